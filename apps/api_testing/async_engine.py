@@ -0,0 +1,162 @@
+"""
+API 请求异步执行引擎
+
+基于 httpx.AsyncClient 的批量执行路径，适用于数据驱动/压测类场景：
+一个 worker 可以同时保持数百个在途请求。请求准备（参数替换、加密、签名、前置脚本）
+和响应处理（断言、后置脚本、临时变量、请求历史）复用同步路径的实现，
+通过 sync_to_async 在线程中执行，保证行为与 execute_api_request 一致。
+
+同步的 execute_api_request 仍是单个请求和测试套件的执行方式；
+接口批量执行（ApiRequestViewSet.batch_execute）通过 run_api_request_batch 使用本引擎，
+API_ASYNC_ENGINE_ENABLED=False 时退回逐个同步执行。
+"""
+import asyncio
+import logging
+import time
+
+import httpx
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+
+from .history_writer import RequestHistoryWriter
+from .http_client import get_http_config
+from .utils import _prepare_api_request, _finalize_api_request
+
+logger = logging.getLogger(__name__)
+
+
+def build_async_client(environment=None, max_connections=None):
+    """根据环境的 http_config 创建 httpx.AsyncClient"""
+    max_connections = max_connections or getattr(settings, 'API_ASYNC_MAX_CONCURRENCY', 100)
+    http_config = get_http_config(environment)
+
+    verify = http_config.get('verify', True)
+    cert = http_config.get('cert')
+    if isinstance(cert, list):
+        cert = tuple(cert)
+
+    keep_alive = http_config.get('keep_alive', getattr(settings, 'API_HTTP_KEEP_ALIVE', True))
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections if keep_alive else 0
+    )
+
+    # 代理：{'http': 'http://proxy:8080', 'https': 'http://proxy:8080'}
+    mounts = None
+    proxies = http_config.get('proxies')
+    if isinstance(proxies, dict):
+        mounts = {
+            f'{scheme}://': httpx.AsyncHTTPTransport(proxy=proxy, verify=verify, cert=cert, limits=limits)
+            for scheme, proxy in proxies.items() if proxy
+        }
+
+    return httpx.AsyncClient(
+        verify=verify,
+        cert=cert,
+        limits=limits,
+        mounts=mounts,
+        timeout=getattr(settings, 'API_HTTP_TIMEOUT', 30),
+        follow_redirects=True
+    )
+
+
+async def execute_api_request_async(api_request, environment, executed_by, client, temp_vars=None,
+                                    history_writer=None):
+    """
+    异步执行单个API请求，返回值与 execute_api_request 相同
+
+    参数:
+        client: httpx.AsyncClient 实例（由调用方管理生命周期，便于多个请求复用连接）
+        temp_vars: TemporaryVariables 实例，用于存储提取的变量
+        history_writer: RequestHistoryWriter 实例，传入时请求历史批量写入
+    """
+    try:
+        prepared = await sync_to_async(_prepare_api_request)(api_request, environment)
+
+        start_time = time.time()
+        response = await client.request(
+            method=api_request.method,
+            url=prepared['url'],
+            headers=prepared['headers'],
+            params=prepared['params'],
+            content=prepared['data'],
+            json=prepared['json']
+        )
+        end_time = time.time()
+        response_time = (end_time - start_time) * 1000
+
+        return await sync_to_async(_finalize_api_request)(
+            api_request, environment, executed_by, prepared, response, response_time,
+            temp_vars, history_writer
+        )
+
+    except Exception as e:
+        import traceback
+        return {
+            'success': False,
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }
+
+
+async def execute_api_requests_async(api_requests, environment, executed_by, concurrency=None):
+    """
+    并发执行一批API请求（同一个请求可以重复出现，用于数据驱动/压测）
+
+    参数:
+        api_requests: ApiRequest 列表
+        concurrency: 最大在途请求数，默认 settings.API_ASYNC_MAX_CONCURRENCY
+
+    返回:
+        与 api_requests 顺序一致的结果列表
+    """
+    concurrency = concurrency or getattr(settings, 'API_ASYNC_MAX_CONCURRENCY', 100)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    logger.info(f"[异步执行] 共 {len(api_requests)} 个请求，最大在途请求数 {concurrency}")
+
+    history_writer = RequestHistoryWriter()
+
+    try:
+        async with build_async_client(environment, concurrency) as client:
+            async def run(api_request):
+                async with semaphore:
+                    return await execute_api_request_async(
+                        api_request, environment, executed_by, client, history_writer=history_writer
+                    )
+
+            return await asyncio.gather(*(run(api_request) for api_request in api_requests))
+    finally:
+        await sync_to_async(history_writer.flush)()
+
+
+def run_api_requests_async(api_requests, environment, executed_by, concurrency=None):
+    """
+    同步入口：并发执行一批API请求
+
+    通过 async_to_sync 运行事件循环，ORM 调用（sync_to_async）回到调用线程执行，
+    在 WSGI 视图、ASGI 下的同步视图和 Celery 任务中都可以直接调用
+    """
+    return async_to_sync(execute_api_requests_async)(api_requests, environment, executed_by, concurrency)
+
+
+def run_api_request_batch(api_requests, environment, executed_by, concurrency=None):
+    """
+    批量执行API请求（数据驱动/压测）
+
+    API_ASYNC_ENGINE_ENABLED 时通过 httpx.AsyncClient 并发发送，否则逐个调用 execute_api_request；
+    两种方式的请求历史都批量写入
+
+    返回:
+        与 api_requests 顺序一致的结果列表
+    """
+    if getattr(settings, 'API_ASYNC_ENGINE_ENABLED', True):
+        return run_api_requests_async(api_requests, environment, executed_by, concurrency)
+
+    from .utils import execute_api_request
+
+    with RequestHistoryWriter() as history_writer:
+        return [
+            execute_api_request(api_request, environment, executed_by, history_writer=history_writer)
+            for api_request in api_requests
+        ]
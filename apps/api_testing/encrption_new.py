@@ -14,13 +14,16 @@ from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
 
+from .key_cache import KeyCache
+
 
 class Encryption:
     """
     加密相关类
     """
 
-    def _load_rsa_key(self, key: Union[str, bytes], is_private: bool = False) -> rsa.RSAPublicKey | rsa.RSAPrivateKey:
+    def _load_rsa_key(self, key: Union[str, bytes], is_private: bool = False,
+                      key_id: Optional[int] = None) -> rsa.RSAPublicKey | rsa.RSAPrivateKey:
         """
         加载RSA密钥
         支持 PEM 格式和纯 Base64 编码格式
@@ -28,10 +31,19 @@ class Encryption:
         Args:
             key: 密钥内容或文件路径
             is_private: 是否为私钥
+            key_id: 签名配置 id（用于密钥缓存）
 
         Returns:
             RSA密钥对象
         """
+        # 密钥文件每次重新读取，其余格式按签名配置 id 与密钥哈希缓存
+        if isinstance(key, str) and os.path.exists(key):
+            return self._parse_rsa_key(key, is_private)
+        kind = 'rsa_private' if is_private else 'rsa_public'
+        return KeyCache.get(kind, key, lambda: self._parse_rsa_key(key, is_private), key_id)
+
+    def _parse_rsa_key(self, key: Union[str, bytes], is_private: bool = False) -> rsa.RSAPublicKey | rsa.RSAPrivateKey:
+        """解析RSA密钥（文件路径、PEM、Base64）"""
         # 如果是文件路径
         if isinstance(key, str) and os.path.exists(key):
             with open(key, 'rb') as f:
@@ -146,7 +158,7 @@ class Encryption:
         return plaintext
 
     def rsa_long_encrypt(self, pub_key: Union[str, bytes], msg: Union[str, bytes], 
-                         length: int = 117) -> bytes:
+                         length: int = 117, key_id: Optional[int] = None) -> bytes:
         """
         RSA长数据加密
         
@@ -157,6 +169,7 @@ class Encryption:
             pub_key: 公钥文件路径或Base64编码的公钥
             msg: 需要加密的消息
             length: 每次加密的最大长度
+            key_id: 签名配置 id（用于密钥缓存）
             
         Returns:
             加密后的数据
@@ -166,7 +179,7 @@ class Encryption:
         if isinstance(msg, str):
             msg = msg.encode('utf-8')
         
-        public_key = self._load_rsa_key(pub_key, is_private=False)
+        public_key = self._load_rsa_key(pub_key, is_private=False, key_id=key_id)
         msg_len = len(msg)
         res = []
         
@@ -0,0 +1,89 @@
+"""
+请求历史批量写入
+
+套件执行期间把每个步骤的 RequestHistory 缓存在内存中，
+达到批量大小或时间间隔后用 bulk_create 一次性写入，套件结束或失败时保证落库。
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .models import RequestHistory
+
+logger = logging.getLogger(__name__)
+
+
+class RequestHistoryWriter:
+    """缓冲的请求历史写入器（线程安全，可在并行执行的工作线程间共享）
+
+    注意：
+    - executed_at 在创建 RequestHistory 对象时取值（请求完成时间），不受写入时机影响
+    - MySQL 的 bulk_create 不回填主键，缓冲写入的请求结果中不包含 history_id
+    """
+
+    def __init__(self, batch_size=None, flush_interval=None, on_flush=None):
+        """
+        Args:
+            batch_size: 缓冲多少条后写入，默认 settings.API_HISTORY_BATCH_SIZE
+            flush_interval: 距上次写入超过多少秒后写入，默认 settings.API_HISTORY_FLUSH_INTERVAL
+            on_flush: 每次写入后的回调 on_flush(count)，用于按批次更新执行进度
+        """
+        self.batch_size = batch_size or getattr(settings, 'API_HISTORY_BATCH_SIZE', 50)
+        self.flush_interval = flush_interval or getattr(settings, 'API_HISTORY_FLUSH_INTERVAL', 5)
+        self.on_flush = on_flush
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.total_written = 0
+
+    def add(self, history):
+        """缓存一条未保存的 RequestHistory，必要时触发写入"""
+        with self._lock:
+            self._buffer.append(history)
+            should_flush = (
+                len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """把缓冲区中的历史记录写入数据库"""
+        with self._lock:
+            pending, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return 0
+
+        try:
+            RequestHistory.objects.bulk_create(pending, batch_size=self.batch_size)
+        except Exception as e:
+            # 批量写入失败时逐条写入，避免一条坏数据导致整批丢失
+            logger.error(f"批量写入请求历史失败，改为逐条写入: {e}")
+            for history in pending:
+                try:
+                    history.save()
+                except Exception as save_error:
+                    logger.error(f"写入请求历史失败: {save_error}")
+
+        with self._lock:
+            self.total_written += len(pending)
+        logger.debug(f"写入请求历史 {len(pending)} 条，累计 {self.total_written} 条")
+
+        if self.on_flush:
+            try:
+                self.on_flush(len(pending))
+            except Exception as e:
+                logger.error(f"更新执行进度失败: {e}")
+
+        return len(pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.flush()
+        return False
@@ -0,0 +1,144 @@
+"""
+API 测试 HTTP 客户端连接池
+
+为 execute_api_request 提供进程级共享的 requests.Session，
+按 (环境, scheme, host) 复用 TCP/TLS 连接，避免套件每个步骤都重新握手。
+"""
+import logging
+import threading
+from collections import OrderedDict
+from http import cookiejar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _RejectAllCookiePolicy(cookiejar.CookiePolicy):
+    """拒绝所有 Cookie 的策略
+
+    Session 在多个套件/用户之间共享，不能把上一个请求的 Set-Cookie 带到下一个请求，
+    保持与原先每次 requests.request() 独立会话一致的行为。
+    """
+    netscape = True
+    rfc2965 = hide_cookie2 = False
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+    def domain_return_ok(self, domain, request):
+        return False
+
+    def path_return_ok(self, path, request):
+        return False
+
+
+def get_http_config(environment):
+    """读取环境级别的 TLS/代理/连接池配置（Environment.http_config）"""
+    config = getattr(environment, 'http_config', None) if environment else None
+    return config if isinstance(config, dict) else {}
+
+
+class HttpClientPool:
+    """进程级 HTTP 连接池
+
+    每个 (环境ID, scheme, host) 对应一个 requests.Session，Session 内部由
+    HTTPAdapter 维护 urllib3 连接池。环境的 http_config 变更后会自动重建对应 Session。
+    """
+
+    _sessions = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _get_setting(name, default):
+        return getattr(settings, name, default)
+
+    @classmethod
+    def _build_session(cls, http_config):
+        """根据全局配置和环境配置创建 Session"""
+        pool_connections = cls._get_setting('API_HTTP_POOL_CONNECTIONS', 10)
+        pool_maxsize = http_config.get('pool_maxsize') or cls._get_setting('API_HTTP_POOL_MAXSIZE', 20)
+        max_retries = cls._get_setting('API_HTTP_MAX_RETRIES', 0)
+
+        session = requests.Session()
+        session.cookies.set_policy(_RejectAllCookiePolicy())
+
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        keep_alive = http_config.get('keep_alive', cls._get_setting('API_HTTP_KEEP_ALIVE', True))
+        if not keep_alive:
+            session.headers['Connection'] = 'close'
+
+        # TLS 校验：verify 可以是布尔值或 CA 证书路径
+        if 'verify' in http_config:
+            session.verify = http_config['verify']
+
+        # 客户端证书：'cert.pem' 或 ['cert.pem', 'key.pem']
+        cert = http_config.get('cert')
+        if cert:
+            session.cert = tuple(cert) if isinstance(cert, list) else cert
+
+        # 代理：{'http': 'http://proxy:8080', 'https': 'http://proxy:8080'}
+        proxies = http_config.get('proxies')
+        if isinstance(proxies, dict):
+            session.proxies.update(proxies)
+
+        return session
+
+    @classmethod
+    def get_session(cls, url, environment=None):
+        """获取指定环境和目标主机对应的 Session"""
+        parts = urlsplit(url)
+        http_config = get_http_config(environment)
+        key = (getattr(environment, 'id', None), parts.scheme.lower(), parts.netloc.lower())
+        fingerprint = repr(sorted(http_config.items()))
+
+        with cls._lock:
+            entry = cls._sessions.get(key)
+            if entry and entry[1] == fingerprint:
+                cls._sessions.move_to_end(key)
+                return entry[0]
+
+            if entry:
+                # 环境配置已变更，关闭旧连接
+                entry[0].close()
+
+            session = cls._build_session(http_config)
+            cls._sessions[key] = (session, fingerprint)
+            cls._sessions.move_to_end(key)
+
+            # 超过主机上限时淘汰最久未使用的 Session
+            max_hosts = cls._get_setting('API_HTTP_POOL_MAX_HOSTS', 100)
+            while len(cls._sessions) > max_hosts:
+                _, (stale_session, _) = cls._sessions.popitem(last=False)
+                stale_session.close()
+
+            logger.debug(f"创建 HTTP 会话: env={key[0]}, host={key[2]}, 当前会话数={len(cls._sessions)}")
+            return session
+
+    @classmethod
+    def request(cls, method, url, environment=None, **kwargs):
+        """通过连接池发送请求，参数与 requests.request 一致"""
+        kwargs.setdefault('timeout', cls._get_setting('API_HTTP_TIMEOUT', 30))
+        session = cls.get_session(url, environment)
+        return session.request(method=method, url=url, **kwargs)
+
+    @classmethod
+    def close_all(cls):
+        """关闭所有 Session 并释放连接"""
+        with cls._lock:
+            for session, _ in cls._sessions.values():
+                session.close()
+            cls._sessions.clear()
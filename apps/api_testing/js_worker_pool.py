@@ -0,0 +1,389 @@
+"""
+Persistent Node.js worker pool for JavaScript pre/post-request scripts.
+
+Each worker is a long-lived ``node`` process that reads one JSON job per line
+on stdin and answers with one framed JSON line on stdout. Workers are reused
+across calls and recycled after a number of calls or when their resident
+memory grows too large.
+
+Scripts are compiled once into a cached ``vm.Script`` but every job runs in a
+fresh ``vm`` context, so globals a script creates are gone by the next job.
+Timers a job started are cleared once it has answered. The in-worker ``vm``
+timeout stops runaway scripts without losing the worker; a call that still
+overruns the timeout on the Python side kills the worker.
+"""
+import atexit
+import json
+import logging
+import queue
+import subprocess
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Responses are prefixed with this marker so that anything a user script
+# writes directly to stdout cannot be mistaken for a protocol frame.
+FRAME_MARKER = '\x1e'
+
+# Seconds to wait beyond the script timeout before killing an unresponsive worker
+WORKER_TIMEOUT_GRACE = 2
+
+WORKER_SOURCE = r"""
+const readline = require('readline');
+const vm = require('vm');
+const https = require('https');
+const http = require('http');
+const url = require('url');
+
+const FRAME_MARKER = '\x1e';
+const MAX_COMPILED = 200;
+const compiled = new Map();
+
+// Fetch polyfill for Node.js
+function fetch(fullUrl, options = {}) {
+    return new Promise((resolve, reject) => {
+        const urlObj = url.parse(fullUrl);
+        const isHttps = urlObj.protocol === 'https:';
+        const client = isHttps ? https : http;
+
+        const requestOptions = {
+            hostname: urlObj.hostname,
+            port: urlObj.port || (isHttps ? 443 : 80),
+            path: urlObj.path,
+            method: options.method || 'GET',
+            headers: options.headers || {},
+            body: options.body ? options.body : undefined
+        };
+
+        const req = client.request(requestOptions, (res) => {
+            let data = '';
+
+            res.on('data', (chunk) => {
+                data += chunk;
+            });
+
+            res.on('end', () => {
+                // Create headers object with get method
+                const headers = {
+                    get: (name) => {
+                        const lowerName = name.toLowerCase();
+                        for (const [key, value] of Object.entries(res.headers)) {
+                            if (key.toLowerCase() === lowerName) {
+                                // Handle set-cookie as array
+                                if (lowerName === 'set-cookie' && Array.isArray(value)) {
+                                    return value[0];
+                                }
+                                return value;
+                            }
+                        }
+                        return null;
+                    },
+                    entries: () => Object.entries(res.headers)
+                };
+
+                resolve({
+                    ok: res.statusCode >= 200 && res.statusCode < 300,
+                    status: res.statusCode,
+                    headers: headers,
+                    json: async () => {
+                        try {
+                            return JSON.parse(data);
+                        } catch (e) {
+                            return null;
+                        }
+                    },
+                    text: async () => data
+                });
+            });
+        });
+
+        req.on('error', (err) => {
+            reject(err);
+        });
+
+        if (options.body) {
+            req.write(options.body);
+        }
+        req.end();
+    });
+}
+
+// Node globals scripts may rely on, exposed in every job context
+const SANDBOX_GLOBALS = {
+    Buffer: Buffer,
+    URL: URL,
+    URLSearchParams: URLSearchParams,
+    TextEncoder: TextEncoder,
+    TextDecoder: TextDecoder
+};
+
+function compile(script) {
+    let compiledScript = compiled.get(script);
+    if (!compiledScript) {
+        // The script runs as a function body, with `context` as a local
+        // variable that it may mutate or reassign. The context is parsed
+        // inside the job's own realm so instanceof checks behave normally.
+        compiledScript = new vm.Script(
+            '(function () {\nvar context = __holder.context = JSON.parse(__contextJson);\n' + script +
+            '\n;__holder.context = context;\n})();',
+            { filename: 'script.js', lineOffset: -2 });
+        compiled.set(script, compiledScript);
+        if (compiled.size > MAX_COMPILED) {
+            compiled.delete(compiled.keys().next().value);
+        }
+    }
+    return compiledScript;
+}
+
+// Timer functions bound to one job, so whatever it leaves pending can be cleared
+function createTimers() {
+    const pending = new Map();
+    const track = (handle, clear) => {
+        pending.set(handle, clear);
+        return handle;
+    };
+    const untrack = (handle, clear) => {
+        pending.delete(handle);
+        clear(handle);
+    };
+    return {
+        api: {
+            setTimeout: (fn, ms, ...args) => {
+                const handle = setTimeout(() => { pending.delete(handle); fn(...args); }, ms);
+                return track(handle, clearTimeout);
+            },
+            clearTimeout: (handle) => untrack(handle, clearTimeout),
+            setInterval: (fn, ms, ...args) => track(setInterval(fn, ms, ...args), clearInterval),
+            clearInterval: (handle) => untrack(handle, clearInterval),
+            setImmediate: (fn, ...args) => {
+                const handle = setImmediate(() => { pending.delete(handle); fn(...args); });
+                return track(handle, clearImmediate);
+            },
+            clearImmediate: (handle) => untrack(handle, clearImmediate)
+        },
+        clearAll: () => {
+            pending.forEach((clear, handle) => clear(handle));
+            pending.clear();
+        }
+    };
+}
+
+function send(message) {
+    message.rss = process.memoryUsage().rss;
+    process.stdout.write(FRAME_MARKER + JSON.stringify(message) + '\n');
+}
+
+function handle(line) {
+    let job;
+    try {
+        job = JSON.parse(line);
+    } catch (e) {
+        return;
+    }
+
+    const output = [];
+    const log = function () {
+        output.push(Array.prototype.slice.call(arguments).join(' '));
+    };
+    const scriptConsole = { log: log, info: log, warn: log, error: log, debug: log };
+    const holder = { context: null };
+    const timers = createTimers();
+    const sandbox = vm.createContext(Object.assign({}, SANDBOX_GLOBALS, timers.api, {
+        console: scriptConsole,
+        require: require,
+        fetch: fetch,
+        __holder: holder,
+        __contextJson: JSON.stringify(job.context === undefined ? null : job.context)
+    }));
+
+    try {
+        compile(job.script).runInContext(sandbox, { timeout: job.timeoutMs });
+        send({ id: job.id, ok: true, modifiedContext: holder.context, output: output.join('\n') });
+    } catch (e) {
+        if (e && e.code === 'ERR_SCRIPT_EXECUTION_TIMEOUT') {
+            send({ id: job.id, ok: false, timedOut: true, error: e.message });
+        } else {
+            send({ id: job.id, ok: false, error: e && e.stack ? e.message + '\n' + e.stack : String(e) });
+        }
+    } finally {
+        timers.clearAll();
+    }
+}
+
+const rl = readline.createInterface({ input: process.stdin });
+rl.on('line', handle);
+rl.on('close', () => process.exit(0));
+"""
+
+
+class _NodeWorker:
+    """A single long-lived node process."""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            ['node', '-e', WORKER_SOURCE],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            bufsize=1
+        )
+        self.calls = 0
+        self.rss = 0
+        self._responses = queue.Queue()
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+
+    def _read_stdout(self):
+        for line in self.process.stdout:
+            if line.startswith(FRAME_MARKER):
+                try:
+                    self._responses.put(json.loads(line[len(FRAME_MARKER):]))
+                except ValueError:
+                    logger.warning(f"Invalid frame from Node.js worker {self.process.pid}: {line[:200]}")
+            else:
+                logger.debug(f"Node.js worker {self.process.pid} stdout: {line.rstrip()[:500]}")
+        # EOF: the worker exited
+        self._responses.put(None)
+
+    def _read_stderr(self):
+        for line in self.process.stderr:
+            logger.debug(f"Node.js worker {self.process.pid} stderr: {line.rstrip()[:500]}")
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def call(self, script_content, context, timeout):
+        """Run one script and return the worker's response dict."""
+        self.calls += 1
+        job_id = self.calls
+        self.process.stdin.write(json.dumps({
+            'id': job_id,
+            'script': script_content,
+            'context': context,
+            'timeoutMs': int(timeout * 1000)
+        }, ensure_ascii=False) + '\n')
+        self.process.stdin.flush()
+
+        # The worker enforces the timeout itself; allow a little slack before
+        # treating it as stuck
+        deadline = time.monotonic() + timeout + WORKER_TIMEOUT_GRACE
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError
+            try:
+                response = self._responses.get(timeout=remaining)
+            except queue.Empty:
+                raise TimeoutError
+            if response is None:
+                raise RuntimeError(f"Node.js worker exited with code {self.process.poll()}")
+            if response.get('id') == job_id:
+                self.rss = response.get('rss', 0)
+                return response
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=1)
+        except Exception:
+            self.process.kill()
+
+
+class NodeWorkerPool:
+    """Process-wide pool of Node.js workers.
+
+    Workers are started lazily up to API_JS_WORKER_POOL_SIZE. A worker is
+    recycled after API_JS_WORKER_MAX_CALLS calls, when its RSS exceeds
+    API_JS_WORKER_MAX_RSS_MB, or when a call fails at the process level.
+    """
+
+    _idle = []
+    _total = 0
+    _condition = threading.Condition()
+
+    @staticmethod
+    def _get_setting(name, default):
+        return getattr(settings, name, default)
+
+    @classmethod
+    def _acquire(cls):
+        with cls._condition:
+            while True:
+                while cls._idle:
+                    worker = cls._idle.pop()
+                    if worker.is_alive():
+                        return worker
+                    cls._total -= 1
+                if cls._total < cls._get_setting('API_JS_WORKER_POOL_SIZE', 2):
+                    cls._total += 1
+                    break
+                cls._condition.wait()
+
+        try:
+            worker = _NodeWorker()
+        except Exception:
+            with cls._condition:
+                cls._total -= 1
+                cls._condition.notify()
+            raise
+        logger.debug(f"Started Node.js worker {worker.process.pid}")
+        return worker
+
+    @classmethod
+    def _release(cls, worker, reusable):
+        max_calls = cls._get_setting('API_JS_WORKER_MAX_CALLS', 500)
+        max_rss = cls._get_setting('API_JS_WORKER_MAX_RSS_MB', 256) * 1024 * 1024
+        if reusable and worker.is_alive() and worker.calls < max_calls and worker.rss < max_rss:
+            with cls._condition:
+                cls._idle.append(worker)
+                cls._condition.notify()
+            return
+
+        logger.debug(f"Recycling Node.js worker {worker.process.pid} "
+                     f"(calls={worker.calls}, rss={worker.rss // (1024 * 1024)}MB)")
+        worker.close()
+        with cls._condition:
+            cls._total -= 1
+            cls._condition.notify()
+
+    @classmethod
+    def execute(cls, script_content, context, timeout=30):
+        """
+        Run a script on a pooled worker.
+
+        Returns the worker response: {'ok', 'modifiedContext', 'output'} or {'ok': False, 'error'}.
+        Raises FileNotFoundError when Node.js is not installed and TimeoutError
+        when the script does not finish within ``timeout`` seconds.
+        """
+        worker = cls._acquire()
+        reusable = False
+        try:
+            response = worker.call(script_content, context, timeout)
+            reusable = True
+        except TimeoutError:
+            # The worker did not answer even after its own vm timeout, drop it
+            worker.process.kill()
+            raise
+        finally:
+            cls._release(worker, reusable)
+
+        if response.get('timedOut'):
+            # Interrupted by the vm timeout; the worker itself is still usable
+            raise TimeoutError
+        return response
+
+    @classmethod
+    def close_all(cls):
+        with cls._condition:
+            idle, cls._idle = cls._idle, []
+            cls._total -= len(idle)
+        for worker in idle:
+            worker.close()
+
+
+atexit.register(NodeWorkerPool.close_all)
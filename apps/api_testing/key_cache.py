@@ -0,0 +1,70 @@
+"""
+签名/加密密钥缓存
+
+解析 PEM 私钥/公钥、创建 SM2 对象的开销较大，签名套件中每个请求都会重复一次。
+这里按 (签名配置 id, 密钥类型, 密钥内容哈希) 缓存解析后的密钥对象（LRU，容量 API_SIGNATURE_KEY_CACHE_SIZE），
+签名配置保存或删除时按 id 失效；密钥内容变化时哈希随之变化，不会命中旧对象。
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class KeyCache:
+    """进程级密钥对象缓存"""
+
+    _entries = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _hash(key_text):
+        if isinstance(key_text, str):
+            key_text = key_text.encode('utf-8')
+        return hashlib.sha256(key_text).hexdigest()
+
+    @classmethod
+    def get(cls, kind, key_text, loader, key_id=None):
+        """
+        获取解析后的密钥对象，未命中时调用 loader() 解析并缓存
+
+        Args:
+            kind: 密钥类型，如 rsa_private / rsa_public / sm2_private
+            key_text: 密钥原文
+            loader: 无参函数，返回解析后的密钥对象；解析失败时抛出的异常原样向上传递
+            key_id: 签名配置 id，用于配置更新时失效
+        """
+        cache_key = (key_id, kind, cls._hash(key_text))
+
+        with cls._lock:
+            key_obj = cls._entries.get(cache_key)
+            if key_obj is not None:
+                cls._entries.move_to_end(cache_key)
+                return key_obj
+
+        key_obj = loader()
+
+        with cls._lock:
+            if key_id is not None:
+                # 同一配置的同类密钥已更换，丢弃旧对象
+                for stale_key in [k for k in cls._entries if k[:2] == (key_id, kind)]:
+                    del cls._entries[stale_key]
+            cls._entries[cache_key] = key_obj
+            max_size = getattr(settings, 'API_SIGNATURE_KEY_CACHE_SIZE', 64)
+            while len(cls._entries) > max_size:
+                cls._entries.popitem(last=False)
+
+        return key_obj
+
+    @classmethod
+    def invalidate(cls, key_id):
+        """丢弃某个签名配置的全部密钥对象"""
+        with cls._lock:
+            for stale_key in [k for k in cls._entries if k[0] == key_id]:
+                del cls._entries[stale_key]
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
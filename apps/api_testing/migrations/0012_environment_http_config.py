@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_testing", "0011_add_runtime_input_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="environment",
+            name="http_config",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text='连接池/TLS/代理配置，如 {"verify": false, "cert": "client.pem", "proxies": {"https": "http://proxy:8080"}, "keep_alive": true, "pool_maxsize": 20}',
+                verbose_name="HTTP客户端配置",
+            ),
+        ),
+    ]
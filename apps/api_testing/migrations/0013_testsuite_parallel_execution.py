@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_testing", "0012_environment_http_config"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testsuite",
+            name="parallel_execution",
+            field=models.BooleanField(
+                default=False, help_text="按临时变量依赖关系并行执行互不依赖的请求", verbose_name="并行执行"
+            ),
+        ),
+        migrations.AddField(
+            model_name="testsuite",
+            name="max_workers",
+            field=models.IntegerField(default=4, help_text="并行执行时的工作线程数", verbose_name="最大并发数"),
+        ),
+    ]
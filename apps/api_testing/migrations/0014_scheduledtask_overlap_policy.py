@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_testing", "0013_testsuite_parallel_execution"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scheduledtask",
+            name="overlap_policy",
+            field=models.CharField(
+                choices=[("SKIP", "跳过"), ("QUEUE", "排队"), ("ALLOW", "允许并发")],
+                default="SKIP",
+                max_length=10,
+                verbose_name="重叠执行策略",
+            ),
+        ),
+        migrations.AddField(
+            model_name="scheduledtask",
+            name="max_concurrent_runs",
+            field=models.PositiveIntegerField(
+                default=1, help_text="重叠执行策略为允许并发时生效", verbose_name="最大并发运行数"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_testing", "0014_scheduledtask_overlap_policy"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="taskexecutionlog",
+            name="celery_task_id",
+            field=models.CharField(blank=True, default="", max_length=255, verbose_name="Celery任务ID"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_testing", "0015_taskexecutionlog_celery_task_id"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="requesthistory",
+            name="executed_at",
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name="执行时间"),
+        ),
+    ]
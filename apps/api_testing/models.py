@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 import json
 
+from .key_cache import KeyCache
+
 User = get_user_model()
 
 
@@ -143,6 +145,9 @@ class Environment(models.Model):
     name = models.CharField(max_length=200, verbose_name='环境名称')
     scope = models.CharField(max_length=10, choices=SCOPE_CHOICES, verbose_name='作用域')
     variables = models.JSONField(default=dict, verbose_name='环境变量')
+    http_config = models.JSONField(default=dict, blank=True, verbose_name='HTTP客户端配置',
+                                   help_text='连接池/TLS/代理配置，如 {"verify": false, "cert": "client.pem", '
+                                             '"proxies": {"https": "http://proxy:8080"}, "keep_alive": true, "pool_maxsize": 20}')
     is_active = models.BooleanField(default=False, verbose_name='是否激活')
     project = models.ForeignKey(ApiProject, on_delete=models.CASCADE, null=True, blank=True,
                                 related_name='environments', verbose_name='关联项目')
@@ -171,7 +176,7 @@ class RequestHistory(models.Model):
     error_message = models.TextField(blank=True, verbose_name='错误信息')
     assertions_results = models.JSONField(null=True, blank=True, verbose_name='断言结果')
     executed_by = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='执行者')
-    executed_at = models.DateTimeField(auto_now_add=True, verbose_name='执行时间')
+    executed_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name='执行时间')
 
     class Meta:
         db_table = 'api_request_histories'
@@ -192,6 +197,9 @@ class TestSuite(models.Model):
     requests = models.ManyToManyField(ApiRequest, through='TestSuiteRequest', verbose_name='包含请求')
     environment = models.ForeignKey(Environment, on_delete=models.SET_NULL, null=True, blank=True,
                                     verbose_name='执行环境')
+    parallel_execution = models.BooleanField(default=False, verbose_name='并行执行',
+                                             help_text='按临时变量依赖关系并行执行互不依赖的请求')
+    max_workers = models.IntegerField(default=4, verbose_name='最大并发数', help_text='并行执行时的工作线程数')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_test_suites',
                                    verbose_name='创建者')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
@@ -300,6 +308,12 @@ class ScheduledTask(models.Model):
         ('ONCE', '单次执行'),
     ]
 
+    OVERLAP_POLICY_CHOICES = [
+        ('SKIP', '跳过'),
+        ('QUEUE', '排队'),
+        ('ALLOW', '允许并发'),
+    ]
+
     name = models.CharField(max_length=200, verbose_name='任务名称')
     description = models.TextField(blank=True, verbose_name='任务描述')
     task_type = models.CharField(max_length=20, choices=TASK_TYPE_CHOICES, verbose_name='任务类型')
@@ -322,6 +336,13 @@ class ScheduledTask(models.Model):
     environment = models.ForeignKey('Environment', on_delete=models.SET_NULL, null=True, blank=True,
                                     verbose_name='执行环境')
 
+    # 重叠执行策略：上一次执行尚未结束时，SKIP 跳过本次，QUEUE 等上一次结束后再执行，
+    # ALLOW 最多允许 max_concurrent_runs 次同时运行（已满时跳过本次）
+    overlap_policy = models.CharField(max_length=10, choices=OVERLAP_POLICY_CHOICES, default='SKIP',
+                                      verbose_name='重叠执行策略')
+    max_concurrent_runs = models.PositiveIntegerField(default=1, verbose_name='最大并发运行数',
+                                                      help_text='重叠执行策略为允许并发时生效')
+
     # 状态管理
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='ACTIVE', verbose_name='任务状态')
     last_run_time = models.DateTimeField(null=True, blank=True, verbose_name='最后运行时间')
@@ -415,6 +436,7 @@ class TaskExecutionLog(models.Model):
     result = models.JSONField(default=dict, verbose_name='执行结果')
     error_message = models.TextField(blank=True, verbose_name='错误信息')
     executed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, verbose_name='执行者')
+    celery_task_id = models.CharField(max_length=255, blank=True, default='', verbose_name='Celery任务ID')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
 
     class Meta:
@@ -754,4 +776,12 @@ class SignatureConfig(models.Model):
                 is_default=True
             ).exclude(id=self.id).update(is_default=False)
         super().save(*args, **kwargs)
+        # 密钥可能已修改，丢弃缓存的密钥对象
+        KeyCache.invalidate(self.id)
+
+    def delete(self, *args, **kwargs):
+        config_id = self.id
+        result = super().delete(*args, **kwargs)
+        KeyCache.invalidate(config_id)
+        return result
 
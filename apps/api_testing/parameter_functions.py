@@ -9,6 +9,11 @@ import string
 import re
 from datetime import datetime, timedelta
 
+from apps.core.template_engine import TemplateScope, render_text, render_data
+
+# ${...} 中的参数函数调用：get_id、get_id()、get_id(12)
+FUNCTION_CALL_PATTERN = re.compile(r'(\w+)(?:\(([^)]*)\))?')
+
 
 class ParameterFunctions:
     """参数化函数类"""
@@ -201,6 +206,19 @@ def execute_parameter_function(func_str):
         return func_str
 
 
+class ParameterFunctionScope(TemplateScope):
+    """只解析参数化函数的模板作用域"""
+
+    def resolve_expr(self, expression):
+        # 跳过 ${Enc(...)} 格式，这是加密标记，不是参数函数
+        if expression.startswith('Enc(') or not FUNCTION_CALL_PATTERN.fullmatch(expression):
+            return None
+        return str(execute_parameter_function(expression))
+
+
+PARAMETER_FUNCTION_SCOPE = ParameterFunctionScope()
+
+
 def replace_parameters(text, context=None):
     """
     替换文本中的参数化函数
@@ -212,23 +230,7 @@ def replace_parameters(text, context=None):
     Returns:
         替换后的文本
     """
-    import re
-
-    if not isinstance(text, str):
-        return text
-
-    # 匹配 ${function_name(...)} 格式（支持带冒号和不带冒号）
-    # 但要排除 ${Enc(...)} 格式，因为这是加密标记，不是参数函数
-    pattern = r'\$\{\w+(?:\([^)]*\))?\}'
-
-    def replacer(match):
-        func_str = match.group(0)
-        # 跳过 ${Enc(...)} 格式，这是加密标记，不是参数函数
-        if func_str.startswith('${Enc('):
-            return func_str  # 保持原样，不处理
-        return execute_parameter_function(f':{func_str}')
-
-    return re.sub(pattern, replacer, text)
+    return render_text(text, PARAMETER_FUNCTION_SCOPE)
 
 
 def replace_parameters_in_dict(data, context=None):
@@ -242,14 +244,7 @@ def replace_parameters_in_dict(data, context=None):
     Returns:
         替换后的数据
     """
-    if isinstance(data, dict):
-        return {k: replace_parameters_in_dict(v, context) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [replace_parameters_in_dict(item, context) for item in data]
-    elif isinstance(data, str):
-        return replace_parameters(data, context)
-    else:
-        return data
+    return render_data(data, PARAMETER_FUNCTION_SCOPE)
 
 
 def extract_enc_placeholders(data):
@@ -0,0 +1,310 @@
+"""
+API 请求模板
+
+把 ApiRequest 的 URL、请求头、参数、请求体编译为模板树，按请求版本（id + updated_at）缓存，
+执行时针对环境变量、临时变量、用户输入和参数函数单次渲染，
+替代原先对每个字段依次执行环境变量、参数函数、临时变量多轮替换的做法。
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from apps.core.template_engine import TemplateScope, DataTemplate, compile_template
+from .parameter_functions import (
+    FUNCTION_CALL_PATTERN, PARAMETER_FUNCTION_SCOPE, ParameterFunctions, execute_parameter_function
+)
+
+
+def get_variable_value(value):
+    """取环境变量的实际值（支持 {'currentValue': ..., 'initialValue': ...} 格式）"""
+    if isinstance(value, dict):
+        return str(value.get('currentValue', '') or value.get('initialValue', ''))
+    return str(value) if value is not None else ''
+
+
+def _available_variables(temp_vars):
+    return list(temp_vars.to_dict().keys()) if temp_vars else '无'
+
+
+def resolve_temp_placeholder(placeholder, temp_vars, user_inputs=None):
+    """
+    在临时变量和用户输入中查找 ${xxx} 占位符的值
+
+    支持 ${get}、${get.xxx}、${user_input.xxx} 以及 ${response.json.data.xxx} 等完整路径
+
+    Returns:
+        (found, value)
+    """
+    # 处理 ${get} 格式（默认获取 response.json.data）
+    if placeholder == 'get':
+        var_name = 'response.json.data'
+    # 处理 ${user_input.xxx} 格式
+    elif placeholder.startswith('user_input.'):
+        field_name = placeholder[11:]  # 去掉 'user_input.' 前缀
+        if user_inputs and field_name in user_inputs:
+            print(f"[临时变量] 从用户输入获取: {field_name} = {user_inputs[field_name]}")
+            return True, user_inputs[field_name]
+        print(f"[临时变量] 警告: 用户输入变量 {field_name} 未找到")
+        print(f"[临时变量] 可用用户输入: {list(user_inputs.keys()) if user_inputs else '无'}")
+        return False, None
+    # 处理 ${get.xxx} 格式
+    elif placeholder.startswith('get.'):
+        field_name = placeholder[4:]  # 去掉 'get.' 前缀
+        # 优先从用户输入中获取
+        if user_inputs and field_name in user_inputs:
+            print(f"[临时变量] 从用户输入获取: {field_name} = {user_inputs[field_name]}")
+            return True, user_inputs[field_name]
+
+        # 1. 先从 request.body 中查找
+        request_body_value = temp_vars.get('request.body')
+        if isinstance(request_body_value, dict) and field_name in request_body_value:
+            value = request_body_value[field_name]
+            print(f"[临时变量] 从request.body获取: {field_name} = {value}")
+            return True, value
+
+        # 2. 从 request.body.xxx 格式的临时变量中查找
+        request_body_field_key = f'request.body.{field_name}'
+        request_body_field_value = temp_vars.get(request_body_field_key)
+        if request_body_field_value is not None:
+            print(f"[临时变量] 从临时变量 {request_body_field_key} 获取: {field_name} = {request_body_field_value}")
+            return True, request_body_field_value
+
+        # 3. 从 response.json.data 中获取指定字段（根级别优先，其次 data 子字段）
+        base_value = temp_vars.get('response.json.data')
+        if isinstance(base_value, dict):
+            if field_name in base_value:
+                value = base_value[field_name]
+                print(f"[临时变量] 从response.json.data根级别获取: {field_name} = {value}")
+                return True, value
+            if isinstance(base_value.get('data'), dict):
+                if field_name in base_value['data']:
+                    value = base_value['data'][field_name]
+                    print(f"[临时变量] 从response.json.data.data获取: {field_name} = {value}")
+                    return True, value
+                print(f"[临时变量] 警告: 字段 {field_name} 在response.json.data.data中未找到")
+                print(f"[临时变量] data子字段可用字段: {list(base_value['data'].keys())}")
+                return False, None
+            print(f"[临时变量] 警告: 字段 {field_name} 在response.json.data中未找到")
+            print(f"[临时变量] 根级别可用字段: {list(base_value.keys())}")
+            return False, None
+
+        print(f"[临时变量] 警告: 所有位置都未找到字段 {field_name}")
+        print(f"[临时变量] 可用临时变量: {_available_variables(temp_vars)}")
+        return False, None
+    # 处理 ${response.json.data.xxx} 等完整路径格式
+    else:
+        var_name = placeholder
+
+    # 优先从用户输入中获取
+    if user_inputs and var_name in user_inputs:
+        print(f"[临时变量] 从用户输入获取: {var_name} = {user_inputs[var_name]}")
+        return True, user_inputs[var_name]
+
+    # 其次从临时变量中获取
+    value = temp_vars.get(var_name)
+    if value is not None:
+        print(f"[临时变量] 从临时变量获取: {var_name} = {value}")
+        return True, value
+
+    # 如果是路径格式（如 response.json.data.txn_seqno），从 response.json.data 开始解析嵌套访问
+    if '.' in var_name:
+        current = temp_vars.get('response.json.data')
+        if current is not None:
+            parts = var_name.split('.')
+            # 跳过 response.json.data 前缀
+            if parts[:3] == ['response', 'json', 'data']:
+                parts = parts[3:]
+
+            for part in parts:
+                if isinstance(current, dict) and part in current:
+                    current = current[part]
+                else:
+                    print(f"[临时变量] 警告: 变量路径 {var_name} 在 {part} 处未找到")
+                    if isinstance(current, dict):
+                        print(f"[临时变量] 当前层级可用字段: {list(current.keys())}")
+                    return False, None
+            print(f"[临时变量] 从路径获取: {var_name} = {current}")
+            return True, current
+
+    print(f"[临时变量] 警告: 变量 {var_name} 未找到")
+    return False, None
+
+
+def resolve_bare_variable(var_name, temp_vars, user_inputs=None):
+    """
+    查找裸变量（没有 ${} 包裹、以 get_ 开头的变量，如 get_token）的值
+
+    Returns:
+        (found, value)
+    """
+    # 优先从用户输入中获取
+    if user_inputs and var_name in user_inputs:
+        print(f"[临时变量] 从用户输入获取裸变量: {var_name} = {user_inputs[var_name]}")
+        return True, user_inputs[var_name]
+
+    # 从临时变量中直接获取
+    value = temp_vars.get(var_name)
+    if value is not None:
+        print(f"[临时变量] 从临时变量获取裸变量: {var_name} = {value}")
+        return True, value
+
+    # 尝试从 request.body.xxx 格式的临时变量中查找
+    request_body_field_key = f'request.body.{var_name}'
+    request_body_field_value = temp_vars.get(request_body_field_key)
+    if request_body_field_value is not None:
+        print(f"[临时变量] 从临时变量 {request_body_field_key} 获取裸变量: {var_name} = {request_body_field_value}")
+        return True, request_body_field_value
+
+    # 尝试从 request.body 字典中获取
+    request_body_value = temp_vars.get('request.body')
+    if isinstance(request_body_value, dict) and var_name in request_body_value:
+        value = request_body_value[var_name]
+        print(f"[临时变量] 从request.body获取裸变量: {var_name} = {value}")
+        return True, value
+
+    # 尝试从 response.json.data 中获取
+    base_value = temp_vars.get('response.json.data')
+    if isinstance(base_value, dict):
+        if var_name in base_value:
+            value = base_value[var_name]
+            print(f"[临时变量] 从response.json.data获取裸变量: {var_name} = {value}")
+            return True, value
+        if isinstance(base_value.get('data'), dict) and var_name in base_value['data']:
+            value = base_value['data'][var_name]
+            print(f"[临时变量] 从response.json.data.data获取裸变量: {var_name} = {value}")
+            return True, value
+
+    print(f"[临时变量] 警告: 裸变量 {var_name} 未找到")
+    print(f"[临时变量] 可用临时变量: {_available_variables(temp_vars)}")
+    return False, None
+
+
+class RequestScope(TemplateScope):
+    """
+    API 请求渲染作用域
+
+    解析顺序：
+    - {{name}}：环境变量；变量值中的参数函数会一并解析
+    - ${Enc(...)}：加密标记，保留原文交由加密步骤处理
+    - ${name()} / ${name(args)}：参数函数；套件执行时 ${name()} 生成的值写入同名临时变量
+    - ${xxx}：用户输入 / 临时变量，找不到且形如参数函数时按参数函数处理
+    - get_xxx：裸变量，仅在提供了临时变量时解析
+    """
+
+    def __init__(self, variables=None, temp_vars=None, user_inputs=None, functions=True):
+        """
+        Args:
+            variables: 环境变量字典
+            temp_vars: TemporaryVariables 实例，套件执行时提供
+            user_inputs: 用户输入的参数字典
+            functions: 是否解析参数函数
+        """
+        self.variables = variables or {}
+        self.temp_vars = temp_vars
+        self.user_inputs = user_inputs
+        self.functions = functions
+
+    def resolve_env(self, name):
+        if name not in self.variables:
+            return None
+        value = get_variable_value(self.variables[name])
+        if self.functions and '${' in value:
+            value = compile_template(value).render(PARAMETER_FUNCTION_SCOPE)
+        return value
+
+    def resolve_expr(self, expression):
+        if expression.startswith('Enc('):
+            return None
+
+        call = FUNCTION_CALL_PATTERN.fullmatch(expression)
+        has_args = call is not None and call.group(2) is not None
+
+        if self.temp_vars is not None and not has_args:
+            found, value = resolve_temp_placeholder(expression, self.temp_vars, self.user_inputs)
+            if found:
+                return str(value)
+
+        if not (self.functions and call):
+            return None
+
+        value = execute_parameter_function(expression)
+        func_name = call.group(1)
+        if self.temp_vars is not None and call.group(2) == '' and hasattr(ParameterFunctions, func_name):
+            # 将生成的值存储到临时变量，供后续请求引用
+            self.temp_vars.set(func_name, value)
+            print(f"[临时变量] 参数函数 {func_name} 生成值: {value}，已存储到临时变量")
+        return str(value)
+
+    def resolve_bare(self, name):
+        if self.temp_vars is None:
+            return None
+        found, value = resolve_bare_variable(name, self.temp_vars, self.user_inputs)
+        return str(value) if found else None
+
+
+class RequestTemplate:
+    """编译后的 ApiRequest（URL、请求头、参数、请求体）"""
+
+    def __init__(self, api_request):
+        self.url = compile_template(api_request.url or '')
+
+        self.headers = []
+        if isinstance(api_request.headers, list):
+            for header_item in api_request.headers:
+                if header_item.get('enabled', True) and header_item.get('key'):
+                    self.headers.append(
+                        (header_item['key'], compile_template(str(header_item.get('value', ''))))
+                    )
+        else:
+            for key, value in (api_request.headers or {}).items():
+                self.headers.append((key, compile_template(str(value))))
+
+        self.params = [
+            (key, compile_template(str(value))) for key, value in (api_request.params or {}).items()
+        ]
+
+        body_data = api_request.body.get('data') if isinstance(api_request.body, dict) else None
+        self.body = DataTemplate(body_data) if body_data is not None else None
+
+    def render_url(self, scope):
+        return self.url.render(scope)
+
+    def render_headers(self, scope):
+        return {key: template.render(scope) for key, template in self.headers}
+
+    def render_params(self, scope):
+        return {key: template.render(scope) for key, template in self.params}
+
+    def render_body(self, scope):
+        """渲染请求体的 data 部分，未配置时返回 None"""
+        return self.body.render(scope) if self.body is not None else None
+
+
+_templates = OrderedDict()
+_templates_lock = threading.Lock()
+
+
+def get_request_template(api_request):
+    """获取请求的编译模板，按 (id, updated_at) 缓存，请求保存后自动失效"""
+    version = getattr(api_request, 'updated_at', None)
+    if version is None or api_request.pk is None:
+        return RequestTemplate(api_request)
+
+    key = api_request.pk
+    with _templates_lock:
+        entry = _templates.get(key)
+        if entry and entry[0] == version:
+            _templates.move_to_end(key)
+            return entry[1]
+
+    template = RequestTemplate(api_request)
+
+    with _templates_lock:
+        _templates[key] = (version, template)
+        _templates.move_to_end(key)
+        max_size = getattr(settings, 'API_TEMPLATE_CACHE_SIZE', 500)
+        while len(_templates) > max_size:
+            _templates.popitem(last=False)
+
+    return template
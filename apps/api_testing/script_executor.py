@@ -2,13 +2,18 @@
 Script execution utility for pre-request and post-request scripts.
 Supports both Python and JavaScript execution.
 """
+import hashlib
 import json
 import logging
-import sys
+import threading
+import time
 import traceback
+from collections import OrderedDict
 from typing import Dict, Any, Optional
 from io import StringIO
 
+from django.conf import settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,6 +26,7 @@ class ScriptExecutionResult:
         self.error = None
         self.modified_context = {}
         self.logs = []
+        self.duration_ms = 0.0
     
     def to_dict(self):
         return {
@@ -28,10 +34,92 @@ class ScriptExecutionResult:
             'output': self.output,
             'error': self.error,
             'modified_context': self.modified_context,
-            'logs': self.logs
+            'logs': self.logs,
+            'duration_ms': self.duration_ms
         }
 
 
+class CompiledScriptCache:
+    """Process-wide cache of compiled Python scripts.
+
+    Scripts are compiled to code objects once and keyed by script id and
+    content hash, so an edited script is recompiled on its next run. Scripts
+    without an id (ad-hoc content) are keyed by content hash only. Per-script
+    execution timings are recorded alongside and evicted together with the
+    code object, so both stay bounded by API_SCRIPT_CACHE_SIZE.
+    """
+
+    _code_objects = OrderedDict()
+    _timings = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _content_hash(script_content: str) -> str:
+        return hashlib.sha1(script_content.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def get_code(cls, script_content: str, script_id: Optional[int] = None):
+        """Return (cache_key, code object) for the script, compiling it on first use."""
+        content_hash = cls._content_hash(script_content)
+        key = script_id if script_id is not None else content_hash
+
+        with cls._lock:
+            entry = cls._code_objects.get(key)
+            if entry and entry[0] == content_hash:
+                cls._code_objects.move_to_end(key)
+                return key, entry[1]
+
+        start = time.perf_counter()
+        filename = f'<script {script_id}>' if script_id is not None else '<script>'
+        code = compile(script_content, filename, 'exec')
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        with cls._lock:
+            cls._code_objects[key] = (content_hash, code)
+            cls._code_objects.move_to_end(key)
+            max_size = getattr(settings, 'API_SCRIPT_CACHE_SIZE', 256)
+            while len(cls._code_objects) > max_size:
+                evicted_key, _ = cls._code_objects.popitem(last=False)
+                cls._timings.pop(evicted_key, None)
+            cls._timings.setdefault(key, cls._new_timing())['compile_ms'] = compile_ms
+
+        logger.debug(f"Compiled script {key} in {compile_ms:.2f}ms")
+        return key, code
+
+    @staticmethod
+    def _new_timing():
+        return {'calls': 0, 'failures': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'compile_ms': 0.0}
+
+    @classmethod
+    def record(cls, key, duration_ms: float, success: bool):
+        """Record one execution of a cached script."""
+        with cls._lock:
+            if key not in cls._code_objects:
+                # Evicted while running; don't resurrect an unbounded entry
+                return
+            timing = cls._timings.setdefault(key, cls._new_timing())
+            timing['calls'] += 1
+            timing['total_ms'] += duration_ms
+            timing['max_ms'] = max(timing['max_ms'], duration_ms)
+            if not success:
+                timing['failures'] += 1
+
+    @classmethod
+    def get_timings(cls) -> Dict[Any, Dict[str, float]]:
+        """Return per-script timings: calls, failures, total/avg/max execution ms, compile ms."""
+        with cls._lock:
+            return {
+                key: {**timing, 'avg_ms': timing['total_ms'] / timing['calls'] if timing['calls'] else 0.0}
+                for key, timing in cls._timings.items()
+            }
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._code_objects.clear()
+            cls._timings.clear()
+
+
 class ScriptExecutor:
     """Script executor for Python and JavaScript scripts"""
     
@@ -39,25 +127,36 @@ class ScriptExecutor:
     def execute_python_script(
         script_content: str,
         context: Dict[str, Any],
-        timeout: int = 30
+        timeout: int = 30,
+        script_id: Optional[int] = None
     ) -> ScriptExecutionResult:
         """
         Execute a Python script with given context.
         
+        The script is compiled once and reused from CompiledScriptCache.
+        Output is captured per call through the sandboxed ``print``, so
+        concurrent executions never touch the process-global ``sys.stdout``.
+        
         Args:
             script_content: The Python script code to execute
             context: Dictionary containing variables available to script
             timeout: Maximum execution time in seconds
+            script_id: Id of the Script model, used as the compile cache key
             
         Returns:
             ScriptExecutionResult object containing execution results
         """
         result = ScriptExecutionResult()
+        captured_output = StringIO()
+        
+        def script_print(*args, sep=' ', end='\n', **kwargs):
+            result.logs.append(' '.join(str(a) for a in args))
+            captured_output.write(sep.join(str(a) for a in args) + end)
         
         # Create a safe execution environment
         safe_locals = {
             '__builtins__': {
-                'print': lambda *args, **kwargs: result.logs.append(' '.join(str(a) for a in args)),
+                'print': script_print,
                 'len': len,
                 'str': str,
                 'int': int,
@@ -81,13 +180,14 @@ class ScriptExecutor:
         # Add context variables
         safe_locals.update(context)
         
-        # Capture stdout
-        old_stdout = sys.stdout
-        sys.stdout = captured_output = StringIO()
+        cache_key = None
+        start = time.perf_counter()
         
         try:
+            cache_key, code = CompiledScriptCache.get_code(script_content, script_id)
+            
             # Execute script
-            exec(script_content, safe_locals, safe_locals)
+            exec(code, safe_locals, safe_locals)
             
             # Capture any output
             result.output = captured_output.getvalue()
@@ -115,7 +215,9 @@ class ScriptExecutor:
             logger.error(f"Python script execution error: {e}\n{traceback.format_exc()}")
             
         finally:
-            sys.stdout = old_stdout
+            result.duration_ms = (time.perf_counter() - start) * 1000
+            if cache_key is not None:
+                CompiledScriptCache.record(cache_key, result.duration_ms, result.success)
         
         return result
     
@@ -128,6 +230,9 @@ class ScriptExecutor:
         """
         Execute a JavaScript script with given context.
         
+        Scripts run on the persistent Node.js worker pool; PyExecJS is used
+        only when Node.js is not installed.
+        
         Args:
             script_content: The JavaScript code to execute
             context: Dictionary containing variables available to script
@@ -136,22 +241,51 @@ class ScriptExecutor:
         Returns:
             ScriptExecutionResult object containing execution results
         """
+        from .js_worker_pool import NodeWorkerPool
+
+        result = ScriptExecutionResult()
+        start = time.perf_counter()
+        
+        try:
+            response = NodeWorkerPool.execute(script_content, context, timeout)
+        except FileNotFoundError:
+            return ScriptExecutor._execute_javascript_via_execjs(script_content, context, timeout)
+        except TimeoutError:
+            result.success = False
+            result.error = f"Script execution timed out after {timeout} seconds"
+        except Exception as e:
+            result.success = False
+            result.error = f"JavaScript execution failed: {str(e)}"
+            logger.error(f"JavaScript execution error: {e}\n{traceback.format_exc()}")
+        else:
+            if response.get('ok'):
+                result.output = response.get('output', '')
+                result.modified_context = response.get('modifiedContext', {})
+                result.success = True
+            else:
+                result.success = False
+                result.error = f"Script error: {response.get('error', '')}"
+        
+        result.duration_ms = (time.perf_counter() - start) * 1000
+        return result
+    
+    @staticmethod
+    def _execute_javascript_via_execjs(
+        script_content: str,
+        context: Dict[str, Any],
+        timeout: int = 30
+    ) -> ScriptExecutionResult:
+        """
+        Fallback method: Execute JavaScript using PyExecJS when Node.js is not installed.
+        """
         result = ScriptExecutionResult()
         
-        # Try to use PyExecJS if available
         try:
             import execjs
         except ImportError:
-            # Fallback: try using Node.js directly via subprocess
-            try:
-                return ScriptExecutor._execute_javascript_via_subprocess(
-                    script_content, context, timeout
-                )
-            except Exception as e:
-                result.success = False
-                result.error = f"JavaScript execution not available. Please install execjs or ensure Node.js is installed: {str(e)}"
-                logger.error(f"JavaScript execution error: {e}")
-                return result
+            result.success = False
+            result.error = "JavaScript execution not available. Please install Node.js or execjs package."
+            return result
         
         try:
             # Prepare context for JavaScript
@@ -195,186 +329,13 @@ class ScriptExecutor:
         
         return result
     
-    @staticmethod
-    def _execute_javascript_via_subprocess(
-        script_content: str,
-        context: Dict[str, Any],
-        timeout: int = 30
-    ) -> ScriptExecutionResult:
-        """
-        Fallback method: Execute JavaScript using Node.js via subprocess.
-        """
-        import subprocess
-        result = ScriptExecutionResult()
-        
-        # Prepare context for JavaScript
-        js_context = json.dumps(context, ensure_ascii=False)
-
-        # Wrap script to expose context and capture output
-        # Add fetch polyfill for Node.js environment
-        wrapped_script = f"""
-            // Fetch polyfill for Node.js
-            const https = require('https');
-            const http = require('http');
-            const url = require('url');
-
-            function fetch(fullUrl, options = {{}}) {{
-                return new Promise((resolve, reject) => {{
-                    const urlObj = url.parse(fullUrl);
-                    const isHttps = urlObj.protocol === 'https:';
-                    const client = isHttps ? https : http;
-
-                    const requestOptions = {{
-                        hostname: urlObj.hostname,
-                        port: urlObj.port || (isHttps ? 443 : 80),
-                        path: urlObj.path,
-                        method: options.method || 'GET',
-                        headers: options.headers || {{}},
-                        body: options.body ? options.body : undefined
-                    }};
-
-                    const req = client.request(requestOptions, (res) => {{
-                        let data = '';
-
-                        res.on('data', (chunk) => {{
-                            data += chunk;
-                        }});
-
-                        res.on('end', () => {{
-                            // Create headers object with get method
-                            const headers = {{
-                                get: (name) => {{
-                                    const lowerName = name.toLowerCase();
-                                    for (const [key, value] of Object.entries(res.headers)) {{
-                                        if (key.toLowerCase() === lowerName) {{
-                                            // Handle set-cookie as array
-                                            if (lowerName === 'set-cookie') {{
-                                                if (Array.isArray(value)) {{
-                                                    return value[0];
-                                                }}
-                                                return value;
-                                            }}
-                                            return value;
-                                        }}
-                                    }}
-                                    return null;
-                                }},
-                                entries: () => Object.entries(res.headers)
-                            }};
-
-                            resolve({{
-                                ok: res.statusCode >= 200 && res.statusCode < 300,
-                                status: res.statusCode,
-                                headers: headers,
-                                json: async () => {{
-                                    try {{
-                                        return JSON.parse(data);
-                                    }} catch (e) {{
-                                        return null;
-                                    }}
-                                }},
-                                text: async () => data
-                            }});
-                        }});
-                    }});
-
-                    req.on('error', (err) => {{
-                        reject(err);
-                    }});
-
-                    if (options.body) {{
-                        req.write(options.body);
-                    }}
-                    req.end();
-                }});
-            }}
-
-            (function() {{
-                var context = {js_context};
-                var output = [];
-
-                // Override console.log to capture output
-                console.log = function() {{
-                    output.push(Array.prototype.slice.call(arguments).join(' '));
-                }};
-
-                // Execute user script
-                try {{
-                    {script_content}
-                    console.log('---RESULT-BEGIN---');
-                    console.log(JSON.stringify({{
-                        modifiedContext: context,
-                        output: output.join('\\n')
-                    }}));
-                }} catch (e) {{
-                    console.log('---ERROR-BEGIN---');
-                    console.log(e.message);
-                    console.log(e.stack);
-                }}
-            }})();
-        """
-        
-        try:
-            # Run Node.js with script
-            process = subprocess.run(
-                ['node'],
-                input=wrapped_script,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                encoding='utf-8'
-            )
-
-            output = process.stdout
-            stderr = process.stderr
-
-            logger.debug(f"Node.js returncode: {process.returncode}")
-            logger.debug(f"Node.js stdout: {output[:500]}")
-            if stderr:
-                logger.debug(f"Node.js stderr: {stderr[:500]}")
-
-            if process.returncode == 0 and '---RESULT-BEGIN---' in output:
-                # Extract result
-                _, result_part = output.split('---RESULT-BEGIN---', 1)
-                js_result = json.loads(result_part.strip())
-
-                result.output = js_result.get('output', '')
-                result.modified_context = js_result.get('modifiedContext', {})
-                result.success = True
-            elif '---ERROR-BEGIN---' in output:
-                # Extract error
-                _, error_part = output.split('---ERROR-BEGIN---', 1)
-                result.success = False
-                result.error = f"Script error: {error_part.strip()}"
-            else:
-                result.success = False
-                error_details = []
-                if process.returncode != 0:
-                    error_details.append(f"Return code: {process.returncode}")
-                if output:
-                    error_details.append(f"Output: {output[:500]}")
-                if stderr:
-                    error_details.append(f"Stderr: {stderr[:500]}")
-                result.error = f"Unknown error: {'; '.join(error_details) if error_details else 'No output'}"
-                
-        except FileNotFoundError:
-            result.success = False
-            result.error = "Node.js not found. Please install Node.js or execjs package."
-        except subprocess.TimeoutExpired:
-            result.success = False
-            result.error = f"Script execution timed out after {timeout} seconds"
-        except Exception as e:
-            result.success = False
-            result.error = f"JavaScript execution failed: {str(e)}"
-        
-        return result
-    
     @staticmethod
     def execute_script(
         script_type: str,
         script_content: str,
         context: Dict[str, Any],
-        timeout: int = 30
+        timeout: int = 30,
+        script_id: Optional[int] = None
     ) -> ScriptExecutionResult:
         """
         Execute a script based on its type.
@@ -384,6 +345,7 @@ class ScriptExecutor:
             script_content: The script code to execute
             context: Dictionary containing variables available to script
             timeout: Maximum execution time in seconds
+            script_id: Id of the Script model, used to cache compiled scripts
             
         Returns:
             ScriptExecutionResult object containing execution results
@@ -391,7 +353,7 @@ class ScriptExecutor:
         script_type = script_type.lower()
         
         if script_type == 'python':
-            return ScriptExecutor.execute_python_script(script_content, context, timeout)
+            return ScriptExecutor.execute_python_script(script_content, context, timeout, script_id)
         elif script_type == 'javascript':
             return ScriptExecutor.execute_javascript_script(script_content, context, timeout)
         else:
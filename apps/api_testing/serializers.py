@@ -134,7 +134,7 @@ class EnvironmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Environment
         fields = [
-            'id', 'name', 'scope', 'project', 'project_name', 'variables', 'is_active',
+            'id', 'name', 'scope', 'project', 'project_name', 'variables', 'http_config', 'is_active',
             'created_by', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at', 'created_by', 'project_name']
@@ -185,6 +185,7 @@ class TestSuiteSerializer(serializers.ModelSerializer):
         model = TestSuite
         fields = [
             'id', 'name', 'description', 'project', 'environment',
+            'parallel_execution', 'max_workers',
             'suite_requests', 'created_by', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
@@ -232,7 +233,7 @@ class ScheduledTaskSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'task_type', 'trigger_type',
             'cron_expression', 'interval_seconds', 'execute_at',
             'test_suite', 'test_suite_name', 'api_request', 'api_request_name',
-            'environment', 'environment_name', 'status', 'last_run_time',
+            'environment', 'environment_name', 'overlap_policy', 'max_concurrent_runs', 'status', 'last_run_time',
             'next_run_time', 'total_runs', 'successful_runs', 'failed_runs',
             'last_result', 'error_message', 'notify_on_success', 'notify_on_failure',
             'notify_emails', 'notification_type', 'notification_type_display', 'notification_type_input', 'created_by', 'created_by_name',
@@ -434,11 +435,11 @@ class TaskExecutionLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = TaskExecutionLog
         fields = [
-            'id', 'task', 'task_name', 'status', 'start_time', 'end_time',
+            'id', 'task', 'task_name', 'status', 'start_time', 'end_time', 'duration',
             'result', 'error_message', 'executed_by', 'executed_by_name',
-            'created_at'
+            'celery_task_id', 'created_at'
         ]
-        read_only_fields = ['created_at']
+        read_only_fields = ['duration', 'celery_task_id', 'created_at']
 
 
 # ================ 通知管理序列化器 ================
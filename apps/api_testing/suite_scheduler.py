@@ -0,0 +1,184 @@
+"""
+测试套件并行调度
+
+分析套件中每个请求生产/消费的临时变量，构建依赖 DAG，
+在有界线程池中并发执行互不依赖的请求，结果仍按套件 order 顺序返回。
+"""
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from django.db import connection
+
+# ${get_id()} 形式的参数函数调用，执行时会把生成的值写入同名临时变量
+PRODUCER_PATTERN = re.compile(r'\$\{(\w+)\(\)\}')
+# ${xxx} 占位符
+PLACEHOLDER_PATTERN = re.compile(r'\$\{([^}]+)\}')
+# get_xxx 裸变量（不含函数调用）
+BARE_VARIABLE_PATTERN = re.compile(r'(?<!\$\{)\bget_\w+\b(?!\s*\()')
+
+# 引用"上一个请求的请求/响应上下文"的占位符前缀
+CONTEXT_PREFIXES = ('get.', 'response.', 'request.')
+
+
+def _request_texts(api_request):
+    """返回请求中可能包含占位符的文本（URL、请求头、参数、请求体）"""
+    return [
+        api_request.url or '',
+        json.dumps(api_request.headers or {}, ensure_ascii=False),
+        json.dumps(api_request.params or {}, ensure_ascii=False),
+        json.dumps(api_request.body or {}, ensure_ascii=False),
+    ]
+
+
+def analyze_request_variables(api_request):
+    """
+    分析单个请求生产和消费的临时变量
+
+    Returns:
+        (produces, consumes, uses_context)
+        produces: 该请求通过参数函数写入的变量名集合
+        consumes: 该请求按名称读取的变量名集合
+        uses_context: 是否引用上一个请求的请求/响应数据（${get}、${get.xxx}、${response.xxx} 等）
+    """
+    produces = set()
+    consumes = set()
+    uses_context = False
+
+    for text in _request_texts(api_request):
+        produces.update(PRODUCER_PATTERN.findall(text))
+
+        for placeholder in PLACEHOLDER_PATTERN.findall(text):
+            if '(' in placeholder or placeholder.startswith('user_input.'):
+                continue
+            if placeholder == 'get' or placeholder.startswith(CONTEXT_PREFIXES) or '.' in placeholder:
+                uses_context = True
+            else:
+                consumes.add(placeholder)
+
+        consumes.update(BARE_VARIABLE_PATTERN.findall(text))
+
+    return produces, consumes - produces, uses_context
+
+
+def build_dependency_graph(suite_requests):
+    """
+    构建请求依赖图
+
+    - 引用上一个请求上下文的请求，依赖于紧邻的前一个请求（串行语义下 response.json.data 总是最近一次响应）
+    - 按名称读取变量的请求，依赖于此前最近一次生产该变量的请求；
+      若没有任何请求生产该变量，按裸变量的回退查找逻辑视为依赖上一个请求上下文
+
+    Returns:
+        列表，第 i 项为第 i 个请求所依赖的请求下标集合
+    """
+    dependencies = []
+    last_producer = {}
+
+    for index, suite_request in enumerate(suite_requests):
+        produces, consumes, uses_context = analyze_request_variables(suite_request.request)
+        deps = set()
+
+        for name in consumes:
+            if name in last_producer:
+                deps.add(last_producer[name])
+            else:
+                uses_context = True
+
+        if uses_context and index > 0:
+            deps.add(index - 1)
+
+        dependencies.append(deps)
+        for name in produces:
+            last_producer[name] = index
+
+    return dependencies
+
+
+def _ancestors(index, dependencies, cache):
+    """计算请求的全部祖先（传递依赖）"""
+    if index not in cache:
+        result = set()
+        for dep in dependencies[index]:
+            result.add(dep)
+            result.update(_ancestors(dep, dependencies, cache))
+        cache[index] = result
+    return cache[index]
+
+
+def run_suite_requests_parallel(suite_requests, execute_one, base_variables=None, max_workers=4, merge=None):
+    """
+    按依赖关系并行执行套件请求
+
+    每个请求使用独立的临时变量作用域：由其全部祖先请求写入的变量按套件顺序合并而成，
+    因此并发执行的无关请求不会互相覆盖 response.json.data 等上下文变量。
+
+    Args:
+        suite_requests: 已按 order 排序的 TestSuiteRequest 列表
+        execute_one: 回调 execute_one(suite_request, variables) -> (passed, result, variables_after)
+        base_variables: 初始临时变量字典
+        max_workers: 最大并发数
+        merge: 可选，merge(target, delta) 把一个请求写入的变量合并到 target，默认 target.update(delta)
+
+    Returns:
+        (outcomes, merged_variables)
+        outcomes: 与 suite_requests 顺序一致的 (passed, result) 列表
+        merged_variables: 按套件顺序合并后的全部临时变量
+    """
+    base_variables = dict(base_variables or {})
+    merge = merge or dict.update
+    dependencies = build_dependency_graph(suite_requests)
+    ancestor_cache = {}
+    total = len(suite_requests)
+
+    outcomes = [None] * total
+    deltas = [None] * total
+    pending = set(range(total))
+    completed = set()
+
+    print(f"[并行执行] 共 {total} 个请求，最大并发数 {max_workers}")
+    for index, deps in enumerate(dependencies):
+        if deps:
+            print(f"[并行执行] 请求 {suite_requests[index].request.name} 依赖: {sorted(deps)}")
+
+    def build_scope(index):
+        scope = dict(base_variables)
+        for ancestor in sorted(_ancestors(index, dependencies, ancestor_cache)):
+            merge(scope, deltas[ancestor])
+        return scope
+
+    def run(index, scope):
+        try:
+            wait_time = suite_requests[index].wait_time or 0
+            if wait_time > 0:
+                time.sleep(wait_time)
+            passed, result, variables_after = execute_one(suite_requests[index], scope)
+            # 只记录本请求新写入或修改的变量
+            delta = {k: v for k, v in variables_after.items() if k not in scope or scope[k] is not v}
+            return passed, result, delta
+        finally:
+            # 工作线程各自持有数据库连接，执行结束后释放
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        running = {}
+        while pending or running:
+            ready = [i for i in sorted(pending) if dependencies[i] <= completed]
+            for index in ready:
+                pending.discard(index)
+                running[executor.submit(run, index, build_scope(index))] = index
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                passed, result, delta = future.result()
+                outcomes[index] = (passed, result)
+                deltas[index] = delta
+                completed.add(index)
+
+    merged_variables = dict(base_variables)
+    for delta in deltas:
+        merge(merged_variables, delta or {})
+
+    return outcomes, merged_variables
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+API 测试 Celery 任务
+
+定时任务（调度器触发和“立即运行”）由独立的 API 执行 worker 运行，不再占用 Web 进程或调度器进程的后台线程：
+- 测试套件投递到 API_SUITE_QUEUE，单个请求投递到 API_REQUEST_QUEUE，耗时的套件不会阻塞单个请求
+- 同一项目同时执行的定时任务不超过 API_PROJECT_MAX_CONCURRENCY 个（按运行中的执行日志计数，跨 worker 生效），
+  超出时任务延迟重新入队
+- 执行状态、开始/结束时间、结果和 Celery 任务 ID 记录在 TaskExecutionLog 中
+
+启动示例：
+    celery -A backend worker -Q api_suite,api_request -c 8 -n api@%h
+
+API_EXECUTION_BACKEND=thread 时不经过 Celery，仍在当前进程的后台线程中执行（本地开发）。
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from celery import shared_task
+from celery.exceptions import Retry
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def api_queue(task):
+    """定时任务对应的 Celery 队列"""
+    if task.task_type == 'TEST_SUITE':
+        return getattr(settings, 'API_SUITE_QUEUE', 'api_suite')
+    return getattr(settings, 'API_REQUEST_QUEUE', 'api_request')
+
+
+def dispatch_scheduled_task(execution_log, lease_id=None):
+    """
+    异步执行定时任务：celery 模式投递到 API 执行队列，thread 模式在当前进程的后台线程中执行
+
+    Args:
+        execution_log: 以 PENDING 状态创建的 TaskExecutionLog
+        lease_id: 可选，调度器的执行租约 ID，执行结束后释放
+    """
+    from .models import TaskExecutionLog
+
+    if getattr(settings, 'API_EXECUTION_BACKEND', 'celery') == 'celery':
+        result = execute_api_scheduled_task.apply_async(
+            args=[execution_log.id], kwargs={'lease_id': lease_id}, queue=api_queue(execution_log.task)
+        )
+        TaskExecutionLog.objects.filter(id=execution_log.id).update(celery_task_id=result.id)
+        execution_log.celery_task_id = result.id
+        return result
+
+    thread = threading.Thread(
+        target=execute_api_scheduled_task, args=(execution_log.id,), kwargs={'lease_id': lease_id}, daemon=True
+    )
+    thread.start()
+    return None
+
+
+def _project_id(task):
+    if task.task_type == 'TEST_SUITE':
+        return task.test_suite.project_id if task.test_suite else None
+    return task.api_request.collection.project_id if task.api_request else None
+
+
+def _start_execution(execution_log, limit, celery_task_id=None):
+    """
+    在项目并发上限内把执行日志标记为运行中
+
+    Returns:
+        True 已开始执行；False 项目并发已满；None 执行日志已不是待执行状态（重复投递或已取消）
+    """
+    from .models import ApiProject, TaskExecutionLog
+
+    now = timezone.now()
+    project_id = _project_id(execution_log.task)
+    with transaction.atomic():
+        if limit and project_id:
+            # 锁住项目行，同一项目的并发检查在多个 worker 之间串行
+            ApiProject.objects.select_for_update().filter(id=project_id).first()
+            cutoff = now - timedelta(seconds=getattr(settings, 'API_TASK_RUN_TIMEOUT', 3600))
+            running = TaskExecutionLog.objects.filter(
+                status='RUNNING', start_time__gte=cutoff
+            ).filter(
+                Q(task__test_suite__project_id=project_id) | Q(task__api_request__collection__project_id=project_id)
+            ).count()
+            if running >= limit:
+                return False
+
+        fields = {'status': 'RUNNING', 'start_time': now}
+        if celery_task_id:
+            fields['celery_task_id'] = celery_task_id
+        started = TaskExecutionLog.objects.filter(id=execution_log.id, status='PENDING').update(**fields)
+    if not started:
+        return None
+    for name, value in fields.items():
+        setattr(execution_log, name, value)
+    return True
+
+
+@shared_task(bind=True, max_retries=None)
+def execute_api_scheduled_task(self, execution_log_id, lease_id=None):
+    """
+    执行API定时任务
+
+    Args:
+        execution_log_id: TaskExecutionLog 的 ID（以 PENDING 状态创建）
+        lease_id: 可选，调度器的执行租约 ID，执行结束后释放
+    """
+    from apps.core.task_lease import release_lease
+    from .models import TaskExecutionLog
+
+    execution_log = TaskExecutionLog.objects.select_related(
+        'task__test_suite', 'task__api_request__collection', 'task__environment', 'task__created_by'
+    ).filter(id=execution_log_id).first()
+    if execution_log is None:
+        logger.error(f"[API定时任务] 执行日志不存在: {execution_log_id}")
+        if lease_id:
+            release_lease(lease_id)
+        return None
+
+    # 直接调用（thread 模式）时不限制项目并发
+    limit = 0 if self.request.called_directly else getattr(settings, 'API_PROJECT_MAX_CONCURRENCY', 4)
+    started = _start_execution(execution_log, limit, self.request.id)
+    if started is False:
+        logger.info(f"[API定时任务] 项目并发已满，任务 {execution_log.task.name} 稍后重试")
+        try:
+            raise self.retry(countdown=getattr(settings, 'API_TASK_RETRY_DELAY', 10))
+        except Retry:
+            raise
+        except Exception as e:
+            # 无法重新入队（超过重试次数、投递失败），执行日志不会再被执行
+            logger.error(f"[API定时任务] 任务 {execution_log.task.name} 重新入队失败: {str(e)}")
+            TaskExecutionLog.objects.filter(id=execution_log_id, status='PENDING').update(
+                status='FAILED', end_time=timezone.now(), error_message=f'项目并发已满，重新入队失败: {str(e)}'
+            )
+            if lease_id:
+                release_lease(lease_id)
+            raise
+
+    try:
+        if started is None:
+            logger.warning(f"[API定时任务] 执行日志 {execution_log_id} 不是待执行状态，跳过")
+            return None
+        return _run_scheduled_task(execution_log)
+    finally:
+        if lease_id:
+            release_lease(lease_id)
+
+
+def _run_scheduled_task(execution_log):
+    from .utils import execute_api_request, execute_test_suite_with_runtime_input
+    from .views import ScheduledTaskViewSet
+
+    task = execution_log.task
+    try:
+        if task.task_type == 'TEST_SUITE':
+            result = execute_test_suite_with_runtime_input(task.test_suite, task.environment, task.created_by)
+            if result.get('need_user_input'):
+                raise RuntimeError(f"套件中的接口 {result.get('current_request_name')} 需要运行时输入，定时任务无法执行")
+            if result.get('error'):
+                raise RuntimeError(result['error'])
+        elif task.task_type == 'API_REQUEST':
+            result = execute_api_request(task.api_request, task.environment, task.created_by)
+        else:
+            raise ValueError(f"未知的任务类型: {task.task_type}")
+
+        # 更新执行结果
+        execution_log.status = 'COMPLETED'
+        execution_log.end_time = timezone.now()
+        execution_log.result = result
+        execution_log.save()
+
+        # 更新任务统计
+        task.update_run_stats(success=True)
+        task.last_result = result
+        task.save()
+        success = True
+
+    except Exception as e:
+        logger.error(f"[API定时任务] {task.name} 执行失败: {str(e)}", exc_info=True)
+
+        # 记录执行失败
+        execution_log.status = 'FAILED'
+        execution_log.end_time = timezone.now()
+        execution_log.error_message = str(e)
+        execution_log.save()
+
+        # 更新任务统计
+        task.update_run_stats(success=False)
+        task.error_message = str(e)
+        task.save()
+        success = False
+
+    # 发送通知（是否发送由任务的通知设置决定）
+    ScheduledTaskViewSet()._send_notification(task, execution_log, success=success)
+    return {'status': execution_log.status, 'execution_log_id': execution_log.id}
@@ -0,0 +1,68 @@
+from django.test import SimpleTestCase
+
+from .utils import TemporaryVariables, merge_scope_variables
+
+
+class TemporaryVariablesTests(SimpleTestCase):
+    """临时变量数据源：之前步骤写入的路径一直可读，暂停保存时只保留仍能读到的值"""
+
+    def _run_steps(self, temp_vars, count):
+        for step in range(count):
+            temp_vars.set_from_request_data(
+                {'body': {'step': step}},
+                {'status_code': 200, 'json': {'code': 0, 'data': {'step': step, 'items': [step]}}}
+            )
+
+    def test_value_from_earlier_step_still_resolves(self):
+        temp_vars = TemporaryVariables()
+        temp_vars.set_from_request_data(
+            {'body': {'username': 'alice'}},
+            {'status_code': 200, 'json': {'code': 0, 'data': {'token': 'T1'}}}
+        )
+        self._run_steps(temp_vars, 5)
+
+        self.assertEqual(temp_vars.get('response.json.data.token'), 'T1')
+        self.assertEqual(temp_vars.get('request.body.username'), 'alice')
+        self.assertEqual(temp_vars.replace_in_text('${get.response.json.data.token}'), 'T1')
+        self.assertEqual(temp_vars.get('response.json.data.step'), 4)
+        self.assertEqual(temp_vars.get('response.json.data'), {'step': 4, 'items': [4]})
+
+    def test_paused_payload_keeps_only_reachable_values(self):
+        temp_vars = TemporaryVariables()
+        temp_vars.set_from_request_data({}, {'json': {'code': 0, 'data': {'token': 'T1', 'step': -1}}})
+        self._run_steps(temp_vars, 5)
+
+        paused = temp_vars.to_dict()
+        self.assertEqual(
+            list(paused['__source__|response.json']),
+            [{'code': 0, 'data': {'step': 4, 'items': [4]}}, {'data': {'token': 'T1'}}]
+        )
+
+        restored = TemporaryVariables()
+        restored.set_from_dict(paused)
+        for key in ('response.json.data.token', 'response.json.data.step', 'response.json.data.items[0]',
+                    'request.body.step', 'response.status_code'):
+            self.assertEqual(restored.get(key), temp_vars.get(key), key)
+
+    def test_parallel_scopes_keep_sibling_sources(self):
+        base = TemporaryVariables()
+        base.add_source('response.json', {'data': {'token': 'T1'}})
+        variables = base.to_dict()
+
+        scopes = []
+        for name in ('a', 'b'):
+            scope = TemporaryVariables()
+            scope.variables = dict(variables)
+            scope.add_source('response.json', {'data': {name: name}})
+            scopes.append(scope.variables)
+
+        merged = dict(variables)
+        for scope in scopes:
+            merge_scope_variables(merged, {k: v for k, v in scope.items() if variables.get(k) is not v})
+        result = TemporaryVariables()
+        result.variables = merged
+
+        self.assertEqual(result.get('response.json.data.a'), 'a')
+        self.assertEqual(result.get('response.json.data.b'), 'b')
+        self.assertEqual(result.get('response.json.data.token'), 'T1')
+        self.assertEqual(result.get('response.json.data'), {'b': 'b'})
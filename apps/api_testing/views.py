@@ -390,6 +390,76 @@ class ApiRequestViewSet(viewsets.ModelViewSet):
 
             return Response(RequestHistorySerializer(history).data, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'], url_path='batch-execute')
+    def batch_execute(self, request):
+        """
+        批量执行API请求（数据驱动/压测）
+
+        request_ids 中的接口按顺序各执行 repeat 次，最多 concurrency 个请求同时在途；
+        API_ASYNC_ENGINE_ENABLED 时通过异步引擎并发发送，否则逐个同步执行
+        """
+        from .async_engine import run_api_request_batch
+
+        try:
+            request_ids = [int(rid) for rid in request.data.get('request_ids') or []]
+            repeat = max(int(request.data.get('repeat') or 1), 1)
+            concurrency = int(request.data.get('concurrency') or 0) or None
+        except (TypeError, ValueError):
+            return Response({'error': '参数格式错误'}, status=status.HTTP_400_BAD_REQUEST)
+
+        requests_by_id = {r.id: r for r in self.get_queryset().filter(id__in=request_ids)}
+        api_requests = [requests_by_id[rid] for rid in request_ids if rid in requests_by_id] * repeat
+        if not api_requests:
+            return Response({'error': '请选择要执行的接口'}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_requests = getattr(settings, 'API_BATCH_MAX_REQUESTS', 1000)
+        if len(api_requests) > max_requests:
+            return Response({'error': f'单次最多执行 {max_requests} 个请求'}, status=status.HTTP_400_BAD_REQUEST)
+
+        environment = None
+        environment_id = request.data.get('environment_id')
+        if environment_id:
+            try:
+                environment = Environment.objects.get(id=environment_id)
+            except Environment.DoesNotExist:
+                return Response({'error': '环境不存在'}, status=status.HTTP_400_BAD_REQUEST)
+
+        start_time = time.time()
+        results = run_api_request_batch(api_requests, environment, request.user, concurrency=concurrency)
+        duration = (time.time() - start_time) * 1000
+
+        items = []
+        for api_request, result in zip(api_requests, results):
+            assertions_results = result.get('assertions_results') or []
+            items.append({
+                'request_id': api_request.id,
+                'request_name': api_request.name,
+                'success': bool(result.get('success')) and all(r.get('passed', False) for r in assertions_results),
+                'status_code': result.get('status_code'),
+                'response_time': result.get('response_time'),
+                'error': result.get('error'),
+            })
+
+        response_times = [item['response_time'] for item in items if item['response_time'] is not None]
+        passed = sum(1 for item in items if item['success'])
+
+        log_operation(
+            operation_type='execute',
+            resource_type='request',
+            resource_id=api_requests[0].id,
+            resource_name=f'批量执行 {len(api_requests)} 个请求',
+            user=request.user
+        )
+
+        return Response({
+            'total': len(items),
+            'passed': passed,
+            'failed': len(items) - passed,
+            'duration': duration,
+            'avg_response_time': sum(response_times) / len(response_times) if response_times else None,
+            'results': items,
+        })
+
     @action(detail=False, methods=['post'], url_path='reorder')
     def reorder(self, request):
         """
@@ -1308,9 +1378,9 @@ class ScheduledTaskViewSet(viewsets.ModelViewSet):
             )
             logger.info(f"创建执行日志: {execution_log.id}")
             
-            # 异步执行任务
-            logger.info("调用 _execute_task_async 方法")
-            self._execute_task_async(task, execution_log)
+            # 投递到 API 执行队列
+            from .tasks import dispatch_scheduled_task
+            dispatch_scheduled_task(execution_log)
             
             logger.info("任务开始执行")
             return Response(
@@ -1386,141 +1456,6 @@ class ScheduledTaskViewSet(viewsets.ModelViewSet):
         serializer = TaskExecutionLogSerializer(logs, many=True)
         return Response(serializer.data)
     
-    def _execute_task_async(self, task, execution_log):
-        """异步执行任务"""
-        import threading
-        from datetime import datetime
-        
-        # 添加测试日志
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info("=== _execute_task_async 方法被调用 ===")
-        
-        def execute():
-            try:
-                # 更新执行状态
-                execution_log.status = 'RUNNING'
-                execution_log.start_time = timezone.now()
-                execution_log.save()
-                
-                # 执行任务
-                if task.task_type == 'TEST_SUITE':
-                    result = self._execute_test_suite(task)
-                elif task.task_type == 'API_REQUEST':
-                    result = self._execute_api_request(task)
-                else:
-                    raise ValueError(f"未知的任务类型: {task.task_type}")
-                
-                # 更新执行结果
-                execution_log.status = 'COMPLETED'
-                execution_log.end_time = timezone.now()
-                execution_log.result = result
-                execution_log.save()
-                
-                # 更新任务统计
-                task.update_run_stats(success=True)
-                task.last_result = result
-                task.save()
-                
-                logger.info("=== 开始检查发送成功通知 ===")
-                # 发送通知（如果配置了）
-                # 检查任务是否有通知设置
-                notification_setting = None
-                if hasattr(task, 'notification_settings'):
-                    try:
-                        notification_setting = task.notification_settings.first()
-                        logger.info(f"获取到通知设置: {notification_setting}")
-                        if notification_setting:
-                            logger.info(f"通知设置详情 - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 成功通知: {notification_setting.notify_on_success}")
-                        else:
-                            logger.info("没有找到通知设置")
-                    except Exception as e:
-                        logger.error(f"获取任务通知设置时出错: {e}")
-                        import traceback
-                        traceback.print_exc()
-                else:
-                    logger.info("任务没有notification_settings属性")
-                
-                if notification_setting and notification_setting.is_enabled:
-                    logger.info("通知设置已启用，准备发送成功通知")
-                    if notification_setting.notify_on_success:
-                        logger.info("调用 _send_notification 方法发送成功通知")
-                        self._send_notification(task, execution_log, success=True)
-                    else:
-                        logger.info("通知设置中未启用成功通知")
-                else:
-                    logger.info("通知设置未启用或不存在，跳过成功通知")
-                logger.info("=== 结束检查发送成功通知 ===")
-                
-            except Exception as e:
-                # 记录执行失败
-                execution_log.status = 'FAILED'
-                execution_log.end_time = timezone.now()
-                execution_log.error_message = str(e)
-                execution_log.save()
-                
-                # 更新任务统计
-                task.update_run_stats(success=False)
-                task.error_message = str(e)
-                task.save()
-                
-                logger.info("=== 开始检查发送失败通知 ===")
-                # 发送失败通知（如果配置了）
-                # 检查任务是否有通知设置
-                notification_setting = None
-                if hasattr(task, 'notification_settings'):
-                    try:
-                        notification_setting = task.notification_settings.first()
-                        logger.info(f"获取到通知设置（失败情况）: {notification_setting}")
-                        if notification_setting:
-                            logger.info(f"通知设置详情（失败情况） - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 失败通知: {notification_setting.notify_on_failure}")
-                        else:
-                            logger.info("没有找到通知设置（失败情况）")
-                    except Exception as e:
-                        logger.error(f"获取任务通知设置时出错（失败情况）: {e}")
-                        import traceback
-                        traceback.print_exc()
-                else:
-                    logger.info("任务没有notification_settings属性（失败情况）")
-                
-                if notification_setting and notification_setting.is_enabled:
-                    logger.info("通知设置已启用，准备发送失败通知")
-                    if notification_setting.notify_on_failure:
-                        logger.info("调用 _send_notification 方法发送失败通知")
-                        self._send_notification(task, execution_log, success=False)
-                    else:
-                        logger.info("通知设置中未启用失败通知")
-                else:
-                    logger.info("通知设置未启用或不存在，跳过失败通知")
-                logger.info("=== 结束检查发送失败通知 ===")
-        
-        # 在新线程中执行
-        thread = threading.Thread(target=execute)
-        thread.daemon = True
-        thread.start()
-    
-    def _execute_test_suite(self, task):
-        """执行测试套件"""
-        from .utils import execute_test_suite
-        
-        result = execute_test_suite(
-            task.test_suite, 
-            task.environment, 
-            task.created_by
-        )
-        return result
-    
-    def _execute_api_request(self, task):
-        """执行API请求"""
-        from .utils import execute_api_request
-        
-        result = execute_api_request(
-            task.api_request, 
-            task.environment, 
-            task.created_by
-        )
-        return result
-    
     def _send_notification(self, task, execution_log, success=True):
         """发送通知邮件"""
         try:
@@ -2134,7 +2069,8 @@ class SignatureConfigViewSet(viewsets.ModelViewSet):
                 extra_params=test_params,
                 rsa_private_key=config.rsa_private_key if config.rsa_private_key else None,
                 sm2_private_key=config.sm2_private_key if config.sm2_private_key else None,
-                sm2_mode=config.sm2_mode if config.sm2_mode else 'C1C2C3'
+                sm2_mode=config.sm2_mode if config.sm2_mode else 'C1C2C3',
+                key_id=config.id
             )
             return Response({
                 'signature': signature,
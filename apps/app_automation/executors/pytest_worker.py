@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+常驻 pytest 执行进程
+
+每个用例单独启动 python -m pytest 时，都要重新启动解释器、初始化 Django、导入 airtest 并连接设备。
+这里为每台设备保留一个常驻子进程（APP_PYTEST_WORKER_ENABLED）：
+- 子进程启动时完成 Django 初始化和测试依赖的导入，设备连接在用例之间保持（AirtestBase.persistent）
+- 父进程通过子进程的标准输入逐行发送用例任务（JSON：pytest 参数 + APP_* 环境变量），
+  子进程在进程内调用 pytest.main 执行，输出原样写回标准输出，结束时输出一行 JOB_DONE_MARKER 和退出码
+- allure 结果目录等参数与单独启动 pytest 时完全相同
+- 子进程执行 APP_PYTEST_WORKER_MAX_JOBS 个用例后、空闲超过 APP_PYTEST_WORKER_IDLE_TIMEOUT 秒后，
+  或 pytest 出现内部错误、子进程意外退出时重新启动
+
+子进程入口：python -m apps.app_automation.executors.pytest_worker
+"""
+import atexit
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+JOB_DONE_MARKER = '@@testhub-pytest-worker:done@@'
+
+# 每个用例任务传递的环境变量，执行下一个用例前清除上一个用例的值
+JOB_ENV_KEYS = ('APP_TEST_CASE_ID', 'APP_DEVICE_ID', 'APP_PACKAGE_NAME', 'APP_EXECUTION_ID', 'APP_USERNAME')
+
+# pytest 退出码：0 全部通过，1 有用例失败，5 没有收集到用例；其余为中断或内部错误，子进程状态不可信
+HEALTHY_EXIT_CODES = (0, 1, 5)
+
+
+class WorkerCrashed(RuntimeError):
+    """常驻执行进程在用例执行过程中退出"""
+
+
+class PytestWorker:
+    """单台设备的常驻 pytest 子进程"""
+
+    def __init__(self, device_id: str, base_path: str, env: dict):
+        self.device_id = device_id
+        self.jobs = 0
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+        self.process = subprocess.Popen(
+            [sys.executable, '-u', '-m', 'apps.app_automation.executors.pytest_worker'],
+            cwd=base_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding='utf-8',
+            errors='ignore',
+            bufsize=1,
+            env=env
+        )
+        logger.info(f"启动常驻 pytest 执行进程: 设备 {device_id}, PID {self.process.pid}")
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, args, job_env: dict, on_line) -> int:
+        """
+        执行一个用例任务
+
+        Args:
+            args: pytest 参数
+            job_env: 本次用例的 APP_* 环境变量
+            on_line: 每行输出的回调
+
+        Returns:
+            pytest 退出码
+
+        Raises:
+            WorkerCrashed: 子进程在执行过程中退出
+        """
+        with self.lock:
+            try:
+                self.process.stdin.write(json.dumps({'args': args, 'env': job_env}) + '\n')
+                self.process.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                raise WorkerCrashed(f"常驻 pytest 执行进程已退出: {e}")
+
+            for line in self.process.stdout:
+                line = line.rstrip('\n')
+                if line.startswith(JOB_DONE_MARKER):
+                    self.jobs += 1
+                    self.last_used = time.monotonic()
+                    return json.loads(line[len(JOB_DONE_MARKER):])['exit_code']
+                on_line(line)
+
+            raise WorkerCrashed(f"常驻 pytest 执行进程意外退出，退出码: {self.process.wait()}")
+
+    def close(self):
+        """结束子进程：关闭标准输入让其自行退出，超时后强制结束"""
+        try:
+            if self.process.stdin:
+                self.process.stdin.close()
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        except Exception as e:
+            logger.warning(f"关闭常驻 pytest 执行进程失败: {e}")
+        logger.info(f"常驻 pytest 执行进程已退出: 设备 {self.device_id}")
+
+    def kill(self):
+        """立即结束子进程（停止执行）"""
+        try:
+            self.process.kill()
+            self.process.wait(timeout=5)
+        except Exception as e:
+            logger.warning(f"结束常驻 pytest 执行进程失败: {e}")
+
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def get_worker(device_id: str, base_path: str, env: dict) -> PytestWorker:
+    """获取设备对应的常驻执行进程，不存在、已退出或已达到最大执行次数时重新启动"""
+    from django.conf import settings
+
+    max_jobs = getattr(settings, 'APP_PYTEST_WORKER_MAX_JOBS', 200)
+    idle_timeout = getattr(settings, 'APP_PYTEST_WORKER_IDLE_TIMEOUT', 900)
+
+    with _workers_lock:
+        now = time.monotonic()
+        for key, worker in list(_workers.items()):
+            if key != device_id and not worker.lock.locked() and idle_timeout and now - worker.last_used > idle_timeout:
+                del _workers[key]
+                worker.close()
+
+        worker = _workers.get(device_id)
+        if worker is not None and (not worker.alive() or (max_jobs and worker.jobs >= max_jobs)):
+            del _workers[device_id]
+            worker.close()
+            worker = None
+
+        if worker is None:
+            worker = PytestWorker(device_id, base_path, env)
+            _workers[device_id] = worker
+        return worker
+
+
+def discard_worker(worker: PytestWorker, kill: bool = False):
+    """丢弃状态不可信的执行进程，下次执行时重新启动"""
+    with _workers_lock:
+        if _workers.get(worker.device_id) is worker:
+            del _workers[worker.device_id]
+    if kill:
+        worker.kill()
+    else:
+        worker.close()
+
+
+@atexit.register
+def shutdown_workers():
+    with _workers_lock:
+        workers = list(_workers.values())
+        _workers.clear()
+    for worker in workers:
+        worker.close()
+
+
+def main():
+    """子进程入口：初始化一次 Django 和测试依赖，然后逐个执行标准输入中的用例任务"""
+    import traceback
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+
+    import pytest
+    from django.db import connections
+
+    # 预先导入测试依赖（airtest、allure、UI Flow 执行器、OCR 模型），后续用例不再重复加载
+    import allure  # noqa: F401
+    from apps.app_automation.utils.airtest_base import AirtestBase  # noqa: F401
+    from apps.app_automation.runners.ui_flow_runner import UiFlowRunner  # noqa: F401
+    try:
+        from apps.app_automation.utils.ocr_helper import warm_up_readers_in_background
+    except ImportError:
+        pass
+    else:
+        # 后台预加载 OCR 模型（APP_OCR_WARMUP_LANGUAGES），与第一个用例的设备连接并行进行
+        warm_up_readers_in_background()
+
+    # 测试 fixture 据此复用设备连接
+    os.environ['APP_PERSISTENT_WORKER'] = '1'
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        for key in JOB_ENV_KEYS:
+            os.environ.pop(key, None)
+        os.environ.update(job.get('env', {}))
+
+        try:
+            exit_code = int(pytest.main(job['args']))
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 3
+        finally:
+            # 用例之间可能间隔很久，避免数据库连接超时断开
+            connections.close_all()
+
+        sys.stdout.write(f"{JOB_DONE_MARKER}{json.dumps({'exit_code': exit_code})}\n")
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
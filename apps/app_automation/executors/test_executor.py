@@ -13,6 +13,8 @@ from typing import Optional, Dict, Any
 from django.conf import settings
 import logging
 
+from .pytest_worker import HEALTHY_EXIT_CODES, PytestWorker, WorkerCrashed, discard_worker, get_worker
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,6 +37,7 @@ class AppTestExecutor:
             raise ValueError(f"测试项目路径不存在: {self.base_path}")
         
         self._current_process: Optional[subprocess.Popen] = None
+        self._current_worker: Optional[PytestWorker] = None
         
         logger.info(f"初始化 AppTestExecutor，基础路径: {self.base_path}")
     
@@ -61,12 +64,7 @@ class AppTestExecutor:
         """
         logger.info(f"开始执行APP测试: test_case_id={test_case_id}, device={device_id}")
         
-        original_cwd = os.getcwd()
-        
         try:
-            # 切换到项目根目录
-            os.chdir(self.base_path)
-            
             # 准备环境变量
             env = os.environ.copy()
             env['PYTHONPATH'] = self._build_pythonpath()
@@ -76,46 +74,33 @@ class AppTestExecutor:
             env['PYTHONIOENCODING'] = 'utf-8'
             
             # 传递执行参数到 pytest
-            env['APP_TEST_CASE_ID'] = str(test_case_id)
-            env['APP_DEVICE_ID'] = device_id
-            env['APP_PACKAGE_NAME'] = package_name
+            job_env = {
+                'APP_TEST_CASE_ID': str(test_case_id),
+                'APP_DEVICE_ID': device_id,
+                'APP_PACKAGE_NAME': package_name,
+            }
             if execution_id:
-                env['APP_EXECUTION_ID'] = str(execution_id)
+                job_env['APP_EXECUTION_ID'] = str(execution_id)
             if username:
-                env['APP_USERNAME'] = username
+                job_env['APP_USERNAME'] = username
             
             # Allure 结果目录
             allure_results_dir = self._get_allure_results_dir(execution_id)
             os.makedirs(allure_results_dir, exist_ok=True)
             
-            # 构建 pytest 参数
+            # 构建 pytest 参数（相对路径基于项目根目录，即执行进程的工作目录）
             pytest_args = [
-                sys.executable, '-m', 'pytest',
                 'apps/app_automation/tests/',  # 测试目录
                 '-s', '-v',
                 '--alluredir', allure_results_dir,
                 '--tb=short',
             ]
+            use_worker = getattr(settings, 'APP_PYTEST_WORKER_ENABLED', True)
             
-            logger.info(f"执行命令: {' '.join(pytest_args)}")
-            logger.info(f"工作目录: {os.getcwd()}")
+            logger.info(f"执行 pytest 参数: {' '.join(pytest_args)}（{'常驻执行进程' if use_worker else '独立子进程'}）")
+            logger.info(f"工作目录: {self.base_path}")
             logger.info(f"PYTHONPATH: {env['PYTHONPATH']}")
             
-            # 执行 pytest
-            process = subprocess.Popen(
-                pytest_args,
-                cwd=self.base_path,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                encoding='utf-8',
-                errors='ignore',
-                bufsize=1,
-                env=env
-            )
-            
-            self._current_process = process
-            
             # 准备日志文件
             log_file_path = self._get_log_file_path(username or 'unknown')
             
@@ -124,6 +109,15 @@ class AppTestExecutor:
             important_patterns = ['PASSED', 'FAILED', 'ERROR', 'SKIPPED', 'collected', 'passed', 'failed']
             
             log_file = open(log_file_path, 'a', encoding='utf-8')
+            
+            def on_line(line):
+                line = line.rstrip()
+                if line:
+                    output_lines.append(line)
+                    log_file.write(line + '\n')
+                    if any(pattern in line for pattern in important_patterns):
+                        logger.info(f"[pytest] {line}")
+            
             try:
                 log_file.write(f"\n{'='*80}\n")
                 log_file.write(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] "
@@ -131,25 +125,17 @@ class AppTestExecutor:
                               f"设备: {device_id}\n")
                 log_file.write(f"{'='*80}\n")
                 
-                if process.stdout:
-                    for line in process.stdout:
-                        line = line.rstrip()
-                        if line:
-                            output_lines.append(line)
-                            log_file.write(line + '\n')
-                            if any(pattern in line for pattern in important_patterns):
-                                logger.info(f"[pytest] {line}")
+                # 执行 pytest
+                if use_worker:
+                    exit_code = self._run_in_worker(device_id, env, job_env, pytest_args, on_line)
+                else:
+                    exit_code = self._run_in_subprocess(env, job_env, pytest_args, on_line)
                 
                 log_file.write(f"\n[执行完毕]\n")
             finally:
                 log_file.close()
             
             logger.info(f"执行日志已保存: {log_file_path}")
-            
-            # 等待执行完成
-            exit_code = process.wait()
-            self._current_process = None
-            
             logger.info(f"pytest 执行完成，退出码: {exit_code}")
             
             # 解析测试结果
@@ -172,8 +158,48 @@ class AppTestExecutor:
                 'success': False,
                 'error': str(e),
             }
+    
+    def _run_in_subprocess(self, env: Dict[str, str], job_env: Dict[str, str], pytest_args: list, on_line) -> int:
+        """为本次用例单独启动 python -m pytest 子进程，返回退出码"""
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'pytest', *pytest_args],
+            cwd=self.base_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding='utf-8',
+            errors='ignore',
+            bufsize=1,
+            env={**env, **job_env}
+        )
+        
+        self._current_process = process
+        try:
+            if process.stdout:
+                for line in process.stdout:
+                    on_line(line)
+            
+            # 等待执行完成
+            return process.wait()
+        finally:
+            self._current_process = None
+    
+    def _run_in_worker(self, device_id: str, env: Dict[str, str], job_env: Dict[str, str], pytest_args: list, on_line) -> int:
+        """在设备的常驻 pytest 执行进程中执行本次用例，返回退出码"""
+        worker = get_worker(device_id, str(self.base_path), env)
+        self._current_worker = worker
+        try:
+            exit_code = worker.run(pytest_args, job_env, on_line)
+        except WorkerCrashed as e:
+            on_line(str(e))
+            exit_code = worker.process.returncode or 3
         finally:
-            os.chdir(original_cwd)
+            self._current_worker = None
+        
+        if exit_code not in HEALTHY_EXIT_CODES:
+            # 执行被中断或 pytest 内部错误，执行进程的状态不可信，下次重新启动
+            discard_worker(worker)
+        return exit_code
     
     def _get_log_file_path(self, username: str) -> str:
         """生成日志文件路径: logs/app_automation/{username}/{日期}.log"""
@@ -374,6 +400,10 @@ class AppTestExecutor:
     
     def stop(self):
         """停止当前执行的测试"""
+        if self._current_worker:
+            discard_worker(self._current_worker, kill=True)
+            self._current_worker = None
+            logger.info("测试执行已停止")
         if self._current_process:
             try:
                 self._current_process.terminate()
@@ -149,6 +149,23 @@ class DeviceManager:
         
         return info
     
+    def is_device_online(self, device_id: str) -> bool:
+        """
+        检查设备当前是否在线（adb get-state 为 device）
+        """
+        try:
+            result = subprocess.run(
+                [self.adb_path, '-s', device_id, 'get-state'],
+                capture_output=True,
+                text=True,
+                timeout=10,
+                **self.subprocess_kwargs
+            )
+            return result.returncode == 0 and result.stdout.strip() == 'device'
+        except Exception as e:
+            logger.warning(f"检查设备 {device_id} 状态失败: {str(e)}")
+            return False
+    
     def connect_device(self, ip_address, port=5555):
         """
         连接远程设备
@@ -101,6 +101,7 @@ class AppDevice(models.Model):
     device_specs = models.JSONField(default=dict, verbose_name='设备规格', help_text='RAM, CPU, 分辨率等信息')
     description = models.TextField(blank=True, default='', verbose_name='设备描述')
     location = models.CharField(max_length=200, blank=True, default='', verbose_name='设备位置')
+    tags = models.JSONField(default=list, blank=True, verbose_name='设备标签', help_text='套件分片执行时按标签选择设备池')
     
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
@@ -437,6 +438,12 @@ class AppTestSuite(models.Model):
     passed_count = models.IntegerField(default=0, verbose_name='通过用例数')
     failed_count = models.IntegerField(default=0, verbose_name='失败用例数')
     last_run_at = models.DateTimeField(null=True, blank=True, verbose_name='最后执行时间')
+    # 多设备分片执行时尚未结束的分片数，最后一个结束的分片汇总套件结果
+    active_shards = models.IntegerField(default=0, verbose_name='运行中的分片数')
+    # 当前（最近一次）分片执行的批次号，分片结束时只对本批次的 active_shards 计数
+    shard_run_id = models.CharField(max_length=32, blank=True, default='', verbose_name='分片执行批次号')
+    shard_started_at = models.DateTimeField(null=True, blank=True, verbose_name='分片执行开始时间')
+    shard_heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='分片执行最近心跳时间')
 
     created_by = models.ForeignKey(
         User,
@@ -608,6 +615,7 @@ class AppTestExecution(models.Model):
     progress = models.IntegerField(default=0, verbose_name='执行进度(0-100)')
     started_at = models.DateTimeField(null=True, blank=True, verbose_name='开始时间')
     finished_at = models.DateTimeField(null=True, blank=True, verbose_name='结束时间')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='最近心跳时间')
     duration = models.FloatField(default=0, verbose_name='执行时长(秒)')
     report_path = models.CharField(max_length=500, blank=True, default='', verbose_name='Allure报告路径')
     error_message = models.TextField(blank=True, default='', verbose_name='错误信息')
@@ -678,6 +686,11 @@ class AppScheduledTask(models.Model):
         ('webhook', 'Webhook机器人'),
         ('both', '两者都发送'),
     ]
+    OVERLAP_POLICY_CHOICES = [
+        ('SKIP', '跳过'),
+        ('QUEUE', '排队'),
+        ('ALLOW', '允许并发'),
+    ]
 
     project = models.ForeignKey(
         'AppProject', on_delete=models.CASCADE,
@@ -699,6 +712,8 @@ class AppScheduledTask(models.Model):
         AppDevice, on_delete=models.SET_NULL, null=True, blank=True,
         related_name='scheduled_tasks', verbose_name='执行设备'
     )
+    # 非空时测试套件在带有全部这些标签的设备上分片执行（忽略 device）
+    device_tags = models.JSONField(default=list, blank=True, verbose_name='设备池标签')
     app_package = models.ForeignKey(
         AppPackage, on_delete=models.SET_NULL, null=True, blank=True,
         related_name='scheduled_tasks', verbose_name='应用包名'
@@ -721,6 +736,15 @@ class AppScheduledTask(models.Model):
     )
     notify_emails = models.JSONField(default=list, blank=True, verbose_name='通知邮箱列表')
 
+    # 重叠执行策略：上一次执行尚未结束时，SKIP 跳过本次，QUEUE 等上一次结束后再执行，
+    # ALLOW 最多允许 max_concurrent_runs 次同时运行（已满时跳过本次）
+    overlap_policy = models.CharField(
+        max_length=10, choices=OVERLAP_POLICY_CHOICES, default='SKIP', verbose_name='重叠执行策略'
+    )
+    max_concurrent_runs = models.PositiveIntegerField(
+        default=1, verbose_name='最大并发运行数', help_text='重叠执行策略为允许并发时生效'
+    )
+
     # 状态与统计
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='ACTIVE', verbose_name='任务状态')
     last_run_time = models.DateTimeField(null=True, blank=True, verbose_name='最后运行时间')
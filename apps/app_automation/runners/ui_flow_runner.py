@@ -13,17 +13,18 @@ from django.conf import settings
 
 from airtest.core.api import (
     Template,
-    wait,
     touch,
     sleep,
     swipe,
     snapshot,
-    exists,
     double_click,
     G,
     ST,
     text as airtest_text,
 )
+from airtest.core.error import TargetNotFoundError
+
+from ..utils.frame_cache import FrameBuffer, TemplateCache, locate
 
 # 导入 OCR 工具
 try:
@@ -82,6 +83,10 @@ class UiFlowRunner:
         # OCR 工具（延迟初始化）
         self._ocr_helper = None
         
+        # 图片匹配缓存：模板图片只解码一次，短时间内的多次匹配/OCR 复用同一帧截图
+        self._templates = TemplateCache()
+        self._frames = FrameBuffer(getattr(settings, 'APP_FRAME_REUSE_WINDOW', 0.5))
+        
         logger.info(f"初始化UiFlowRunner，图片目录: {self.image_base_dir}")
     
     def run(
@@ -109,6 +114,8 @@ class UiFlowRunner:
         
         # 初始化上下文
         self._init_context(variables, runtime)
+        self._templates.clear()
+        self._frames.invalidate()
         
         # 执行所有步骤
         total_steps = len(ui_flow)
@@ -266,6 +273,7 @@ class UiFlowRunner:
                     return  # 成功则直接返回
                 except Exception as e:
                     last_error = e
+                    self._frames.discard()
                     if attempt < retry_times:
                         logger.warning(
                             f"步骤 '{step.get('name', action)}' 第 {attempt + 1} 次失败，"
@@ -471,7 +479,7 @@ class UiFlowRunner:
                 return None
             
             threshold = step.get('image_threshold', 0.7)
-            return Template(image_path, threshold=threshold)
+            return self._templates.get(image_path, threshold)
         
         elif selector_type == 'pos':
             # 坐标选择器
@@ -527,7 +535,7 @@ class UiFlowRunner:
                     return None
                 
                 threshold = element.config.get('image_threshold', 0.7)
-                return Template(image_path, threshold=threshold)
+                return self._templates.get(image_path, threshold)
             
             elif element.element_type == 'pos':
                 x = element.config.get('x')
@@ -545,6 +553,53 @@ class UiFlowRunner:
             logger.error(f"解析元素失败: element_id={element_id}, 错误: {e}", exc_info=True)
             return None
     
+    # ---------- 屏幕操作（复用模板与屏幕帧） ----------
+    
+    def _find(self, target: Any, timeout: Optional[float] = None) -> Any:
+        """查找目标坐标：Template 在屏幕帧中匹配（默认超时 ST.FIND_TIMEOUT_TMP），坐标直接返回，未找到返回 None"""
+        if isinstance(target, Template):
+            return locate(target, self._frames, ST.FIND_TIMEOUT_TMP if timeout is None else timeout)
+        return target
+    
+    def _locate_or_raise(self, target: Any, timeout: Optional[float] = None) -> Any:
+        """查找目标坐标，Template 超时（默认 ST.FIND_TIMEOUT）未找到时抛出 TargetNotFoundError"""
+        pos = self._find(target, ST.FIND_TIMEOUT if timeout is None else timeout)
+        if pos is None:
+            raise TargetNotFoundError(f"Picture {target} not found in screen")
+        return pos
+    
+    def _exists(self, target: Any) -> Any:
+        """同 Airtest exists，未找到时返回 None"""
+        return self._find(target)
+    
+    def _wait(self, target: Any, timeout: Optional[float] = None) -> Any:
+        """同 Airtest wait，超时未出现抛出 TargetNotFoundError"""
+        return self._locate_or_raise(target, timeout)
+    
+    def _touch(self, target: Any, **kwargs) -> Any:
+        pos = self._locate_or_raise(target)
+        touch(pos, **kwargs)
+        self._frames.invalidate()
+        return pos
+    
+    def _double_click(self, target: Any) -> Any:
+        pos = self._locate_or_raise(target)
+        double_click(pos)
+        self._frames.invalidate()
+        return pos
+    
+    def _swipe(self, start: Any, end: Any, **kwargs):
+        swipe(self._locate_or_raise(start), self._locate_or_raise(end), **kwargs)
+        self._frames.invalidate()
+    
+    def _text(self, value: str):
+        airtest_text(value)
+        self._frames.invalidate()
+    
+    def _ocr_frame(self):
+        """OCR 使用的屏幕帧：需要重新截图时距离上一次屏幕操作至少间隔 0.3 秒"""
+        return self._frames.grab(settle=0.3)
+    
     def _action_touch(self, step: Dict[str, Any]):
         """点击动作"""
         target = self._resolve_selector(step)
@@ -552,14 +607,14 @@ class UiFlowRunner:
             step_name = step.get('name', step.get('type', 'unknown'))
             raise ValueError(f"步骤 '{step_name}' 无法解析选择器，请检查元素配置（selector 或 element_id）")
         logger.info(f"执行点击: {target}")
-        touch(target)
+        self._touch(target)
     
     def _action_double_click(self, step: Dict[str, Any]):
         """双击动作"""
         target = self._resolve_selector(step)
         if target:
             logger.info(f"执行双击: {target}")
-            double_click(target)
+            self._double_click(target)
     
     def _action_swipe(self, step: Dict[str, Any]):
         """滑动动作"""
@@ -573,7 +628,7 @@ class UiFlowRunner:
             end = tuple(int(x) for x in end.split(','))
         
         logger.info(f"执行滑动: {start} -> {end}")
-        swipe(start, end, duration=duration)
+        self._swipe(start, end, duration=duration)
     
     def _action_wait(self, step: Dict[str, Any]):
         """等待：有 selector 时等待元素出现，没有时纯等待 timeout 秒"""
@@ -582,7 +637,7 @@ class UiFlowRunner:
         
         if target:
             logger.info(f"等待元素出现: {target}, 超时: {timeout}s")
-            wait(target, timeout=timeout)
+            self._wait(target, timeout=timeout)
         else:
             logger.info(f"等待 {timeout} 秒")
             sleep(timeout)
@@ -601,7 +656,7 @@ class UiFlowRunner:
         """输入文本"""
         text_value = step.get('text', '')
         logger.info(f"输入文本: {text_value}")
-        airtest_text(text_value)
+        self._text(text_value)
     
     def _action_set_variable(self, step: Dict[str, Any]):
         """设置变量"""
@@ -620,6 +675,7 @@ class UiFlowRunner:
         
         支持的 assert_type:
         - text:   OCR 识别文本，支持 exact/contains/regex 匹配
+        - texts:  同一帧截图中批量识别 checks 列出的多个区域，逐个按 exact/contains/regex 匹配
         - number: OCR 识别数字（自动去除逗号等格式符号），精确匹配
         - regex:  OCR 识别文本，用正则表达式匹配（text + match_mode=regex 的快捷方式）
         - range:  OCR 识别数字，判断是否在 [min, max] 范围内
@@ -632,6 +688,7 @@ class UiFlowRunner:
         
         assert_map = {
             'text': self._assert_text,
+            'texts': self._assert_texts,
             'number': self._assert_number,
             'regex': self._assert_regex,
             'range': self._assert_range,
@@ -661,6 +718,7 @@ class UiFlowRunner:
                 return  # 断言通过
             except (AssertionError, Exception) as e:
                 last_error = e
+                self._frames.discard()
                 if time.time() >= deadline:
                     break
                 remaining = deadline - time.time()
@@ -702,12 +760,12 @@ class UiFlowRunner:
     def _ocr_recognize_text(self, region: tuple) -> str:
         """OCR 识别指定区域的文本"""
         ocr = self._get_ocr_helper()
-        return ocr.recognize_region_text(region)
+        return ocr.recognize_region_text(region, screen=self._ocr_frame())
     
     def _ocr_recognize_number(self, region: tuple) -> int:
         """OCR 识别指定区域的数字（自动去除逗号等格式符号）"""
         ocr = self._get_ocr_helper()
-        return ocr.recognize_region_number(region)
+        return ocr.recognize_region_number(region, screen=self._ocr_frame())
     
     def _assert_text(self, step: Dict[str, Any]):
         """文本断言：OCR 识别文本，支持 exact/contains/regex 匹配"""
@@ -720,20 +778,49 @@ class UiFlowRunner:
         
         actual_text = self._ocr_recognize_text(region)
         
-        if match_mode == 'exact':
-            passed = actual_text == expected
-        elif match_mode == 'contains':
-            passed = expected in actual_text
-        elif match_mode == 'regex':
-            passed = re.search(expected, actual_text) is not None
-        else:
-            raise ValueError(f"不支持的 match_mode: {match_mode}")
-        
-        if not passed:
+        if not self._text_matches(actual_text, expected, match_mode):
             raise AssertionError(f"文本断言失败: 期望 '{expected}' ({match_mode}), 实际 '{actual_text}'")
         
         logger.info(f"文本断言成功: '{expected}' ({match_mode}) 匹配 '{actual_text}'")
     
+    @staticmethod
+    def _text_matches(actual_text: str, expected: str, match_mode: str) -> bool:
+        """按 exact/contains/regex 比较识别出的文本"""
+        if match_mode == 'exact':
+            return actual_text == expected
+        if match_mode == 'contains':
+            return expected in actual_text
+        if match_mode == 'regex':
+            return re.search(expected, actual_text) is not None
+        raise ValueError(f"不支持的 match_mode: {match_mode}")
+    
+    def _assert_texts(self, step: Dict[str, Any]):
+        """
+        多区域文本断言：checks 为 [{selector, expected, match_mode}, ...]，
+        所有区域取自同一帧截图，通过 recognize_regions 一次批量识别
+        """
+        if not OCR_AVAILABLE:
+            raise RuntimeError("文本断言需要 OCR 支持，请安装 easyocr")
+        
+        checks = step.get('checks') or []
+        if not checks:
+            raise ValueError("texts 断言需要在 checks 中配置至少一个区域")
+        
+        regions = [self._parse_ocr_region(check) for check in checks]
+        texts = self._get_ocr_helper().recognize_regions(regions, screen=self._ocr_frame())
+        
+        failures = []
+        for check, region in zip(checks, regions):
+            expected = check.get('expected', '')
+            match_mode = check.get('match_mode', step.get('match_mode', 'contains'))
+            if not self._text_matches(texts[region], expected, match_mode):
+                failures.append(f"区域 {region} 期望 '{expected}' ({match_mode}), 实际 '{texts[region]}'")
+        
+        if failures:
+            raise AssertionError("多区域文本断言失败: " + '; '.join(failures))
+        
+        logger.info(f"多区域文本断言成功: {len(checks)} 个区域")
+    
     def _assert_number(self, step: Dict[str, Any]):
         """数值断言：OCR 识别数字（去逗号），与期望值精确匹配"""
         if not OCR_AVAILABLE:
@@ -812,7 +899,7 @@ class UiFlowRunner:
         target = self._resolve_selector(step)
         expected_exists = step.get('expected_exists', True)
         
-        result = exists(target) is not None
+        result = self._exists(target) is not None
         
         if expected_exists and not result:
             raise AssertionError(f"期望元素存在，但实际不存在")
@@ -835,8 +922,8 @@ class UiFlowRunner:
         if not os.path.isfile(image_path):
             raise ValueError(f"期望图片文件不存在: {image_path}")
         
-        target = Template(image_path, threshold=threshold)
-        result = exists(target)
+        target = self._templates.get(image_path, threshold)
+        result = self._exists(target)
         
         if result is None:
             raise AssertionError(f"图片断言失败: 未在屏幕上找到图片 '{expected_image}' (阈值: {threshold})")
@@ -855,11 +942,11 @@ class UiFlowRunner:
         value = step.get('value', '')
         
         if target:
-            touch(target)
+            self._touch(target)
             time.sleep(0.3)
         
         logger.info(f"输入文本: {value}")
-        airtest_text(value)
+        self._text(value)
     
     def _action_long_press(self, step: Dict[str, Any]):
         """长按"""
@@ -868,7 +955,7 @@ class UiFlowRunner:
         
         if target:
             logger.info(f"长按: {target}, 时长: {duration}秒")
-            touch(target, duration=duration)
+            self._touch(target, duration=duration)
     
     def _action_drag(self, step: Dict[str, Any]):
         """拖拽：从起点拖拽到终点"""
@@ -892,7 +979,7 @@ class UiFlowRunner:
         
         if start and end:
             logger.info(f"拖拽: {start} -> {end}")
-            swipe(start, end, duration=duration)
+            self._swipe(start, end, duration=duration)
     
     def _action_swipe_to(self, step: Dict[str, Any]):
         """滑动直到目标元素出现"""
@@ -908,7 +995,7 @@ class UiFlowRunner:
         interval = step.get('interval', 0.5)
         
         for i in range(max_swipes):
-            if exists(target):
+            if self._exists(target):
                 logger.info(f"找到目标元素，停止滑动")
                 return
             
@@ -916,16 +1003,16 @@ class UiFlowRunner:
             swipe_vector = G.DEVICE.get_current_resolution()
             
             if direction == 'up':
-                swipe((swipe_vector[0]//2, swipe_vector[1]*0.7), 
+                self._swipe((swipe_vector[0]//2, swipe_vector[1]*0.7), 
                       (swipe_vector[0]//2, swipe_vector[1]*0.3))
             elif direction == 'down':
-                swipe((swipe_vector[0]//2, swipe_vector[1]*0.3), 
+                self._swipe((swipe_vector[0]//2, swipe_vector[1]*0.3), 
                       (swipe_vector[0]//2, swipe_vector[1]*0.7))
             elif direction == 'left':
-                swipe((swipe_vector[0]*0.7, swipe_vector[1]//2), 
+                self._swipe((swipe_vector[0]*0.7, swipe_vector[1]//2), 
                       (swipe_vector[0]*0.3, swipe_vector[1]//2))
             elif direction == 'right':
-                swipe((swipe_vector[0]*0.3, swipe_vector[1]//2), 
+                self._swipe((swipe_vector[0]*0.3, swipe_vector[1]//2), 
                       (swipe_vector[0]*0.7, swipe_vector[1]//2))
             
             time.sleep(interval)
@@ -952,12 +1039,12 @@ class UiFlowRunner:
         }
         fallback_target = self._resolve_selector(fallback_config)
         
-        if main_target and exists(main_target):
+        if main_target and self._exists(main_target):
             logger.info(f"主定位存在，点击主定位")
-            touch(main_target)
+            self._touch(main_target)
         elif fallback_target:
             logger.info(f"主定位不存在，点击备用定位")
-            touch(fallback_target)
+            self._touch(fallback_target)
     
     def _action_image_exists_click_chain(self, step: Dict[str, Any]):
         """主定位存在则依次点击主定位和备用定位，否则只点击备用定位"""
@@ -977,13 +1064,13 @@ class UiFlowRunner:
         }
         fallback_target = self._resolve_selector(fallback_config)
         
-        if main_target and exists(main_target):
+        if main_target and self._exists(main_target):
             logger.info(f"主定位存在，依次点击主定位和备用定位")
-            touch(main_target)
+            self._touch(main_target)
             time.sleep(0.5)
         
         if fallback_target:
-            touch(fallback_target)
+            self._touch(fallback_target)
     
     def _action_unset_variable(self, step: Dict[str, Any]):
         """删除变量"""
@@ -1457,14 +1544,14 @@ class UiFlowRunner:
                 logger.info(f"循环点击断言 第 {i+1}/{max_loops} 次")
                 
                 # 点击
-                touch(click_target)
+                self._touch(click_target)
                 time.sleep(interval)
                 
                 # OCR 识别
                 if assert_type == 'number':
-                    actual_value = ocr.recognize_region_number(ocr_region)
+                    actual_value = ocr.recognize_region_number(ocr_region, screen=self._ocr_frame())
                 else:
-                    actual_value = ocr.recognize_region_text(ocr_region)
+                    actual_value = ocr.recognize_region_text(ocr_region, screen=self._ocr_frame())
                 
                 # 检查是否匹配期望列表中的任何值
                 matched = False
@@ -267,7 +267,7 @@ class AppTestSuiteSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'project',
             'execution_status', 'execution_status_display',
             'execution_result', 'execution_result_display',
-            'passed_count', 'failed_count', 'last_run_at',
+            'passed_count', 'failed_count', 'last_run_at', 'active_shards',
             'test_case_count', 'suite_cases',
             'created_by', 'created_by_name',
             'created_at', 'updated_at',
@@ -275,7 +275,7 @@ class AppTestSuiteSerializer(serializers.ModelSerializer):
         read_only_fields = (
             'created_at', 'updated_at',
             'execution_status', 'execution_result',
-            'passed_count', 'failed_count', 'last_run_at',
+            'passed_count', 'failed_count', 'last_run_at', 'active_shards',
         )
 
     def get_created_by_name(self, obj):
@@ -339,10 +339,11 @@ class AppScheduledTaskSerializer(serializers.ModelSerializer):
             'task_type', 'task_type_display',
             'trigger_type', 'trigger_type_display',
             'cron_expression', 'interval_seconds', 'execute_at',
-            'device', 'device_name',
+            'device', 'device_name', 'device_tags',
             'app_package', 'app_package_name',
             'test_suite', 'test_suite_name',
             'test_case', 'test_case_name',
+            'overlap_policy', 'max_concurrent_runs',
             'notify_on_success', 'notify_on_failure',
             'notification_type', 'notification_type_display', 'notify_emails',
             'status', 'status_display',
@@ -394,13 +395,13 @@ class AppScheduledTaskSerializer(serializers.ModelSerializer):
         validated_data['created_by'] = self.context['request'].user
         instance = super().create(validated_data)
         instance.next_run_time = instance.calculate_next_run()
-        instance.save(update_fields=['next_run_time'])
+        instance.save(update_fields=['next_run_time', 'updated_at'])
         return instance
 
     def update(self, instance, validated_data):
         instance = super().update(instance, validated_data)
         instance.next_run_time = instance.calculate_next_run()
-        instance.save(update_fields=['next_run_time'])
+        instance.save(update_fields=['next_run_time', 'updated_at'])
         return instance
 
 
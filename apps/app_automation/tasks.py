@@ -190,7 +190,7 @@ def send_execution_update(execution_id, status=None, progress=None, message=None
 
 
 @shared_task
-def execute_app_test_task(execution_id, package_name: str = None, scheduled_task_id: int = None):
+def execute_app_test_task(execution_id, package_name: str = None, scheduled_task_id: int = None, lease_id: int = None):
     """
     异步执行APP测试任务
     
@@ -198,6 +198,7 @@ def execute_app_test_task(execution_id, package_name: str = None, scheduled_task
         execution_id: AppTestExecution 的 ID
         package_name: 可选的应用包名
         scheduled_task_id: 可选的定时任务 ID（来自定时调度）
+        lease_id: 可选的定时任务执行租约 ID，执行结束后释放
     """
     from django.conf import settings
     from .models import AppTestExecution, AppDevice
@@ -350,10 +351,159 @@ def execute_app_test_task(execution_id, package_name: str = None, scheduled_task
                 logger.info(f"设备已释放: {device.device_id}")
         except Exception as e:
             logger.error(f"释放设备失败: {str(e)}")
+        if lease_id:
+            from apps.core.task_lease import release_lease
+            release_lease(lease_id)
+
+
+def _run_suite_case(execution, device, package_name, position):
+    """
+    在指定设备上执行套件中的一个用例，执行状态和结果保存到执行记录
+
+    Args:
+        execution: AppTestExecution
+        device: 执行设备
+        package_name: 可选的应用包名覆盖
+        position: 进度提示中的用例序号，如 3/10
+
+    Returns:
+        用例是否通过
+    """
+    from .executors.test_executor import AppTestExecutor
+
+    test_case = execution.test_case
+    if not test_case:
+        execution.status = 'error'
+        execution.result = None
+        execution.error_message = '用例不存在'
+        execution.finished_at = timezone.now()
+        execution.save()
+        return False
+
+    try:
+        # 更新为运行中
+        execution.status = 'running'
+        execution.started_at = timezone.now()
+        execution.progress = 0
+        execution.save()
+        send_execution_update(
+            execution.id, status='running', progress=0,
+            message=f'开始执行 ({position})'
+        )
+
+        # 确定包名
+        if package_name:
+            final_pkg = package_name
+        else:
+            final_pkg = test_case.app_package.package_name if test_case.app_package else ""
+
+        execution.progress = 10
+        execution.save()
+        send_execution_update(
+            execution.id, status='running', progress=10,
+            message='正在准备测试环境'
+        )
+
+        executor = AppTestExecutor()
+        report_result = executor.run_tests(
+            test_case_id=test_case.id,
+            device_id=device.device_id,
+            package_name=final_pkg,
+            execution_id=execution.id,
+            username=execution.user.username if execution.user else 'unknown',
+        )
+
+        execution.refresh_from_db()
+
+        if report_result.get('report_path'):
+            execution.report_path = report_result['report_path']
+
+        test_results = report_result.get('test_results', {})
+        execution.total_steps = test_results.get('total', 0)
+        execution.passed_steps = test_results.get('passed', 0)
+        execution.failed_steps = test_results.get('failed', 0)
+
+        execution.status = 'completed'
+        if execution.total_steps == 0:
+            execution.result = 'skipped'
+        elif execution.failed_steps == 0:
+            execution.result = 'passed'
+        else:
+            execution.result = 'failed'
+        execution.finished_at = timezone.now()
+        execution.duration = (execution.finished_at - execution.started_at).total_seconds()
+        execution.progress = 100
+        execution.save()
+
+        send_execution_update(
+            execution.id, status=execution.status, progress=100,
+            message='执行完成',
+            report_path=execution.report_path,
+            finished_at=execution.finished_at,
+            result=execution.result,
+        )
+
+        logger.info(f"用例 {test_case.name} 执行完成: status={execution.status}, result={execution.result}")
+        return execution.result == 'passed'
+
+    except Exception as e:
+        logger.error(f"用例 {test_case.name} 执行失败: {str(e)}", exc_info=True)
+        execution.status = 'error'
+        execution.result = None
+        execution.error_message = str(e)
+        execution.finished_at = timezone.now()
+        if execution.started_at:
+            execution.duration = (execution.finished_at - execution.started_at).total_seconds()
+        execution.save()
+        send_execution_update(
+            execution.id, status='error',
+            progress=execution.progress or 0,
+            message=str(e),
+            finished_at=execution.finished_at,
+            result=None,
+        )
+        return False
+
+
+def _complete_suite_run(suite, passed, failed, scheduled_task_id=None):
+    """更新套件执行统计，来自定时任务时更新任务统计并发送通知"""
+    suite.execution_status = 'completed'
+    if passed == 0 and failed == 0:
+        suite.execution_result = 'skipped'
+    elif failed == 0:
+        suite.execution_result = 'passed'
+    else:
+        suite.execution_result = 'failed'
+    suite.passed_count = passed
+    suite.failed_count = failed
+    suite.last_run_at = timezone.now()
+    suite.save(update_fields=['execution_status', 'execution_result', 'passed_count', 'failed_count', 'last_run_at'])
+
+    logger.info(f"套件执行完成: {suite.name}, 通过: {passed}, 失败: {failed}")
+
+    # 定时任务通知
+    if scheduled_task_id:
+        try:
+            from .models import AppScheduledTask
+            st = AppScheduledTask.objects.get(id=scheduled_task_id)
+            is_success = failed == 0
+            if is_success:
+                st.successful_runs += 1
+            else:
+                st.failed_runs += 1
+            st.last_result = {
+                'status': suite.execution_status,
+                'result': suite.execution_result,
+                'message': f'通过: {passed}, 失败: {failed}'
+            }
+            st.save(update_fields=['successful_runs', 'failed_runs', 'last_result'])
+            send_scheduled_task_notification(scheduled_task_id, success=is_success)
+        except Exception as ne:
+            logger.error(f"更新定时任务状态失败: {ne}")
 
 
 @shared_task
-def execute_app_suite_task(suite_id, execution_ids, package_name=None, scheduled_task_id=None):
+def execute_app_suite_task(suite_id, execution_ids, package_name=None, scheduled_task_id=None, lease_id=None):
     """
     异步执行APP测试套件（顺序执行多个用例）
 
@@ -362,9 +512,9 @@ def execute_app_suite_task(suite_id, execution_ids, package_name=None, scheduled
         execution_ids: AppTestExecution ID 列表（按执行顺序）
         package_name: 可选的应用包名覆盖
         scheduled_task_id: 可选的定时任务 ID
+        lease_id: 可选的定时任务执行租约 ID，执行结束后释放
     """
-    from .models import AppTestSuite, AppTestExecution, AppDevice
-    from .executors.test_executor import AppTestExecutor
+    from .models import AppTestSuite, AppTestExecution
 
     suite = None
     device = None
@@ -395,138 +545,12 @@ def execute_app_suite_task(suite_id, execution_ids, package_name=None, scheduled
         logger.info(f"套件执行开始: {suite.name}, 设备: {device.device_id}, 共 {len(executions)} 个用例")
 
         for idx, execution in enumerate(executions):
-            test_case = execution.test_case
-            if not test_case:
-                execution.status = 'error'
-                execution.result = None
-                execution.error_message = '用例不存在'
-                execution.finished_at = timezone.now()
-                execution.save()
-                failed += 1
-                continue
-
-            try:
-                # 更新为运行中
-                execution.status = 'running'
-                execution.started_at = timezone.now()
-                execution.progress = 0
-                execution.save()
-                send_execution_update(
-                    execution.id, status='running', progress=0,
-                    message=f'开始执行 ({idx + 1}/{len(executions)})'
-                )
-
-                # 确定包名
-                if package_name:
-                    final_pkg = package_name
-                else:
-                    final_pkg = test_case.app_package.package_name if test_case.app_package else ""
-
-                execution.progress = 10
-                execution.save()
-                send_execution_update(
-                    execution.id, status='running', progress=10,
-                    message='正在准备测试环境'
-                )
-
-                executor = AppTestExecutor()
-                report_result = executor.run_tests(
-                    test_case_id=test_case.id,
-                    device_id=device.device_id,
-                    package_name=final_pkg,
-                    execution_id=execution.id,
-                    username=execution.user.username if execution.user else 'unknown',
-                )
-
-                execution.refresh_from_db()
-
-                if report_result.get('report_path'):
-                    execution.report_path = report_result['report_path']
-
-                test_results = report_result.get('test_results', {})
-                execution.total_steps = test_results.get('total', 0)
-                execution.passed_steps = test_results.get('passed', 0)
-                execution.failed_steps = test_results.get('failed', 0)
-
-                execution.status = 'completed'
-                if execution.total_steps == 0:
-                    execution.result = 'skipped'
-                elif execution.failed_steps == 0:
-                    execution.result = 'passed'
-                else:
-                    execution.result = 'failed'
-                execution.finished_at = timezone.now()
-                execution.duration = (execution.finished_at - execution.started_at).total_seconds()
-                execution.progress = 100
-                execution.save()
-
-                if execution.result == 'passed':
-                    passed += 1
-                else:
-                    failed += 1
-
-                send_execution_update(
-                    execution.id, status=execution.status, progress=100,
-                    message='执行完成',
-                    report_path=execution.report_path,
-                    finished_at=execution.finished_at,
-                    result=execution.result,
-                )
-
-                logger.info(f"用例 {test_case.name} 执行完成: status={execution.status}, result={execution.result}")
-
-            except Exception as e:
-                logger.error(f"用例 {test_case.name} 执行失败: {str(e)}", exc_info=True)
-                execution.status = 'error'
-                execution.result = None
-                execution.error_message = str(e)
-                execution.finished_at = timezone.now()
-                if execution.started_at:
-                    execution.duration = (execution.finished_at - execution.started_at).total_seconds()
-                execution.save()
+            if _run_suite_case(execution, device, package_name, f'{idx + 1}/{len(executions)}'):
+                passed += 1
+            else:
                 failed += 1
-                send_execution_update(
-                    execution.id, status='error',
-                    progress=execution.progress or 0,
-                    message=str(e),
-                    finished_at=execution.finished_at,
-                    result=None,
-                )
-
-        # 更新套件统计
-        suite.execution_status = 'completed'
-        if passed == 0 and failed == 0:
-            suite.execution_result = 'skipped'
-        elif failed == 0:
-            suite.execution_result = 'passed'
-        else:
-            suite.execution_result = 'failed'
-        suite.passed_count = passed
-        suite.failed_count = failed
-        suite.last_run_at = timezone.now()
-        suite.save(update_fields=['execution_status', 'execution_result', 'passed_count', 'failed_count', 'last_run_at'])
 
-        logger.info(f"套件执行完成: {suite.name}, 通过: {passed}, 失败: {failed}")
-
-        # 定时任务通知
-        if scheduled_task_id:
-            try:
-                from .models import AppScheduledTask
-                st = AppScheduledTask.objects.get(id=scheduled_task_id)
-                is_success = failed == 0
-                if is_success:
-                    st.successful_runs += 1
-                else:
-                    st.failed_runs += 1
-                st.last_result = {
-                    'status': suite.execution_status,
-                    'result': suite.execution_result,
-                    'message': f'通过: {passed}, 失败: {failed}'
-                }
-                st.save(update_fields=['successful_runs', 'failed_runs', 'last_result'])
-                send_scheduled_task_notification(scheduled_task_id, success=is_success)
-            except Exception as ne:
-                logger.error(f"更新定时任务状态失败: {ne}")
+        _complete_suite_run(suite, passed, failed, scheduled_task_id)
 
     except AppTestSuite.DoesNotExist:
         logger.error(f"测试套件不存在: {suite_id}")
@@ -549,6 +573,346 @@ def execute_app_suite_task(suite_id, execution_ids, package_name=None, scheduled
                     logger.info(f"设备已释放: {device.device_id}")
         except Exception as e:
             logger.error(f"释放设备失败: {str(e)}")
+        if lease_id:
+            from apps.core.task_lease import release_lease
+            release_lease(lease_id)
+
+
+# ---------- 多设备分片执行 ----------
+#
+# 套件的每个用例先创建为不指定设备的待执行记录，设备池中的每台设备各投递一个分片任务（Celery worker 并发数需不少于设备数），
+# 各分片从同一批记录中按顺序认领下一个用例执行，执行快的设备自然多执行；
+# 用例未通过且设备已离线时，该用例放回待执行状态由其他设备执行，该设备的分片结束；
+# 最后一个结束的分片（AppTestSuite.active_shards 减到 0）汇总套件结果并发送定时任务通知；
+# 分片执行期间定时刷新心跳，recover_stale_suite_shards 回收心跳超时（worker 被强制终止等）的分片。
+# 每次分片执行有一个批次号（AppTestSuite.shard_run_id），分片只对自己批次的计数生效，
+# 已结束或已被回收的批次中迟到的分片不会影响下一次执行。
+
+def select_device_pool(user=None, tags=None, capabilities=None, device_ids=None):
+    """
+    选择套件分片执行的设备池：未离线、未被其他用户锁定，且带有全部标签、设备规格匹配的设备
+
+    Args:
+        user: 发起执行的用户，该用户已锁定的设备可以使用
+        tags: 设备必须带有的标签列表
+        capabilities: 设备规格（device_specs）需要匹配的键值，如 {"resolution": "1080x2400"}
+        device_ids: 可选，只在这些设备序列号中选择
+
+    Returns:
+        AppDevice 列表（最多 APP_SUITE_MAX_SHARDS 台）
+    """
+    from django.conf import settings
+    from .models import AppDevice
+    from .constants import DeviceStatus
+
+    devices = AppDevice.objects.exclude(status=DeviceStatus.OFFLINE).order_by('id')
+    if device_ids:
+        devices = devices.filter(device_id__in=device_ids)
+
+    pool = []
+    for device in devices:
+        if device.status == DeviceStatus.LOCKED and (user is None or device.locked_by_id != user.id):
+            continue
+        if tags and not set(tags) <= set(device.tags or []):
+            continue
+        specs = device.device_specs or {}
+        if capabilities and any(str(specs.get(key)) != str(value) for key, value in capabilities.items()):
+            continue
+        pool.append(device)
+
+    max_shards = getattr(settings, 'APP_SUITE_MAX_SHARDS', 0)
+    return pool[:max_shards] if max_shards else pool
+
+
+def start_sharded_suite_run(suite, devices, user, package_name=None, scheduled_task_id=None, lease_id=None):
+    """
+    在设备池上分片执行测试套件：为每个用例创建待执行记录，为每台设备投递一个分片任务
+
+    先用条件更新（active_shards 为 0 时才设为设备数）占用套件并生成新的批次号，
+    同一套件并发发起的多次执行只有一次成功。
+
+    Args:
+        suite: AppTestSuite
+        devices: select_device_pool 选出的设备
+        user: 执行用户
+        package_name: 可选的应用包名覆盖
+        scheduled_task_id: 可选的定时任务 ID
+        lease_id: 可选的定时任务执行租约 ID，所有分片结束后释放
+
+    Returns:
+        AppTestExecution 列表；套件已有正在进行的分片执行时返回 None
+    """
+    import uuid
+    from .models import AppTestSuite, AppTestExecution
+
+    now = timezone.now()
+    run_id = uuid.uuid4().hex
+    reserved = AppTestSuite.objects.filter(id=suite.id, active_shards=0).update(
+        active_shards=len(devices), execution_status='running', shard_run_id=run_id,
+        shard_started_at=now, shard_heartbeat_at=now
+    )
+    if not reserved:
+        logger.warning(f"套件正在多设备分片执行中，忽略本次执行: {suite.name}")
+        return None
+    suite.active_shards = len(devices)
+    suite.execution_status = 'running'
+    suite.shard_run_id = run_id
+    suite.shard_started_at = now
+    suite.shard_heartbeat_at = now
+
+    executions = []
+    for sc in suite.suite_cases.select_related('test_case').all():
+        execution = AppTestExecution.objects.create(
+            test_case=sc.test_case,
+            test_suite=suite,
+            user=user,
+            status='pending'
+        )
+        executions.append(execution)
+
+    execution_ids = [e.id for e in executions]
+    for device in devices:
+        execute_app_suite_shard_task.delay(
+            suite_id=suite.id,
+            execution_ids=execution_ids,
+            device_id=device.id,
+            run_id=run_id,
+            package_name=package_name,
+            scheduled_task_id=scheduled_task_id,
+            lease_id=lease_id,
+        )
+
+    logger.info(f"套件分片执行开始: {suite.name}, 设备: {[d.device_id for d in devices]}, 共 {len(executions)} 个用例")
+    return executions
+
+
+def _claim_suite_execution(execution_ids, device):
+    """按顺序认领下一个待执行的用例，多个分片同时认领同一个用例时只有一个成功"""
+    from .models import AppTestExecution
+
+    pending = set(
+        AppTestExecution.objects.filter(id__in=execution_ids, status='pending').values_list('id', flat=True)
+    )
+    for execution_id in execution_ids:
+        if execution_id not in pending:
+            continue
+        now = timezone.now()
+        claimed = AppTestExecution.objects.filter(id=execution_id, status='pending').update(
+            status='running', device=device, started_at=now, heartbeat_at=now, progress=0
+        )
+        if claimed:
+            return AppTestExecution.objects.select_related(
+                'test_case', 'test_case__app_package', 'user'
+            ).get(id=execution_id)
+    return None
+
+
+def _requeue_suite_execution(execution, device):
+    """设备离线时把用例放回待执行状态，由其他设备重新执行"""
+    message = f'设备 {device.device_id} 离线，用例已重新分配'
+    execution.status = 'pending'
+    execution.result = None
+    execution.device = None
+    execution.started_at = None
+    execution.finished_at = None
+    execution.duration = 0
+    execution.progress = 0
+    execution.report_path = ''
+    execution.total_steps = 0
+    execution.passed_steps = 0
+    execution.failed_steps = 0
+    execution.error_message = message
+    execution.save()
+    send_execution_update(execution.id, status='pending', progress=0, message=message)
+
+
+def _finish_suite_shard(suite_id, run_id, execution_ids, scheduled_task_id=None, lease_id=None, abandon=False):
+    """
+    分片结束：最后一个结束的分片汇总套件结果，释放定时任务租约
+
+    只有批次号匹配且批次仍在执行时才计数，已结束或已被回收的批次中迟到的分片直接忽略；
+    abandon=True 时（回收整个批次）不再等待其余分片，直接汇总。
+    """
+    from django.db import transaction
+    from django.db.models import F
+    from .models import AppTestSuite, AppTestExecution
+
+    # 本批次已经结束（最后一个分片、被回收或迟到的分片）时释放租约
+    finished = True
+    try:
+        with transaction.atomic():
+            counted = AppTestSuite.objects.filter(id=suite_id, shard_run_id=run_id, active_shards__gt=0).update(
+                active_shards=0 if abandon else F('active_shards') - 1
+            )
+            if not counted:
+                logger.warning(f"套件 {suite_id} 的分片执行批次 {run_id} 已结束，忽略迟到的分片")
+                return
+            suite = AppTestSuite.objects.select_for_update().get(id=suite_id)
+            finished = suite.active_shards <= 0
+        if not finished:
+            return
+
+        # 设备池中的设备都已离线时，剩余的用例无法执行
+        AppTestExecution.objects.filter(id__in=execution_ids, status='pending').update(
+            status='error', result=None, error_message='设备池中没有可用设备执行该用例', finished_at=timezone.now()
+        )
+
+        executions = AppTestExecution.objects.filter(id__in=execution_ids)
+        passed = executions.filter(result='passed').count()
+        failed = executions.count() - passed
+        _complete_suite_run(suite, passed, failed, scheduled_task_id)
+
+    except Exception as e:
+        logger.error(f"汇总套件分片执行结果失败: {str(e)}", exc_info=True)
+    finally:
+        if finished and lease_id:
+            from apps.core.task_lease import release_lease
+            release_lease(lease_id)
+
+
+@shared_task
+def execute_app_suite_shard_task(suite_id, execution_ids, device_id, run_id, package_name=None, scheduled_task_id=None, lease_id=None):
+    """
+    多设备分片执行测试套件中的一个分片：在一台设备上循环认领并执行尚未执行的用例
+
+    Args:
+        suite_id: AppTestSuite 的 ID
+        execution_ids: 本次套件执行的 AppTestExecution ID 列表（按执行顺序）
+        device_id: AppDevice 的 ID
+        run_id: 分片执行批次号（AppTestSuite.shard_run_id）
+        package_name: 可选的应用包名覆盖
+        scheduled_task_id: 可选的定时任务 ID
+        lease_id: 可选的定时任务执行租约 ID，所有分片结束后释放
+    """
+    from django.conf import settings
+    from apps.core.heartbeat import Heartbeat
+    from .models import AppDevice, AppTestSuite, AppTestExecution
+    from .constants import DeviceStatus
+    from .managers.device_manager import DeviceManager
+    from .views.device_views import get_adb_path
+
+    def beat(now):
+        AppTestSuite.objects.filter(id=suite_id, shard_run_id=run_id, active_shards__gt=0).update(shard_heartbeat_at=now)
+        AppTestExecution.objects.filter(id__in=execution_ids, device_id=device_id, status='running').update(heartbeat_at=now)
+
+    device = None
+    locked = False
+    dropped = False
+    executed = 0
+
+    try:
+        if not AppTestSuite.objects.filter(id=suite_id, shard_run_id=run_id, active_shards__gt=0).exists():
+            logger.warning(f"套件 {suite_id} 的分片执行批次 {run_id} 已结束，分片不执行用例")
+            return
+        device = AppDevice.objects.get(id=device_id)
+        first = AppTestExecution.objects.filter(id__in=execution_ids).select_related('user').order_by('id').first()
+        user = first.user if first else None
+
+        if device.status == DeviceStatus.LOCKED and device.locked_by != user:
+            logger.warning(f"设备 {device.device_id} 已被其他用户锁定，分片不执行用例")
+            return
+        if device.status != DeviceStatus.LOCKED:
+            device.lock(user)
+        locked = True
+
+        manager = DeviceManager(adb_path=get_adb_path())
+        label = device.name or device.device_id
+        interval = getattr(settings, 'APP_SUITE_SHARD_HEARTBEAT_INTERVAL', 30)
+        with Heartbeat(beat, interval, name=f'suite-shard-{suite_id}-{device_id}'):
+            while True:
+                execution = _claim_suite_execution(execution_ids, device)
+                if execution is None:
+                    break
+                executed += 1
+                if _run_suite_case(execution, device, package_name, f'{label} 第 {executed} 个'):
+                    continue
+                if not manager.is_device_online(device.device_id):
+                    logger.warning(f"设备 {device.device_id} 已离线，用例 {execution.id} 重新分配给其他设备")
+                    _requeue_suite_execution(execution, device)
+                    dropped = True
+                    break
+
+        logger.info(f"套件分片结束: 套件 {suite_id}, 设备 {device.device_id}, 执行 {executed} 个用例")
+
+    except AppDevice.DoesNotExist:
+        logger.error(f"设备不存在: {device_id}")
+    except Exception as e:
+        logger.error(f"套件分片执行失败: {str(e)}", exc_info=True)
+    finally:
+        # 释放设备，已离线的设备标记为离线，不再被选入设备池
+        try:
+            if device and locked:
+                device.unlock()
+                if dropped:
+                    AppDevice.objects.filter(id=device.id).update(status=DeviceStatus.OFFLINE)
+                logger.info(f"设备已释放: {device.device_id}")
+        except Exception as e:
+            logger.error(f"释放设备失败: {str(e)}")
+        _finish_suite_shard(suite_id, run_id, execution_ids, scheduled_task_id, lease_id)
+
+
+@shared_task
+def recover_stale_suite_shards():
+    """
+    回收心跳超时的多设备分片执行
+
+    分片任务所在的 worker 被强制终止时不会执行 _finish_suite_shard，active_shards 不会减少，
+    认领的用例也一直停留在运行中。这里把超过 APP_SUITE_SHARD_HEARTBEAT_TIMEOUT 秒没有心跳的
+    运行中用例放回待执行状态，由仍在执行的分片重新认领；整个批次都没有心跳时（所有分片都已退出）
+    把运行中的用例标记为错误并按批次号汇总套件结果，之后迟到的分片不再计数。
+    分片计数只由分片自身或整批回收修改，单个用例的回收不计数，避免变慢的分片重复计数。
+    回收时不发送定时任务通知，定时任务租约由 SCHEDULER_LEASE_TIMEOUT 到期释放。
+    """
+    from datetime import timedelta
+    from django.conf import settings
+    from django.db.models import F, Q
+    from .models import AppTestSuite, AppTestExecution
+
+    timeout = getattr(settings, 'APP_SUITE_SHARD_HEARTBEAT_TIMEOUT', 180)
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=timeout)
+    message = f'分片执行心跳超时（超过 {timeout} 秒未更新），执行进程可能已退出'
+
+    def run_execution_ids(suite):
+        # 本次分片执行创建的用例记录
+        executions = AppTestExecution.objects.filter(test_suite_id=suite.id)
+        if suite.shard_started_at:
+            executions = executions.filter(created_at__gte=suite.shard_started_at)
+        return list(executions.order_by('id').values_list('id', flat=True))
+
+    # 单个分片退出：放回本批次的用例，其余分片继续执行
+    requeued = 0
+    stale_executions = AppTestExecution.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status='running', test_suite__active_shards__gt=0,
+        created_at__gte=F('test_suite__shard_started_at'),
+    )
+    for execution in stale_executions:
+        reset = AppTestExecution.objects.filter(id=execution.id, status='running', heartbeat_at=execution.heartbeat_at).update(
+            status='pending', device=None, started_at=None, heartbeat_at=None, progress=0, error_message=message
+        )
+        if not reset:
+            continue
+        requeued += 1
+        send_execution_update(execution.id, status='pending', progress=0, message=message)
+
+    # 整个批次没有心跳：所有分片都已退出
+    recovered_suites = 0
+    stale_suites = AppTestSuite.objects.filter(
+        Q(shard_heartbeat_at__lt=cutoff) | Q(shard_heartbeat_at__isnull=True, shard_started_at__lt=cutoff),
+        active_shards__gt=0,
+    )
+    for suite in stale_suites:
+        execution_ids = run_execution_ids(suite)
+        AppTestExecution.objects.filter(id__in=execution_ids, status='running').update(
+            status='error', result=None, error_message=message, finished_at=now
+        )
+        _finish_suite_shard(suite.id, suite.shard_run_id, execution_ids, abandon=True)
+        recovered_suites += 1
+
+    if requeued or recovered_suites:
+        logger.warning(f"已回收心跳超时的分片执行: 重新分配用例 {requeued} 个, 结束套件执行 {recovered_suites} 个")
+    return {'requeued': requeued, 'suites': recovered_suites}
 
 
 @shared_task
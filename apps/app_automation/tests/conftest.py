@@ -11,6 +11,18 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 django.setup()
 
 
+def pytest_sessionstart(session):
+    """会话开始时在后台预加载 OCR 模型（APP_OCR_WARMUP_LANGUAGES），与设备连接并行进行"""
+    if os.environ.get('APP_PERSISTENT_WORKER'):
+        # 常驻执行进程启动时已预加载，每个用例都重新预加载会刷新空闲时间，reader 永远不会被回收
+        return
+    try:
+        from apps.app_automation.utils.ocr_helper import warm_up_readers_in_background
+    except ImportError:
+        return
+    warm_up_readers_in_background()
+
+
 def pytest_addoption(parser):
     """添加命令行选项"""
     parser.addoption("--device-id", action="store", default=None, help="设备ID")
@@ -80,6 +80,14 @@ class TestAppFlow:
     @pytest.fixture(scope="class")
     def airtest(self, device_id, username):
         """Airtest 基础环境"""
+        if os.environ.get('APP_PERSISTENT_WORKER'):
+            # 常驻执行进程中复用设备连接，用例结束后不断开
+            airtest_base = AirtestBase.persistent(device_id=device_id, username=username)
+            if airtest_base is None:
+                pytest.fail("Airtest 环境设置失败")
+            yield airtest_base
+            return
+
         airtest_base = AirtestBase(device_id=device_id, username=username)
         
         # 设置环境
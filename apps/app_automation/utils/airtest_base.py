@@ -29,6 +29,9 @@ class AirtestBase:
         'FIND_TIMEOUT': 10,
         'CLICK_DELAY': 0.5,
     }
+
+    # 常驻执行进程中当前保持连接的设备
+    _persistent_device = None
     
     def __init__(self, device_id: Optional[str] = None, screenshots_dir: Optional[str] = None, username: Optional[str] = None):
         """
@@ -54,6 +57,24 @@ class AirtestBase:
         os.makedirs(self.screenshots_dir, exist_ok=True)
         logger.info(f"初始化AirtestBase实例，设备ID: {self.device_id}，截图目录: {self.screenshots_dir}")
     
+    @classmethod
+    def persistent(cls, device_id: Optional[str] = None, username: Optional[str] = None) -> Optional['AirtestBase']:
+        """
+        常驻执行进程中复用设备连接：设备已连接时直接返回，未连接或连接已断开时重新连接
+
+        Returns:
+            已连接设备的实例，连接失败返回 None
+        """
+        airtest_base = cls(device_id=device_id, username=username)
+        if cls._persistent_device == device_id and airtest_base.is_device_connected():
+            return airtest_base
+
+        if not airtest_base.setup_airtest():
+            cls._persistent_device = None
+            return None
+        cls._persistent_device = device_id
+        return airtest_base
+
     def setup_airtest(self, config: Optional[dict] = None) -> bool:
         """
         设置Airtest环境，连接设备
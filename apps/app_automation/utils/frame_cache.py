@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+图片匹配缓存 - 模板图片解码缓存与屏幕帧复用
+
+- TemplateCache: 单次执行内按 (图片路径, 修改时间, 阈值) 复用 Template，模板图片只解码一次
+- FrameBuffer: 短时间窗口内（APP_FRAME_REUSE_WINDOW 秒）连续的 exists / touch / OCR 复用同一帧截图，
+  点击、滑动、输入等改变屏幕的操作之后立即失效
+- locate: 基于 FrameBuffer 的 loop_find，语义与 Airtest 一致（超时前每隔 interval 秒重新截图匹配）
+"""
+import os
+import time
+import logging
+
+from airtest.core.api import G, Template
+from airtest.aircv import imread
+
+logger = logging.getLogger(__name__)
+
+
+class CachedTemplate(Template):
+    """只在首次匹配时读取并解码模板图片的 Template"""
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, **kwargs)
+        self._image = None
+
+    def _imread(self):
+        if self._image is None:
+            self._image = imread(self.filepath)
+        return self._image
+
+
+class TemplateCache:
+    """单次执行内的模板缓存，图片文件被替换（修改时间变化）后重新加载"""
+
+    def __init__(self):
+        self._templates = {}
+
+    def get(self, image_path: str, threshold: float = 0.7) -> Template:
+        key = (image_path, os.path.getmtime(image_path), threshold)
+        template = self._templates.get(key)
+        if template is None:
+            template = CachedTemplate(image_path, threshold=threshold)
+            self._templates[key] = template
+        return template
+
+    def clear(self):
+        self._templates.clear()
+
+
+class FrameBuffer:
+    """短时复用的设备截图"""
+
+    def __init__(self, max_age: float = 0.5):
+        """
+        Args:
+            max_age: 帧的最长复用时间（秒），0 表示每次都重新截图
+        """
+        self.max_age = max_age
+        self._frame = None
+        self._captured_at = 0.0
+        self._changed_at = 0.0
+
+    def grab(self, settle: float = 0):
+        """
+        获取当前屏幕帧
+
+        Args:
+            settle: 需要重新截图时，距离上一次屏幕操作至少等待的秒数（给界面留出刷新时间）
+        """
+        now = time.monotonic()
+        if self._frame is not None and now - self._captured_at <= self.max_age:
+            return self._frame
+
+        remaining = settle - (now - self._changed_at)
+        if remaining > 0:
+            time.sleep(remaining)
+
+        frame = G.DEVICE.snapshot()
+        if frame is None:
+            raise RuntimeError("截图失败，snapshot 返回 None")
+        self._frame = frame
+        self._captured_at = time.monotonic()
+        return frame
+
+    def invalidate(self):
+        """屏幕可能发生变化（点击、滑动、输入等操作之后），丢弃缓存的帧"""
+        self._frame = None
+        self._changed_at = time.monotonic()
+
+    def discard(self):
+        """丢弃缓存的帧，下次重新截图（用于轮询等待）"""
+        self._frame = None
+
+
+def locate(target: Template, frames: FrameBuffer, timeout: float, interval: float = 0.5):
+    """
+    在屏幕上查找模板，找到返回坐标，超时返回 None
+
+    与 Airtest 的 loop_find 相同：先匹配一次，未找到时每隔 interval 秒重新截图匹配直到超时。
+    """
+    start = time.monotonic()
+    while True:
+        pos = target.match_in(frames.grab())
+        if pos:
+            return pos
+        if time.monotonic() - start > timeout:
+            return None
+        frames.discard()
+        time.sleep(interval)
@@ -1,13 +1,24 @@
 # -*- coding: utf-8 -*-
 """
 OCR 工具类 - 基于 EasyOCR
+
+recognize_regions 对同一帧截图中的多个区域一次性识别：只截图一次，所有区域的裁剪图合并为一个批次交给
+EasyOCR（readtext_batched），识别结果按 (帧 hash, 区域) 存入 LRU 缓存，同一帧的相同区域不再重复识别。
+
+EasyOCR reader 由 ReaderRegistry 按语言集合分别创建和缓存，记录每个 reader 的模型内存占用，
+空闲超过 APP_OCR_READER_IDLE_TIMEOUT 秒或总内存超过 APP_OCR_READER_MAX_MEMORY_MB 时回收最久未用的 reader；
+有 reader 时后台线程每隔 APP_OCR_READER_SWEEP_INTERVAL 秒检查一次空闲超时，不依赖下一次 OCR 调用。
+warm_up_readers 在 pytest 执行进程（pytest_worker / conftest）启动时预加载 APP_OCR_WARMUP_LANGUAGES 配置的模型。
 """
+import gc
 import os
-import time
 import logging
 import hashlib
 import re
-from typing import Any, Dict, Optional, Tuple
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from functools import lru_cache
 
 import cv2
@@ -21,20 +32,174 @@ except ImportError:
     EASYOCR_AVAILABLE = False
 
 from airtest.core.api import G, sleep as airtest_sleep
+from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
 
+def _reader_memory(reader) -> int:
+    """估算 reader 的模型内存占用（检测模型和识别模型的参数与缓冲区字节数）"""
+    total = 0
+    for model in (getattr(reader, 'detector', None), getattr(reader, 'recognizer', None)):
+        if model is None:
+            continue
+        try:
+            for tensor in list(model.parameters()) + list(model.buffers()):
+                total += tensor.numel() * tensor.element_size()
+        except Exception:
+            pass
+    return total
+
+
+class ReaderRegistry:
+    """EasyOCR reader 注册表，按 (语言集合, 是否使用 GPU) 缓存 reader"""
+    
+    def __init__(self):
+        # key -> {'reader', 'memory', 'last_used'}，按最近使用排序
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweeper = None
+    
+    @staticmethod
+    def key(languages=None, use_gpu=False) -> Tuple:
+        return tuple(sorted(set(languages or ['en']))), bool(use_gpu)
+    
+    def get(self, languages=None, use_gpu=False):
+        """获取 reader，不存在时创建（同一时间只创建一个，避免并发重复加载模型）"""
+        key = self.key(languages, use_gpu)
+        with self._lock:
+            self._evict(keep=key)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {'reader': self._create(list(key[0]), use_gpu), 'memory': 0}
+                entry['memory'] = _reader_memory(entry['reader'])
+                self._entries[key] = entry
+                logger.info(
+                    f"EasyOCR reader 已加载 (语言: {list(key[0])}, GPU: {use_gpu})，"
+                    f"模型内存约 {entry['memory'] / 1024 / 1024:.1f}MB，当前共 {len(self._entries)} 个 reader"
+                )
+            entry['last_used'] = time.monotonic()
+            self._entries.move_to_end(key)
+            self._evict(keep=key)
+            self._start_sweeper()
+            return entry['reader']
+    
+    def _start_sweeper(self):
+        """启动定期回收空闲 reader 的后台线程（调用方持有锁）"""
+        if not getattr(settings, 'APP_OCR_READER_IDLE_TIMEOUT', 600):
+            return
+        if self._sweeper is None or not self._sweeper.is_alive():
+            self._sweeper = threading.Thread(target=self._sweep, name='ocr-reader-sweeper', daemon=True)
+            self._sweeper.start()
+    
+    def _sweep(self):
+        """定期回收空闲超时的 reader，全部回收后线程退出，下次加载 reader 时重新启动"""
+        interval = getattr(settings, 'APP_OCR_READER_SWEEP_INTERVAL', 60)
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                self._evict()
+                if not self._entries:
+                    self._sweeper = None
+                    return
+    
+    @staticmethod
+    def _create(languages, use_gpu):
+        if not EASYOCR_AVAILABLE:
+            raise ImportError("EasyOCR 未安装，请运行: pip install easyocr")
+        try:
+            logger.info(f"初始化 EasyOCR reader (语言: {languages}, GPU: {use_gpu})...")
+            logger.info("首次使用会下载模型，可能需要一些时间")
+            return easyocr.Reader(languages, gpu=use_gpu)
+        except Exception as e:
+            logger.error(f"EasyOCR 初始化失败: {e}")
+            raise
+    
+    def _evict(self, keep=None):
+        """回收空闲超时的 reader；总内存超过上限时从最久未用的开始回收（调用方持有锁）"""
+        idle_timeout = getattr(settings, 'APP_OCR_READER_IDLE_TIMEOUT', 600)
+        max_memory = getattr(settings, 'APP_OCR_READER_MAX_MEMORY_MB', 0) * 1024 * 1024
+        now = time.monotonic()
+        
+        evicted = []
+        for key, entry in list(self._entries.items()):
+            if key == keep or 'last_used' not in entry:
+                continue
+            over_memory = max_memory and self.total_memory() > max_memory
+            if over_memory or (idle_timeout and now - entry['last_used'] > idle_timeout):
+                self._entries.pop(key)
+                evicted.append(key)
+        
+        if evicted:
+            logger.info(f"回收 EasyOCR reader: {evicted}，剩余模型内存约 {self.total_memory() / 1024 / 1024:.1f}MB")
+            gc.collect()
+    
+    def total_memory(self) -> int:
+        return sum(entry['memory'] for entry in self._entries.values())
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """当前已加载的 reader 及其内存占用、空闲时间"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    'languages': list(key[0]),
+                    'use_gpu': key[1],
+                    'memory_mb': round(entry['memory'] / 1024 / 1024, 1),
+                    'idle_seconds': round(now - entry.get('last_used', now), 1),
+                }
+                for key, entry in self._entries.items()
+            ]
+
+
+reader_registry = ReaderRegistry()
+
+
+def parse_language_sets(value: str) -> List[List[str]]:
+    """解析语言集合配置，如 "en;ch_sim,en" -> [['en'], ['ch_sim', 'en']]"""
+    return [
+        [language.strip() for language in group.split(',') if language.strip()]
+        for group in (value or '').split(';') if group.strip()
+    ]
+
+
+def warm_up_readers(language_sets: Optional[List[List[str]]] = None, use_gpu=False):
+    """
+    预加载 OCR 模型，避免第一个 OCR 步骤在用例执行中加载模型
+
+    Args:
+        language_sets: 语言集合列表，默认读取 APP_OCR_WARMUP_LANGUAGES
+    """
+    if language_sets is None:
+        language_sets = parse_language_sets(getattr(settings, 'APP_OCR_WARMUP_LANGUAGES', ''))
+    if not language_sets or not EASYOCR_AVAILABLE:
+        return
+    
+    for languages in language_sets:
+        start = time.monotonic()
+        try:
+            reader_registry.get(languages, use_gpu)
+            logger.info(f"OCR 模型预加载完成 (语言: {languages})，耗时 {time.monotonic() - start:.1f}s")
+        except Exception as e:
+            logger.warning(f"OCR 模型预加载失败 (语言: {languages}): {e}")
+
+
+def warm_up_readers_in_background():
+    """在后台线程中预加载 OCR 模型，不阻塞进程启动；OCR 调用会等待正在加载的模型"""
+    if not parse_language_sets(getattr(settings, 'APP_OCR_WARMUP_LANGUAGES', '')):
+        return None
+    thread = threading.Thread(target=warm_up_readers, name='ocr-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
 class OCRHelper:
     """OCR 辅助类 - 提供图像文字识别功能"""
     
-    # OCR结果缓存：key为(坐标区域hash, 图片hash)，value为(识别结果, 时间戳)
-    _ocr_cache = {}
-    _cache_ttl = 2.0  # 缓存有效期2秒
-    _cache_max_size = 50  # 最大缓存条目数
-    
-    # EasyOCR reader实例（延迟初始化）
-    _easyocr_reader = None
+    # OCR结果 LRU 缓存：key 为 (帧/图片 hash, 区域, 最小置信度, reader)，value 为识别文本
+    _ocr_cache = OrderedDict()
+    _cache_max_size = 256  # 最大缓存条目数
+    _cache_lock = threading.Lock()
     
     def __init__(self, languages=None, use_gpu=False):
         """
@@ -50,11 +215,12 @@ class OCRHelper:
         
         self.languages = languages or ['en']
         self.use_gpu = use_gpu
+        self._reader_key = ReaderRegistry.key(self.languages, use_gpu)
     
     @classmethod
     def get_easyocr_reader(cls, languages=None, use_gpu=False):
         """
-        获取或创建EasyOCR reader实例（延迟初始化，单例模式）
+        获取或创建EasyOCR reader实例（按语言集合分别缓存，见 ReaderRegistry）
         
         Args:
             languages: 识别语言列表
@@ -63,20 +229,7 @@ class OCRHelper:
         Returns:
             easyocr.Reader 实例
         """
-        if not EASYOCR_AVAILABLE:
-            raise ImportError("EasyOCR 未安装，请运行: pip install easyocr")
-        
-        if cls._easyocr_reader is None:
-            try:
-                languages = languages or ['en']
-                logger.info(f"初始化 EasyOCR reader (语言: {languages}, GPU: {use_gpu})...")
-                logger.info("首次使用会下载模型，可能需要一些时间")
-                cls._easyocr_reader = easyocr.Reader(languages, gpu=use_gpu)
-                logger.info("EasyOCR reader 初始化完成")
-            except Exception as e:
-                logger.error(f"EasyOCR 初始化失败: {e}")
-                raise
-        return cls._easyocr_reader
+        return reader_registry.get(languages, use_gpu)
     
     @staticmethod
     def _get_image_hash(img) -> str:
@@ -96,30 +249,88 @@ class OCRHelper:
         return hashlib.md5(img_array.tobytes()).hexdigest()
     
     @classmethod
-    def _get_cache_key(cls, region: Tuple, img_hash: str) -> Tuple:
-        """生成缓存key"""
-        return (tuple(region), img_hash)
+    def _cache_get(cls, key: Tuple) -> Optional[str]:
+        with cls._cache_lock:
+            result = cls._ocr_cache.get(key)
+            if result is not None:
+                cls._ocr_cache.move_to_end(key)
+            return result
     
     @classmethod
-    def _clean_cache(cls):
-        """清理过期缓存"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, (_, timestamp) in cls._ocr_cache.items()
-            if current_time - timestamp > cls._cache_ttl
-        ]
-        for key in expired_keys:
-            cls._ocr_cache.pop(key, None)
+    def _cache_put(cls, key: Tuple, text: str):
+        with cls._cache_lock:
+            cls._ocr_cache[key] = text
+            cls._ocr_cache.move_to_end(key)
+            while len(cls._ocr_cache) > cls._cache_max_size:
+                cls._ocr_cache.popitem(last=False)
+    
+    @staticmethod
+    def _prepare_image(img) -> np.ndarray:
+        """图像预处理：转换为 RGB 数组，图片较小时放大以提高识别率"""
+        if isinstance(img, Image.Image):
+            # 转换为 RGB
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            
+            # 图片较小时放大以提高识别率
+            width, height = img.size
+            if width < 1000 or height < 200:
+                scale_factor = 2
+                img = img.resize(
+                    (width * scale_factor, height * scale_factor),
+                    Image.LANCZOS
+                )
+                logger.debug(f"图片放大 {scale_factor} 倍以提高识别率")
+            
+            return np.array(img)
+        
+        img_array = img
+        if len(img_array.shape) == 2:
+            # 灰度图转 RGB
+            img_array = np.stack([img_array] * 3, axis=-1)
+        return img_array
+    
+    @staticmethod
+    def _combine_results(results, min_confidence: float) -> str:
+        """提取置信度达标的文本，按从左到右排序后拼接"""
+        text_items = []
+        for (bbox, text, confidence) in results:
+            if float(confidence) >= min_confidence:
+                x_coord = bbox[0][0]  # 左上角的 x 坐标
+                text_items.append((x_coord, text, float(confidence)))
+                logger.debug(f"OCR: '{text}', 置信度: {confidence:.2f}, x: {x_coord:.1f}")
+        
+        # 按 x 坐标排序
+        text_items.sort(key=lambda x: x[0])
+        return ' '.join(item[1] for item in text_items).strip()
+    
+    @staticmethod
+    def _background_color(image: np.ndarray) -> List[int]:
+        """取图片四条边像素的中位数作为背景色"""
+        edges = np.concatenate([image[0], image[-1], image[:, 0], image[:, -1]])
+        return [int(channel) for channel in np.median(edges, axis=0)]
+    
+    def _read_batch(self, images: List[np.ndarray]) -> List[list]:
+        """
+        一次调用识别多张图片，返回每张图片的 readtext 结果
+        
+        尺寸不同的图片按最大宽高用各自的背景色填充（不缩放，不改变文字形状；复制边缘像素会把贴边的笔画
+        拉成长条），再交给 readtext_batched。
+        """
+        reader = self.get_easyocr_reader(self.languages, self.use_gpu)
+        if len(images) == 1 or not hasattr(reader, 'readtext_batched'):
+            return [reader.readtext(image) for image in images]
         
-        # 如果缓存仍然太大，删除最旧的条目
-        if len(cls._ocr_cache) > cls._cache_max_size:
-            sorted_items = sorted(
-                cls._ocr_cache.items(),
-                key=lambda x: x[1][1]  # 按时间戳排序
+        height = max(image.shape[0] for image in images)
+        width = max(image.shape[1] for image in images)
+        padded = [
+            cv2.copyMakeBorder(
+                image, 0, height - image.shape[0], 0, width - image.shape[1], cv2.BORDER_CONSTANT,
+                value=self._background_color(image)
             )
-            # 删除最旧的一半
-            for key, _ in sorted_items[:len(sorted_items)//2]:
-                cls._ocr_cache.pop(key, None)
+            for image in images
+        ]
+        return reader.readtext_batched(padded, n_width=width, n_height=height, batch_size=len(padded))
     
     def recognize_text(self, img, min_confidence=0.3, use_cache=True) -> str:
         """
@@ -138,71 +349,88 @@ class OCRHelper:
             return ""
         
         # 检查缓存
-        img_hash = None
         cache_key = None
         if use_cache:
-            img_hash = self._get_image_hash(img)
-            cache_key = (img_hash,)  # 简化的缓存键
-            if cache_key in self._ocr_cache:
-                result, timestamp = self._ocr_cache[cache_key]
-                if time.time() - timestamp < self._cache_ttl:
-                    logger.debug(f"使用缓存 OCR 结果: {result}")
-                    return result
+            cache_key = (self._get_image_hash(img), None, min_confidence, self._reader_key)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.debug(f"使用缓存 OCR 结果: {cached}")
+                return cached
         
         try:
-            reader = self.get_easyocr_reader(self.languages, self.use_gpu)
-            
-            # 图像预处理
-            if isinstance(img, Image.Image):
-                # 转换为 RGB
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # 图片较小时放大以提高识别率
-                width, height = img.size
-                if width < 1000 or height < 200:
-                    scale_factor = 2
-                    img = img.resize(
-                        (width * scale_factor, height * scale_factor),
-                        Image.LANCZOS
-                    )
-                    logger.debug(f"图片放大 {scale_factor} 倍以提高识别率")
-                
-                img_array = np.array(img)
-            else:
-                img_array = img
-                if len(img_array.shape) == 2:
-                    # 灰度图转 RGB
-                    img_array = np.stack([img_array] * 3, axis=-1)
-            
-            # EasyOCR 识别
-            results = reader.readtext(img_array)
-            
-            # 提取文本，按从左到右排序
-            text_items = []
-            for (bbox, text, confidence) in results:
-                if float(confidence) >= min_confidence:
-                    x_coord = bbox[0][0]  # 左上角的 x 坐标
-                    text_items.append((x_coord, text, float(confidence)))
-                    logger.debug(f"OCR: '{text}', 置信度: {confidence:.2f}, x: {x_coord:.1f}")
-            
-            # 按 x 坐标排序
-            text_items.sort(key=lambda x: x[0])
-            texts = [item[1] for item in text_items]
-            combined_text = ' '.join(texts)
+            results = self._read_batch([self._prepare_image(img)])[0]
+            combined_text = self._combine_results(results, min_confidence)
             
             # 缓存结果
-            if use_cache and cache_key:
-                self._ocr_cache[cache_key] = (combined_text, time.time())
-                self._clean_cache()
+            if cache_key:
+                self._cache_put(cache_key, combined_text)
             
             logger.info(f"OCR 识别结果: '{combined_text}'")
-            return combined_text.strip()
+            return combined_text
             
         except Exception as e:
             logger.error(f"OCR 识别失败: {e}")
             return ""
     
+    def recognize_regions(self, regions: Iterable[Tuple[int, int, int, int]], screenshot_path: Optional[str] = None,
+                          screen: Optional[np.ndarray] = None, min_confidence=0.3) -> Dict[Tuple, str]:
+        """
+        识别同一帧截图中多个区域的文本
+        
+        Args:
+            regions: 坐标元组 (x1, y1, x2, y2) 列表
+            screenshot_path: 截图文件路径（可选）
+            screen: 已获取的屏幕帧（BGR，可选，优先使用）
+            min_confidence: 最小置信度阈值
+            
+        Returns:
+            {区域: 识别出的文本}
+        """
+        regions = [tuple(region) for region in regions]
+        if not EASYOCR_AVAILABLE:
+            logger.error("EasyOCR 未安装，无法进行文字识别")
+            return {region: "" for region in regions}
+        
+        frame = self.capture_frame(screenshot_path, screen)
+        frame_hash = self._get_image_hash(frame)
+        
+        texts = {}
+        pending = []
+        for region in dict.fromkeys(regions):
+            cached = self._cache_get((frame_hash, region, min_confidence, self._reader_key))
+            if cached is not None:
+                logger.debug(f"使用缓存 OCR 结果: {region} -> {cached}")
+                texts[region] = cached
+            else:
+                pending.append(region)
+        
+        if pending:
+            try:
+                images = [self._prepare_image(self._crop(frame, region)) for region in pending]
+                for region, results in zip(pending, self._read_batch(images)):
+                    text = self._combine_results(results, min_confidence)
+                    self._cache_put((frame_hash, region, min_confidence, self._reader_key), text)
+                    texts[region] = text
+                    logger.info(f"OCR 识别结果: {region} -> '{text}'")
+            except Exception as e:
+                logger.error(f"OCR 识别失败: {e}")
+                for region in pending:
+                    texts[region] = ""
+        
+        return {region: texts[region] for region in regions}
+    
+    def recognize_regions_number(self, regions: Iterable[Tuple[int, int, int, int]],
+                                 screenshot_path: Optional[str] = None, screen: Optional[np.ndarray] = None,
+                                 allow_comma=True) -> Dict[Tuple, int]:
+        """
+        识别同一帧截图中多个区域的数字
+        
+        Returns:
+            {区域: 识别出的数字}
+        """
+        texts = self.recognize_regions(regions, screenshot_path, screen)
+        return {region: self.parse_number(text, allow_comma) for region, text in texts.items()}
+    
     def recognize_number(self, img, allow_comma=True, use_cache=True) -> int:
         """
         识别图片中的数字
@@ -215,8 +443,11 @@ class OCRHelper:
         Returns:
             识别出的数字（整数）
         """
-        text = self.recognize_text(img, use_cache=use_cache)
-        
+        return self.parse_number(self.recognize_text(img, use_cache=use_cache), allow_comma)
+    
+    @staticmethod
+    def parse_number(text: str, allow_comma=True) -> int:
+        """从 OCR 文本中提取数字"""
         # 常见字符替换
         text = text.replace('o', '0').replace('O', '0')  # o/O -> 0
         text = text.replace('l', '1').replace('I', '1')  # l/I -> 1
@@ -238,75 +469,94 @@ class OCRHelper:
             return 0
     
     @staticmethod
-    def crop_region(region: Tuple[int, int, int, int], screenshot_path: Optional[str] = None) -> Image.Image:
+    def capture_frame(screenshot_path: Optional[str] = None, screen: Optional[np.ndarray] = None) -> np.ndarray:
         """
-        裁剪屏幕指定区域
+        获取用于识别的屏幕帧（BGR）
         
         Args:
-            region: 坐标元组 (x1, y1, x2, y2)
-            screenshot_path: 截图文件路径（可选，如果不提供则实时截图）
-            
-        Returns:
-            裁剪后的 PIL Image
+            screenshot_path: 截图文件路径（可选）
+            screen: 已获取的屏幕帧（可选，优先使用）
         """
+        if screen is not None:
+            return screen
         if screenshot_path and os.path.exists(screenshot_path):
             # 从文件加载
-            img_cv = cv2.imread(screenshot_path)
-        else:
-            # 实时截图
-            airtest_sleep(0.3)
-            img_cv = G.DEVICE.snapshot()
-            if img_cv is None:
-                raise RuntimeError("截图失败，snapshot 返回 None")
+            return cv2.imread(screenshot_path)
         
-        # 裁剪
+        # 实时截图
+        airtest_sleep(0.3)
+        img_cv = G.DEVICE.snapshot()
+        if img_cv is None:
+            raise RuntimeError("截图失败，snapshot 返回 None")
+        return img_cv
+    
+    @staticmethod
+    def _crop(frame: np.ndarray, region: Tuple[int, int, int, int]) -> Image.Image:
+        """裁剪区域并增强对比度"""
         x1, y1, x2, y2 = region
-        cropped = img_cv[y1:y2, x1:x2]
+        cropped = frame[y1:y2, x1:x2]
         
         # 转换为 PIL Image
         pil_img = Image.fromarray(cv2.cvtColor(cropped, cv2.COLOR_BGR2RGB))
         
         # 增强对比度
-        pil_img = ImageEnhance.Contrast(pil_img).enhance(2.0)
+        return ImageEnhance.Contrast(pil_img).enhance(2.0)
+    
+    @classmethod
+    def crop_region(cls, region: Tuple[int, int, int, int], screenshot_path: Optional[str] = None,
+                    screen: Optional[np.ndarray] = None) -> Image.Image:
+        """
+        裁剪屏幕指定区域
         
-        return pil_img
+        Args:
+            region: 坐标元组 (x1, y1, x2, y2)
+            screenshot_path: 截图文件路径（可选，如果不提供则实时截图）
+            screen: 已获取的屏幕帧（BGR，可选，优先使用）
+            
+        Returns:
+            裁剪后的 PIL Image
+        """
+        return cls._crop(cls.capture_frame(screenshot_path, screen), region)
     
-    def recognize_region_text(self, region: Tuple[int, int, int, int], screenshot_path: Optional[str] = None) -> str:
+    def recognize_region_text(self, region: Tuple[int, int, int, int], screenshot_path: Optional[str] = None,
+                              screen: Optional[np.ndarray] = None) -> str:
         """
         识别屏幕指定区域的文本
         
         Args:
             region: 坐标元组 (x1, y1, x2, y2)
             screenshot_path: 截图文件路径（可选）
+            screen: 已获取的屏幕帧（可选，多次识别复用同一帧截图）
             
         Returns:
             识别出的文本
         """
-        img = self.crop_region(region, screenshot_path)
-        return self.recognize_text(img)
+        region = tuple(region)
+        return self.recognize_regions([region], screenshot_path, screen)[region]
     
-    def recognize_region_number(self, region: Tuple[int, int, int, int], screenshot_path: Optional[str] = None) -> int:
+    def recognize_region_number(self, region: Tuple[int, int, int, int], screenshot_path: Optional[str] = None,
+                                screen: Optional[np.ndarray] = None) -> int:
         """
         识别屏幕指定区域的数字
         
         Args:
             region: 坐标元组 (x1, y1, x2, y2)
             screenshot_path: 截图文件路径（可选）
+            screen: 已获取的屏幕帧（可选，多次识别复用同一帧截图）
             
         Returns:
             识别出的数字
         """
-        img = self.crop_region(region, screenshot_path)
-        return self.recognize_number(img)
+        return self.parse_number(self.recognize_region_text(region, screenshot_path, screen))
 
 
-# 全局单例实例
-_ocr_helper_instance = None
+# 全局实例，按语言集合区分
+_ocr_helper_instances: Dict[Tuple, OCRHelper] = {}
 
 
 def get_ocr_helper(languages=None, use_gpu=False) -> OCRHelper:
     """
-    获取全局 OCR Helper 单例实例
+    获取指定语言集合的全局 OCR Helper 实例
     
     Args:
         languages: OCR 识别语言列表
@@ -315,7 +565,8 @@ def get_ocr_helper(languages=None, use_gpu=False) -> OCRHelper:
     Returns:
         OCRHelper 实例
     """
-    global _ocr_helper_instance
-    if _ocr_helper_instance is None:
-        _ocr_helper_instance = OCRHelper(languages=languages, use_gpu=use_gpu)
-    return _ocr_helper_instance
+    key = ReaderRegistry.key(languages, use_gpu)
+    helper = _ocr_helper_instances.get(key)
+    if helper is None:
+        helper = _ocr_helper_instances.setdefault(key, OCRHelper(languages=languages, use_gpu=use_gpu))
+    return helper
@@ -39,7 +39,7 @@ class AppScheduledTaskViewSet(viewsets.ModelViewSet):
     def pause(self, request, pk=None):
         task = self.get_object()
         task.status = 'PAUSED'
-        task.save(update_fields=['status'])
+        task.save(update_fields=['status', 'updated_at'])
         return Response({'success': True, 'message': '任务已暂停'})
 
     @action(detail=True, methods=['post'])
@@ -47,7 +47,7 @@ class AppScheduledTaskViewSet(viewsets.ModelViewSet):
         task = self.get_object()
         task.status = 'ACTIVE'
         task.next_run_time = task.calculate_next_run()
-        task.save(update_fields=['status', 'next_run_time'])
+        task.save(update_fields=['status', 'next_run_time', 'updated_at'])
         return Response({'success': True, 'message': '任务已恢复'})
 
     @action(detail=True, methods=['post'])
@@ -56,6 +56,9 @@ class AppScheduledTaskViewSet(viewsets.ModelViewSet):
         task = self.get_object()
 
         try:
+            if task.task_type == 'TEST_SUITE' and task.test_suite and task.device_tags:
+                return self._run_sharded_now(request, task)
+
             if not task.device:
                 return Response({'success': False, 'message': '该任务未配置执行设备'},
                                 status=status.HTTP_400_BAD_REQUEST)
@@ -150,6 +153,42 @@ class AppScheduledTaskViewSet(viewsets.ModelViewSet):
             return Response({'success': False, 'message': f'执行失败: {str(e)}'},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _run_sharded_now(self, request, task):
+        """立即在设备池（device_tags）上分片执行套件任务"""
+        from ..tasks import select_device_pool, start_sharded_suite_run
+
+        suite = task.test_suite
+        if not suite.suite_cases.exists():
+            return Response({'success': False, 'message': '测试套件没有用例'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        devices = select_device_pool(user=request.user, tags=task.device_tags)
+        if not devices:
+            return Response({'success': False, 'message': '设备池中没有可用设备'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        package_name = task.app_package.package_name if task.app_package else ''
+        executions = start_sharded_suite_run(
+            suite, devices, request.user,
+            package_name=package_name,
+            scheduled_task_id=task.id,
+        )
+        if executions is None:
+            return Response({'success': False, 'message': '该套件正在多设备分片执行中'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # 更新统计
+        task.last_run_time = timezone.now()
+        task.total_runs += 1
+        task.next_run_time = task.calculate_next_run()
+        task.save()
+
+        return Response({
+            'success': True,
+            'message': f'测试套件开始在 {len(devices)} 台设备上分片执行，共 {len(executions)} 个用例',
+            'data': {'test_case_count': len(executions), 'devices': [d.device_id for d in devices]}
+        })
+
 
 class AppNotificationLogViewSet(viewsets.ReadOnlyModelViewSet):
     """APP通知日志视图集（只读）"""
@@ -148,13 +148,23 @@ class AppTestSuiteViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def run(self, request, pk=None):
-        """执行测试套件（顺序执行所有用例）"""
+        """
+        执行测试套件
+
+        - device_id：在一台设备上顺序执行所有用例
+        - device_ids / device_tags / capabilities：在符合条件的设备池上分片执行，
+          每台设备一个 Celery 任务，从同一批用例中依次认领执行
+        """
         suite = self.get_object()
         device_id = request.data.get('device_id')
         package_name = request.data.get('package_name')
+        device_ids = request.data.get('device_ids') or []
+        device_tags = request.data.get('device_tags') or []
+        capabilities = request.data.get('capabilities') or {}
+        sharded = bool(device_ids or device_tags or capabilities)
 
-        if not device_id:
-            return Response({'success': False, 'message': '请选择执行设备'},
+        if not device_id and not sharded:
+            return Response({'success': False, 'message': '请选择执行设备或设备池'},
                             status=status.HTTP_400_BAD_REQUEST)
 
         # 检查套件是否包含用例
@@ -163,6 +173,9 @@ class AppTestSuiteViewSet(viewsets.ModelViewSet):
             return Response({'success': False, 'message': '该套件未包含任何测试用例'},
                             status=status.HTTP_400_BAD_REQUEST)
 
+        if sharded:
+            return self._run_sharded(request, suite, package_name, device_ids, device_tags, capabilities)
+
         try:
             device = AppDevice.objects.get(device_id=device_id)
             if device.status == 'locked' and device.locked_by != request.user:
@@ -223,6 +236,47 @@ class AppTestSuiteViewSet(viewsets.ModelViewSet):
             return Response({'success': False, 'message': f'执行失败: {str(e)}'},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _run_sharded(self, request, suite, package_name, device_ids, device_tags, capabilities):
+        """在设备池上分片执行测试套件"""
+        from ..tasks import select_device_pool, start_sharded_suite_run
+
+        devices = select_device_pool(
+            user=request.user, tags=device_tags, capabilities=capabilities, device_ids=device_ids
+        )
+        if not devices:
+            return Response({'success': False, 'message': '没有符合条件的可用设备'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            executions = start_sharded_suite_run(suite, devices, request.user, package_name=package_name)
+            if executions is None:
+                return Response({'success': False, 'message': '该套件正在多设备分片执行中'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            execution_ids = [e.id for e in executions]
+
+            logger.info(f"测试套件已提交分片执行: suite={suite.name}, "
+                        f"cases={len(executions)}, devices={len(devices)}")
+
+            return Response({
+                'success': True,
+                'message': f'测试套件已提交到 {len(devices)} 台设备分片执行，共 {len(executions)} 个用例',
+                'data': {
+                    'suite_id': suite.id,
+                    'execution_ids': execution_ids,
+                    'test_case_count': len(executions),
+                    'devices': [d.device_id for d in devices],
+                }
+            })
+
+        except Exception as e:
+            logger.error(f"执行套件失败: {str(e)}", exc_info=True)
+            # 只结束本次请求占用的批次，不影响其他请求发起的执行
+            AppTestSuite.objects.filter(id=suite.id, shard_run_id=suite.shard_run_id).update(
+                execution_status='error', active_shards=0
+            )
+            return Response({'success': False, 'message': f'执行失败: {str(e)}'},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
     @action(detail=True, methods=['get'])
     def executions(self, request, pk=None):
         """获取套件的执行历史"""
@@ -0,0 +1,41 @@
+"""
+执行心跳
+
+长时间运行的执行任务在后台线程中定时刷新执行记录的心跳时间，周期任务据此把心跳超时
+（执行进程崩溃、worker 被强制终止）仍为运行中的记录回收。
+"""
+import logging
+import threading
+
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class Heartbeat:
+    """执行期间在后台线程中每隔 interval 秒调用一次 beat(now) 刷新心跳"""
+
+    def __init__(self, beat, interval, name='heartbeat'):
+        self._beat = beat
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def _run(self):
+        try:
+            while not self._stopped.wait(self._interval):
+                try:
+                    self._beat(timezone.now())
+                except Exception as e:
+                    logger.warning(f"刷新心跳失败: {str(e)}")
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
@@ -0,0 +1,67 @@
+"""
+Django管理命令：把 UI 用例执行记录中以 base64 保存的截图迁移到媒体存储
+用法：python manage.py migrate_ui_screenshots [--batch-size 100] [--dry-run]
+"""
+from django.core.management.base import BaseCommand
+
+from apps.ui_automation.models import TestCaseExecution
+from apps.ui_automation.screenshot_store import DATA_URL_PREFIX, store_screenshot_entries
+
+
+class Command(BaseCommand):
+    help = '把 UI 用例执行记录中的 base64 截图写入媒体存储，数据库只保留文件引用'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='每批读取的执行记录数，默认100'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='只统计需要迁移的记录，不写入'
+        )
+
+    @staticmethod
+    def _has_inline_screenshot(screenshots):
+        return any(
+            isinstance(entry, dict) and str(entry.get('url') or '').startswith(DATA_URL_PREFIX)
+            for entry in screenshots or []
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        self.stdout.write(self.style.SUCCESS('开始迁移UI截图...'))
+
+        migrated = 0
+        last_id = 0
+        while True:
+            # 按主键分批读取，每批只取 id 和截图字段，避免一次加载全部大字段
+            batch = list(
+                TestCaseExecution.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'screenshots')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            for execution in batch:
+                if not self._has_inline_screenshot(execution.screenshots):
+                    continue
+                migrated += 1
+                if dry_run:
+                    continue
+                execution.screenshots = store_screenshot_entries(execution.screenshots)
+                execution.save(update_fields=['screenshots'])
+
+            self.stdout.write(f'  已检查到 ID {last_id}，累计 {migrated} 条记录包含 base64 截图')
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f'试运行：共 {migrated} 条记录需要迁移'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'迁移完成：共迁移 {migrated} 条记录'))
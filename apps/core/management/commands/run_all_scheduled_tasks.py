@@ -1,8 +1,10 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 import time
 import logging
-import sys
+
+from apps.core.task_lease import CLAIMED, QUEUED, SKIPPED, claim_task, release_lease
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +17,7 @@ class Command(BaseCommand):
             '--interval',
             type=int,
             default=60,
-            help='检查间隔（秒），默认60秒'
+            help='任务表变更检查间隔（秒），默认60秒；到期任务按下次运行时间准时触发，不受此间隔影响'
         )
         parser.add_argument(
             '--once',
@@ -27,38 +29,58 @@ class Command(BaseCommand):
         interval = options['interval']
         run_once = options['once']
 
+        from apps.api_testing.models import ScheduledTask
+        from apps.ui_automation.models import UiScheduledTask
+        from apps.app_automation.models import AppScheduledTask
+        from apps.core.schedule_index import DueTaskIndex
+
+        self.index = index = DueTaskIndex({
+            'api': ScheduledTask,
+            'ui': UiScheduledTask,
+            'app': AppScheduledTask,
+        })
+        index.watch()
+
         self.stdout.write(self.style.SUCCESS(f"{'='*60}"))
         self.stdout.write(self.style.SUCCESS("启动统一定时任务调度器"))
-        self.stdout.write(self.style.SUCCESS(f"检查间隔: {interval}秒"))
+        self.stdout.write(self.style.SUCCESS(f"变更检查间隔: {interval}秒（任务按下次运行时间准时触发）"))
         self.stdout.write(self.style.SUCCESS(f"调度模块: API测试 + UI自动化 + APP自动化"))
         self.stdout.write(self.style.SUCCESS(f"{'='*60}"))
 
         while True:
             try:
-                now = timezone.now()
-                self.stdout.write(f"\n[{now.strftime('%Y-%m-%d %H:%M:%S')}] 开始检查任务...")
+                if index.refresh():
+                    next_due = index.next_due()
+                    next_text = timezone.localtime(next_due).strftime('%Y-%m-%d %H:%M:%S') if next_due else '无'
+                    self.stdout.write(f"\n[{timezone.localtime().strftime('%Y-%m-%d %H:%M:%S')}] 任务索引已更新: "
+                                      f"待调度任务 {len(index)} 个, 最近一次运行时间: {next_text}")
+
+                due = index.pop_due()
+                if due:
+                    now = timezone.now()
+                    self.stdout.write(f"\n[{timezone.localtime(now).strftime('%Y-%m-%d %H:%M:%S')}] 开始执行到期任务...")
 
-                # 调度 API 测试模块的定时任务
-                api_count = self.schedule_api_tasks()
+                    # 调度 API 测试模块的定时任务
+                    api_count = self.schedule_api_tasks(due.get('api', []))
 
-                # 调度 UI 自动化模块的定时任务
-                ui_count = self.schedule_ui_tasks()
+                    # 调度 UI 自动化模块的定时任务
+                    ui_count = self.schedule_ui_tasks(due.get('ui', []))
 
-                # 调度 APP 自动化模块的定时任务
-                app_count = self.schedule_app_tasks()
+                    # 调度 APP 自动化模块的定时任务
+                    app_count = self.schedule_app_tasks(due.get('app', []))
 
-                total_count = api_count + ui_count + app_count
-                if total_count > 0:
+                    total_count = api_count + ui_count + app_count
                     self.stdout.write(self.style.SUCCESS(f"✓ 本次调度执行了 {total_count} 个任务 (API: {api_count}, UI: {ui_count}, APP: {app_count})"))
-                else:
+                elif run_once:
                     self.stdout.write("  没有需要执行的任务")
 
                 if run_once:
                     self.stdout.write(self.style.WARNING("单次执行模式，调度器退出"))
                     break
 
-                self.stdout.write(f"等待 {interval} 秒后进行下一次检查...")
-                time.sleep(interval)
+                # 休眠到最近一个任务到期，最长 interval 秒后检查一次任务表变更；本进程内任务变更时提前唤醒
+                wait = index.seconds_until_next()
+                index.changed.wait(interval if wait is None else min(wait, interval))
 
             except KeyboardInterrupt:
                 self.stdout.write(self.style.WARNING("\n\n调度器已停止"))
@@ -71,32 +93,41 @@ class Command(BaseCommand):
                 self.stdout.write(f"等待 {interval} 秒后重试...")
                 time.sleep(interval)
 
-    def schedule_api_tasks(self):
-        """调度 API 测试模块的定时任务"""
+    def _claim(self, module, label, task):
+        """认领到期任务，返回执行租约；按重叠策略不执行或已被其他调度器触发时返回 None"""
+        status, lease = claim_task(module, task)
+        if status in (CLAIMED, SKIPPED):
+            # next_run_time 由条件 UPDATE 推进，不会触发 post_save，需要直接更新索引
+            self.index.reschedule(module, task.id, task.next_run_time)
+        if status == CLAIMED:
+            return lease
+        if status == SKIPPED:
+            self.stdout.write(f"  {label} 跳过任务: {task.name}（上一次执行尚未结束）")
+        elif status == QUEUED:
+            self.index.defer(module, task.id, getattr(settings, 'SCHEDULER_QUEUE_RETRY_INTERVAL', 15))
+            self.stdout.write(f"  {label} 任务 {task.name} 上一次执行尚未结束，排队等待")
+        else:
+            self.stdout.write(f"  {label} 任务 {task.name} 已由其他调度器触发")
+        return None
+
+    def schedule_api_tasks(self, task_ids):
+        """执行 API 测试模块中到期的定时任务"""
+        if not task_ids:
+            return 0
         try:
             from apps.api_testing.models import ScheduledTask
-            from apps.api_testing.views import ScheduledTaskViewSet
+            from apps.api_testing.tasks import dispatch_scheduled_task
 
-            # 获取所有活跃的定时任务
-            active_tasks = ScheduledTask.objects.filter(status='ACTIVE')
+            # 索引中到期的任务，执行前仍按数据库中的最新状态确认
+            active_tasks = ScheduledTask.objects.filter(status='ACTIVE', id__in=task_ids)
             executed_count = 0
 
-            # 显示所有活跃任务的调试信息
-            if active_tasks.exists():
-                now = timezone.now()
-                self.stdout.write(f"  [API] 活跃任务数: {active_tasks.count()}")
-                for task in active_tasks:
-                    if task.next_run_time:
-                        time_diff = (task.next_run_time - now).total_seconds()
-                        if time_diff > 0:
-                            self.stdout.write(f"        - {task.name}: 距下次执行还有 {int(time_diff)} 秒")
-                        else:
-                            self.stdout.write(f"        - {task.name}: 应该立即执行！")
-                    else:
-                        self.stdout.write(f"        - {task.name}: 未设置下次执行时间")
-
             for task in active_tasks:
                 if task.should_run_now():
+                    lease = self._claim('api', '[API]', task)
+                    if lease is None:
+                        continue
+                    handed_off = False
                     self.stdout.write(f"  [API] 执行任务: {task.name}")
                     self.stdout.write(f"       类型: {task.get_task_type_display() if hasattr(task, 'get_task_type_display') else task.task_type}, 触发方式: {task.get_trigger_type_display() if hasattr(task, 'get_trigger_type_display') else task.trigger_type}")
                     try:
@@ -107,9 +138,9 @@ class Command(BaseCommand):
                             status='PENDING'
                         )
 
-                        # 调用任务执行方法
-                        view = ScheduledTaskViewSet()
-                        view._execute_task_async(task, execution_log)
+                        # 投递到 API 执行队列，执行结束后由 worker 释放租约
+                        dispatch_scheduled_task(execution_log, lease_id=lease.id)
+                        handed_off = True
 
                         executed_count += 1
                         self.stdout.write(self.style.SUCCESS(f"    ✓ 任务 {task.name} 已启动"))
@@ -117,6 +148,9 @@ class Command(BaseCommand):
                     except Exception as e:
                         logger.error(f"执行API任务 {task.name} 时出错: {e}", exc_info=True)
                         self.stdout.write(self.style.ERROR(f"    ✗ 任务 {task.name} 执行失败: {e}"))
+                    finally:
+                        if not handed_off:
+                            release_lease(lease.id)
 
             return executed_count
 
@@ -125,31 +159,23 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f"[API] 调度失败: {e}"))
             return 0
 
-    def schedule_ui_tasks(self):
-        """调度 UI 自动化模块的定时任务"""
+    def schedule_ui_tasks(self, task_ids):
+        """执行 UI 自动化模块中到期的定时任务"""
+        if not task_ids:
+            return 0
         try:
             from apps.ui_automation.models import UiScheduledTask
 
-            # 获取所有活跃的定时任务
-            active_tasks = UiScheduledTask.objects.filter(status='ACTIVE')
+            # 索引中到期的任务，执行前仍按数据库中的最新状态确认
+            active_tasks = UiScheduledTask.objects.filter(status='ACTIVE', id__in=task_ids)
             executed_count = 0
 
-            # 显示所有活跃任务的调试信息
-            if active_tasks.exists():
-                now = timezone.now()
-                self.stdout.write(f"  [UI]  活跃任务数: {active_tasks.count()}")
-                for task in active_tasks:
-                    if task.next_run_time:
-                        time_diff = (task.next_run_time - now).total_seconds()
-                        if time_diff > 0:
-                            self.stdout.write(f"        - {task.name}: 距下次执行还有 {int(time_diff)} 秒")
-                        else:
-                            self.stdout.write(f"        - {task.name}: 应该立即执行！")
-                    else:
-                        self.stdout.write(f"        - {task.name}: 未设置下次执行时间")
-
             for task in active_tasks:
                 if task.should_run_now():
+                    lease = self._claim('ui', '[UI] ', task)
+                    if lease is None:
+                        continue
+                    handed_off = False
                     self.stdout.write(f"  [UI]  执行任务: {task.name}")
                     self.stdout.write(f"       类型: {task.get_task_type_display()}, 触发方式: {task.get_trigger_type_display()}")
                     try:
@@ -185,119 +211,14 @@ class Command(BaseCommand):
                             test_suite.execution_status = 'running'
                             test_suite.save()
 
-                            # 在后台线程中执行测试
-                            import threading
-                            from apps.ui_automation.test_executor import TestExecutor
-
-                            def run_test():
-                                try:
-                                    executor = TestExecutor(
-                                        test_suite=test_suite,
-                                        engine=task.engine,
-                                        browser=task.browser,
-                                        headless=task.headless,
-                                        executed_by=task.created_by
-                                    )
-                                    executor.run()
-
-                                    # 测试完成后，重新加载任务并更新结果和下次运行时间
-                                    task.refresh_from_db()
-                                    task.successful_runs += 1
-                                    task.last_result = {
-                                        'status': 'success',
-                                        'test_case_count': test_case_count
-                                    }
-                                    # 重新计算下次运行时间
-                                    task.next_run_time = task.calculate_next_run()
-                                    task.save()
-
-                                    logger.info(f"UI定时任务 {task.name} 执行成功")
-
-                                    # 发送成功通知
-                                    print("       === 开始检查发送成功通知 ===")
-                                    notification_setting = None
-                                    if hasattr(task, 'notification_settings'):
-                                        try:
-                                            notification_setting = task.notification_settings.first()
-                                            print(f"       获取到通知设置: {notification_setting}")
-                                            if notification_setting:
-                                                print(f"       通知设置详情 - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 成功通知: {notification_setting.notify_on_success}")
-                                            else:
-                                                print("       没有找到通知设置")
-                                        except Exception as e:
-                                            print(f"       获取任务通知设置时出错: {e}", file=sys.stderr)
-                                            import traceback
-                                            traceback.print_exc()
-                                    else:
-                                        print("       任务没有notification_settings属性")
-
-                                    if notification_setting and notification_setting.is_enabled:
-                                        print("       通知设置已启用，准备发送成功通知")
-                                        if notification_setting.notify_on_success:
-                                            print("       调用 _send_task_notification 方法发送成功通知")
-                                            try:
-                                                from apps.ui_automation.views import UiScheduledTaskViewSet
-                                                viewset = UiScheduledTaskViewSet()
-                                                viewset._send_task_notification(task, success=True)
-                                                print("       ✓ 成功通知已发送")
-                                            except Exception as e:
-                                                print(f"       ✗ 发送UI定时任务 {task.name} 成功通知失败: {e}", file=sys.stderr)
-                                        else:
-                                            print("       通知设置中未启用成功通知")
-                                    else:
-                                        print("       通知设置未启用或不存在，跳过成功通知")
-                                    print("       === 结束检查发送成功通知 ===")
-
-                                except Exception as e:
-                                    logger.error(f"UI定时任务 {task.name} 执行失败: {e}", exc_info=True)
-                                    task.refresh_from_db()
-                                    task.failed_runs += 1
-                                    task.error_message = str(e)
-                                    task.last_result = {
-                                        'status': 'failed',
-                                        'error': str(e)
-                                    }
-                                    # 即使失败也要重新计算下次运行时间
-                                    task.next_run_time = task.calculate_next_run()
-                                    task.save()
-
-                                    # 发送失败通知
-                                    print("       === 开始检查发送失败通知 ===")
-                                    notification_setting = None
-                                    if hasattr(task, 'notification_settings'):
-                                        try:
-                                            notification_setting = task.notification_settings.first()
-                                            print(f"       获取到通知设置（失败情况）: {notification_setting}")
-                                            if notification_setting:
-                                                print(f"       通知设置详情（失败情况） - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 失败通知: {notification_setting.notify_on_failure}")
-                                            else:
-                                                print("       没有找到通知设置（失败情况）")
-                                        except Exception as notify_error:
-                                            print(f"       获取任务通知设置时出错（失败情况）: {notify_error}", file=sys.stderr)
-                                            import traceback
-                                            traceback.print_exc()
-                                    else:
-                                        print("       任务没有notification_settings属性（失败情况）")
-
-                                    if notification_setting and notification_setting.is_enabled:
-                                        print("       通知设置已启用，准备发送失败通知")
-                                        if notification_setting.notify_on_failure:
-                                            print("       调用 _send_task_notification 方法发送失败通知")
-                                            try:
-                                                from apps.ui_automation.views import UiScheduledTaskViewSet
-                                                viewset = UiScheduledTaskViewSet()
-                                                viewset._send_task_notification(task, success=False)
-                                                print("       ✓ 失败通知已发送")
-                                            except Exception as notify_error:
-                                                print(f"       ✗ 发送UI定时任务 {task.name} 失败通知失败: {notify_error}", file=sys.stderr)
-                                        else:
-                                            print("       通知设置中未启用失败通知")
-                                    else:
-                                        print("       通知设置未启用或不存在，跳过失败通知")
-                                    print("       === 结束检查发送失败通知 ===")
-
-                            thread = threading.Thread(target=run_test, daemon=True)
-                            thread.start()
+                            # 投递到 UI 执行 worker，执行结束后由 worker 释放租约
+                            from apps.ui_automation.tasks import dispatch_ui_task, execute_ui_suite_task
+                            dispatch_ui_task(
+                                execute_ui_suite_task, task.browser,
+                                test_suite.id, task.engine, task.browser, task.headless,
+                                task.created_by_id, task.id, lease.id
+                            )
+                            handed_off = True
 
                         elif task.task_type == 'TEST_CASE':
                             # 执行单个或多个测试用例
@@ -324,157 +245,10 @@ class Command(BaseCommand):
                             test_case_count = test_cases_list.count()
                             self.stdout.write(f"    准备执行 {test_case_count} 个测试用例")
 
-                            # 为每个测试用例创建一个临时的测试套件来执行
-                            import threading
-                            from apps.ui_automation.models import TestSuite
-                            from apps.ui_automation.test_executor import TestExecutor
-
-                            def run_test_cases():
-                                success_count = 0
-                                failed_count = 0
-                                results = []
-
-                                for test_case in test_cases_list:
-                                    temp_suite = None
-                                    try:
-                                        # 创建临时测试套件
-                                        temp_suite = TestSuite.objects.create(
-                                            project=task.project,
-                                            name=f"[临时] {test_case.name}"
-                                        )
-
-                                        # 添加测试用例到临时套件
-                                        temp_suite.test_cases.add(test_case)
-
-                                        # 更新套件执行状态
-                                        temp_suite.execution_status = 'running'
-                                        temp_suite.save()
-
-                                        # 使用 TestExecutor 执行
-                                        executor = TestExecutor(
-                                            test_suite=temp_suite,
-                                            engine=task.engine,
-                                            browser=task.browser,
-                                            headless=task.headless,
-                                            executed_by=task.created_by
-                                        )
-                                        executor.run()
-
-                                        # 检查执行结果
-                                        temp_suite.refresh_from_db()
-                                        suite_executions = temp_suite.executions.all()
-
-                                        if suite_executions.exists():
-                                            last_execution = suite_executions.first()
-
-                                            if last_execution.status == 'SUCCESS':
-                                                success_count += 1
-                                                results.append({
-                                                    'case_id': test_case.id,
-                                                    'case_name': test_case.name,
-                                                    'status': 'success'
-                                                })
-                                            else:
-                                                failed_count += 1
-                                                results.append({
-                                                    'case_id': test_case.id,
-                                                    'case_name': test_case.name,
-                                                    'status': 'failed',
-                                                    'error': last_execution.error_message
-                                                })
-
-                                    except Exception as e:
-                                        logger.error(f"执行测试用例 {test_case.name} 失败: {e}")
-                                        failed_count += 1
-                                        results.append({
-                                            'case_id': test_case.id,
-                                            'case_name': test_case.name,
-                                            'status': 'failed',
-                                            'error': str(e)
-                                        })
-                                    finally:
-                                        # 删除临时测试套件
-                                        if temp_suite:
-                                            temp_suite.delete()
-
-                                # 更新任务执行结果
-                                task.refresh_from_db()
-                                task.successful_runs += 1
-                                task.last_result = {
-                                    'status': 'success' if failed_count == 0 else 'partial_success',
-                                    'test_case_count': test_case_count,
-                                    'success_count': success_count,
-                                    'failed_count': failed_count,
-                                    'results': results
-                                }
-                                # 重新计算下次运行时间
-                                task.next_run_time = task.calculate_next_run()
-                                task.save()
-
-                                logger.info(f"UI定时任务 {task.name} 执行完成: 成功{success_count}, 失败{failed_count}")
-
-                                # 发送通知
-                                success = (failed_count == 0)
-                                if success:
-                                    print("       === 开始检查发送成功通知 ===")
-                                else:
-                                    print("       === 开始检查发送失败通知 ===")
-
-                                notification_setting = None
-                                if hasattr(task, 'notification_settings'):
-                                    try:
-                                        notification_setting = task.notification_settings.first()
-                                        print(f"       获取到通知设置: {notification_setting}")
-                                        if notification_setting:
-                                            if success:
-                                                print(f"       通知设置详情 - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 成功通知: {notification_setting.notify_on_success}")
-                                            else:
-                                                print(f"       通知设置详情 - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 失败通知: {notification_setting.notify_on_failure}")
-                                        else:
-                                            print("       没有找到通知设置")
-                                    except Exception as e:
-                                        print(f"       获取任务通知设置时出错: {e}", file=sys.stderr)
-                                        import traceback
-                                        traceback.print_exc()
-                                else:
-                                    print("       任务没有notification_settings属性")
-
-                                if notification_setting and notification_setting.is_enabled:
-                                    print("       通知设置已启用，准备发送通知")
-                                    if success and notification_setting.notify_on_success:
-                                        print("       调用 _send_task_notification 方法发送成功通知")
-                                        try:
-                                            from apps.ui_automation.views import UiScheduledTaskViewSet
-                                            viewset = UiScheduledTaskViewSet()
-                                            viewset._send_task_notification(task, success=True)
-                                            print(f"       ✓ 成功通知已发送 (成功:{success_count}, 失败:{failed_count})")
-                                        except Exception as e:
-                                            print(f"       ✗ 发送UI定时任务 {task.name} 成功通知失败: {e}", file=sys.stderr)
-                                    elif not success and notification_setting.notify_on_failure:
-                                        print("       调用 _send_task_notification 方法发送失败通知")
-                                        try:
-                                            from apps.ui_automation.views import UiScheduledTaskViewSet
-                                            viewset = UiScheduledTaskViewSet()
-                                            viewset._send_task_notification(task, success=False)
-                                            print(f"       ✓ 失败通知已发送 (成功:{success_count}, 失败:{failed_count})")
-                                        except Exception as e:
-                                            print(f"       ✗ 发送UI定时任务 {task.name} 失败通知失败: {e}", file=sys.stderr)
-                                    else:
-                                        if success:
-                                            print("       通知设置中未启用成功通知")
-                                        else:
-                                            print("       通知设置中未启用失败通知")
-                                else:
-                                    print("       通知设置未启用或不存在，跳过通知")
-
-                                if success:
-                                    print("       === 结束检查发送成功通知 ===")
-                                else:
-                                    print("       === 结束检查发送失败通知 ===")
-
-                            # 在后台线程中执行
-                            thread = threading.Thread(target=run_test_cases, daemon=True)
-                            thread.start()
+                            # 投递到 UI 执行 worker，执行结束后由 worker 释放租约
+                            from apps.ui_automation.tasks import dispatch_ui_task, execute_ui_scheduled_cases_task
+                            dispatch_ui_task(execute_ui_scheduled_cases_task, task.browser, task.id, lease.id)
+                            handed_off = True
 
                         executed_count += 1
                         self.stdout.write(self.style.SUCCESS(f"    ✓ 任务 {task.name} 已启动"))
@@ -482,6 +256,9 @@ class Command(BaseCommand):
                     except Exception as e:
                         logger.error(f"执行UI任务 {task.name} 时出错: {e}", exc_info=True)
                         self.stdout.write(self.style.ERROR(f"    ✗ 任务 {task.name} 执行失败: {e}"))
+                    finally:
+                        if not handed_off:
+                            release_lease(lease.id)
 
             return executed_count
 
@@ -490,29 +267,22 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f"[UI] 调度失败: {e}"))
             return 0
 
-    def schedule_app_tasks(self):
-        """调度 APP 自动化模块的定时任务"""
+    def schedule_app_tasks(self, task_ids):
+        """执行 APP 自动化模块中到期的定时任务"""
+        if not task_ids:
+            return 0
         try:
             from apps.app_automation.models import AppScheduledTask, AppTestExecution
 
-            active_tasks = AppScheduledTask.objects.filter(status='ACTIVE')
+            active_tasks = AppScheduledTask.objects.filter(status='ACTIVE', id__in=task_ids)
             executed_count = 0
 
-            if active_tasks.exists():
-                now = timezone.now()
-                self.stdout.write(f"  [APP] 活跃任务数: {active_tasks.count()}")
-                for task in active_tasks:
-                    if task.next_run_time:
-                        time_diff = (task.next_run_time - now).total_seconds()
-                        if time_diff > 0:
-                            self.stdout.write(f"        - {task.name}: 距下次执行还有 {int(time_diff)} 秒")
-                        else:
-                            self.stdout.write(f"        - {task.name}: 应该立即执行！")
-                    else:
-                        self.stdout.write(f"        - {task.name}: 未设置下次执行时间")
-
             for task in active_tasks:
                 if task.should_run_now():
+                    lease = self._claim('app', '[APP]', task)
+                    if lease is None:
+                        continue
+                    handed_off = False
                     self.stdout.write(f"  [APP] 执行任务: {task.name}")
                     self.stdout.write(f"       类型: {task.get_task_type_display()}, 触发方式: {task.get_trigger_type_display()}")
                     try:
@@ -522,13 +292,39 @@ class Command(BaseCommand):
                         task.next_run_time = task.calculate_next_run()
                         task.save()
 
+                        package_name = task.app_package.package_name if task.app_package else ''
+
+                        if task.task_type == 'TEST_SUITE' and task.test_suite and task.device_tags:
+                            # 在带有 device_tags 的设备池上分片执行
+                            from apps.app_automation.tasks import select_device_pool, start_sharded_suite_run
+                            if not task.test_suite.suite_cases.exists():
+                                self.stdout.write(self.style.ERROR(f"    ✗ 套件 {task.test_suite.name} 无用例"))
+                                continue
+                            devices = select_device_pool(user=task.created_by, tags=task.device_tags)
+                            if not devices:
+                                self.stdout.write(self.style.ERROR(f"    ✗ 标签 {task.device_tags} 的设备池中没有可用设备"))
+                                continue
+                            executions = start_sharded_suite_run(
+                                task.test_suite, devices, task.created_by,
+                                package_name=package_name,
+                                scheduled_task_id=task.id,
+                                lease_id=lease.id,
+                            )
+                            if executions is None:
+                                self.stdout.write(self.style.WARNING(f"    - 套件 {task.test_suite.name} 正在分片执行中，跳过本次"))
+                                continue
+                            handed_off = True
+                            executed_count += 1
+                            self.stdout.write(self.style.SUCCESS(
+                                f"    ✓ 任务 {task.name} 已启动，分片设备: {', '.join(d.device_id for d in devices)}"
+                            ))
+                            continue
+
                         device = task.device
                         if not device:
                             self.stdout.write(self.style.ERROR(f"    ✗ 任务 {task.name} 未配置设备"))
                             continue
 
-                        package_name = task.app_package.package_name if task.app_package else ''
-
                         if task.task_type == 'TEST_SUITE' and task.test_suite:
                             suite_cases = task.test_suite.suite_cases.select_related('test_case').all()
                             if not suite_cases.exists():
@@ -555,7 +351,9 @@ class Command(BaseCommand):
                                 execution_ids=[e.id for e in executions],
                                 package_name=package_name,
                                 scheduled_task_id=task.id,
+                                lease_id=lease.id,
                             )
+                            handed_off = True
 
                         elif task.task_type == 'TEST_CASE' and task.test_case:
                             execution = AppTestExecution.objects.create(
@@ -569,7 +367,9 @@ class Command(BaseCommand):
                                 execution.id,
                                 package_name=package_name,
                                 scheduled_task_id=task.id,
+                                lease_id=lease.id,
                             )
+                            handed_off = True
                             execution.task_id = celery_task.id
                             execution.save(update_fields=['task_id'])
 
@@ -583,6 +383,9 @@ class Command(BaseCommand):
                     except Exception as e:
                         logger.error(f"执行APP任务 {task.name} 时出错: {e}", exc_info=True)
                         self.stdout.write(self.style.ERROR(f"    ✗ 任务 {task.name} 执行失败: {e}"))
+                    finally:
+                        if not handed_off:
+                            release_lease(lease.id)
 
             return executed_count
 
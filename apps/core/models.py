@@ -61,3 +61,31 @@ class UnifiedNotificationConfig(models.Model):
                     bot_data['secret'] = bot_config.get('secret')
                 bots.append(bot_data)
         return bots
+
+
+class ScheduledTaskLease(models.Model):
+    """定时任务执行租约 - 调度器触发任务时创建，执行结束后删除，用于多个调度器之间防止重复和重叠执行"""
+
+    MODULE_CHOICES = [
+        ('api', 'API测试'),
+        ('ui', 'UI自动化'),
+        ('app', 'APP自动化'),
+    ]
+
+    module = models.CharField(max_length=10, choices=MODULE_CHOICES, verbose_name='所属模块')
+    task_id = models.BigIntegerField(verbose_name='定时任务ID')
+    owner = models.CharField(max_length=200, verbose_name='持有者', help_text='触发任务的调度器（主机名:进程号）')
+    fire_time = models.DateTimeField(null=True, blank=True, verbose_name='计划运行时间')
+    expires_at = models.DateTimeField(verbose_name='过期时间', help_text='执行进程异常退出时租约在此时间后失效')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+
+    class Meta:
+        db_table = 'scheduled_task_leases'
+        verbose_name = '定时任务执行租约'
+        verbose_name_plural = '定时任务执行租约'
+        indexes = [
+            models.Index(fields=['module', 'task_id', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.module}:{self.task_id} @ {self.owner}"
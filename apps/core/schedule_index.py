@@ -0,0 +1,139 @@
+"""
+定时任务到期索引
+
+统一调度器不再每隔固定时间加载全部 ACTIVE 任务逐个判断 should_run_now，而是在内存中维护
+(next_run_time, 模块, 任务ID) 的最小堆（next_run_time 由各模型的 calculate_next_run 通过 croniter 计算并保存），
+休眠到最近一个任务到期时才查询并执行到期的任务。
+
+任务表变化的检测：
+- 每张任务表的 (行数, 最大 updated_at) 作为变更计数，调度器每次醒来时用一条聚合查询比较，变化时重建索引；
+  Web 进程中新增、编辑、启停、删除任务都会改变它
+- 调度器进程自身保存任务（执行后回写下次运行时间等）时通过 post_save / post_delete 信号立即唤醒并重建索引
+- 认领任务时用条件 UPDATE 推进 next_run_time，不会触发信号，由调度器调用 reschedule 把新的运行时间直接放入索引
+
+任务触发后，在其 next_run_time 被执行逻辑更新之前不会因索引重建而重复触发；
+需要稍后重试的任务（重叠策略为排队且上一次执行未结束）通过 defer 重新放回索引。
+"""
+import heapq
+import logging
+import threading
+from datetime import timedelta
+
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class DueTaskIndex:
+    """按下次运行时间排序的定时任务索引"""
+
+    def __init__(self, sources):
+        """
+        Args:
+            sources: {模块名: 定时任务模型}，如 {'api': ScheduledTask, 'ui': UiScheduledTask}
+        """
+        self.sources = sources
+        self.changed = threading.Event()
+        self._heap = []
+        self._signatures = None
+        # (模块, 任务ID) -> 已触发的 next_run_time
+        self._fired = {}
+        # (模块, 任务ID) -> (重试时间, 已触发的 next_run_time)
+        self._deferred = {}
+
+    def watch(self):
+        """监听本进程内的任务变更，变更时唤醒调度循环"""
+        for model in self.sources.values():
+            post_save.connect(self._on_change, sender=model, weak=False)
+            post_delete.connect(self._on_change, sender=model, weak=False)
+
+    def _on_change(self, sender, **kwargs):
+        self.changed.set()
+
+    def _signature(self, model):
+        stats = model.objects.aggregate(rows=Count('id'), updated=Max('updated_at'))
+        return stats['rows'], stats['updated']
+
+    def refresh(self):
+        """
+        任务表有变化时重建索引
+
+        Returns:
+            是否重建了索引
+        """
+        force = self.changed.is_set()
+        self.changed.clear()
+        signatures = {name: self._signature(model) for name, model in self.sources.items()}
+        if not force and signatures == self._signatures:
+            return False
+
+        heap = []
+        fired = {}
+        deferred = {}
+        for name, model in self.sources.items():
+            rows = model.objects.filter(
+                status='ACTIVE', next_run_time__isnull=False
+            ).values_list('id', 'next_run_time')
+            for task_id, next_run_time in rows:
+                key = (name, task_id)
+                if self._fired.get(key) == next_run_time:
+                    # 本轮已触发，等待执行逻辑更新下次运行时间
+                    fired[key] = next_run_time
+                    retry = self._deferred.get(key)
+                    if retry and retry[1] == next_run_time:
+                        deferred[key] = retry
+                        heap.append((retry[0], name, task_id, next_run_time))
+                    continue
+                heap.append((next_run_time, name, task_id, next_run_time))
+        heapq.heapify(heap)
+
+        self._heap = heap
+        self._fired = fired
+        self._deferred = deferred
+        self._signatures = signatures
+        return True
+
+    def __len__(self):
+        return len(self._heap)
+
+    def next_due(self):
+        """最近一个任务的运行时间，没有任务时返回 None"""
+        return self._heap[0][0] if self._heap else None
+
+    def seconds_until_next(self):
+        next_run_time = self.next_due()
+        if next_run_time is None:
+            return None
+        return max(0.0, (next_run_time - timezone.now()).total_seconds())
+
+    def pop_due(self):
+        """
+        取出所有已到期的任务
+
+        Returns:
+            {模块名: [任务ID, ...]}
+        """
+        now = timezone.now()
+        due = {}
+        while self._heap and self._heap[0][0] <= now:
+            _, name, task_id, next_run_time = heapq.heappop(self._heap)
+            self._fired[(name, task_id)] = next_run_time
+            self._deferred.pop((name, task_id), None)
+            due.setdefault(name, []).append(task_id)
+        return due
+
+    def reschedule(self, name, task_id, next_run_time):
+        """任务的 next_run_time 已被推进（认领或按重叠策略跳过）时，按新的运行时间放回索引"""
+        if next_run_time is not None:
+            heapq.heappush(self._heap, (next_run_time, name, task_id, next_run_time))
+
+    def defer(self, name, task_id, delay):
+        """已触发但暂时不能执行的任务，delay 秒后重新触发（next_run_time 变化时以新的时间为准）"""
+        key = (name, task_id)
+        if key not in self._fired:
+            return
+        retry_at = timezone.now() + timedelta(seconds=delay)
+        self._deferred[key] = (retry_at, self._fired[key])
+        heapq.heappush(self._heap, (retry_at, name, task_id, self._fired[key]))
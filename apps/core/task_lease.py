@@ -0,0 +1,88 @@
+"""
+定时任务触发租约
+
+调度器触发到期任务前先原子地认领（claim）：
+- 条件更新 next_run_time：只有任务仍为 ACTIVE 且 next_run_time 仍是调度器看到的值时才推进到下一次运行时间，
+  多个调度器进程同时看到同一个到期任务时只有一个能更新成功
+- 同一事务内创建执行租约（ScheduledTaskLease，记录持有者和过期时间），执行结束后释放；
+  执行进程崩溃时租约在 SCHEDULER_LEASE_TIMEOUT 秒后失效
+- 按任务的重叠执行策略（overlap_policy）处理上一次执行尚未结束的情况：
+  SKIP 推进 next_run_time 跳过本次；QUEUE 保持到期状态，等租约释放后再触发；
+  ALLOW 最多 max_concurrent_runs 个租约同时存在，已满时跳过本次
+"""
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ScheduledTaskLease
+
+logger = logging.getLogger(__name__)
+
+LEASE_OWNER = f'{socket.gethostname()}:{os.getpid()}'
+
+CLAIMED = 'claimed'
+SKIPPED = 'skipped'
+QUEUED = 'queued'
+LOST = 'lost'
+
+
+def _advance(task, fire_time, now):
+    """把 next_run_time 从 fire_time 推进到下一次运行时间，被其他调度器抢先或任务已变化时返回 False"""
+    next_run_time = task.calculate_next_run()
+    updated = type(task).objects.filter(
+        id=task.id, status='ACTIVE', next_run_time=fire_time
+    ).update(next_run_time=next_run_time, updated_at=now)
+    if updated:
+        # 后续执行逻辑会整体保存任务对象，这里同步内存中的值，避免写回旧的运行时间
+        task.next_run_time = next_run_time
+    return bool(updated)
+
+
+def claim_task(module, task):
+    """
+    认领到期的定时任务
+
+    Args:
+        module: 所属模块（api / ui / app）
+        task: 到期的定时任务对象
+
+    Returns:
+        (结果, 租约)：结果为 CLAIMED 时返回新建的租约，执行结束后需要调用 release_lease 释放；
+        SKIPPED（按重叠策略跳过本次）、QUEUED（等待上一次执行结束）、LOST（已被其他调度器触发或任务已变化）时租约为 None
+    """
+    now = timezone.now()
+    fire_time = task.next_run_time
+    leases = ScheduledTaskLease.objects.filter(module=module, task_id=task.id)
+    limit = max(task.max_concurrent_runs, 1) if task.overlap_policy == 'ALLOW' else 1
+
+    with transaction.atomic():
+        leases.filter(expires_at__lte=now).delete()
+        if leases.count() >= limit:
+            if task.overlap_policy == 'QUEUE':
+                return QUEUED, None
+            return (SKIPPED if _advance(task, fire_time, now) else LOST), None
+
+        if not _advance(task, fire_time, now):
+            return LOST, None
+
+        lease = ScheduledTaskLease.objects.create(
+            module=module,
+            task_id=task.id,
+            owner=LEASE_OWNER,
+            fire_time=fire_time,
+            expires_at=now + timedelta(seconds=getattr(settings, 'SCHEDULER_LEASE_TIMEOUT', 7200))
+        )
+    return CLAIMED, lease
+
+
+def release_lease(lease_id):
+    """执行结束后释放租约"""
+    try:
+        ScheduledTaskLease.objects.filter(id=lease_id).delete()
+    except Exception as e:
+        logger.error(f"释放定时任务租约 {lease_id} 失败: {e}")
@@ -0,0 +1,139 @@
+"""
+占位符模板引擎
+把包含占位符的文本编译为 token 序列并缓存，渲染时单次遍历 token，
+按作用域（TemplateScope）解析每个占位符，替代对同一文本反复执行多轮 re.sub。
+
+支持的占位符：
+- {{name}}          环境变量
+- ${expression}     参数函数 / 临时变量 / 动态函数，如 ${get_id()}、${get.token}
+                    表达式中可以嵌套环境变量，如 ${get_random_int({{min}}, 100)}
+- get_xxx           裸变量（仅在提供了临时变量的作用域中解析）
+"""
+import re
+from functools import lru_cache
+
+TEXT = 'text'
+ENV = 'env'
+EXPR = 'expr'
+BARE = 'bare'
+
+TOKEN_PATTERN = re.compile(
+    r'\{\{(?P<env>[^{}]+)\}\}'
+    r'|\$\{(?P<expr>(?:[^{}]|\{\{[^{}]*\}\})+)\}'
+    r'|(?P<bare>\bget_\w+\b)'
+)
+
+
+class TemplateScope:
+    """模板作用域，子类按需实现占位符解析
+
+    各方法返回替换后的字符串；返回 None 表示无法解析，保留占位符原文
+    """
+
+    def resolve_env(self, name):
+        return None
+
+    def resolve_expr(self, expression):
+        return None
+
+    def resolve_bare(self, name):
+        return None
+
+
+class Template:
+    """编译后的文本模板"""
+
+    __slots__ = ('source', 'tokens', 'is_static')
+
+    def __init__(self, source, tokens):
+        self.source = source
+        self.tokens = tokens
+        self.is_static = all(kind == TEXT for kind, _ in tokens)
+
+    def render(self, scope):
+        if self.is_static:
+            return self.source
+
+        parts = []
+        for kind, value in self.tokens:
+            if kind == TEXT:
+                parts.append(value)
+            elif kind == ENV:
+                replacement = scope.resolve_env(value)
+                parts.append(f'{{{{{value}}}}}' if replacement is None else replacement)
+            elif kind == EXPR:
+                # 表达式中嵌套的环境变量先于表达式本身解析
+                if '{{' in value:
+                    value = compile_template(value).render(scope)
+                replacement = scope.resolve_expr(value)
+                parts.append(f'${{{value}}}' if replacement is None else replacement)
+            else:
+                replacement = scope.resolve_bare(value)
+                parts.append(value if replacement is None else replacement)
+        return ''.join(parts)
+
+
+@lru_cache(maxsize=4096)
+def compile_template(text):
+    """把文本编译为 Template（相同文本只解析一次）"""
+    tokens = []
+    position = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        if match.start() > position:
+            tokens.append((TEXT, text[position:match.start()]))
+        kind = match.lastgroup
+        tokens.append(({'env': ENV, 'expr': EXPR, 'bare': BARE}[kind], match.group(kind)))
+        position = match.end()
+    if position < len(text):
+        tokens.append((TEXT, text[position:]))
+    return Template(text, tuple(tokens))
+
+
+def render_text(text, scope):
+    """渲染单个文本，非字符串原样返回"""
+    if not isinstance(text, str):
+        return text
+    return compile_template(text).render(scope)
+
+
+class DataTemplate:
+    """编译后的嵌套数据（dict/list）模板
+
+    编译时只保留包含占位符的字符串对应的 Template，渲染时重建容器，
+    不修改原始数据，也不与其他渲染结果共享可变对象。
+    """
+
+    __slots__ = ('node',)
+
+    def __init__(self, data):
+        self.node = self._compile(data)
+
+    @classmethod
+    def _compile(cls, data):
+        if isinstance(data, dict):
+            return dict, [(key, cls._compile(value)) for key, value in data.items()]
+        if isinstance(data, list):
+            return list, [cls._compile(item) for item in data]
+        if isinstance(data, str):
+            template = compile_template(data)
+            return str, (data if template.is_static else template)
+        return None, data
+
+    @classmethod
+    def _render(cls, node, scope):
+        kind, value = node
+        if kind is dict:
+            return {key: cls._render(child, scope) for key, child in value}
+        if kind is list:
+            return [cls._render(child, scope) for child in value]
+        if kind is str:
+            return value if isinstance(value, str) else value.render(scope)
+        return value
+
+    def render(self, scope):
+        return self._render(self.node, scope)
+
+
+def render_data(data, scope):
+    """渲染嵌套数据中的全部字符串"""
+    return DataTemplate(data).render(scope)
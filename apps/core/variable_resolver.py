@@ -23,8 +23,10 @@ from apps.data_factory.tools.encryption_tools import EncryptionTools
 from apps.data_factory.tools.crontab_tools import CrontabTools
 from apps.data_factory.tools.image_tools import ImageTools
 
+from .template_engine import TemplateScope, render_text
 
-class VariableResolver:
+
+class VariableResolver(TemplateScope):
     """统一变量解析器 - 使用数据工厂工具"""
     
     def __init__(self):
@@ -128,26 +130,20 @@ class VariableResolver:
         Returns:
             解析后的文本
         """
-        if not isinstance(text, str):
-            return text
-        
-        # 匹配 ${function_name(args)} 模式
-        pattern = r'\$\{([^}]+)\}'
-        
-        def replace_func(match):
-            expression = match.group(1)
+        return render_text(text, self)
+    
+    def resolve_expr(self, expression):
+        """解析单个 ${...} 占位符，失败时返回 None 保留原文"""
+        try:
+            return str(self._evaluate_expression(expression))
+        except Exception as e:
+            if isinstance(e, UnicodeEncodeError):
+                return None
             try:
-                return str(self._evaluate_expression(expression))
-            except Exception as e:
-                if isinstance(e, UnicodeEncodeError):
-                    return match.group(0)
-                try:
-                    print(f"[WARNING] Variable resolution failed: ${{{expression}}} - {str(e)}")
-                except UnicodeEncodeError:
-                    print(f"[WARNING] Variable resolution failed: ${{{expression}}}")
-                return match.group(0)
-        
-        return re.sub(pattern, replace_func, text)
+                print(f"[WARNING] Variable resolution failed: ${{{expression}}} - {str(e)}")
+            except UnicodeEncodeError:
+                print(f"[WARNING] Variable resolution failed: ${{{expression}}}")
+            return None
     
     def _evaluate_expression(self, expression):
         """评估单个表达式
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class UiAutomationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.ui_automation'
-    verbose_name = 'UI自动化测试'
\ No newline at end of file
+    verbose_name = 'UI自动化测试'
+
+    def ready(self):
+        """注册步骤计划失效的信号处理"""
+        import apps.ui_automation.signals  # noqa
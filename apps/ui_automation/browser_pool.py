@@ -0,0 +1,169 @@
+"""
+Playwright 浏览器池
+
+Playwright 同步 API 的对象只能在创建它的线程中使用，因此浏览器池由若干常驻工作线程组成：
+每个工作线程持有自己的 Playwright 实例，以及按 (浏览器类型, 是否无头) 启动的浏览器进程。
+调用方提交的任务在工作线程中执行，每个任务使用全新的 BrowserContext，保证用例之间相互隔离。
+
+- 浏览器进程跨用例、跨套件复用，使用前检查连接状态，断开则重新启动
+- 单个浏览器创建 UI_BROWSER_MAX_CONTEXTS 个上下文后重启，避免长期运行导致内存上涨
+- 工作线程空闲超过 UI_BROWSER_IDLE_TIMEOUT 秒后关闭其浏览器进程，下次使用时再启动
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+def launch_browser(playwright, browser, headless):
+    """按浏览器类型启动 Playwright 浏览器"""
+    if browser == 'firefox':
+        return playwright.firefox.launch(headless=headless)
+    if browser == 'safari':
+        return playwright.webkit.launch(headless=headless)
+    # chrome or edge，添加防检测参数
+    return playwright.chromium.launch(
+        headless=headless,
+        args=['--disable-blink-features=AutomationControlled']
+    )
+
+
+class _BrowserWorker(threading.Thread):
+    """持有 Playwright 实例和浏览器进程的常驻线程"""
+
+    def __init__(self, index):
+        super().__init__(name=f'playwright-browser-{index}', daemon=True)
+        self.tasks = queue.Queue()
+        # (browser, headless) -> [Browser, 已创建的上下文数]
+        self.browsers = {}
+
+    def submit(self, browser, headless, func, context_options):
+        future = Future()
+        self.tasks.put((browser, headless, func, context_options, future))
+        return future
+
+    def run(self):
+        try:
+            from playwright.sync_api import sync_playwright
+            playwright = sync_playwright().start()
+        except BaseException as e:
+            # 启动失败：把错误交给取得本线程的调用方后退出，池会丢弃已退出的线程
+            self.tasks.get()[-1].set_exception(e)
+            return
+
+        idle_timeout = getattr(settings, 'UI_BROWSER_IDLE_TIMEOUT', 300)
+        try:
+            while True:
+                try:
+                    task = self.tasks.get(timeout=idle_timeout)
+                except queue.Empty:
+                    self._close_browsers()
+                    continue
+                self._run_task(playwright, *task)
+        finally:
+            self._close_browsers()
+            playwright.stop()
+
+    def _get_browser(self, playwright, browser, headless):
+        key = (browser, headless)
+        entry = self.browsers.get(key)
+        if entry:
+            max_contexts = getattr(settings, 'UI_BROWSER_MAX_CONTEXTS', 50)
+            if not entry[0].is_connected():
+                print(f"[浏览器池] {self.name} 浏览器 {browser} 已断开，重新启动")
+                self.browsers.pop(key)
+            elif entry[1] >= max_contexts:
+                print(f"[浏览器池] {self.name} 浏览器 {browser} 已创建 {entry[1]} 个上下文，重新启动")
+                self._close_browser(self.browsers.pop(key)[0])
+            else:
+                return entry
+
+        entry = [launch_browser(playwright, browser, headless), 0]
+        self.browsers[key] = entry
+        print(f"[浏览器池] {self.name} 已启动浏览器 {browser} (headless={headless})")
+        return entry
+
+    def _run_task(self, playwright, browser, headless, func, context_options, future):
+        context = None
+        try:
+            entry = self._get_browser(playwright, browser, headless)
+            context = entry[0].new_context(**context_options)
+            entry[1] += 1
+            future.set_result(func(context))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            if context is not None:
+                try:
+                    context.close()
+                except Exception:
+                    pass
+            close_old_connections()
+
+    @staticmethod
+    def _close_browser(browser):
+        try:
+            browser.close()
+        except Exception:
+            pass
+
+    def _close_browsers(self):
+        for browser, _ in self.browsers.values():
+            self._close_browser(browser)
+        self.browsers.clear()
+
+
+class BrowserPool:
+    """进程级 Playwright 浏览器池，最多 max(UI_BROWSER_POOL_SIZE, UI_SUITE_CONCURRENCY) 个工作线程"""
+
+    _idle = []
+    _total = 0
+    _condition = threading.Condition()
+
+    @staticmethod
+    def max_size():
+        """工作线程上限，不小于 UI 套件的用例并发数"""
+        return max(getattr(settings, 'UI_BROWSER_POOL_SIZE', 2), getattr(settings, 'UI_SUITE_CONCURRENCY', 1))
+
+    @classmethod
+    def _acquire(cls):
+        with cls._condition:
+            while True:
+                while cls._idle:
+                    worker = cls._idle.pop()
+                    if worker.is_alive():
+                        return worker
+                    cls._total -= 1
+                if cls._total < cls.max_size():
+                    cls._total += 1
+                    worker = _BrowserWorker(cls._total)
+                    worker.start()
+                    return worker
+                cls._condition.wait()
+
+    @classmethod
+    def _release(cls, worker):
+        with cls._condition:
+            cls._idle.append(worker)
+            cls._condition.notify()
+
+    @classmethod
+    def run(cls, browser, headless, func, **context_options):
+        """
+        在池中的浏览器上以全新的 BrowserContext 执行 func(context)，返回 func 的返回值
+
+        func 在浏览器池的工作线程中执行，其中创建的 Page 等对象不能带出该函数使用；
+        func 返回后上下文即被关闭。
+
+        Args:
+            browser: chrome / edge / firefox / safari
+            headless: 是否无头模式
+            context_options: 传给 Browser.new_context 的参数，如 viewport、user_agent
+        """
+        worker = cls._acquire()
+        try:
+            return worker.submit(browser, headless, func, context_options).result()
+        finally:
+            cls._release(worker)
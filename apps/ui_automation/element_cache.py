@@ -0,0 +1,220 @@
+"""
+Selenium 元素定位缓存
+
+远程 WebDriver（Selenium Grid 等）上每次 find_element / is_displayed / is_enabled 都是一次网络往返，
+WebDriverWait 每轮轮询又要重复这些调用。这里：
+
+- resolve_locator: 定位策略 → (By, 定位值) 的转换结果按 (策略, 值) 缓存
+- ElementCache: 按页面缓存元素句柄，一次 execute_script 同时解析当前步骤和后续若干步骤（UI_SELENIUM_PREFETCH_STEPS）
+  的定位器，并带回元素的可见/可用状态；页面跳转、DOM 变化（探针中的 domKey 改变）或切换标签页时整体失效
+- 命中缓存时先用 DOM_KEY_SCRIPT 取页面当前的 domKey，与解析时一致才使用缓存的元素和可见/可用状态
+- 元素过期（StaleElementReferenceException）时调用 refresh 重新解析该定位器
+"""
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from selenium.common.exceptions import InvalidSelectorException, TimeoutException
+from selenium.webdriver.common.by import By
+
+from .smart_wait import INSTALL_SCRIPT
+
+POLL_INTERVAL = 0.5
+
+STRATEGY_MAP = {
+    'id': By.ID,
+    'css': By.CSS_SELECTOR,
+    'css selector': By.CSS_SELECTOR,
+    'xpath': By.XPATH,
+    'name': By.NAME,
+    'class': By.CLASS_NAME,
+    'class name': By.CLASS_NAME,
+    'tag': By.TAG_NAME,
+    'tag name': By.TAG_NAME,
+    'link text': By.LINK_TEXT,
+    'partial link text': By.PARTIAL_LINK_TEXT
+}
+
+# 参数 arguments[0]: [[by, value], ...]
+# 每个定位器返回 null（未找到）、['error', 信息]（定位器非法）或 [首个元素, 是否可见, 是否可用, 首个可见元素]
+LOOKUP_SCRIPT = INSTALL_SCRIPT + r"""
+    const isDisplayed = (el) => {
+        const style = window.getComputedStyle(el);
+        return style.display !== 'none' && style.visibility !== 'hidden' && el.getClientRects().length > 0;
+    };
+    const linkText = (a) => (a.innerText || a.textContent || '').trim();
+    const findAll = (by, value) => {
+        switch (by) {
+            case 'xpath': {
+                const snapshot = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+                const nodes = [];
+                for (let i = 0; i < snapshot.snapshotLength; i++) {
+                    const node = snapshot.snapshotItem(i);
+                    if (node.nodeType === Node.ELEMENT_NODE) nodes.push(node);
+                }
+                return nodes;
+            }
+            case 'id': return Array.from(document.querySelectorAll('[id="' + CSS.escape(value) + '"]'));
+            case 'name': return Array.from(document.getElementsByName(value));
+            case 'class name': return Array.from(document.getElementsByClassName(value));
+            case 'tag name': return Array.from(document.getElementsByTagName(value));
+            case 'link text': return Array.from(document.querySelectorAll('a')).filter(a => linkText(a) === value);
+            case 'partial link text': return Array.from(document.querySelectorAll('a')).filter(a => linkText(a).includes(value));
+            default: return Array.from(document.querySelectorAll(value));
+        }
+    };
+    return {
+        domKey: state.id + ':' + state.mutations,
+        results: arguments[0].map(([by, value]) => {
+            let elements;
+            try {
+                elements = findAll(by, value);
+            } catch (e) {
+                return ['error', String(e.message || e)];
+            }
+            if (!elements.length) return null;
+            const first = elements[0];
+            return [first, isDisplayed(first), !first.disabled, elements.find(isDisplayed) || null];
+        })
+    };
+"""
+
+# 只返回页面当前的 domKey，用于校验缓存的元素状态是否仍然有效
+DOM_KEY_SCRIPT = INSTALL_SCRIPT + r"""
+    return state.id + ':' + state.mutations;
+"""
+
+
+@lru_cache(maxsize=1024)
+def resolve_locator(locator_strategy, locator_value):
+    """
+    转换定位策略为 Selenium 的 By 类型
+
+    Returns:
+        (By类型, 定位值)
+    """
+    strategy = (locator_strategy or 'css').lower()
+
+    if strategy == 'text':
+        # Selenium不支持直接的text定位，转换为XPath
+        return By.XPATH, f"//*[contains(text(), '{locator_value}')]"
+
+    # 自动检测XPath (如果策略不是xpath但值看起来像xpath)
+    if locator_value.startswith('xpath='):
+        return By.XPATH, locator_value[6:]
+    if strategy != 'xpath' and (locator_value.startswith('//') or locator_value.startswith('(')):
+        return By.XPATH, locator_value
+
+    return STRATEGY_MAP.get(strategy, By.CSS_SELECTOR), locator_value
+
+
+class ElementCache:
+    """单个 WebDriver 当前页面的元素句柄缓存"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._dom_key = None
+        # (by, value) -> [首个元素, 是否可见, 是否可用, 首个可见元素]
+        self._entries = {}
+        self._upcoming = []
+
+    @classmethod
+    def for_driver(cls, driver):
+        """获取绑定在 driver 上的缓存（每个 driver 只属于一个执行线程）"""
+        cache = getattr(driver, '_testhub_element_cache', None)
+        if cache is None:
+            cache = cls(driver)
+            driver._testhub_element_cache = cache
+        return cache
+
+    def invalidate(self):
+        """页面跳转、切换标签页后丢弃全部元素句柄"""
+        self._entries.clear()
+        self._dom_key = None
+
+    def sync(self, dom_key):
+        """根据页面最新的 domKey（来自 SmartWait 探针）判断缓存是否失效"""
+        if dom_key is None or dom_key != self._dom_key:
+            self.invalidate()
+
+    def plan(self, locators):
+        """设置后续步骤的定位器 [(by, value), ...]，下次解析时一并批量解析"""
+        self._upcoming = list(locators)
+
+    def _validate(self):
+        """页面的 domKey 与缓存解析时不同（DOM 已变化）时丢弃缓存，返回缓存是否仍然有效"""
+        try:
+            dom_key = self.driver.execute_script(DOM_KEY_SCRIPT)
+        except Exception:
+            dom_key = None
+        self.sync(dom_key)
+        return self._dom_key is not None
+
+    def _lookup(self, locator):
+        """一次往返解析 locator 和尚未缓存的后续定位器"""
+        batch = [locator] + [
+            item for item in self._upcoming
+            if item != locator and item not in self._entries
+        ][:getattr(settings, 'UI_SELENIUM_PREFETCH_STEPS', 5)]
+
+        try:
+            response = self.driver.execute_script(LOOKUP_SCRIPT, [list(item) for item in batch])
+        except Exception:
+            # 页面跳转中等情况，按未找到处理，由调用方继续轮询
+            return
+
+        if response['domKey'] != self._dom_key:
+            self._entries.clear()
+            self._dom_key = response['domKey']
+
+        for item, entry in zip(batch, response['results']):
+            if entry and entry[0] == 'error':
+                if item == locator:
+                    raise InvalidSelectorException(f"定位器无效: {item[0]}={item[1]} ({entry[1]})")
+                continue
+            if entry:
+                self._entries[item] = entry
+            else:
+                self._entries.pop(item, None)
+
+    @staticmethod
+    def _match(entry, condition):
+        if not entry:
+            return None
+        element, displayed, enabled, visible_element = entry
+        if condition == 'visible':
+            return visible_element
+        if condition == 'clickable':
+            return element if displayed and enabled else None
+        return element
+
+    def find(self, by, value, timeout, condition='present'):
+        """
+        等待并返回元素
+
+        Args:
+            condition: present（存在）/ visible（取第一个可见的匹配元素）/ clickable（第一个匹配元素可见且可用）
+
+        Raises:
+            TimeoutException: 超时仍未找到满足条件的元素
+        """
+        locator = (by, value)
+        if locator in self._entries and self._validate():
+            element = self._match(self._entries[locator], condition)
+            if element is not None:
+                return element
+
+        deadline = time.monotonic() + timeout
+        while True:
+            self._lookup(locator)
+            element = self._match(self._entries.get(locator), condition)
+            if element is not None:
+                return element
+            if time.monotonic() >= deadline:
+                raise TimeoutException(f"等待元素超时({timeout}秒): {by}={value}")
+            time.sleep(POLL_INTERVAL)
+
+    def refresh(self, by, value, timeout, condition='present'):
+        """元素过期后重新解析"""
+        self._entries.pop((by, value), None)
+        return self.find(by, value, timeout, condition)
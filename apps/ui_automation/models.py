@@ -506,6 +506,10 @@ class TestExecution(models.Model):
     error_message = models.TextField(blank=True, verbose_name='错误信息')
     report_url = models.CharField(max_length=500, blank=True, verbose_name='报告URL')
 
+    # 执行节点
+    worker_host = models.CharField(max_length=255, blank=True, verbose_name='执行主机')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='最近心跳时间')
+
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
 
     class Meta:
@@ -592,6 +596,8 @@ class TestCase(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft', verbose_name='状态')
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium', verbose_name='优先级')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_test_cases', verbose_name='创建人')
+    step_plan_version = models.PositiveIntegerField(default=0, verbose_name='步骤计划版本',
+                                                    help_text='步骤或元素变化时递增，使缓存的步骤计划失效')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
 
@@ -604,6 +610,16 @@ class TestCase(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # step_plan_version 只由 signals 用 F() 递增，普通保存不写回，
+        # 避免早先读取的用例对象在元素变更后把版本号覆盖回旧值、继续使用旧计划
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'step_plan_version'
+            ]
+        super().save(*args, **kwargs)
+
 
 class TestCaseStep(models.Model):
     """测试用例步骤模型"""
@@ -685,6 +701,8 @@ class TestCaseExecution(models.Model):
     execution_time = models.FloatField(null=True, blank=True, verbose_name='执行时长(秒)')
     started_at = models.DateTimeField(null=True, blank=True, verbose_name='开始时间')
     finished_at = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+    worker_host = models.CharField(max_length=255, blank=True, verbose_name='执行主机')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='最近心跳时间')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='test_case_executions', verbose_name='执行人')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
 
@@ -763,6 +781,12 @@ class UiScheduledTask(models.Model):
         ('ONCE', '单次执行'),
     ]
 
+    OVERLAP_POLICY_CHOICES = [
+        ('SKIP', '跳过'),
+        ('QUEUE', '排队'),
+        ('ALLOW', '允许并发'),
+    ]
+
     name = models.CharField(max_length=200, verbose_name='任务名称')
     description = models.TextField(blank=True, verbose_name='任务描述')
     task_type = models.CharField(max_length=20, choices=TASK_TYPE_CHOICES, verbose_name='任务类型')
@@ -803,6 +827,13 @@ class UiScheduledTask(models.Model):
                                         verbose_name='通知类型')
     notify_emails = models.JSONField(default=list, blank=True, verbose_name='通知邮箱列表')
 
+    # 重叠执行策略：上一次执行尚未结束时，SKIP 跳过本次，QUEUE 等上一次结束后再执行，
+    # ALLOW 最多允许 max_concurrent_runs 次同时运行（已满时跳过本次）
+    overlap_policy = models.CharField(max_length=10, choices=OVERLAP_POLICY_CHOICES, default='SKIP',
+                                      verbose_name='重叠执行策略')
+    max_concurrent_runs = models.PositiveIntegerField(default=1, verbose_name='最大并发运行数',
+                                                      help_text='重叠执行策略为允许并发时生效')
+
     # 状态管理
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='ACTIVE', verbose_name='任务状态')
     last_run_time = models.DateTimeField(null=True, blank=True, verbose_name='最后运行时间')
@@ -0,0 +1,100 @@
+"""
+UI 截图存储
+
+截图按内容哈希写入媒体存储（ui_screenshots/<哈希前两位>/<哈希>.<格式>），相同截图只保存一份，
+数据库中的截图列表只保存文件 URL，不再保存 data:image/png;base64 字符串。
+
+- UI_SCREENSHOT_FORMAT: png（原图）/ webp / jpeg，后两者需要 Pillow
+- UI_SCREENSHOT_QUALITY: webp / jpeg 压缩质量
+- UI_SCREENSHOT_THUMBNAIL_WIDTH: 缩略图宽度，0 表示不生成缩略图
+"""
+import base64
+import hashlib
+import io
+import logging
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+SCREENSHOT_DIR = 'ui_screenshots'
+DATA_URL_PREFIX = 'data:image/'
+
+_PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+
+def _save_file(path, content):
+    """文件不存在时写入（内容寻址，同名即同内容）"""
+    if not default_storage.exists(path):
+        default_storage.save(path, ContentFile(content))
+    return default_storage.url(path)
+
+
+def _encode(image, image_format, quality):
+    buffer = io.BytesIO()
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    image.save(buffer, format=image_format, quality=quality)
+    return buffer.getvalue()
+
+
+def save_screenshot(image_bytes):
+    """
+    保存截图
+
+    Args:
+        image_bytes: PNG 截图内容
+
+    Returns:
+        {'url', 'thumbnail_url', 'hash'}，未生成缩略图时 thumbnail_url 为 None
+    """
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    base_path = f'{SCREENSHOT_DIR}/{digest[:2]}/{digest}'
+
+    image_format = getattr(settings, 'UI_SCREENSHOT_FORMAT', 'png').lower()
+    quality = getattr(settings, 'UI_SCREENSHOT_QUALITY', 80)
+    thumbnail_width = getattr(settings, 'UI_SCREENSHOT_THUMBNAIL_WIDTH', 320)
+
+    image = None
+    if image_format in _PIL_FORMATS or thumbnail_width:
+        try:
+            from PIL import Image
+            image = Image.open(io.BytesIO(image_bytes))
+            image.load()
+        except Exception as e:
+            logger.warning(f"无法使用 Pillow 处理截图，按原图保存: {str(e)}")
+            image = None
+
+    if image is not None and image_format in _PIL_FORMATS:
+        url = _save_file(f'{base_path}.{image_format}', _encode(image, _PIL_FORMATS[image_format], quality))
+    else:
+        url = _save_file(f'{base_path}.png', image_bytes)
+
+    thumbnail_url = None
+    if image is not None and thumbnail_width and image.width > thumbnail_width:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((thumbnail_width, thumbnail_width * image.height // image.width))
+        thumbnail_url = _save_file(f'{base_path}_thumb.jpeg', _encode(thumbnail, 'JPEG', quality))
+
+    return {'url': url, 'thumbnail_url': thumbnail_url or url, 'hash': digest}
+
+
+def store_screenshot_entries(screenshots):
+    """
+    把截图列表中以 data URL 保存的截图写入媒体存储，返回只包含文件引用的新列表
+
+    已经是文件 URL 的条目、截图失败的条目原样保留。
+    """
+    stored = []
+    for entry in screenshots or []:
+        url = entry.get('url') if isinstance(entry, dict) else None
+        if isinstance(url, str) and url.startswith(DATA_URL_PREFIX):
+            try:
+                image_bytes = base64.b64decode(url.split(',', 1)[1])
+                entry = {**entry, **save_screenshot(image_bytes)}
+            except Exception as e:
+                logger.warning(f"截图写入存储失败，保留原始数据: {str(e)}")
+        stored.append(entry)
+    return stored
@@ -10,13 +10,13 @@ import shutil
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementNotInteractableException
 import logging
 
+from .element_cache import ElementCache, resolve_locator
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,6 +34,8 @@ class SeleniumTestEngine:
         self.browser_type = browser_type
         self.headless = headless
         self.driver = None
+        # 上一步是否可能改变了页面（点击、悬停），是则下一步重新解析元素
+        self._page_changed = False
 
     @staticmethod
     def check_browser_available(browser_type='chrome'):
@@ -306,56 +308,32 @@ class SeleniumTestEngine:
         Returns:
             (By类型, 定位值)
         """
-        strategy_map = {
-            'id': By.ID,
-            'css': By.CSS_SELECTOR,
-            'css selector': By.CSS_SELECTOR,
-            'xpath': By.XPATH,
-            'name': By.NAME,
-            'class': By.CLASS_NAME,
-            'class name': By.CLASS_NAME,
-            'tag': By.TAG_NAME,
-            'tag name': By.TAG_NAME,
-            'link text': By.LINK_TEXT,
-            'partial link text': By.PARTIAL_LINK_TEXT
-        }
-
-        by_type = strategy_map.get(locator_strategy.lower(), By.CSS_SELECTOR)
-
-        # 处理特殊情况
-        if locator_strategy.lower() == 'text':
-            # Selenium不支持直接的text定位，转换为XPath
-            return By.XPATH, f"//*[contains(text(), '{locator_value}')]"
-            
-        elif locator_strategy.lower() == 'id' and not locator_value.startswith('#'):
-            # ID定位直接使用值
-            return by_type, locator_value
-            
-        elif locator_strategy.lower() == 'css' and locator_value.startswith('#'):
-            # CSS选择器
-            return by_type, locator_value
-            
-        # 自动检测XPath (如果策略不是xpath但值看起来像xpath)
-        if locator_strategy.lower() not in ['xpath'] and (locator_value.startswith('//') or locator_value.startswith('(') or locator_value.startswith('xpath=')):
-            if locator_value.startswith('xpath='):
-                locator_value = locator_value[6:]
-            return By.XPATH, locator_value
+        return resolve_locator(locator_strategy, locator_value)
 
-        return by_type, locator_value
-
-    def execute_step(self, step, element_data: Dict) -> Tuple[bool, str, Optional[str]]:
+    def execute_step(self, step, element_data: Dict, upcoming: Optional[List[Dict]] = None) -> Tuple[bool, str, Optional[str]]:
         """
         执行单个测试步骤
 
         Args:
             step: 测试步骤对象
             element_data: 元素数据字典 {locator_strategy, locator_value, name}
+            upcoming: 后续步骤的元素数据列表，定位当前元素时一并批量解析
 
         Returns:
             (是否成功, 日志信息, 截图base64)
         """
         print(f"\n🔵 开始执行步骤: action_type={step.action_type}")
         action_type = step.action_type
+
+        element_cache = ElementCache.for_driver(self.driver)
+        if self._page_changed:
+            element_cache.invalidate()
+        self._page_changed = action_type in ('click', 'hover')
+        if upcoming:
+            element_cache.plan([
+                data.get('locator') or resolve_locator(data.get('locator_strategy', 'css'), data.get('locator_value', ''))
+                for data in upcoming if data and data.get('locator_value')
+            ])
         
         # 预先解析变量
         resolved_input_value = step.input_value
@@ -433,7 +411,8 @@ class SeleniumTestEngine:
                         
                     time.sleep(0.5)
                 
-                # 执行切换
+                # 执行切换，原标签页的元素句柄不再可用
+                element_cache.invalidate()
                 if target_index == -1:
                     self.driver.switch_to.window(handles[-1])
                     final_target_index = len(handles) - 1
@@ -465,11 +444,10 @@ class SeleniumTestEngine:
             else:
                 timeout_seconds = 5
 
-            # 获取定位器
-            by_type, by_value = self._get_locator(locator_strategy, locator_value)
+            # 获取定位器（步骤计划中已预先转换）
+            by_type, by_value = element_data.get('locator') or self._get_locator(locator_strategy, locator_value)
 
-            # 根据操作类型选择合适的等待条件
-            wait = WebDriverWait(self.driver, timeout_seconds)
+            # 根据操作类型选择合适的等待条件（元素句柄按页面缓存，批量解析后续步骤的定位器）
             from selenium.common.exceptions import StaleElementReferenceException
             
             if action_type == 'click':
@@ -477,20 +455,12 @@ class SeleniumTestEngine:
                 # 对于下拉框选项，需要等待可见性，且必须找到可见的那个（因为可能有多个同名元素，有的隐藏有的显示）
                 if 'dropdown' in by_value.lower() or 'el-select' in by_value.lower() or '下拉' in element_name or '选项' in element_name:
                     logger.info(f"检测到下拉框选项，查找可见元素...")
-                    
-                    def find_visible_element(driver):
-                        elements = driver.find_elements(by_type, by_value)
-                        for elem in elements:
-                            if elem.is_displayed():
-                                return elem
-                        return False
-                    
-                    element = wait.until(find_visible_element)
+                    element = element_cache.find(by_type, by_value, timeout_seconds, 'visible')
                 else:
-                    element = wait.until(EC.element_to_be_clickable((by_type, by_value)))
+                    element = element_cache.find(by_type, by_value, timeout_seconds, 'clickable')
             else:
                 # 其他操作：等待元素出现
-                element = wait.until(EC.presence_of_element_located((by_type, by_value)))
+                element = element_cache.find(by_type, by_value, timeout_seconds)
 
             # 执行操作（添加 stale element 重试机制）
             execution_time = 0
@@ -534,15 +504,9 @@ class SeleniumTestEngine:
 
                             # 根据类型重新定位
                             if 'dropdown' in by_value.lower() or 'el-select' in by_value.lower():
-                                def find_visible_element(driver):
-                                    elements = driver.find_elements(by_type, by_value)
-                                    for elem in elements:
-                                        if elem.is_displayed():
-                                            return elem
-                                    return False
-                                element = wait.until(find_visible_element)
+                                element = element_cache.refresh(by_type, by_value, timeout_seconds, 'visible')
                             else:
-                                element = wait.until(EC.element_to_be_clickable((by_type, by_value)))
+                                element = element_cache.refresh(by_type, by_value, timeout_seconds, 'clickable')
 
                             # 等待元素状态稳定（确保 DOM 不再变化）
                             time.sleep(0.3)
@@ -565,9 +529,9 @@ class SeleniumTestEngine:
                                 if attempt < max_retries - 1:
                                     time.sleep(0.5)
                                     if 'dropdown' in by_value.lower() or 'el-select' in by_value.lower():
-                                        element = wait.until(EC.visibility_of_element_located((by_type, by_value)))
+                                        element = element_cache.refresh(by_type, by_value, timeout_seconds, 'visible')
                                     else:
-                                        element = wait.until(EC.element_to_be_clickable((by_type, by_value)))
+                                        element = element_cache.refresh(by_type, by_value, timeout_seconds, 'clickable')
                                 else:
                                     raise
                         else:
@@ -620,7 +584,7 @@ class SeleniumTestEngine:
                             wait_time = 1.0 if attempt == 0 else 1.5
                             logger.info(f"等待 {wait_time}秒 让页面稳定...")
                             time.sleep(wait_time)
-                            element = wait.until(EC.presence_of_element_located((by_type, by_value)))
+                            element = element_cache.refresh(by_type, by_value, timeout_seconds)
                             time.sleep(0.3)  # 确保元素状态稳定
                             logger.info(f"✓ 元素重新定位成功")
                         else:
@@ -646,7 +610,7 @@ class SeleniumTestEngine:
                             wait_time = 1.0 if attempt == 0 else 1.5
                             logger.info(f"等待 {wait_time}秒 让页面稳定...")
                             time.sleep(wait_time)
-                            element = wait.until(EC.presence_of_element_located((by_type, by_value)))
+                            element = element_cache.refresh(by_type, by_value, timeout_seconds)
                             time.sleep(0.3)  # 确保元素状态稳定
                             logger.info(f"✓ 元素重新定位成功")
                         else:
@@ -654,7 +618,7 @@ class SeleniumTestEngine:
 
             elif action_type == 'waitFor':
                 # 等待元素可见
-                wait.until(EC.visibility_of_element_located((by_type, by_value)))
+                element_cache.find(by_type, by_value, timeout_seconds, 'visible')
                 execution_time = round(time.time() - start_time, 2)
                 log = f"✓ 等待元素 '{element_name}' 出现成功\n"
                 log += f"  - 定位器: {locator_strategy}={locator_value}\n"
@@ -834,12 +798,12 @@ class SeleniumTestEngine:
                     if tb_str:
                         # 提取等待条件信息（从堆栈中）
                         wait_condition = "未知条件"
-                        if 'EC.visibility_of_element_located' in tb_str:
-                            wait_condition = "等待元素可见 (visibility_of_element_located)"
-                        elif 'EC.element_to_be_clickable' in tb_str:
-                            wait_condition = "等待元素可点击 (element_to_be_clickable)"
-                        elif 'EC.presence_of_element_located' in tb_str:
-                            wait_condition = "等待元素存在 (presence_of_element_located)"
+                        if "'visible')" in tb_str:
+                            wait_condition = "等待元素可见 (visible)"
+                        elif "'clickable')" in tb_str:
+                            wait_condition = "等待元素可点击 (clickable)"
+                        elif 'element_cache.' in tb_str:
+                            wait_condition = "等待元素存在 (present)"
                         
                         error_parts.append(f"\n等待条件: {wait_condition}")
                         error_parts.append(f"\n调用堆栈:\n{tb_str}")
@@ -988,6 +952,7 @@ class SeleniumTestEngine:
         """
         try:
             self.driver.get(url)
+            ElementCache.for_driver(self.driver).invalidate()
 
             # 等待页面基本加载完成
             # 在服务器环境（特别是无头模式）需要更长的等待时间
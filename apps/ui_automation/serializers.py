@@ -643,7 +643,7 @@ class UiScheduledTaskSerializer(serializers.ModelSerializer):
             'trigger_type', 'trigger_type_display', 'cron_expression',
             'interval_seconds', 'execute_at', 'project', 'project_name',
             'test_suite', 'test_suite_name', 'test_cases',
-            'engine', 'browser', 'headless',
+            'engine', 'browser', 'headless', 'overlap_policy', 'max_concurrent_runs',
             'notify_on_success', 'notify_on_failure', 'notification_type', 'notification_type_display', 'notify_emails',
             'status', 'status_display',
             'last_run_time', 'next_run_time', 'total_runs',
@@ -0,0 +1,65 @@
+"""
+UI自动化信号处理：步骤、元素、定位策略变化时使相关用例的步骤计划失效
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Element, LocatorStrategy, TestCase, TestCaseStep
+
+_deferred = threading.local()
+
+
+def _bump_versions(test_case_ids):
+    if test_case_ids:
+        TestCase.objects.filter(id__in=test_case_ids).update(step_plan_version=F('step_plan_version') + 1)
+
+
+def invalidate_case_plans(test_case_ids):
+    """递增用例的 step_plan_version，使已缓存的步骤计划失效；在 deferred_plan_invalidation 内时推迟到结束时统一递增"""
+    test_case_ids = {case_id for case_id in test_case_ids if case_id}
+    pending = getattr(_deferred, 'case_ids', None)
+    if pending is not None:
+        pending.update(test_case_ids)
+    else:
+        _bump_versions(test_case_ids)
+
+
+@contextmanager
+def deferred_plan_invalidation():
+    """
+    合并代码块内的步骤计划失效，结束时每个用例只递增一次 step_plan_version
+
+    视图一次请求内删除并重建全部步骤时使用（也可作为装饰器），避免每个步骤的信号各发一条 UPDATE。
+    """
+    if getattr(_deferred, 'case_ids', None) is not None:
+        yield
+        return
+    _deferred.case_ids = set()
+    try:
+        yield
+    finally:
+        test_case_ids, _deferred.case_ids = _deferred.case_ids, None
+        _bump_versions(test_case_ids)
+
+
+@receiver([post_save, post_delete], sender=TestCaseStep)
+def invalidate_step_plan_on_step_change(sender, instance, **kwargs):
+    invalidate_case_plans([instance.test_case_id])
+
+
+@receiver(post_save, sender=Element)
+def invalidate_step_plan_on_element_change(sender, instance, **kwargs):
+    invalidate_case_plans(
+        TestCaseStep.objects.filter(element=instance).values_list('test_case_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=LocatorStrategy)
+def invalidate_step_plan_on_strategy_change(sender, instance, **kwargs):
+    invalidate_case_plans(
+        TestCaseStep.objects.filter(element__locator_strategy=instance).values_list('test_case_id', flat=True)
+    )
@@ -0,0 +1,161 @@
+"""
+UI 步骤智能等待
+
+替代步骤之间、导航之后固定时长的 sleep：向页面注入一个探针脚本，记录最近一次 DOM 变化时间、
+进行中的 fetch/XHR 请求数和正在播放的动画数，轮询直到页面安静下来；每个条件有各自的超时，
+超时后不再等待该条件。页面本来就是静止的时候，等待时间只有 DOM 安静窗口（默认 150ms）。
+
+同时支持 Playwright（Page）和 Selenium（WebDriver），通过 SmartWait.for_playwright / for_selenium 创建。
+"""
+import time
+
+from django.conf import settings
+
+POLL_INTERVAL_MS = 50
+
+# 首次调用时在页面中安装 MutationObserver 和 fetch/XHR 计数钩子（element_cache 的批量定位脚本共用）
+INSTALL_SCRIPT = r"""
+    const w = window;
+    if (!w.__testhubWait) {
+        const state = w.__testhubWait = {
+            id: Math.random().toString(36).slice(2), mutations: 0,
+            lastMutation: performance.now(), lastNetwork: performance.now(), pending: 0
+        };
+        const done = () => { state.pending = Math.max(0, state.pending - 1); state.lastNetwork = performance.now(); };
+        new MutationObserver(() => { state.lastMutation = performance.now(); state.mutations++; })
+            .observe(document, { childList: true, subtree: true, attributes: true, characterData: true });
+        if (w.fetch) {
+            const originalFetch = w.fetch;
+            w.fetch = function () {
+                state.pending++;
+                return originalFetch.apply(this, arguments).finally(done);
+            };
+        }
+        const originalSend = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function () {
+            state.pending++;
+            this.addEventListener('loadend', done, { once: true });
+            return originalSend.apply(this, arguments);
+        };
+    }
+    const state = w.__testhubWait;
+"""
+
+# 返回页面当前状态；domKey 由文档标识和 DOM 变更计数组成，页面跳转或 DOM 变化后随之改变
+PROBE_SCRIPT = "(() => {" + INSTALL_SCRIPT + r"""
+    const now = performance.now();
+    const animations = document.getAnimations
+        ? document.getAnimations().filter(a => a.playState === 'running' && a.effect
+            && a.effect.getComputedTiming().iterations !== Infinity).length
+        : 0;
+    return {
+        domQuietMs: now - state.lastMutation,
+        networkQuietMs: state.pending ? 0 : now - state.lastNetwork,
+        animations: animations,
+        domKey: state.id + ':' + state.mutations
+    };
+})()
+"""
+
+RECT_SCRIPT = """
+(el) => {
+    const r = el.getBoundingClientRect();
+    return [r.x, r.y, r.width, r.height];
+}
+"""
+
+
+class SmartWait:
+    """页面安静检测"""
+
+    def __init__(self, evaluate, evaluate_on, sleep):
+        """
+        Args:
+            evaluate: evaluate(script) 在页面中执行表达式并返回结果
+            evaluate_on: evaluate_on(element, function_script) 以元素为参数执行函数并返回结果
+            sleep: sleep(ms) 等待，Playwright 下需要使用 wait_for_timeout 以便继续处理页面事件
+        """
+        self._evaluate = evaluate
+        self._evaluate_on = evaluate_on
+        self._sleep = sleep
+        # 最近一次探测到的页面 DOM 标识，供元素缓存判断是否失效
+        self.dom_key = None
+
+    @classmethod
+    def for_playwright(cls, page):
+        return cls(
+            evaluate=page.evaluate,
+            evaluate_on=lambda element, script: element.evaluate(script),
+            sleep=page.wait_for_timeout
+        )
+
+    @classmethod
+    def for_selenium(cls, driver):
+        return cls(
+            evaluate=lambda script: driver.execute_script(f'return {script.strip()};'),
+            evaluate_on=lambda element, script: driver.execute_script(
+                f'return ({script.strip()})(arguments[0]);', element
+            ),
+            sleep=lambda ms: time.sleep(ms / 1000)
+        )
+
+    @staticmethod
+    def _setting(name, default):
+        return getattr(settings, name, default)
+
+    def _probe(self):
+        try:
+            return self._evaluate(PROBE_SCRIPT)
+        except Exception:
+            # 页面正在跳转等情况下脚本无法执行，视为尚未安静
+            return None
+
+    def settle(self, dom=True, network=True, animations=True):
+        """
+        等待页面安静：DOM 无变化、网络请求结束后再空闲一小段时间、动画播放完毕
+
+        Returns:
+            实际等待的毫秒数
+        """
+        dom_quiet = self._setting('UI_WAIT_DOM_QUIET_MS', 150)
+        dom_timeout = self._setting('UI_WAIT_DOM_TIMEOUT_MS', 2000)
+        network_tail = self._setting('UI_WAIT_NETWORK_TAIL_MS', 200)
+        network_timeout = self._setting('UI_WAIT_NETWORK_TIMEOUT_MS', 5000)
+        animation_timeout = self._setting('UI_WAIT_ANIMATION_TIMEOUT_MS', 1000)
+
+        start = time.monotonic()
+        while True:
+            elapsed = (time.monotonic() - start) * 1000
+            state = self._probe()
+            if state is None:
+                pending = elapsed < max(dom_timeout if dom else 0, network_timeout if network else 0)
+            else:
+                self.dom_key = state.get('domKey')
+                pending = (
+                    (dom and state['domQuietMs'] < dom_quiet and elapsed < dom_timeout)
+                    or (network and state['networkQuietMs'] < network_tail and elapsed < network_timeout)
+                    or (animations and state['animations'] > 0 and elapsed < animation_timeout)
+                )
+            if not pending:
+                return elapsed
+            self._sleep(POLL_INTERVAL_MS)
+
+    def wait_for_element_stable(self, element, timeout_ms=None):
+        """等待元素位置和大小不再变化（滚动、展开动画结束）
+
+        Returns:
+            元素是否已稳定（超时返回 False）
+        """
+        timeout_ms = timeout_ms or self._setting('UI_WAIT_STABLE_TIMEOUT_MS', 1000)
+        start = time.monotonic()
+        previous = None
+        while (time.monotonic() - start) * 1000 < timeout_ms:
+            try:
+                rect = self._evaluate_on(element, RECT_SCRIPT)
+            except Exception:
+                return False
+            if rect == previous:
+                return True
+            previous = rect
+            self._sleep(POLL_INTERVAL_MS)
+        return False
@@ -0,0 +1,130 @@
+"""
+UI 用例步骤计划
+
+用例每次执行都要查询步骤和元素、逐步转换定位器。这里把用例编译为步骤计划并缓存：
+
+- 步骤字段、元素数据一次性从 ORM 取出
+- 定位器预先转换好：Playwright 选择器（selector）和 Selenium 的 (By, 定位值)（locator）
+- 变量槽位：记录 input_value / assert_value 中哪些字段包含占位符，静态值执行时不再解析
+
+计划按 (用例ID, TestCase.step_plan_version) 缓存在 Django 缓存中。步骤、元素或定位策略变化时
+由 signals.invalidate_case_plans 递增相关用例的 step_plan_version（一次请求内重建步骤时合并为一次），旧版本计划自然失效。
+版本号随用例对象一起读取，缓存命中时不再查询步骤表，多个执行进程各自的本地缓存也不会用到过期计划。
+TestCase.save() 不写回 step_plan_version，早先读取的用例对象保存时不会把版本号覆盖回旧值。
+"""
+from django.core.cache import cache
+
+from apps.core.template_engine import compile_template
+
+from .element_cache import resolve_locator
+from .variable_resolver import resolve_variables
+
+# 计划结构变化时递增，使旧格式的缓存失效
+PLAN_FORMAT = 1
+PLAN_CACHE_TIMEOUT = 24 * 3600
+
+VARIABLE_FIELDS = ('input_value', 'assert_value')
+
+
+def playwright_selector(locator_strategy, locator_value):
+    """根据定位策略构造 Playwright 选择器"""
+    if locator_strategy in ['css', 'css selector']:
+        return locator_value
+    if locator_strategy == 'xpath':
+        return f'xpath={locator_value}'
+    if locator_strategy == 'id':
+        return f'#{locator_value}'
+    if locator_strategy == 'name':
+        return f'[name="{locator_value}"]'
+    if locator_strategy == 'text':
+        return f'text={locator_value}'
+    return locator_value
+
+
+def _has_placeholders(text):
+    return bool(text) and not compile_template(text).is_static
+
+
+def compile_step(step):
+    """把 TestCaseStep 编译为计划中的步骤字典"""
+    step_data = {
+        'id': step.id,
+        'step_number': step.step_number,
+        'action_type': step.action_type,
+        'description': step.description,
+        'input_value': step.input_value,
+        'wait_time': step.wait_time,
+        'assert_type': step.assert_type,
+        'assert_value': step.assert_value,
+        'variable_slots': tuple(
+            field for field in VARIABLE_FIELDS if _has_placeholders(getattr(step, field))
+        ),
+        'element': None
+    }
+
+    element = step.element
+    if element:
+        locator_strategy = element.locator_strategy.name if element.locator_strategy else 'css'
+        step_data['element'] = {
+            'id': element.id,
+            'name': element.name,
+            'locator_value': element.locator_value,
+            'locator_strategy': locator_strategy,
+            'wait_timeout': element.wait_timeout,  # 元素的等待超时设置（秒）
+            'force_action': element.force_action,  # 强制操作选项
+            'selector': playwright_selector(locator_strategy.lower(), element.locator_value),
+            'locator': resolve_locator(locator_strategy, element.locator_value)
+        }
+    return step_data
+
+
+def compile_case_plan(test_case):
+    """从 ORM 编译用例的步骤计划"""
+    steps = test_case.steps.select_related('element', 'element__locator_strategy').order_by('step_number')
+    return {
+        'case_id': test_case.id,
+        'version': test_case.step_plan_version,
+        'steps': [compile_step(step) for step in steps]
+    }
+
+
+def _cache_key(test_case):
+    return f'ui_step_plan:{PLAN_FORMAT}:{test_case.id}:{test_case.step_plan_version}'
+
+
+def get_case_plan(test_case):
+    """
+    获取用例的步骤计划，缓存未命中时编译并写入缓存
+
+    Returns:
+        {'case_id', 'version', 'steps': [步骤字典, ...]}，每次返回独立的副本，执行时可以修改
+    """
+    key = _cache_key(test_case)
+    plan = cache.get(key)
+    if plan is None:
+        plan = compile_case_plan(test_case)
+        cache.set(key, plan, PLAN_CACHE_TIMEOUT)
+    return plan
+
+
+def resolve_slot(step_data, field):
+    """解析步骤字段中的变量，不含占位符的字段直接返回原值"""
+    value = step_data[field]
+    if field in step_data.get('variable_slots', VARIABLE_FIELDS):
+        return resolve_variables(value)
+    return value
+
+
+class StepView:
+    """以 TestCaseStep 属性的方式访问计划中的步骤（引擎的 execute_step 按模型属性读取步骤字段）"""
+
+    __slots__ = ('_data',)
+
+    def __init__(self, step_data):
+        self._data = step_data
+
+    def __getattr__(self, name):
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(name)
@@ -0,0 +1,1184 @@
+# -*- coding: utf-8 -*-
+"""
+UI自动化 Celery 任务
+
+UI 用例在独立的 UI 执行 worker 中运行，Web 进程只负责创建执行记录并投递任务：
+- 按浏览器类型路由到队列 ui_<browser>（如 ui_chrome、ui_firefox），worker 通过 -Q 只订阅本机已安装浏览器的队列
+- 同一主机上的所有 UI worker 进程共享 UI_WORKER_HOST_CONCURRENCY 个执行槽位（文件锁），槽位占满时任务延迟重新入队
+- 执行期间定时刷新执行记录的 heartbeat_at，recover_stale_ui_executions 把心跳超时仍为运行中的记录标记为中止
+
+启动示例：
+    celery -A backend worker -Q ui_chrome,ui_edge -c 4 -n ui@%h
+    celery -A backend beat
+
+UI_EXECUTION_BACKEND=thread 时不经过 Celery，仍在 Web 进程的后台线程中执行（本地开发）。
+"""
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.heartbeat import Heartbeat
+from apps.core.task_lease import release_lease
+
+from .screenshot_store import store_screenshot_entries
+from .step_plan import StepView, get_case_plan
+
+try:
+    import fcntl
+except ImportError:  # Windows 下不限制本机并发
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+WORKER_HOST = socket.gethostname()
+
+
+def ui_queue(browser):
+    """浏览器类型对应的 Celery 队列"""
+    return f"{getattr(settings, 'UI_CELERY_QUEUE_PREFIX', 'ui_')}{browser or 'chrome'}"
+
+
+def _use_celery():
+    return getattr(settings, 'UI_EXECUTION_BACKEND', 'celery') == 'celery'
+
+
+def dispatch_ui_task(task, browser, *args):
+    """
+    异步提交 UI 执行任务：celery 模式投递到浏览器对应的队列，thread 模式在当前进程的后台线程中执行
+    """
+    if _use_celery():
+        return task.apply_async(args=args, queue=ui_queue(browser))
+
+    thread = threading.Thread(target=task, args=args, daemon=True)
+    thread.start()
+    return None
+
+
+def run_ui_task(task, browser, *args):
+    """
+    同步执行 UI 任务并返回任务结果，最长等待 UI_CASE_RUN_TIMEOUT 秒
+    """
+    if _use_celery():
+        return task.apply_async(args=args, queue=ui_queue(browser)).get(
+            timeout=getattr(settings, 'UI_CASE_RUN_TIMEOUT', 600)
+        )
+
+    # 在独立线程中执行，避免与请求线程的事件循环冲突
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = task(*args)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+class HostSlot:
+    """本机 UI 执行槽位，基于文件锁实现，进程异常退出时由操作系统自动释放"""
+
+    def __init__(self):
+        self._file = None
+
+    def acquire(self):
+        """尝试占用一个空闲槽位，全部占满时返回 False"""
+        limit = getattr(settings, 'UI_WORKER_HOST_CONCURRENCY', 2)
+        if not limit or fcntl is None:
+            return True
+
+        slot_dir = getattr(settings, 'UI_WORKER_SLOT_DIR', '') or tempfile.gettempdir()
+        for index in range(limit):
+            lock_file = open(os.path.join(slot_dir, f'testhub_ui_slot_{index}.lock'), 'w')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            self._file = lock_file
+            return True
+        return False
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+def _run_in_slot(task, func, *args):
+    """在本机执行槽位内运行 func；直接调用（thread 模式）时不占用槽位"""
+    if task.request.called_directly:
+        return func(*args)
+
+    slot = HostSlot()
+    if not slot.acquire():
+        logger.info(f"[UI执行] {WORKER_HOST} 执行槽位已满，任务 {task.request.id} 稍后重试")
+        raise task.retry(countdown=getattr(settings, 'UI_WORKER_SLOT_RETRY_DELAY', 10))
+    try:
+        return func(*args)
+    finally:
+        slot.release()
+
+
+def _release_after(lease_id, func, *args):
+    """运行 func，结束后释放定时任务的执行租约；在执行槽位内调用，槽位已满重新入队时不释放"""
+    try:
+        return func(*args)
+    finally:
+        if lease_id:
+            release_lease(lease_id)
+
+
+def _heartbeat(beat):
+    """执行期间每隔 UI_EXECUTION_HEARTBEAT_INTERVAL 秒调用一次 beat(now) 刷新心跳"""
+    return Heartbeat(beat, getattr(settings, 'UI_EXECUTION_HEARTBEAT_INTERVAL', 30), name='ui-heartbeat')
+
+
+def _send_task_notification(task, success):
+    """复用定时任务视图集的通知逻辑"""
+    from .views import UiScheduledTaskViewSet
+    UiScheduledTaskViewSet()._send_task_notification(task, success=success)
+
+
+@shared_task(bind=True, max_retries=None)
+def execute_ui_suite_task(self, suite_id, engine, browser, headless, user_id, scheduled_task_id=None, lease_id=None):
+    """
+    执行UI测试套件
+
+    Args:
+        suite_id: TestSuite 的 ID
+        engine: playwright / selenium
+        browser: chrome / firefox / safari / edge
+        headless: 是否无头模式
+        user_id: 执行人 ID
+        scheduled_task_id: 可选，来自定时任务的 UiScheduledTask ID
+        lease_id: 可选的定时任务执行租约 ID，执行结束后释放
+    """
+    return _run_in_slot(
+        self, _release_after, lease_id,
+        _execute_suite, suite_id, engine, browser, headless, user_id, scheduled_task_id
+    )
+
+
+def _execute_suite(suite_id, engine, browser, headless, user_id, scheduled_task_id):
+    from django.contrib.auth import get_user_model
+    from .models import TestSuite, TestExecution, TestCaseExecution, UiScheduledTask
+    from .test_executor import TestExecutor
+
+    test_suite = TestSuite.objects.select_related('project').get(id=suite_id)
+    executed_by = get_user_model().objects.filter(id=user_id).first()
+    task = UiScheduledTask.objects.get(id=scheduled_task_id) if scheduled_task_id else None
+    since = timezone.now()
+
+    def beat(now):
+        TestExecution.objects.filter(
+            test_suite_id=suite_id, status='RUNNING', started_at__gte=since
+        ).update(heartbeat_at=now, worker_host=WORKER_HOST)
+        TestCaseExecution.objects.filter(
+            test_suite_id=suite_id, status__in=['pending', 'running'], created_at__gte=since
+        ).update(heartbeat_at=now, worker_host=WORKER_HOST)
+
+    try:
+        print(f"[测试套件] 开始执行: {test_suite.name} (ID: {test_suite.id}) @ {WORKER_HOST}")
+        print(f"[测试套件] 配置: engine={engine}, browser={browser}, headless={headless}")
+
+        with _heartbeat(beat):
+            executor = TestExecutor(
+                test_suite=test_suite,
+                engine=engine,
+                browser=browser,
+                headless=headless,
+                executed_by=executed_by
+            )
+            executor.run()
+
+        print(f"[测试套件] 执行完成: {test_suite.name}")
+
+        if task:
+            # 更新任务执行结果
+            task.successful_runs += 1
+            task.last_result = {'status': 'success', 'message': '测试套件执行成功'}
+            task.error_message = ''
+            task.save()
+
+            # 发送成功通知
+            _send_task_notification(task, success=True)
+
+    except Exception as e:
+        logger.error(f"[测试套件] 执行异常: {test_suite.name}: {str(e)}", exc_info=True)
+
+        # 更新套件状态为失败
+        test_suite.execution_status = 'failed'
+        test_suite.save()
+
+        if task:
+            task.failed_runs += 1
+            task.last_result = {'status': 'failed', 'message': str(e)}
+            task.error_message = str(e)
+            task.save()
+
+            # 发送失败通知
+            _send_task_notification(task, success=False)
+
+
+@shared_task(bind=True, max_retries=None)
+def execute_ui_case_task(self, execution_id):
+    """
+    执行单个UI测试用例，返回给前端的执行结果
+
+    Args:
+        execution_id: TestCaseExecution 的 ID（由视图以 pending 状态创建）
+    """
+    return _run_in_slot(self, _execute_case, execution_id)
+
+
+def _execute_case(execution_id):
+    from .models import TestCaseExecution
+
+    # 等待执行槽位期间记录可能已被 recover_stale_ui_executions 判定为未开始执行并标记为错误
+    now = timezone.now()
+    started = TestCaseExecution.objects.filter(id=execution_id, status='pending').update(
+        status='running', started_at=now, heartbeat_at=now, worker_host=WORKER_HOST
+    )
+    execution = TestCaseExecution.objects.select_related('test_case__project', 'created_by').get(id=execution_id)
+    if not started:
+        logger.warning(f"[UI执行] 用例执行记录 {execution_id} 已不是待执行状态（{execution.status}），不再执行")
+        return {
+            'http_status': 409,
+            'success': False,
+            'logs': execution.error_message,
+            'screenshots': [],
+            'execution_time': 0,
+            'errors': [{'message': execution.error_message or '执行记录已不是待执行状态'}],
+        }
+
+    def beat(now):
+        TestCaseExecution.objects.filter(id=execution_id, status='running').update(heartbeat_at=now)
+
+    try:
+        with _heartbeat(beat):
+            return _run_case(execution)
+    except Exception as e:
+        execution.status = 'error'
+        execution.error_message = str(e)
+        execution.finished_at = timezone.now()
+        execution.save()
+        raise
+
+
+def _run_case(execution):
+    from .models import TestCaseStep
+
+    test_case = execution.test_case
+    engine_type = execution.engine
+    browser = execution.browser
+    headless = execution.headless
+
+    # 根据引擎类型导入对应的执行引擎
+    if engine_type == 'selenium':
+        from .selenium_engine import SeleniumTestEngine
+
+        # Selenium 引擎需要预先检查浏览器是否可用（检查的是执行用例的 worker 主机）
+        is_available, error_msg = SeleniumTestEngine.check_browser_available(browser)
+        if not is_available:
+            # 浏览器不可用，立即返回错误
+            logger.error(f"Selenium 浏览器检查失败: {error_msg}")
+            execution.status = 'failed'
+            execution.error_message = error_msg
+            execution.execution_logs = f"浏览器检查失败\n\n{error_msg}\n\n建议：\n1. 请确认已安装 {browser.capitalize()} 浏览器\n2. 或者尝试使用其他浏览器（Chrome、Firefox、Edge）\n3. 或者使用 Playwright 引擎（支持自动下载浏览器）"
+            execution.finished_at = timezone.now()
+            execution.save()
+
+            return {
+                'http_status': 400,
+                'success': False,
+                'logs': execution.execution_logs,
+                'screenshots': [],
+                'execution_time': 0,
+                'errors': [{
+                    'message': f'{browser.capitalize()} 浏览器不可用',
+                    'details': error_msg,
+                    'step_number': None,
+                    'action_type': '浏览器检查',
+                    'element': '',
+                    'description': '执行前浏览器环境检查'
+                }]
+            }
+    else:
+        import asyncio
+        from .playwright_engine import PlaywrightTestEngine
+
+    start_time = time.time()
+
+    # 获取用例的步骤计划（带缓存），避免在异步上下文中访问ORM
+    steps_data = get_case_plan(test_case)['steps']
+
+    # 存储步骤执行结果（用于JSON格式的execution_logs）
+    step_results = []
+
+    # 生成执行日志（保留文本格式用于调试）
+    execution_logs = []
+    execution_logs.append(f"测试用例 '{test_case.name}' 开始执行")
+    execution_logs.append(f"执行时间: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    execution_logs.append(f"执行引擎: {engine_type.upper()}")
+    execution_logs.append(f"浏览器: {browser.capitalize()}")
+    headless_mode = headless
+    mode_text = "无头模式" if headless_mode else "有头模式"
+    execution_logs.append(f"执行模式: {mode_text}")
+    execution_logs.append(f"执行用户: {execution.created_by.username}")
+    execution_logs.append(f"项目基础URL: {test_case.project.base_url}")
+    execution_logs.append("")
+
+    # 截图列表
+    screenshots = []
+    # 详细错误信息列表
+    detailed_errors = []
+    execution_result = {'status': 'passed', 'error_message': None}
+
+    # 根据引擎类型选择执行方式
+    if engine_type == 'selenium':
+        # Selenium同步执行
+        def run_test_selenium():
+            """使用Selenium执行测试"""
+            browser_type = browser
+
+            # 创建Selenium引擎实例
+            engine = SeleniumTestEngine(browser_type=browser_type, headless=headless)
+
+            try:
+                # 启动浏览器
+                execution_logs.append("========== 初始化浏览器 ==========")
+                try:
+                    engine.start()
+                    mode_text = "无头模式" if headless else "有头模式"
+                    execution_logs.append(
+                        f"✓ {browser_type.capitalize()} 浏览器启动成功 (Selenium, {mode_text})")
+                    execution_logs.append("")
+                except Exception as browser_error:
+                    # 浏览器启动失败
+                    execution_logs.append(f"✗ {browser_type.capitalize()} 浏览器启动失败")
+                    execution_logs.append(f"  错误: {str(browser_error)}")
+                    execution_logs.append("")
+                    execution_result['status'] = 'failed'
+                    execution_result[
+                        'error_message'] = f"{browser_type.capitalize()} 浏览器启动失败: {str(browser_error)}"
+
+                    # 添加详细错误信息
+                    detailed_errors.append({
+                        'step_number': None,
+                        'action_type': '浏览器启动',
+                        'element': '',
+                        'message': f"{browser_type.capitalize()} 浏览器启动失败",
+                        'details': str(browser_error),
+                        'description': '执行前浏览器启动检查'
+                    })
+
+                    return False
+
+                # 导航到项目基础URL
+                if test_case.project.base_url:
+                    execution_logs.append("========== 导航到测试页面 ==========")
+                    success, nav_log = engine.navigate(test_case.project.base_url)
+                    execution_logs.append(nav_log)
+                    execution_logs.append("")
+
+                    if not success:
+                        execution_result['status'] = 'failed'
+                        execution_result['error_message'] = "导航到测试页面失败"
+                        return False
+
+                if steps_data:
+                    execution_logs.append("========== 执行测试步骤 ==========")
+                    step_count = len(steps_data)
+                    execution_logs.append(f"共有 {step_count} 个步骤需要执行")
+                    execution_logs.append("")
+
+                    for i, step_info in enumerate(steps_data, 1):
+                        execution_logs.append(f"========== 开始执行步骤 {i}/{step_count} ==========")
+                        execution_logs.append(f"步骤 {i}/{step_count}:")
+
+                        step = StepView(step_info)
+                        action_type = step_info['action_type']
+                        description = step_info['description']
+                        element_data = step_info['element']
+
+                        action_choices_dict = dict(TestCaseStep.ACTION_TYPE_CHOICES)
+                        action_type_text = action_choices_dict.get(action_type, action_type)
+                        execution_logs.append(f"  操作: {action_type_text}")
+
+                        if description:
+                            execution_logs.append(f"  说明: {description}")
+
+                        if element_data:
+                            execution_logs.append(f"  元素: {element_data['name']}")
+                            execution_logs.append(
+                                f"  定位器: {element_data['locator_strategy']}={element_data['locator_value']}")
+                        else:
+                            execution_logs.append(f"  (此步骤不需要元素)")
+
+                        try:
+                            success, step_log, screenshot_base64 = engine.execute_step(
+                                step, element_data or {},
+                                upcoming=[info['element'] for info in steps_data[i:]]
+                            )
+                            execution_logs.append(f"  {step_log}")
+                            execution_logs.append("")
+
+                            # 记录步骤执行结果（用于JSON格式）
+                            step_results.append({
+                                'step_number': i,
+                                'action_type': action_type,
+                                'description': description or '',
+                                'success': success,
+                                'error': None if success else step_log
+                            })
+
+                            if not success:
+                                logger.info(f"[调试-Selenium] 步骤 {i} 执行失败，设置状态为 failed")
+                                execution_result['status'] = 'failed'
+                                element_info = element_data['name'] if element_data else "未知元素"
+                                execution_result['error_message'] = step_log  # 使用step_log作为错误信息
+                                logger.info(f"[调试-Selenium] execution_result = {execution_result}")
+
+                                detailed_errors.append({
+                                    'step_number': i,
+                                    'action_type': action_type_text,
+                                    'element': element_info,
+                                    'message': f"步骤 {i}/{step_count} 执行失败",
+                                    'details': step_log,
+                                    'description': description or ''
+                                })
+
+                                if not screenshot_base64:
+                                    screenshot_base64 = engine.capture_screenshot()
+
+                                if screenshot_base64:
+                                    screenshots.append({
+                                        'url': screenshot_base64,
+                                        'description': f'步骤 {i} 失败截图: {description or action_type_text}',
+                                        'step_number': i,
+                                        'timestamp': timezone.now().isoformat()
+                                        # 移除 loaded 和 error 字段，让前端自行处理
+                                    })
+                                    execution_logs.append(f"  📸 失败截图已捕获")
+
+                                return False
+
+                            if action_type == 'screenshot' and screenshot_base64:
+                                screenshots.append({
+                                    'url': screenshot_base64,
+                                    'description': f'步骤 {i}: {description or "手动截图"}',
+                                    'step_number': i,
+                                    'timestamp': timezone.now().isoformat()
+                                    # 移除 loaded 和 error 字段，让前端自行处理
+                                })
+
+                        except Exception as e:
+                            execution_logs.append(f"  ✗ 步骤执行异常: {str(e)}")
+                            import traceback
+                            tb_str = traceback.format_exc()
+                            execution_logs.append(f"  [调试] 异常堆栈:\n{tb_str}")
+
+                            # 记录步骤执行结果（异常情况）
+                            step_results.append({
+                                'step_number': i,
+                                'action_type': action_type,
+                                'description': description or '',
+                                'success': False,
+                                'error': str(e)
+                            })
+
+                            execution_result['status'] = 'failed'
+                            execution_result['error_message'] = f"步骤 {i} 执行异常: {str(e)}"
+
+                            element_info = element_data['name'] if element_data else "未知元素"
+                            detailed_errors.append({
+                                'step_number': i,
+                                'action_type': action_type_text,
+                                'element': element_info,
+                                'message': f"步骤 {i}/{step_count} 执行异常",
+                                'details': f"异常: {str(e)}\n\n堆栈跟踪:\n{tb_str}",
+                                'description': description or ''
+                            })
+
+                            try:
+                                screenshot_base64 = engine.capture_screenshot()
+                                if screenshot_base64:
+                                    screenshots.append({
+                                        'url': screenshot_base64,
+                                        'description': f'步骤 {i} 异常截图: {str(e)}',
+                                        'step_number': i,
+                                        'timestamp': timezone.now().isoformat()
+                                        # 移除 loaded 和 error 字段，让前端自行处理
+                                    })
+                            except:
+                                pass
+
+                            return False
+
+                    execution_logs.append(f"========== 执行完成 ({step_count} 个步骤全部通过) ==========")
+                    return True
+                else:
+                    execution_logs.append("警告: 测试用例没有定义任何步骤")
+                    return True
+
+            finally:
+                execution_logs.append("")
+                execution_logs.append("========== 清理资源 ==========")
+                engine.stop()
+                execution_logs.append("✓ 浏览器已关闭")
+
+        # 在独立线程中运行Selenium测试
+        import threading
+        test_thread = threading.Thread(target=run_test_selenium)
+        test_thread.start()
+        test_thread.join()
+
+    else:
+        # Playwright异步执行
+        def run_test_in_thread():
+            """在独立线程中运行异步测试"""
+
+            async def run_test():
+                """异步执行测试"""
+                # 根据浏览器类型选择
+                browser_map = {
+                    'chrome': 'chromium',
+                    'firefox': 'firefox',
+                    'safari': 'webkit'
+                }
+                browser_type = browser_map.get(browser, 'chromium')
+
+                # 创建Playwright引擎实例
+                engine = PlaywrightTestEngine(browser_type=browser_type, headless=headless)
+
+                try:
+                    # 启动浏览器
+                    execution_logs.append("========== 初始化浏览器 ==========")
+                    await engine.start()
+                    mode_text = "无头模式" if headless else "有头模式"
+                    execution_logs.append(
+                        f"✓ {browser_type.capitalize()} 浏览器启动成功 (Playwright, {mode_text})")
+                    execution_logs.append("")
+
+                    # 导航到项目基础URL
+                    if test_case.project.base_url:
+                        execution_logs.append("========== 导航到测试页面 ==========")
+                        success, nav_log = await engine.navigate(test_case.project.base_url)
+                        execution_logs.append(nav_log)
+                        execution_logs.append("")
+
+                        if not success:
+                            execution_result['status'] = 'failed'
+                            execution_result['error_message'] = "导航到测试页面失败"
+                            return False
+
+                    if steps_data:
+                        execution_logs.append("========== 执行测试步骤 ==========")
+                        step_count = len(steps_data)
+                        execution_logs.append(f"共有 {step_count} 个步骤需要执行")
+                        execution_logs.append("")
+
+                        for i, step_info in enumerate(steps_data, 1):
+                            execution_logs.append(f"========== 开始执行步骤 {i}/{step_count} ==========")
+                            execution_logs.append(f"步骤 {i}/{step_count}:")
+
+                            # 从预先获取的数据中获取信息
+                            step = StepView(step_info)
+                            action_type = step_info['action_type']
+                            description = step_info['description']
+                            element_data = step_info['element']
+
+                            # 获取操作类型的中文显示
+                            action_choices_dict = dict(TestCaseStep.ACTION_TYPE_CHOICES)
+                            action_type_text = action_choices_dict.get(action_type, action_type)
+                            execution_logs.append(f"  操作: {action_type_text}")
+
+                            if description:
+                                execution_logs.append(f"  说明: {description}")
+
+                            if element_data:
+                                execution_logs.append(f"  元素: {element_data['name']}")
+                                execution_logs.append(
+                                    f"  定位器: {element_data['locator_strategy']}={element_data['locator_value']}")
+                            else:
+                                execution_logs.append(f"  (此步骤不需要元素)")
+
+                            # 执行步骤
+                            try:
+                                execution_logs.append(f"  [调试] 准备执行步骤...")
+                                success, step_log, screenshot_base64 = await engine.execute_step(step,
+                                                                                                 element_data or {})
+                                execution_logs.append(f"  [调试] 步骤执行完成, success={success}")
+
+                                execution_logs.append(f"  {step_log}")
+                                execution_logs.append("")
+
+                                # 记录步骤执行结果（用于JSON格式）
+                                step_results.append({
+                                    'step_number': i,
+                                    'action_type': action_type,
+                                    'description': description or '',
+                                    'success': success,
+                                    'error': None if success else step_log
+                                })
+
+                                # 如果步骤失败,保存截图
+                                if not success:
+                                    execution_logs.append(f"  [调试] 检测到步骤失败,准备处理...")
+                                    execution_result['status'] = 'failed'
+
+                                    # 获取失败的元素信息
+                                    element_info = element_data['name'] if element_data else "未知元素"
+
+                                    execution_result['error_message'] = step_log  # 使用step_log作为错误信息
+
+                                    # 添加详细错误信息
+                                    detailed_errors.append({
+                                        'step_number': i,
+                                        'action_type': action_type_text,
+                                        'element': element_info,
+                                        'message': f"步骤 {i}/{step_count} 执行失败",
+                                        'details': step_log,  # 包含详细的错误日志
+                                        'description': description or ''
+                                    })
+
+                                    # 如果没有截图,捕获一张
+                                    if not screenshot_base64:
+                                        screenshot_base64 = await engine.capture_screenshot()
+
+                                if screenshot_base64:
+                                    screenshots.append({
+                                        'url': screenshot_base64,
+                                        'description': f'步骤 {i} 失败截图: {description or action_type_text}',
+                                        'step_number': i,
+                                        'timestamp': timezone.now().isoformat()
+                                        # 移除 loaded 和 error 字段，让前端自行处理
+                                    })
+                                    execution_logs.append(f"  📸 失败截图已捕获")
+
+                                    execution_logs.append(f"  [调试] 步骤失败,准备退出执行...")
+                                    return False
+
+                                # 如果是截图步骤且成功,也保存截图
+                                if action_type == 'screenshot' and screenshot_base64:
+                                    screenshots.append({
+                                        'url': screenshot_base64,
+                                        'description': f'步骤 {i}: {description or "手动截图"}',
+                                        'step_number': i,
+                                        'timestamp': timezone.now().isoformat()
+                                        # 移除 loaded 和 error 字段，让前端自行处理
+                                    })
+
+                                execution_logs.append(f"  [调试] 步骤 {i} 成功完成,准备执行下一步...")
+
+                            except Exception as e:
+                                execution_logs.append(f"  ✗ 步骤执行异常: {str(e)}")
+                                execution_logs.append(f"  [调试] 异常详情: {repr(e)}")
+                                import traceback
+                                tb_str = traceback.format_exc()
+                                execution_logs.append(f"  [调试] 异常堆栈:\n{tb_str}")
+
+                                # 记录步骤执行结果（异常情况）
+                                step_results.append({
+                                    'step_number': i,
+                                    'action_type': action_type,
+                                    'description': description or '',
+                                    'success': False,
+                                    'error': str(e)
+                                })
+
+                                execution_result['status'] = 'failed'
+                                execution_result['error_message'] = f"步骤 {i} 执行异常: {str(e)}"
+
+                                # 添加详细错误信息
+                                element_info = element_data['name'] if element_data else "未知元素"
+                                detailed_errors.append({
+                                    'step_number': i,
+                                    'action_type': action_type_text,
+                                    'element': element_info,
+                                    'message': f"步骤 {i}/{step_count} 执行异常",
+                                    'details': f"异常: {str(e)}\n\n堆栈跟踪:\n{tb_str}",
+                                    'description': description or ''
+                                })
+
+                                # 捕获异常截图
+                                try:
+                                    screenshot_base64 = await engine.capture_screenshot()
+                                    if screenshot_base64:
+                                        screenshots.append({
+                                            'url': screenshot_base64,
+                                            'description': f'步骤 {i} 异常截图: {str(e)}',
+                                            'step_number': i,
+                                            'timestamp': timezone.now().isoformat()
+                                            # 移除 loaded 和 error 字段，让前端自行处理
+                                        })
+                                except:
+                                    pass
+
+                                execution_logs.append(f"  [调试] 发生异常,准备退出执行...")
+                                return False
+
+                        # 所有步骤都成功
+                        execution_logs.append(f"========== 执行完成 ({step_count} 个步骤全部通过) ==========")
+                        return True
+
+                    else:
+                        execution_logs.append("警告: 测试用例没有定义任何步骤")
+                        return True
+
+                finally:
+                    # 关闭浏览器
+                    execution_logs.append("")
+                    execution_logs.append("========== 清理资源 ==========")
+                    await engine.stop()
+                    execution_logs.append("✓ 浏览器已关闭")
+
+            # 在新的事件循环中运行测试
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(run_test())
+            finally:
+                loop.close()
+
+        # 在独立线程中运行Playwright测试
+        import threading
+        test_thread = threading.Thread(target=run_test_in_thread)
+        test_thread.start()
+        test_thread.join()  # 等待测试完成
+
+    # 计算总执行时间
+    total_time = round(time.time() - start_time, 2)
+    execution_logs.append("")
+    execution_logs.append("执行环境信息:")
+    execution_logs.append(f"- 执行引擎: {engine_type.upper()}")
+    execution_logs.append(f"- 浏览器: {browser.capitalize()}")
+    execution_logs.append(f"- 屏幕分辨率: 1920x1080")
+    execution_logs.append(f"- 总执行时间: {total_time}秒")
+
+    if screenshots:
+        execution_logs.append(f"- 截图数量: {len(screenshots)} 张")
+
+    # 保存执行日志和截图
+    logger.info(f"[调试] 准备保存执行结果: execution_result['status'] = {execution_result['status']}")
+    execution.status = execution_result['status']
+
+    # 保存error_message（step_log已经是简洁的错误信息）
+    execution.error_message = execution_result['error_message'] or ''
+
+    # 保存步骤执行结果为JSON格式
+    execution.execution_logs = json.dumps(step_results, ensure_ascii=False)
+    execution.execution_time = total_time
+    execution.finished_at = timezone.now()
+    # 截图写入媒体存储，数据库只保存文件引用
+    screenshots = store_screenshot_entries(screenshots)
+    execution.screenshots = screenshots
+    execution.save()
+    logger.info(f"[调试] 执行结果已保存: execution.status = {execution.status}")
+
+    # 格式化错误信息为统一的对象格式
+    errors = []
+    if detailed_errors:
+        # 使用详细的错误信息
+        for error in detailed_errors:
+            errors.append({
+                'message': error['message'],
+                'details': error['details'],
+                'step_number': error['step_number'],
+                'action_type': error['action_type'],
+                'element': error['element'],
+                'description': error['description']
+            })
+    elif execution.error_message:
+        # 如果没有详细错误信息，使用简单格式
+        errors.append({
+            'message': execution.error_message,
+            'details': ''
+        })
+
+    return {
+        'success': execution.status == 'passed',
+        'logs': execution.execution_logs,
+        'screenshots': screenshots,
+        'execution_time': execution.execution_time,
+        'errors': errors
+    }
+
+
+@shared_task(bind=True, max_retries=None)
+def execute_ui_scheduled_cases_task(self, scheduled_task_id, lease_id=None):
+    """
+    依次执行定时任务配置的UI测试用例
+
+    Args:
+        scheduled_task_id: UiScheduledTask 的 ID
+        lease_id: 可选的定时任务执行租约 ID，执行结束后释放
+    """
+    return _run_in_slot(self, _release_after, lease_id, _execute_scheduled_cases, scheduled_task_id)
+
+
+def _execute_scheduled_cases(scheduled_task_id):
+    from .models import TestCase, TestCaseExecution, UiScheduledTask
+
+    task = UiScheduledTask.objects.select_related('project', 'created_by').get(id=scheduled_task_id)
+    test_cases = TestCase.objects.filter(id__in=task.test_cases).select_related('project')
+    execution_ids = []
+
+    def beat(now):
+        TestCaseExecution.objects.filter(id__in=list(execution_ids), status='running').update(heartbeat_at=now)
+
+    with _heartbeat(beat):
+        success_count = 0
+        failed_count = 0
+
+        try:
+            for test_case in test_cases:
+                # 创建执行记录
+                execution = TestCaseExecution.objects.create(
+                    test_case=test_case,
+                    project=task.project,
+                    execution_source='scheduled',
+                    status='running',
+                    engine=task.engine,
+                    browser=task.browser,
+                    headless=task.headless,
+                    created_by=task.created_by,
+                    started_at=timezone.now(),
+                    worker_host=WORKER_HOST
+                )
+                execution_ids.append(execution.id)
+
+                # 实际执行测试用例
+                try:
+                    logger.info(f"开始执行定时任务的测试用例: {test_case.name} (ID: {test_case.id})")
+
+                    start_time = time.time()
+
+                    # 获取用例的步骤计划（带缓存）
+                    steps_data = get_case_plan(test_case)['steps']
+
+                    # 存储步骤执行结果和截图
+                    step_results = []
+                    screenshots = []
+                    execution_logs = []
+                    execution_result = {'status': 'passed', 'error_message': None}
+
+                    # 根据引擎类型执行
+                    if task.engine == 'selenium':
+                        from .selenium_engine import SeleniumTestEngine
+
+                        # 检查浏览器是否可用
+                        is_available, error_msg = SeleniumTestEngine.check_browser_available(task.browser)
+                        if not is_available:
+                            execution.status = 'failed'
+                            execution.error_message = error_msg
+                            execution.execution_logs = json.dumps([{
+                                'step_number': 0,
+                                'action_type': '浏览器检查',
+                                'description': '执行前浏览器环境检查',
+                                'success': False,
+                                'error': error_msg
+                            }], ensure_ascii=False)
+                            execution.finished_at = timezone.now()
+                            execution.save()
+                            failed_count += 1
+                            continue
+
+                        # 创建Selenium引擎实例并执行
+                        engine = SeleniumTestEngine(browser_type=task.browser, headless=task.headless)
+
+                        try:
+                            # 启动浏览器
+                            engine.start()
+                            execution_logs.append("✓ 浏览器启动成功")
+
+                            # 导航到项目基础URL
+                            if test_case.project.base_url:
+                                success, nav_log = engine.navigate(test_case.project.base_url)
+                                execution_logs.append(nav_log)
+                                if not success:
+                                    execution_result['status'] = 'failed'
+                                    execution_result['error_message'] = "导航到测试页面失败"
+                                    raise Exception("导航到测试页面失败")
+
+                            # 执行测试步骤
+                            for i, step_info in enumerate(steps_data, 1):
+                                step = StepView(step_info)
+                                action_type = step_info['action_type']
+                                element_data = step_info['element']
+
+                                success, step_log, screenshot_base64 = engine.execute_step(
+                                    step, element_data or {},
+                                    upcoming=[info['element'] for info in steps_data[i:]]
+                                )
+
+                                step_results.append({
+                                    'step_number': i,
+                                    'action_type': action_type,
+                                    'description': step_info['description'] or '',
+                                    'success': success,
+                                    'error': None if success else step_log
+                                })
+
+                                if not success:
+                                    execution_result['status'] = 'failed'
+                                    execution_result['error_message'] = step_log
+
+                                    if not screenshot_base64:
+                                        screenshot_base64 = engine.capture_screenshot()
+
+                                    if screenshot_base64:
+                                        screenshots.append({
+                                            'url': screenshot_base64,
+                                            'description': f'步骤 {i} 失败截图',
+                                            'step_number': i,
+                                            'timestamp': timezone.now().isoformat()
+                                        })
+
+                                    break
+
+                                if action_type == 'screenshot' and screenshot_base64:
+                                    screenshots.append({
+                                        'url': screenshot_base64,
+                                        'description': f'步骤 {i}: {step_info["description"] or "手动截图"}',
+                                        'step_number': i,
+                                        'timestamp': timezone.now().isoformat()
+                                    })
+
+                        finally:
+                            engine.stop()
+
+                    else:  # Playwright
+                        import asyncio
+                        from asgiref.sync import sync_to_async
+                        from .playwright_engine import PlaywrightTestEngine
+
+                        async def run_playwright_test():
+                            browser_map = {
+                                'chrome': 'chromium',
+                                'firefox': 'firefox',
+                                'safari': 'webkit'
+                            }
+                            browser_type = browser_map.get(task.browser, 'chromium')
+
+                            engine = PlaywrightTestEngine(browser_type=browser_type, headless=task.headless)
+
+                            try:
+                                # 启动浏览器
+                                await engine.start()
+                                execution_logs.append("✓ 浏览器启动成功")
+
+                                # 获取项目基础URL（同步操作）
+                                base_url = await sync_to_async(lambda: test_case.project.base_url)()
+
+                                # 导航到项目基础URL
+                                if base_url:
+                                    success, nav_log = await engine.navigate(base_url)
+                                    execution_logs.append(nav_log)
+                                    if not success:
+                                        execution_result['status'] = 'failed'
+                                        execution_result['error_message'] = "导航到测试页面失败"
+                                        return False
+
+                                # 执行测试步骤
+                                for i, step_info in enumerate(steps_data, 1):
+                                    step = StepView(step_info)
+                                    action_type = step_info['action_type']
+                                    element_data = step_info['element']
+
+                                    success, step_log, screenshot_base64 = await engine.execute_step(step,
+                                                                                                     element_data or {})
+
+                                    step_results.append({
+                                        'step_number': i,
+                                        'action_type': action_type,
+                                        'description': step_info['description'] or '',
+                                        'success': success,
+                                        'error': None if success else step_log
+                                    })
+
+                                    if not success:
+                                        execution_result['status'] = 'failed'
+                                        execution_result['error_message'] = step_log
+
+                                        if not screenshot_base64:
+                                            screenshot_base64 = await engine.capture_screenshot()
+
+                                        if screenshot_base64:
+                                            screenshots.append({
+                                                'url': screenshot_base64,
+                                                'description': f'步骤 {i} 失败截图',
+                                                'step_number': i,
+                                                'timestamp': timezone.now().isoformat()
+                                            })
+
+                                        return False
+
+                                    if action_type == 'screenshot' and screenshot_base64:
+                                        screenshots.append({
+                                            'url': screenshot_base64,
+                                            'description': f'步骤 {i}: {step_info["description"] or "手动截图"}',
+                                            'step_number': i,
+                                            'timestamp': timezone.now().isoformat()
+                                        })
+
+                                return True
+
+                            finally:
+                                await engine.stop()
+
+                        # 在新的事件循环中运行Playwright测试
+                        loop = asyncio.new_event_loop()
+                        asyncio.set_event_loop(loop)
+                        try:
+                            loop.run_until_complete(run_playwright_test())
+                        finally:
+                            loop.close()
+
+                    # 计算执行时间
+                    total_time = round(time.time() - start_time, 2)
+
+                    # 保存执行结果
+                    execution.status = execution_result['status']
+                    execution.error_message = execution_result['error_message'] or ''
+                    execution.execution_logs = json.dumps(step_results, ensure_ascii=False)
+                    execution.execution_time = total_time
+                    execution.screenshots = store_screenshot_entries(screenshots)
+                    execution.finished_at = timezone.now()
+                    execution.save()
+
+                    if execution.status == 'passed':
+                        success_count += 1
+                        logger.info(f"测试用例 {test_case.name} 执行成功")
+                    else:
+                        failed_count += 1
+                        logger.warning(f"测试用例 {test_case.name} 执行失败: {execution.error_message}")
+
+                except Exception as e:
+                    logger.error(f"执行测试用例 {test_case.name} 时发生异常: {str(e)}")
+                    execution.status = 'failed'
+                    execution.error_message = str(e)
+                    execution.finished_at = timezone.now()
+                    execution.save()
+                    failed_count += 1
+
+            # 更新任务执行结果
+            if failed_count == 0:
+                task.successful_runs += 1
+                task.last_result = {
+                    'status': 'success',
+                    'message': f'执行完成: {success_count}个成功',
+                    'success_count': success_count,
+                    'failed_count': failed_count
+                }
+                task.error_message = ''
+                task.save()
+
+                # 发送成功通知
+                _send_task_notification(task, success=True)
+            else:
+                task.failed_runs += 1
+                task.last_result = {
+                    'status': 'partial',
+                    'message': f'执行完成: {success_count}个成功, {failed_count}个失败',
+                    'success_count': success_count,
+                    'failed_count': failed_count
+                }
+                task.error_message = f'{failed_count}个测试用例执行失败'
+                task.save()
+
+                # 发送失败通知
+                _send_task_notification(task, success=False)
+
+        except Exception as e:
+            logger.error(f"执行定时任务测试用例时发生异常: {str(e)}")
+            task.failed_runs += 1
+            task.last_result = {'status': 'failed', 'message': str(e)}
+            task.error_message = str(e)
+            task.save()
+
+            # 发送失败通知
+            _send_task_notification(task, success=False)
+
+
+@shared_task
+def recover_stale_ui_executions():
+    """
+    回收心跳超时的UI执行记录
+
+    执行进程崩溃、worker 被强制终止时执行记录会一直停留在运行中，这里把超过
+    UI_EXECUTION_HEARTBEAT_TIMEOUT 秒没有心跳的记录标记为中止/错误，并把对应套件恢复为失败状态；
+    投递后超过 UI_EXECUTION_QUEUE_TIMEOUT 秒仍未开始执行（任务丢失）的待执行用例记录和运行中套件同样回收。
+    """
+    from .models import TestExecution, TestCaseExecution, TestSuite
+
+    timeout = getattr(settings, 'UI_EXECUTION_HEARTBEAT_TIMEOUT', 180)
+    queue_timeout = getattr(settings, 'UI_EXECUTION_QUEUE_TIMEOUT', 3600)
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=timeout)
+    queue_cutoff = now - timedelta(seconds=queue_timeout)
+    stale = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    message = f'执行心跳超时（超过 {timeout} 秒未更新），执行进程可能已退出'
+    queue_message = f'投递后超过 {queue_timeout} 秒未开始执行，执行任务可能已丢失'
+
+    recovered_executions = 0
+    for execution in TestExecution.objects.filter(stale, status='RUNNING'):
+        execution.status = 'ABORTED'
+        execution.error_message = message
+        execution.finished_at = now
+        execution.save(update_fields=['status', 'error_message', 'finished_at'])
+        recovered_executions += 1
+
+        if execution.test_suite_id:
+            # 同一次套件执行中尚未完成的用例记录
+            TestCaseExecution.objects.filter(
+                test_suite_id=execution.test_suite_id,
+                status__in=['pending', 'running'],
+                created_at__gte=execution.started_at or execution.created_at
+            ).update(status='error', error_message=message, finished_at=now)
+            TestSuite.objects.filter(
+                id=execution.test_suite_id, execution_status='running'
+            ).update(execution_status='failed')
+
+    recovered_cases = TestCaseExecution.objects.filter(stale, status='running').update(
+        status='error', error_message=message, finished_at=now
+    )
+    # 套件执行中已创建、随套件心跳刷新的待执行记录
+    recovered_cases += TestCaseExecution.objects.filter(heartbeat_at__lt=cutoff, status='pending').update(
+        status='error', error_message=message, finished_at=now
+    )
+    # 从未开始执行的记录
+    recovered_cases += TestCaseExecution.objects.filter(
+        heartbeat_at__isnull=True, created_at__lt=queue_cutoff, status='pending'
+    ).update(status='error', error_message=queue_message, finished_at=now)
+
+    # 标记为运行中但执行任务一直没有开始（没有运行中的套件执行记录）的套件
+    recovered_suites = TestSuite.objects.filter(
+        execution_status='running', updated_at__lt=queue_cutoff
+    ).exclude(
+        id__in=TestExecution.objects.filter(status='RUNNING', test_suite__isnull=False).values('test_suite_id')
+    ).update(execution_status='failed')
+
+    if recovered_executions or recovered_cases or recovered_suites:
+        logger.warning(
+            f"[UI执行] 已回收超时的执行记录: 套件执行 {recovered_executions} 条, 用例执行 {recovered_cases} 条, "
+            f"未开始执行的套件 {recovered_suites} 个"
+        )
+    return {'executions': recovered_executions, 'case_executions': recovered_cases, 'suites': recovered_suites}
@@ -4,14 +4,16 @@ UI自动化测试执行服务
 """
 import time
 import json
+import queue
+import threading
 from datetime import datetime
+from django.conf import settings
 from django.utils import timezone
 from django.db import connection
-from playwright.sync_api import sync_playwright
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.safari.options import Options as SafariOptions
@@ -21,21 +23,48 @@ from .models import (
     TestSuite, TestExecution, TestCase, TestCaseStep,
     TestCaseExecution, Element
 )
-from .variable_resolver import resolve_variables
+from .browser_pool import BrowserPool
+from .screenshot_store import save_screenshot
+from .smart_wait import SmartWait
+from .element_cache import ElementCache
+from .step_plan import get_case_plan, resolve_slot
+
+# 不需要关联元素的操作类型
+PAGE_ACTIONS = ('wait', 'switchTab')
 
 
 class TestExecutor:
     """测试执行器基类"""
 
-    def __init__(self, test_suite, engine='playwright', browser='chrome', headless=False, executed_by=None):
+    def __init__(self, test_suite, engine='playwright', browser='chrome', headless=False, executed_by=None,
+                 concurrency=None):
         self.test_suite = test_suite
         self.engine = engine
         self.browser = browser
         self.headless = headless
         self.executed_by = executed_by
+        self.concurrency = concurrency
         self.execution = None
         self.test_cases = []
         self.results = []
+        # 当前页面和浏览器上下文按线程保存，多个用例并发执行时互不干扰
+        self._local = threading.local()
+
+    @property
+    def current_page(self):
+        return getattr(self._local, 'current_page', None)
+
+    @current_page.setter
+    def current_page(self, page):
+        self._local.current_page = page
+
+    @property
+    def context(self):
+        return getattr(self._local, 'context', None)
+
+    @context.setter
+    def context(self, context):
+        self._local.context = context
 
     def create_execution_record(self):
         """创建测试执行记录"""
@@ -139,12 +168,123 @@ class TestExecutor:
             connection.close()
             print(f"[TestExecutor] 执行器已退出")
 
+    def get_concurrency(self, case_count):
+        """用例并发数：构造参数优先，其次 UI_SUITE_CONCURRENCY，不超过用例数"""
+        concurrency = self.concurrency or getattr(settings, 'UI_SUITE_CONCURRENCY', 1)
+        return max(1, min(concurrency, case_count))
+
+    def prepare_test_cases_data(self):
+        """预先获取所有测试用例的步骤计划（带缓存），避免在浏览器上下文中访问ORM"""
+        test_cases_data = []
+        for test_case in self.test_cases:
+            test_cases_data.append({
+                'id': test_case.id,
+                'name': test_case.name,
+                'project_id': self.test_suite.project.id,
+                'steps': get_case_plan(test_case)['steps']
+            })
+        return test_cases_data
+
+    def create_case_executions(self, test_cases_data):
+        """预先创建所有测试用例执行记录（不设置 started_at，等实际执行时再设置）"""
+        case_executions = {}
+        for case_data in test_cases_data:
+            case_execution = TestCaseExecution.objects.create(
+                test_case_id=case_data['id'],
+                project_id=case_data['project_id'],
+                test_suite=self.test_suite,
+                execution_source='suite',
+                status='pending',  # 初始状态为 pending
+                engine=self.engine,
+                browser=self.browser,
+                headless=self.headless,
+                created_by=self.executed_by
+                # 注意：不设置 started_at，等用例实际开始执行时再设置
+            )
+            case_executions[case_data['id']] = case_execution
+        return case_executions
+
+    @staticmethod
+    def failed_case_result(case_data, error):
+        """用例未能执行时的失败结果"""
+        return {
+            'test_case_id': case_data['id'],
+            'test_case_name': case_data['name'],
+            'status': 'failed',
+            'steps': [],
+            'error': error,
+            'start_time': datetime.now().isoformat(),
+            'end_time': datetime.now().isoformat(),
+            'screenshots': []
+        }
+
+    @staticmethod
+    def start_case_execution(case_execution):
+        """记录用例实际开始执行时间"""
+        case_execution.started_at = timezone.now()
+        case_execution.status = 'running'
+        case_execution.save()
+
+    @staticmethod
+    def finish_case_execution(case_execution, case_result):
+        """立即更新该用例的执行记录（包含准确的执行时间）"""
+        case_execution.status = case_result['status']
+        case_execution.finished_at = timezone.now()
+        case_execution.execution_time = (case_execution.finished_at - case_execution.started_at).total_seconds()
+        case_execution.execution_logs = json.dumps(case_result['steps'], ensure_ascii=False)
+        if case_result['error']:
+            case_execution.error_message = case_result['error']
+        if case_result.get('screenshots'):
+            case_execution.screenshots = case_result['screenshots']
+        case_execution.save()
+        print(f"⏱️  执行时长: {case_execution.execution_time:.2f}秒")
+
+    def run_case_workers(self, test_cases_data, worker, concurrency, start_time):
+        """
+        启动 concurrency 个工作线程执行用例，全部完成后按用例顺序汇总结果并更新执行记录
+
+        Args:
+            worker: worker(case_queue, results)，从 case_queue 依次取出 (序号, 用例数据) 执行，
+                    把用例结果写入 results[序号]
+        """
+        case_queue = queue.Queue()
+        for index, case_data in enumerate(test_cases_data):
+            case_queue.put((index, case_data))
+        results = [None] * len(test_cases_data)
+
+        def run_worker():
+            try:
+                worker(case_queue, results)
+            finally:
+                # 关闭工作线程的数据库连接
+                connection.close()
+
+        if concurrency <= 1:
+            worker(case_queue, results)
+        else:
+            threads = [
+                threading.Thread(target=run_worker, name=f'ui-suite-worker-{i + 1}')
+                for i in range(concurrency)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.results = [result for result in results if result is not None]
+        passed = sum(1 for result in self.results if result['status'] == 'passed')
+        failed = sum(1 for result in self.results if result['status'] == 'failed')
+        skipped = len(self.results) - passed - failed
+
+        # 注意：每个用例的执行记录已在执行过程中实时更新，不需要在这里统一更新
+
+        duration = time.time() - start_time
+        status = 'SUCCESS' if failed == 0 else 'FAILED'
+        self.update_execution_result(status, passed, failed, skipped, duration)
+
     def run_with_playwright(self):
         """使用 Playwright 执行测试（同步版本）"""
         start_time = time.time()
-        passed = 0
-        failed = 0
-        skipped = 0
 
         # 检查 Playwright 是否可用
         try:
@@ -182,201 +322,70 @@ class TestExecutor:
 
             return
 
-        # 预先获取所有测试用例的步骤数据，避免在Playwright上下文中访问ORM
-        test_cases_data = []
-        for test_case in self.test_cases:
-            case_data = {
-                'id': test_case.id,
-                'name': test_case.name,
-                'project_id': self.test_suite.project.id,
-                'steps': []
-            }
-
-            # 获取步骤并预先加载所有相关数据
-            steps = test_case.steps.select_related('element', 'element__locator_strategy').order_by('step_number')
-            for step in steps:
-                step_data = {
-                    'id': step.id,
-                    'step_number': step.step_number,
-                    'action_type': step.action_type,
-                    'description': step.description,
-                    'input_value': step.input_value,
-                    'wait_time': step.wait_time,
-                    'assert_type': step.assert_type,
-                    'assert_value': step.assert_value,
-                    'element': None
-                }
-
-                # 如果有元素，预先获取元素数据
-                if step.element:
-                    step_data['element'] = {
-                        'id': step.element.id,
-                        'name': step.element.name,
-                        'locator_value': step.element.locator_value,
-                        'locator_strategy': step.element.locator_strategy.name if step.element.locator_strategy else 'css'
-                    }
-
-                case_data['steps'].append(step_data)
-
-            test_cases_data.append(case_data)
-
-        # 预先创建所有测试用例执行记录（不设置 started_at，等实际执行时再设置）
-        case_executions = {}
-        for case_data in test_cases_data:
-            case_execution = TestCaseExecution.objects.create(
-                test_case_id=case_data['id'],
-                project_id=case_data['project_id'],
-                test_suite=self.test_suite,
-                execution_source='suite',
-                status='pending',  # 初始状态为 pending
-                engine=self.engine,
-                browser=self.browser,
-                headless=self.headless,
-                created_by=self.executed_by
-                # 注意：不设置 started_at，等用例实际开始执行时再设置
-            )
-            case_executions[case_data['id']] = case_execution
+        test_cases_data = self.prepare_test_cases_data()
+        case_executions = self.create_case_executions(test_cases_data)
 
-        # 执行每个测试用例，为每个用例单独启动和关闭浏览器
-        print(f"准备执行 {len(test_cases_data)} 个测试用例")
+        # 用例分配到多个工作线程执行：浏览器进程来自浏览器池，每个用例使用独立的浏览器上下文
+        concurrency = self.get_concurrency(len(test_cases_data))
+        print(f"准备执行 {len(test_cases_data)} 个测试用例，并发数: {concurrency}")
 
-        with sync_playwright() as p:
-            for i, case_data in enumerate(test_cases_data, 1):
+        def worker(case_queue, results):
+            while True:
+                try:
+                    index, case_data = case_queue.get_nowait()
+                except queue.Empty:
+                    return
                 print(f"\n{'=' * 60}")
-                print(f"正在执行第 {i}/{len(test_cases_data)} 个用例: {case_data['name']}")
+                print(f"正在执行第 {index + 1}/{len(test_cases_data)} 个用例: {case_data['name']}")
                 print(f"{'=' * 60}")
 
-                # 记录用例实际开始执行时间
                 case_execution = case_executions[case_data['id']]
-                case_execution.started_at = timezone.now()
-                case_execution.status = 'running'
-                case_execution.save()
-
-                # 为每个测试用例启动新的浏览器实例
+                self.start_case_execution(case_execution)
                 try:
-                    # 选择浏览器
-                    if self.browser == 'firefox':
-                        browser = p.firefox.launch(headless=self.headless)
-                    elif self.browser == 'safari':
-                        browser = p.webkit.launch(headless=self.headless)
-                    else:  # chrome or edge
-                        # 添加防检测参数
-                        browser = p.chromium.launch(
-                            headless=self.headless,
-                            args=['--disable-blink-features=AutomationControlled']
-                        )
-
-                    print(f"✓ 浏览器已启动")
-
                     # 配置上下文（User Agent 和 Viewport）
-                    self.context = browser.new_context(
+                    case_result = BrowserPool.run(
+                        self.browser,
+                        self.headless,
+                        lambda context: self._run_case_in_context(context, case_data),
                         viewport={'width': 1920, 'height': 1080},
                         user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
                     )
-                    self.current_page = self.context.new_page()
-
-                    # 导航到项目基础URL
-                    if self.test_suite.project.base_url:
-                        try:
-                            print(f"正在导航到: {self.test_suite.project.base_url}")
+                    print(f"✓ 用例执行完成，状态: {case_result['status']}")
+                except Exception as e:
+                    print(f"✗ 用例执行出现异常: {str(e)}")
+                    case_result = self.failed_case_result(case_data, f"用例执行异常: {str(e)}")
 
-                            # 检测是否在Linux服务器环境
-                            import platform
-                            is_linux = platform.system() == 'Linux'
+                results[index] = case_result
+                self.finish_case_execution(case_execution, case_result)
 
-                            # 使用 networkidle 等待页面加载完成
-                            self.current_page.goto(self.test_suite.project.base_url, wait_until='networkidle',
-                                                   timeout=30000)
+        self.run_case_workers(test_cases_data, worker, concurrency, start_time)
 
-                            # 额外等待，确保动态内容加载（Vue/React等SPA应用）
-                            # 服务器无头模式需要更长的等待时间
-                            extra_wait = 3 if is_linux else 2
-                            time.sleep(extra_wait)
+    def _run_case_in_context(self, context, case_data):
+        """在浏览器池提供的上下文中执行单个用例（在浏览器池工作线程中调用）"""
+        self.context = context
+        self.current_page = context.new_page()
 
-                            print(
-                                f"✓ 成功导航到: {self.test_suite.project.base_url} (已等待页面加载完成，额外{extra_wait}秒)")
-                        except Exception as e:
-                            print(f"✗ 导航失败: {str(e)}")
-                            # 导航失败，记录错误并继续下一个用例
-                            self.results.append({
-                                'test_case_id': case_data['id'],
-                                'test_case_name': case_data['name'],
-                                'status': 'failed',
-                                'steps': [],
-                                'error': f"导航到基础URL失败: {str(e)}",
-                                'start_time': datetime.now().isoformat(),
-                                'end_time': datetime.now().isoformat(),
-                                'screenshots': []
-                            })
-                            failed += 1
-                            browser.close()
-                            print(f"✓ 浏览器已关闭")
-                            continue
-
-                    # 执行测试用例（不再传递page参数，使用self.current_page）
-                    case_result = self.execute_test_case_playwright_no_db(case_data)
-                    self.results.append(case_result)
-                    print(f"✓ 用例执行完成，状态: {case_result['status']}")
+        # 导航到项目基础URL
+        if self.test_suite.project.base_url:
+            try:
+                print(f"正在导航到: {self.test_suite.project.base_url}")
 
-                    # 立即更新该用例的执行记录（包含准确的执行时间）
-                    case_execution = case_executions[case_data['id']]
-                    case_execution.status = case_result['status']
-                    case_execution.finished_at = timezone.now()
-                    case_execution.execution_time = (
-                                case_execution.finished_at - case_execution.started_at).total_seconds()
-                    case_execution.execution_logs = json.dumps(case_result['steps'], ensure_ascii=False)
-                    if case_result['error']:
-                        case_execution.error_message = case_result['error']
-                    if case_result.get('screenshots'):
-                        case_execution.screenshots = case_result['screenshots']
-                    case_execution.save()
-
-                    print(f"⏱️  执行时长: {case_execution.execution_time:.2f}秒")
-
-                    if case_result['status'] == 'passed':
-                        passed += 1
-                    elif case_result['status'] == 'failed':
-                        failed += 1
-                    else:
-                        skipped += 1
+                # 使用 networkidle 等待页面加载完成
+                self.current_page.goto(self.test_suite.project.base_url, wait_until='networkidle',
+                                       timeout=30000)
 
-                except Exception as e:
-                    print(f"✗ 用例执行出现异常: {str(e)}")
-                    # 记录异常
-                    self.results.append({
-                        'test_case_id': case_data['id'],
-                        'test_case_name': case_data['name'],
-                        'status': 'failed',
-                        'steps': [],
-                        'error': f"用例执行异常: {str(e)}",
-                        'start_time': datetime.now().isoformat(),
-                        'end_time': datetime.now().isoformat(),
-                        'screenshots': []
-                    })
-                    failed += 1
-
-                    # 更新执行记录
-                    case_execution = case_executions[case_data['id']]
-                    case_execution.status = 'failed'
-                    case_execution.finished_at = timezone.now()
-                    case_execution.execution_time = (
-                                case_execution.finished_at - case_execution.started_at).total_seconds()
-                    case_execution.error_message = f"用例执行异常: {str(e)}"
-                    case_execution.save()
-
-                finally:
-                    # 确保每个用例执行后都关闭浏览器
-                    try:
-                        browser.close()
-                        print(f"✓ 浏览器已关闭\n")
-                    except:
-                        pass
+                # 等待动态内容渲染完成（Vue/React等SPA应用）
+                waited = SmartWait.for_playwright(self.current_page).settle()
 
-        # 注意：每个用例的执行记录已在执行过程中实时更新，不需要在这里统一更新
+                print(
+                    f"✓ 成功导航到: {self.test_suite.project.base_url} (已等待页面稳定 {waited:.0f}ms)")
+            except Exception as e:
+                print(f"✗ 导航失败: {str(e)}")
+                # 导航失败，记录错误并继续下一个用例
+                return self.failed_case_result(case_data, f"导航到基础URL失败: {str(e)}")
 
-        duration = time.time() - start_time
-        status = 'SUCCESS' if failed == 0 else 'FAILED'
-        self.update_execution_result(status, passed, failed, skipped, duration)
+        # 执行测试用例（不再传递page参数，使用self.current_page）
+        return self.execute_test_case_playwright_no_db(case_data)
 
     def execute_test_case_playwright_no_db(self, case_data):
         """使用 Playwright 执行单个测试用例（不访问数据库）
@@ -426,13 +435,7 @@ class TestExecutor:
                 # 步骤执行完后添加短暂延迟，确保页面状态稳定
                 # 特别是点击操作后，可能触发动画、下拉框展开等
                 if step_result['success'] and step_data['action_type'] in ['click', 'fill', 'hover']:
-                    import asyncio
-                    import time as sync_time
-                    # 点击操作后等待更长时间（下拉框展开动画）
-                    if step_data['action_type'] == 'click':
-                        self.current_page.wait_for_timeout(800)  # 等待800ms，确保下拉框完全展开
-                    else:
-                        self.current_page.wait_for_timeout(300)  # 其他操作等待300ms
+                    SmartWait.for_playwright(self.current_page).settle()
 
                 # 如果步骤失败，捕获失败截图
                 if not step_result['success']:
@@ -442,7 +445,6 @@ class TestExecutor:
 
                     # 捕获失败截图（改进版）
                     try:
-                        import base64
                         # 增加超时设置，避免截图等待时间过长
                         print(f"🔍 开始捕获失败截图 (步骤 {step_data['step_number']})...")
                         print(f"   当前page对象URL: {self.current_page.url}")
@@ -450,22 +452,18 @@ class TestExecutor:
                         screenshot_bytes = self.current_page.screenshot(timeout=5000)  # 5秒超时
                         print(f"   截图字节大小: {len(screenshot_bytes)} bytes")
 
-                        screenshot_base64 = base64.b64encode(screenshot_bytes).decode('utf-8')
-                        print(f"   Base64 编码大小: {len(screenshot_base64)} characters")
-
-                        # 验证 base64 编码是否有效
-                        if len(screenshot_base64) < 100:
-                            raise Exception(f"Base64 编码异常短 ({len(screenshot_base64)} chars)，可能截图失败")
+                        # 验证截图内容是否有效
+                        if len(screenshot_bytes) < 100:
+                            raise Exception(f"截图内容异常短 ({len(screenshot_bytes)} bytes)，可能截图失败")
 
-                        screenshot_url = f'data:image/png;base64,{screenshot_base64}'
+                        stored = save_screenshot(screenshot_bytes)
                         result['screenshots'].append({
-                            'url': screenshot_url,
+                            **stored,
                             'description': f'步骤 {step_data["step_number"]} 失败截图: {step_data.get("description", "")}',
                             'step_number': step_data['step_number'],
                             'timestamp': datetime.now().isoformat()
                         })
-                        print(f"✓ 失败截图已捕获 (步骤 {step_data['step_number']})")
-                        print(f"   截图 URL 长度: {len(screenshot_url)} characters")
+                        print(f"✓ 失败截图已保存 (步骤 {step_data['step_number']}): {stored['url']}")
                     except Exception as screenshot_error:
                         error_msg = f"捕获失败截图失败: {str(screenshot_error)}"
                         print(f"⚠️  {error_msg}")
@@ -488,28 +486,23 @@ class TestExecutor:
 
             # 捕获异常截图（改进版）
             try:
-                import base64
                 # 增加超时设置，避免截图等待时间过长
                 print(f"🔍 开始捕获异常截图...")
                 screenshot_bytes = self.current_page.screenshot(timeout=5000)  # 5秒超时
                 print(f"   截图字节大小: {len(screenshot_bytes)} bytes")
 
-                screenshot_base64 = base64.b64encode(screenshot_bytes).decode('utf-8')
-                print(f"   Base64 编码大小: {len(screenshot_base64)} characters")
-
-                # 验证 base64 编码是否有效
-                if len(screenshot_base64) < 100:
-                    raise Exception(f"Base64 编码异常短 ({len(screenshot_base64)} chars)，可能截图失败")
+                # 验证截图内容是否有效
+                if len(screenshot_bytes) < 100:
+                    raise Exception(f"截图内容异常短 ({len(screenshot_bytes)} bytes)，可能截图失败")
 
-                screenshot_url = f'data:image/png;base64,{screenshot_base64}'
+                stored = save_screenshot(screenshot_bytes)
                 result['screenshots'].append({
-                    'url': screenshot_url,
+                    **stored,
                     'description': f'异常截图: {str(e)}',
                     'step_number': None,
                     'timestamp': datetime.now().isoformat()
                 })
-                print(f"✓ 异常截图已捕获")
-                print(f"   截图 URL 长度: {len(screenshot_url)} characters")
+                print(f"✓ 异常截图已保存: {stored['url']}")
             except Exception as screenshot_error:
                 error_msg = f"捕获异常截图失败: {str(screenshot_error)}"
                 print(f"⚠️  {error_msg}")
@@ -609,598 +602,14 @@ class TestExecutor:
         }
 
         try:
-            # 获取元素定位器
-            if step_data['element']:
-                element = step_data['element']
-                locator_value = element['locator_value']
-                locator_strategy = element['locator_strategy'].lower()
-                element_name = element.get('name', '未知元素')
-
-                # 根据定位策略构造 Playwright 选择器
-                if locator_strategy in ['css', 'css selector']:
-                    selector = locator_value
-                elif locator_strategy == 'xpath':
-                    selector = f'xpath={locator_value}'
-                elif locator_strategy == 'id':
-                    selector = f'#{locator_value}'
-                elif locator_strategy == 'name':
-                    selector = f'[name="{locator_value}"]'
-                elif locator_strategy == 'text':
-                    selector = f'text={locator_value}'
-                else:
-                    selector = locator_value
-
-                # 根据操作类型执行动作
-                if step_data['action_type'] == 'click':
-                    # 检测是否是原生HTML select的option元素（优先检测，因为option元素特殊）
-                    is_native_select_option = (
-                            (
-                                        'option[' in locator_value or ' > option' in locator_value or '//option' in locator_value) or
-                            ('select' in locator_value.lower() and 'option' in locator_value.lower())
-                    )
-
-                    # 对于原生HTML select的option，使用select_option方法
-                    if is_native_select_option:
-                        print(f"[Playwright-调试] 检测到原生HTML select元素，使用select_option方法...")
-
-                        # 提取option的value值
-                        import re
-                        option_value_match = re.search(r'option\[value=["\']([^"\']+)["\']\]', locator_value)
-                        option_value_xpath_match = re.search(r'option\[@value=["\']([^"\']+)["\']\]', locator_value)
-
-                        option_value = None
-                        if option_value_match:
-                            option_value = option_value_match.group(1)
-                        elif option_value_xpath_match:
-                            option_value = option_value_xpath_match.group(1)
-                        else:
-                            option_value = '1'  # 默认值
-
-                        # 构造select元素的定位器（去掉option部分）
-                        select_locator_value = re.sub(r'\s*>\s*option\[.*?\]', '', locator_value)
-                        select_locator_value = re.sub(r'\s+option\[.*?\]', '', select_locator_value)
-                        select_locator_value = re.sub(r'//option\[.*?\]', '', select_locator_value)
-
-                        print(f"[Playwright-调试] Select定位器: {select_locator_value}, Option值: {option_value}")
-
-                        try:
-                            # 构造select元素的locator
-                            if locator_strategy.lower() == 'xpath':
-                                select_match = re.match(r'^(//.*?select)(?:/option)?', locator_value)
-                                if select_match:
-                                    select_locator_value = select_match.group(1)
-                                else:
-                                    select_locator_value = locator_value.split('/')[0]
-                                select_locator = self.current_page.locator(f"xpath={select_locator_value}")
-                            else:
-                                select_locator = self.current_page.locator(select_locator_value)
-
-                            # 使用select_option方法
-                            select_locator.select_option(value=option_value, timeout=step_data['wait_time'])
-
-                            execution_time = round(time.time() - start_time, 2)
-                            step_result['success'] = True
-                            print(f"✓ 选择下拉框选项成功 (select_option方法)")
-                            # 成功处理select，跳过后续逻辑
-                            native_select_handled = True
-                        except Exception as e:
-                            print(f"✗ select_option失败: {e}")
-                            # 如果失败，继续尝试普通点击
-                            native_select_handled = False
-                    else:
-                        native_select_handled = False
-
-                    # 只有当原生select处理失败或不是原生select时，才继续后续逻辑
-                    if not native_select_handled:
-                        # 检测是否是下拉框选项（需要特殊处理）
-                        # 简化逻辑：只要是 XPath 的 //li 元素，或包含特定关键词，就认为是下拉框选项
-                        is_dropdown_option = (
-                            # 条件1: XPath 定位的 li 元素（最常见的下拉框选项）
-                                (locator_strategy.lower() == 'xpath' and '//li' in locator_value) or
-                                # 条件2: CSS 或 XPath 包含 el-select-dropdown
-                                'el-select-dropdown' in locator_value.lower() or
-                                # 条件3: 包含 role="option"
-                                'role="option"' in locator_value.lower() or
-                                # 条件4: 包含 li 标签且看起来像列表项
-                                ('li' in locator_value.lower() and (
-                                            'ul' in locator_value.lower() or 'ol' in locator_value.lower()))
-                        )
-
-                        # 检测是否是 el-select 容器（下拉框触发器）
-                        is_select_trigger = (
-                                'el-select' in locator_value.lower() and
-                                'ancestor::' in locator_value and
-                                '//li' not in locator_value
-                        )
-
-                        if is_select_trigger:
-                            # el-select 容器：需要点击内部的真正触发器
-                            import time as sync_time
-
-                            # 使用 JavaScript 查找并点击内部的可点击元素
-                            if locator_strategy.lower() == 'xpath':
-                                js_code = f"""
-                                    (() => {{
-                                        const xpath = {repr(locator_value)};
-                                        const result = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null);
-                                        const selectEl = result.singleNodeValue;
-
-                                        if (!selectEl) return {{ success: false, error: '未找到 el-select 容器' }};
-
-                                        // 查找内部的触发器（按优先级）
-                                        let trigger = selectEl.querySelector('.el-select__wrapper') ||
-                                                     selectEl.querySelector('input') ||
-                                                     selectEl.querySelector('.el-input__inner');
-
-                                        if (trigger) {{
-                                            trigger.click();
-                                            return {{ success: true, method: 'inner-trigger', element: trigger.className }};
-                                        }} else {{
-                                            // 如果找不到内部触发器，直接点击容器
-                                            selectEl.click();
-                                            return {{ success: true, method: 'container', element: selectEl.className }};
-                                        }}
-                                    }})()
-                                """
-                            else:
-                                js_code = f"""
-                                    (() => {{
-                                        const selectEl = document.querySelector({repr(locator_value)});
-
-                                        if (!selectEl) return {{ success: false, error: '未找到 el-select 容器' }};
-
-                                        let trigger = selectEl.querySelector('.el-select__wrapper') ||
-                                                     selectEl.querySelector('input') ||
-                                                     selectEl.querySelector('.el-input__inner');
-
-                                        if (trigger) {{
-                                            trigger.click();
-                                            return {{ success: true, method: 'inner-trigger', element: trigger.className }};
-                                        }} else {{
-                                            selectEl.click();
-                                            return {{ success: true, method: 'container', element: selectEl.className }};
-                                        }}
-                                    }})()
-                                """
-
-                            js_result = self.current_page.evaluate(js_code)
-
-                            if js_result.get('success'):
-                                self.current_page.wait_for_timeout(800)  # 等待下拉框展开
-                                step_result['success'] = True
-                            else:
-                                step_result['error'] = f"✗ 下拉框触发器点击失败: {js_result.get('error')}"
-
-                        elif is_dropdown_option:
-                            # 下拉框选项：使用 Playwright 原生方法（更可靠）
-                            # 之前使用 JS click() 可能无法触发 Element Plus 的事件监听
-                            self.current_page.wait_for_timeout(800)  # 等待下拉框展开
-
-                            print(f"[Playwright-调试] 下拉框选项处理: {locator_strategy}={locator_value}")
-
-                            # 构造基础定位器（移除 Playwright 特有的伪类，因为我们要手动遍历）
-                            base_locator_value = locator_value.replace(' >> visible=true', '')
-
-                            try:
-                                if locator_strategy.lower() == 'xpath':
-                                    if not base_locator_value.startswith('xpath='):
-                                        candidates = self.current_page.locator(f"xpath={base_locator_value}")
-                                    else:
-                                        candidates = self.current_page.locator(base_locator_value)
-                                elif locator_strategy.lower() in ['css', 'css selector']:
-                                    candidates = self.current_page.locator(base_locator_value)
-                                else:
-                                    # 其他策略暂按 CSS 处理
-                                    candidates = self.current_page.locator(base_locator_value)
-
-                                # 获取匹配元素数量
-                                count = candidates.count()
-                                print(f"[Playwright-调试] 找到 {count} 个匹配元素")
-
-                                found_visible = False
-                                last_error = None
-
-                                for i in range(count):
-                                    try:
-                                        candidate = candidates.nth(i)
-                                        if candidate.is_visible():
-                                            print(f"[Playwright-调试] 第 {i} 个元素可见，尝试点击...")
-                                            # 使用 Playwright 的 click，它会触发完整的鼠标事件链
-                                            candidate.click(timeout=2000)
-                                            found_visible = True
-                                            step_result['success'] = True
-                                            print(f"[Playwright-调试] 点击成功")
-                                            break
-                                    except Exception as e:
-                                        print(f"[Playwright-调试] 点击第 {i} 个元素失败: {e}")
-                                        last_error = e
-
-                                if not found_visible:
-                                    error_msg = f"未找到可见的下拉框选项 (匹配到 {count} 个元素)"
-                                    if last_error:
-                                        error_msg += f", 最后一次错误: {str(last_error)}"
-                                    step_result['error'] = error_msg
-                                    step_result['success'] = False
-
-                            except Exception as e:
-                                step_result['error'] = f"下拉框选项处理异常: {str(e)}"
-                                step_result['success'] = False
-
-                            # 检查并关闭多选下拉框（如果还在显示）
-                            if step_result['success']:
-                                try:
-                                    if self.current_page.locator('.el-select-dropdown').first.is_visible():
-                                        # 点击空白处关闭
-                                        self.current_page.click('body', position={'x': 10, 'y': 10}, timeout=3000)
-                                        self.current_page.wait_for_timeout(500)
-                                except:
-                                    pass
-
-                            # 已移除调试面板代码
-                        else:
-                            # 普通元素：正常点击
-                            # 如果刚切换了标签页，增加超时时间并滚动到元素
-                            if step_data.get('_just_switched_tab'):
-                                print(f"  ⚠️  刚切换标签页，增加元素等待时间和滚动")
-
-                                # 关键修复：确保页面保持在前台！
-                                self.current_page.bring_to_front()
-                                print(f"  ✓ 页面已置于前台")
-
-                                # 先尝试滚动到元素（确保元素在视口内）
-                                try:
-                                    self.current_page.locator(selector).scroll_into_view_if_needed(timeout=5000)
-                                    print(f"  ✓ 元素已滚动到视口")
-                                except Exception as e:
-                                    print(f"  ⚠️  滚动失败: {str(e)[:50]}")
-
-                                # 使用更长的超时时间（至少10秒）
-                                extended_timeout = max(step_data['wait_time'], 10000)
-                                self.current_page.click(selector, timeout=extended_timeout)
-                                print(f"  ✓ 点击成功（超时: {extended_timeout}ms）")
-                            else:
-                                self.current_page.click(selector, timeout=step_data['wait_time'])
-                            step_result['success'] = True
-
-                elif step_data['action_type'] == 'fill':
-                    # 解析输入值中的变量表达式
-                    resolved_value = resolve_variables(step_data['input_value'])
-
-                    # 如果刚切换了标签页，增加超时时间
-                    if step_data.get('_just_switched_tab'):
-                        # 确保页面保持在前台
-                        self.current_page.bring_to_front()
-                        extended_timeout = max(step_data['wait_time'], 10000)
-                        self.current_page.fill(selector, resolved_value, timeout=extended_timeout)
-                    else:
-                        self.current_page.fill(selector, resolved_value, timeout=step_data['wait_time'])
-
-                    step_result['success'] = True
-                    # 记录解析后的值（用于调试）
-                    if resolved_value != step_data['input_value']:
-                        step_result['resolved_value'] = resolved_value
-                        print(f"  ✓ 变量解析: {step_data['input_value']} -> {resolved_value}")
-
-
-                elif step_data['action_type'] == 'getText':
-                    text = self.current_page.text_content(selector, timeout=step_data['wait_time'])
-                    step_result['result'] = text
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'waitFor':
-                    # 检测是否是下拉框选项（下拉框选项可能是隐藏的）
-                    is_dropdown_option_wait = (
-                            (locator_strategy.lower() == 'xpath' and '//li' in locator_value) or
-                            'el-select-dropdown' in locator_value.lower() or
-                            'role="option"' in locator_value.lower() or
-                            ('li' in locator_value.lower() and (
-                                        'ul' in locator_value.lower() or 'ol' in locator_value.lower()))
-                    )
-
-                    if is_dropdown_option_wait:
-                        # 对于下拉框选项，只等待元素在DOM中（attached），不要求可见
-                        self.current_page.wait_for_selector(selector, state='attached', timeout=step_data['wait_time'])
-                    else:
-                        # 普通元素：等待可见
-                        self.current_page.wait_for_selector(selector, timeout=step_data['wait_time'])
-
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'hover':
-                    self.current_page.hover(selector, timeout=step_data['wait_time'])
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'scroll':
-                    self.current_page.locator(selector).scroll_into_view_if_needed()
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'screenshot':
-                    screenshot_path = f'screenshots/step_{step_data["step_number"]}.png'
-                    self.current_page.screenshot(path=screenshot_path)
-                    step_result['screenshot'] = screenshot_path
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'assert':
-                    # 解析断言值中的变量
-                    resolved_assert_value = resolve_variables(step_data['assert_value'])
-                    if resolved_assert_value != step_data['assert_value']:
-                        print(f"  ✓ 断言变量解析: {step_data['assert_value']} -> {resolved_assert_value}")
-
-                    # 执行断言
-                    if step_data['assert_type'] == 'textContains':
-                        text = self.current_page.text_content(selector, timeout=step_data['wait_time'])
-                        if resolved_assert_value in text:
-                            step_result['success'] = True
-                        else:
-                            # 格式化为详细的错误信息，与playwright_engine.py保持一致
-                            log = f"✗ 断言失败: 文本不包含 '{resolved_assert_value}'\n"
-                            log += f"  - 实际文本: '{text}'"
-                            step_result['error'] = log
-                    elif step_data['assert_type'] == 'textEquals':
-                        text = self.current_page.text_content(selector, timeout=step_data['wait_time'])
-                        if text == resolved_assert_value:
-                            step_result['success'] = True
-                        else:
-                            # 格式化为详细的错误信息
-                            log = f"✗ 断言失败: 文本不等于 '{resolved_assert_value}'\n"
-                            log += f"  - 期望: '{resolved_assert_value}'\n"
-                            log += f"  - 实际: '{text}'"
-                            step_result['error'] = log
-                    elif step_data['assert_type'] == 'isVisible':
-                        is_visible = self.current_page.is_visible(selector)
-                        step_result['success'] = is_visible
-                        if not is_visible:
-                            step_result['error'] = f"✗ 断言失败: 元素 '{element_name}' 不可见"
-                    elif step_data['assert_type'] == 'exists':
-                        count = self.current_page.locator(selector).count()
-                        step_result['success'] = count > 0
-                        if count == 0:
-                            step_result['error'] = f"✗ 断言失败: 元素 '{element_name}' 不存在"
-
-                elif step_data['action_type'] == 'wait':
-                    self.current_page.wait_for_timeout(step_data['wait_time'])
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'switchTab':
-                    # 切换标签页 - 同步版本
-                    import time as sync_time
-
-                    # 获取超时时间
-                    # 强制使用至少5秒的超时时间，确保有足够时间等待新标签页打开
-                    user_wait = step_data.get('wait_time', 0) or 0
-                    if user_wait > 0:
-                        timeout = max(user_wait / 1000, 5.0)
-                    else:
-                        timeout = 5.0
-
-                    print(f"🔄 开始执行切换标签页 (超时: {timeout}s)...")
-                    start_wait = sync_time.time()
-                    current_page = self.current_page
-                    target_index = -1
-
-                    # 轮询等待新标签页
-                    # 轮询等待新标签页
-                    while True:
-                        pages = self.current_page.context.pages
-                        target_index = -1  # 默认切换到最新标签页
-                        should_switch = False
-
-                        # 调试日志：打印当前页面状态
-                        print(f"  [Debug] 当前页面列表 (数量: {len(pages)}):")
-                        for idx, p in enumerate(pages):
-                            is_current = " (Current)" if p == current_page else ""
-                            try:
-                                print(f"    {idx}: {p.url} - {p.title()}{is_current}")
-                            except Exception as e:
-                                print(f"    {idx}: [Error getting info] {str(e)}")
-
-                        if step_data['input_value'] and str(step_data['input_value']).isdigit():
-                            # 指定索引的情况
-                            idx = int(step_data['input_value'])
-                            if 0 <= idx < len(pages):
-                                target_index = idx
-                                should_switch = True
-                        else:
-                            # 自动模式：寻找一个不是当前页面的新页面
-                            # 优先找列表末尾的（通常是新的）
-                            candidates = [p for p in pages if p != current_page]
-                            if candidates:
-                                should_switch = True
-                            elif len(pages) > 1:
-                                # 如果有多个页面但都是 current_page (理论上不可能)，或者 current_page 不在 pages 里
-                                # 只要页面数量增加，就应该切换
-                                should_switch = True
-
-                        if should_switch:
-                            break
-
-                        if sync_time.time() - start_wait > timeout:
-                            # 超时了
-                            break
-
-                        # 关键修改：使用 wait_for_timeout 代替 time.sleep
-                        # time.sleep 会阻塞线程，导致 Playwright 无法接收新页面事件
-                        self.current_page.wait_for_timeout(500)
-
-                    # 获取目标页面
-                    pages = self.current_page.context.pages
-                    if target_index == -1:
-                        # 自动模式
-                        candidates = [p for p in pages if p != current_page]
-                        if candidates:
-                            # 切换到最新的一个非当前页面
-                            target_page = candidates[-1]
-                            final_target_index = pages.index(target_page)
-                        else:
-                            # 如果没有找到新页面
-                            if len(pages) > 1:
-                                # 备选：如果有多个页面，切换到最后一个
-                                target_page = pages[-1]
-                                final_target_index = len(pages) - 1
-                            else:
-                                raise Exception(
-                                    f"切换标签页失败: 在 {timeout} 秒内未检测到新标签页打开 (当前页面数: {len(pages)})")
-                    else:
-                        target_page = pages[target_index]
-                        final_target_index = target_index
-
-                    # 将目标页面设为当前活动页面
-                    target_page.bring_to_front()
-
-                    # 等待页面稳定
-                    # 新标签页可能需要时间加载和渲染
-                    try:
-                        # 等待网络空闲状态（页面加载完成）
-                        target_page.wait_for_load_state('networkidle', timeout=10000)  # 增加到10秒
-                        print(f"  - 页面加载状态: networkidle")
-                    except Exception as e:
-                        # 如果networkidle超时，至少等待domcontentloaded
-                        try:
-                            target_page.wait_for_load_state('domcontentloaded', timeout=5000)  # 增加到5秒
-                            print(f"  - 页面加载状态: domcontentloaded")
-                        except Exception as e2:
-                            print(f"  - 页面加载状态: 超时，继续执行 ({str(e2)[:50]})")
-
-                    # 额外等待一小段时间，确保页面完全稳定
-                    target_page.wait_for_timeout(1500)  # 使用 wait_for_timeout 代替 sleep
-
-                    # 验证页面确实已切换
-                    print(f"  - 当前活动页面URL: {target_page.url}")
-                    print(f"  - 页面是否可见: {target_page.is_visible('body') if target_page else 'Unknown'}")
-
-                    # 关键修复：直接更新实例变量！
-                    self.current_page = target_page
-                    step_result['switched_page'] = target_page
-                    step_result['success'] = True
-
-                    print(f"✓ 切换标签页成功")
-                    print(f"  - 目标索引: {final_target_index}")
-                    print(f"  - 页面标题: {self.current_page.title()}")
-                    print(f"  - self.current_page已更新为新页面")
-
+            action_type = step_data['action_type']
+            # 没有关联元素的步骤只执行等待、切换标签页
+            if step_data['element'] or action_type in PAGE_ACTIONS:
+                handler = self.PLAYWRIGHT_ACTIONS.get(action_type)
+                if handler is None:
+                    step_result['error'] = f'⚠ 未知的操作类型: {action_type}'
                 else:
-                    step_result['error'] = f'⚠ 未知的操作类型: {step_data["action_type"]}'
-
-            else:
-                # 没有元素的步骤（如等待、切换标签页）
-                if step_data['action_type'] == 'wait':
-                    self.current_page.wait_for_timeout(step_data['wait_time'])
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'switchTab':
-                    # 切换标签页 - 同步版本（无需元素）
-                    import time as sync_time
-
-                    # 获取超时时间
-                    # 强制使用至少5秒的超时时间，确保有足够时间等待新标签页打开
-                    user_wait = step_data.get('wait_time', 0) or 0
-                    if user_wait > 0:
-                        timeout = max(user_wait / 1000, 5.0)
-                    else:
-                        timeout = 5.0
-
-                    print(f"🔄 开始执行切换标签页 (超时: {timeout}s)...")
-                    start_wait = sync_time.time()
-                    current_page = self.current_page
-                    target_index = -1
-
-                    # 轮询等待新标签页
-                    # 轮询等待新标签页
-                    while True:
-                        pages = self.current_page.context.pages
-                        target_index = -1  # 默认切换到最新标签页
-                        should_switch = False
-
-                        # 调试日志：打印当前页面状态
-                        print(f"  [Debug] 当前页面列表 (数量: {len(pages)}):")
-                        for idx, p in enumerate(pages):
-                            is_current = " (Current)" if p == current_page else ""
-                            try:
-                                print(f"    {idx}: {p.url} - {p.title()}{is_current}")
-                            except Exception as e:
-                                print(f"    {idx}: [Error getting info] {str(e)}")
-
-                        if step_data['input_value'] and str(step_data['input_value']).isdigit():
-                            # 指定索引的情况
-                            idx = int(step_data['input_value'])
-                            if 0 <= idx < len(pages):
-                                target_index = idx
-                                should_switch = True
-                        else:
-                            # 自动模式：寻找一个不是当前页面的新页面
-                            # 优先找列表末尾的（通常是新的）
-                            candidates = [p for p in pages if p != current_page]
-                            if candidates:
-                                should_switch = True
-                            elif len(pages) > 1:
-                                # 如果有多个页面但都是 current_page (理论上不可能)，或者 current_page 不在 pages 里
-                                # 只要页面数量增加，就应该切换
-                                should_switch = True
-
-                        if should_switch:
-                            break
-
-                        if sync_time.time() - start_wait > timeout:
-                            # 超时了
-                            break
-
-                        # 关键修改：使用 wait_for_timeout 代替 time.sleep
-                        self.current_page.wait_for_timeout(500)
-
-                    # 获取目标页面
-                    pages = self.current_page.context.pages
-                    if target_index == -1:
-                        # 自动模式
-                        candidates = [p for p in pages if p != current_page]
-                        if candidates:
-                            # 切换到最新的一个非当前页面
-                            target_page = candidates[-1]
-                            final_target_index = pages.index(target_page)
-                        else:
-                            # 如果没有找到新页面
-                            if len(pages) > 1:
-                                # 备选：如果有多个页面，切换到最后一个
-                                target_page = pages[-1]
-                                final_target_index = len(pages) - 1
-                            else:
-                                raise Exception(
-                                    f"切换标签页失败: 在 {timeout} 秒内未检测到新标签页打开 (当前页面数: {len(pages)})")
-                    else:
-                        target_page = pages[target_index]
-                        final_target_index = target_index
-
-                    # 将目标页面设为当前活动页面
-                    target_page.bring_to_front()
-
-                    # 等待页面稳定
-                    try:
-                        # 等待网络空闲状态（页面加载完成）
-                        target_page.wait_for_load_state('networkidle', timeout=10000)  # 增加到10秒
-                        print(f"  - 页面加载状态: networkidle")
-                    except Exception as e:
-                        # 如果networkidle超时，至少等待domcontentloaded
-                        try:
-                            target_page.wait_for_load_state('domcontentloaded', timeout=5000)  # 增加到5秒
-                            print(f"  - 页面加载状态: domcontentloaded")
-                        except Exception as e2:
-                            print(f"  - 页面加载状态: 超时，继续执行 ({str(e2)[:50]})")
-
-                    # 额外等待一小段时间，确保页面完全稳定
-                    target_page.wait_for_timeout(1500)  # 使用 wait_for_timeout 代替 sleep
-
-                    # 验证页面确实已切换
-                    print(f"  - 当前活动页面URL: {target_page.url}")
-                    print(f"  - 页面是否可见: {target_page.is_visible('body') if target_page else 'Unknown'}")
-
-                    # 关键修复：直接更新实例变量！
-                    self.current_page = target_page
-                    step_result['switched_page'] = target_page
-                    step_result['success'] = True
-
-                    print(f"✓ 切换标签页成功")
-                    print(f"  - 目标索引: {final_target_index}")
-                    print(f"  - 页面标题: {self.current_page.title()}")
-                    print(f"  - self.current_page已更新为新页面")
+                    handler(self, step_data, step_result, start_time)
 
         except Exception as e:
             # 格式化为详细的错误信息，与playwright_engine.py保持一致
@@ -1256,285 +665,628 @@ class TestExecutor:
 
         return step_result
 
-    def run_with_selenium(self):
-        """使用 Selenium 执行测试"""
-        start_time = time.time()
-        passed = 0
-        failed = 0
-        skipped = 0
+    def _playwright_click(self, step_data, step_result, start_time):
+        """点击元素（click）"""
+        element = step_data['element']
+        locator_value = element['locator_value']
+        locator_strategy = element['locator_strategy'].lower()
+        selector = element['selector']
+
+        # 检测是否是原生HTML select的option元素（优先检测，因为option元素特殊）
+        is_native_select_option = (
+                (
+                            'option[' in locator_value or ' > option' in locator_value or '//option' in locator_value) or
+                ('select' in locator_value.lower() and 'option' in locator_value.lower())
+        )
 
-        # 预先获取所有测试用例的步骤数据，避免在Selenium上下文中访问ORM
-        test_cases_data = []
-        for test_case in self.test_cases:
-            case_data = {
-                'id': test_case.id,
-                'name': test_case.name,
-                'project_id': self.test_suite.project.id,
-                'steps': []
-            }
+        # 对于原生HTML select的option，使用select_option方法
+        if is_native_select_option:
+            print(f"[Playwright-调试] 检测到原生HTML select元素，使用select_option方法...")
 
-            # 获取步骤并预先加载所有相关数据
-            steps = test_case.steps.select_related('element', 'element__locator_strategy').order_by('step_number')
-            for step in steps:
-                step_data = {
-                    'id': step.id,
-                    'step_number': step.step_number,
-                    'action_type': step.action_type,
-                    'description': step.description,
-                    'input_value': step.input_value,
-                    'wait_time': step.wait_time,
-                    'assert_type': step.assert_type,
-                    'assert_value': step.assert_value,
-                    'element': None
-                }
-
-                # 如果有元素，预先获取元素数据
-                if step.element:
-                    step_data['element'] = {
-                        'id': step.element.id,
-                        'name': step.element.name,
-                        'locator_value': step.element.locator_value,
-                        'locator_strategy': step.element.locator_strategy.name if step.element.locator_strategy else 'css'
-                    }
-
-                case_data['steps'].append(step_data)
-
-            test_cases_data.append(case_data)
-
-        # 预先创建所有测试用例执行记录（不设置 started_at，等实际执行时再设置）
-        case_executions = {}
-        for case_data in test_cases_data:
-            case_execution = TestCaseExecution.objects.create(
-                test_case_id=case_data['id'],
-                project_id=case_data['project_id'],
-                test_suite=self.test_suite,
-                execution_source='suite',
-                status='pending',  # 初始状态为 pending
-                engine=self.engine,
-                browser=self.browser,
-                headless=self.headless,
-                created_by=self.executed_by
-                # 注意：不设置 started_at，等用例实际开始执行时再设置
-            )
-            case_executions[case_data['id']] = case_execution
+            # 提取option的value值
+            import re
+            option_value_match = re.search(r'option\[value=["\']([^"\']+)["\']\]', locator_value)
+            option_value_xpath_match = re.search(r'option\[@value=["\']([^"\']+)["\']\]', locator_value)
 
-        # 优化：整个测试套件共用一个浏览器实例，避免频繁启动/关闭
-        # 注意：Safari 不支持浏览器复用（会话管理问题），需要每个用例独立启动
-        print(f"准备执行 {len(test_cases_data)} 个测试用例")
+            option_value = None
+            if option_value_match:
+                option_value = option_value_match.group(1)
+            elif option_value_xpath_match:
+                option_value = option_value_xpath_match.group(1)
+            else:
+                option_value = '1'  # 默认值
 
-        # Safari 需要独立浏览器实例，其他浏览器可以复用
-        use_browser_reuse = self.browser != 'safari'
+            # 构造select元素的定位器（去掉option部分）
+            select_locator_value = re.sub(r'\s*>\s*option\[.*?\]', '', locator_value)
+            select_locator_value = re.sub(r'\s+option\[.*?\]', '', select_locator_value)
+            select_locator_value = re.sub(r'//option\[.*?\]', '', select_locator_value)
+
+            print(f"[Playwright-调试] Select定位器: {select_locator_value}, Option值: {option_value}")
 
-        if use_browser_reuse:
-            # 在套件开始时启动一次浏览器（Chrome/Firefox/Edge）
-            driver = None
             try:
-                driver = self.create_selenium_driver()
-                print(f"✓ 浏览器已启动（将复用于所有用例）\n")
+                # 构造select元素的locator
+                if locator_strategy.lower() == 'xpath':
+                    select_match = re.match(r'^(//.*?select)(?:/option)?', locator_value)
+                    if select_match:
+                        select_locator_value = select_match.group(1)
+                    else:
+                        select_locator_value = locator_value.split('/')[0]
+                    select_locator = self.current_page.locator(f"xpath={select_locator_value}")
+                else:
+                    select_locator = self.current_page.locator(select_locator_value)
+
+                # 使用select_option方法
+                select_locator.select_option(value=option_value, timeout=step_data['wait_time'])
+
+                step_result['success'] = True
+                print(f"✓ 选择下拉框选项成功 (select_option方法)")
+                # 成功处理select，跳过后续逻辑
+                native_select_handled = True
             except Exception as e:
-                print(f"✗ 浏览器启动失败: {str(e)}")
-                # 标记所有用例为失败
-                for case_data in test_cases_data:
-                    self.results.append({
-                        'test_case_id': case_data['id'],
-                        'test_case_name': case_data['name'],
-                        'status': 'failed',
-                        'steps': [],
-                        'error': f"浏览器启动失败: {str(e)}",
-                        'start_time': datetime.now().isoformat(),
-                        'end_time': datetime.now().isoformat(),
-                        'screenshots': []
-                    })
-                    failed += 1
-                # 更新执行记录并返回
-                for case_result in self.results:
-                    case_execution = case_executions[case_result['test_case_id']]
-                    case_execution.status = 'failed'
-                    case_execution.finished_at = timezone.now()
-                    case_execution.execution_time = 0
-                    case_execution.error_message = case_result['error']
-                    case_execution.save()
-                duration = time.time() - start_time
-                self.update_execution_result('FAILED', 0, len(test_cases_data), 0, duration)
-                return
+                print(f"✗ select_option失败: {e}")
+                # 如果失败，继续尝试普通点击
+                native_select_handled = False
         else:
-            # Safari：不预先启动浏览器，每个用例独立启动
-            driver = None
-            print(f"ℹ️  Safari 浏览器将为每个用例独立启动（Safari 不支持浏览器复用）\n")
+            native_select_handled = False
+
+        # 只有当原生select处理失败或不是原生select时，才继续后续逻辑
+        if not native_select_handled:
+            # 检测是否是下拉框选项（需要特殊处理）
+            # 简化逻辑：只要是 XPath 的 //li 元素，或包含特定关键词，就认为是下拉框选项
+            is_dropdown_option = (
+                # 条件1: XPath 定位的 li 元素（最常见的下拉框选项）
+                    (locator_strategy.lower() == 'xpath' and '//li' in locator_value) or
+                    # 条件2: CSS 或 XPath 包含 el-select-dropdown
+                    'el-select-dropdown' in locator_value.lower() or
+                    # 条件3: 包含 role="option"
+                    'role="option"' in locator_value.lower() or
+                    # 条件4: 包含 li 标签且看起来像列表项
+                    ('li' in locator_value.lower() and (
+                                'ul' in locator_value.lower() or 'ol' in locator_value.lower()))
+            )
 
-        # 执行所有测试用例
-        for i, case_data in enumerate(test_cases_data, 1):
-            print(f"\n{'=' * 60}")
-            print(f"正在执行第 {i}/{len(test_cases_data)} 个用例: {case_data['name']}")
-            print(f"{'=' * 60}")
+            # 检测是否是 el-select 容器（下拉框触发器）
+            is_select_trigger = (
+                    'el-select' in locator_value.lower() and
+                    'ancestor::' in locator_value and
+                    '//li' not in locator_value
+            )
 
-            # 记录用例实际开始执行时间
-            case_execution = case_executions[case_data['id']]
-            case_execution.started_at = timezone.now()
-            case_execution.status = 'running'
-            case_execution.save()
+            if is_select_trigger:
+                # el-select 容器：需要点击内部的真正触发器
+                # 使用 JavaScript 查找并点击内部的可点击元素
+                if locator_strategy.lower() == 'xpath':
+                    js_code = f"""
+                        (() => {{
+                            const xpath = {repr(locator_value)};
+                            const result = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null);
+                            const selectEl = result.singleNodeValue;
+
+                            if (!selectEl) return {{ success: false, error: '未找到 el-select 容器' }};
+
+                            // 查找内部的触发器（按优先级）
+                            let trigger = selectEl.querySelector('.el-select__wrapper') ||
+                                         selectEl.querySelector('input') ||
+                                         selectEl.querySelector('.el-input__inner');
+
+                            if (trigger) {{
+                                trigger.click();
+                                return {{ success: true, method: 'inner-trigger', element: trigger.className }};
+                            }} else {{
+                                // 如果找不到内部触发器，直接点击容器
+                                selectEl.click();
+                                return {{ success: true, method: 'container', element: selectEl.className }};
+                            }}
+                        }})()
+                    """
+                else:
+                    js_code = f"""
+                        (() => {{
+                            const selectEl = document.querySelector({repr(locator_value)});
+
+                            if (!selectEl) return {{ success: false, error: '未找到 el-select 容器' }};
+
+                            let trigger = selectEl.querySelector('.el-select__wrapper') ||
+                                         selectEl.querySelector('input') ||
+                                         selectEl.querySelector('.el-input__inner');
+
+                            if (trigger) {{
+                                trigger.click();
+                                return {{ success: true, method: 'inner-trigger', element: trigger.className }};
+                            }} else {{
+                                selectEl.click();
+                                return {{ success: true, method: 'container', element: selectEl.className }};
+                            }}
+                        }})()
+                    """
+
+                js_result = self.current_page.evaluate(js_code)
+
+                if js_result.get('success'):
+                    SmartWait.for_playwright(self.current_page).settle()  # 等待下拉框展开
+                    step_result['success'] = True
+                else:
+                    step_result['error'] = f"✗ 下拉框触发器点击失败: {js_result.get('error')}"
+
+            elif is_dropdown_option:
+                # 下拉框选项：使用 Playwright 原生方法（更可靠）
+                # 之前使用 JS click() 可能无法触发 Element Plus 的事件监听
+                SmartWait.for_playwright(self.current_page).settle()  # 等待下拉框展开
+
+                print(f"[Playwright-调试] 下拉框选项处理: {locator_strategy}={locator_value}")
+
+                # 构造基础定位器（移除 Playwright 特有的伪类，因为我们要手动遍历）
+                base_locator_value = locator_value.replace(' >> visible=true', '')
 
-            # Safari：为每个用例启动新的浏览器
-            if not use_browser_reuse:
                 try:
-                    driver = self.create_selenium_driver()
-                    print(f"✓ Safari 浏览器已启动")
+                    if locator_strategy.lower() == 'xpath':
+                        if not base_locator_value.startswith('xpath='):
+                            candidates = self.current_page.locator(f"xpath={base_locator_value}")
+                        else:
+                            candidates = self.current_page.locator(base_locator_value)
+                    elif locator_strategy.lower() in ['css', 'css selector']:
+                        candidates = self.current_page.locator(base_locator_value)
+                    else:
+                        # 其他策略暂按 CSS 处理
+                        candidates = self.current_page.locator(base_locator_value)
+
+                    # 获取匹配元素数量
+                    count = candidates.count()
+                    print(f"[Playwright-调试] 找到 {count} 个匹配元素")
+
+                    found_visible = False
+                    last_error = None
+
+                    for i in range(count):
+                        try:
+                            candidate = candidates.nth(i)
+                            if candidate.is_visible():
+                                print(f"[Playwright-调试] 第 {i} 个元素可见，尝试点击...")
+                                # 使用 Playwright 的 click，它会触发完整的鼠标事件链
+                                candidate.click(timeout=2000)
+                                found_visible = True
+                                step_result['success'] = True
+                                print(f"[Playwright-调试] 点击成功")
+                                break
+                        except Exception as e:
+                            print(f"[Playwright-调试] 点击第 {i} 个元素失败: {e}")
+                            last_error = e
+
+                    if not found_visible:
+                        error_msg = f"未找到可见的下拉框选项 (匹配到 {count} 个元素)"
+                        if last_error:
+                            error_msg += f", 最后一次错误: {str(last_error)}"
+                        step_result['error'] = error_msg
+                        step_result['success'] = False
+
                 except Exception as e:
-                    print(f"✗ Safari 浏览器启动失败: {str(e)}")
-                    self.results.append({
-                        'test_case_id': case_data['id'],
-                        'test_case_name': case_data['name'],
-                        'status': 'failed',
-                        'steps': [],
-                        'error': f"浏览器启动失败: {str(e)}",
-                        'start_time': datetime.now().isoformat(),
-                        'end_time': datetime.now().isoformat(),
-                        'screenshots': []
-                    })
-                    failed += 1
-                    # 更新执行记录
-                    case_execution.status = 'failed'
-                    case_execution.finished_at = timezone.now()
-                    case_execution.execution_time = (
-                                case_execution.finished_at - case_execution.started_at).total_seconds()
-                    case_execution.error_message = f"浏览器启动失败: {str(e)}"
-                    case_execution.save()
-                    continue
+                    step_result['error'] = f"下拉框选项处理异常: {str(e)}"
+                    step_result['success'] = False
 
-            try:
-                # 在每个用例开始前清理浏览器状态（仅对复用浏览器的情况，且跳过第1个用例）
-                # 第1个用例浏览器刚启动，无需清理；从第2个用例开始才需要清理
-                if use_browser_reuse and i > 1:
-                    try:
-                        print(f"🧹 清理浏览器状态...")
-                        # 清除所有 Cookie
-                        driver.delete_all_cookies()
-                        # 清除 localStorage 和 sessionStorage
-                        driver.execute_script("window.localStorage.clear();")
-                        driver.execute_script("window.sessionStorage.clear();")
-                        print(f"✓ 浏览器状态已清理")
-                    except Exception as clean_error:
-                        print(f"⚠️  清理浏览器状态失败: {str(clean_error)}，继续执行...")
-                        pass  # 如果清理失败，继续执行
-
-                # 导航到项目基础URL
-                if self.test_suite.project.base_url:
+                # 检查并关闭多选下拉框（如果还在显示）
+                if step_result['success']:
                     try:
-                        print(f"正在导航到: {self.test_suite.project.base_url}")
+                        if self.current_page.locator('.el-select-dropdown').first.is_visible():
+                            # 点击空白处关闭
+                            self.current_page.click('body', position={'x': 10, 'y': 10}, timeout=3000)
+                            SmartWait.for_playwright(self.current_page).settle()
+                    except:
+                        pass
 
-                        # 检测是否在Linux服务器环境
-                        import platform
-                        is_linux = platform.system() == 'Linux'
+                # 已移除调试面板代码
+            else:
+                # 普通元素：正常点击
+                # 如果刚切换了标签页，增加超时时间并滚动到元素
+                if step_data.get('_just_switched_tab'):
+                    print(f"  ⚠️  刚切换标签页，增加元素等待时间和滚动")
 
-                        # 导航到URL
-                        driver.get(self.test_suite.project.base_url)
+                    # 关键修复：确保页面保持在前台！
+                    self.current_page.bring_to_front()
+                    print(f"  ✓ 页面已置于前台")
 
-                        # 等待页面基本加载完成
-                        # 在服务器环境（特别是无头模式）需要更长的等待时间
-                        try:
-                            WebDriverWait(driver, 15 if is_linux else 10).until(
-                                lambda d: d.execute_script("return document.readyState") == "complete"
-                            )
-                        except:
-                            pass  # 即使超时也继续执行
-
-                        # 额外等待，确保动态内容加载（Vue/React等SPA应用）
-                        extra_wait = 3 if is_linux else 2
-                        time.sleep(extra_wait)
-
-                        print(
-                            f"✓ 成功导航到: {self.test_suite.project.base_url} (已等待页面加载完成，额外{extra_wait}秒)")
+                    # 先尝试滚动到元素（确保元素在视口内）
+                    try:
+                        self.current_page.locator(selector).scroll_into_view_if_needed(timeout=5000)
+                        print(f"  ✓ 元素已滚动到视口")
                     except Exception as e:
-                        print(f"✗ 导航失败: {str(e)}")
-                        # 导航失败，记录错误并继续下一个用例
-                        self.results.append({
-                            'test_case_id': case_data['id'],
-                            'test_case_name': case_data['name'],
-                            'status': 'failed',
-                            'steps': [],
-                            'error': f"导航到基础URL失败: {str(e)}",
-                            'start_time': datetime.now().isoformat(),
-                            'end_time': datetime.now().isoformat(),
-                            'screenshots': []
-                        })
-                        failed += 1
-                        continue
+                        print(f"  ⚠️  滚动失败: {str(e)[:50]}")
 
-                # 执行测试用例
-                case_result = self.execute_test_case_selenium_no_db(driver, case_data)
-                self.results.append(case_result)
-                print(f"✓ 用例执行完成，状态: {case_result['status']}")
+                    # 使用更长的超时时间（至少10秒）
+                    extended_timeout = max(step_data['wait_time'], 10000)
+                    self.current_page.click(selector, timeout=extended_timeout)
+                    print(f"  ✓ 点击成功（超时: {extended_timeout}ms）")
+                else:
+                    self.current_page.click(selector, timeout=step_data['wait_time'])
+                step_result['success'] = True
+
+    def _playwright_fill(self, step_data, step_result, start_time):
+        """输入文本（fill）"""
+        element = step_data['element']
+        selector = element['selector']
+
+        # 解析输入值中的变量表达式
+        resolved_value = resolve_slot(step_data, 'input_value')
+
+        # 如果刚切换了标签页，增加超时时间
+        if step_data.get('_just_switched_tab'):
+            # 确保页面保持在前台
+            self.current_page.bring_to_front()
+            extended_timeout = max(step_data['wait_time'], 10000)
+            self.current_page.fill(selector, resolved_value, timeout=extended_timeout)
+        else:
+            self.current_page.fill(selector, resolved_value, timeout=step_data['wait_time'])
+
+        step_result['success'] = True
+        # 记录解析后的值（用于调试）
+        if resolved_value != step_data['input_value']:
+            step_result['resolved_value'] = resolved_value
+            print(f"  ✓ 变量解析: {step_data['input_value']} -> {resolved_value}")
+
+    def _playwright_get_text(self, step_data, step_result, start_time):
+        """获取元素文本（getText）"""
+        element = step_data['element']
+        selector = element['selector']
+
+        text = self.current_page.text_content(selector, timeout=step_data['wait_time'])
+        step_result['result'] = text
+        step_result['success'] = True
+
+    def _playwright_wait_for(self, step_data, step_result, start_time):
+        """等待元素出现（waitFor）"""
+        element = step_data['element']
+        locator_value = element['locator_value']
+        locator_strategy = element['locator_strategy'].lower()
+        selector = element['selector']
+
+        # 检测是否是下拉框选项（下拉框选项可能是隐藏的）
+        is_dropdown_option_wait = (
+                (locator_strategy.lower() == 'xpath' and '//li' in locator_value) or
+                'el-select-dropdown' in locator_value.lower() or
+                'role="option"' in locator_value.lower() or
+                ('li' in locator_value.lower() and (
+                            'ul' in locator_value.lower() or 'ol' in locator_value.lower()))
+        )
 
-                # 立即更新该用例的执行记录（包含准确的执行时间）
-                case_execution = case_executions[case_data['id']]
-                case_execution.status = case_result['status']
-                case_execution.finished_at = timezone.now()
-                case_execution.execution_time = (case_execution.finished_at - case_execution.started_at).total_seconds()
-                case_execution.execution_logs = json.dumps(case_result['steps'], ensure_ascii=False)
-                if case_result['error']:
-                    case_execution.error_message = case_result['error']
-                if case_result.get('screenshots'):
-                    case_execution.screenshots = case_result['screenshots']
-                case_execution.save()
-
-                print(f"⏱️  执行时长: {case_execution.execution_time:.2f}秒")
-
-                if case_result['status'] == 'passed':
-                    passed += 1
-                elif case_result['status'] == 'failed':
-                    failed += 1
+        if is_dropdown_option_wait:
+            # 对于下拉框选项，只等待元素在DOM中（attached），不要求可见
+            self.current_page.wait_for_selector(selector, state='attached', timeout=step_data['wait_time'])
+        else:
+            # 普通元素：等待可见
+            self.current_page.wait_for_selector(selector, timeout=step_data['wait_time'])
+
+        step_result['success'] = True
+
+    def _playwright_hover(self, step_data, step_result, start_time):
+        """鼠标悬停（hover）"""
+        element = step_data['element']
+        selector = element['selector']
+
+        self.current_page.hover(selector, timeout=step_data['wait_time'])
+        step_result['success'] = True
+
+    def _playwright_scroll(self, step_data, step_result, start_time):
+        """滚动到元素（scroll）"""
+        element = step_data['element']
+        selector = element['selector']
+
+        self.current_page.locator(selector).scroll_into_view_if_needed()
+        step_result['success'] = True
+
+    def _playwright_screenshot(self, step_data, step_result, start_time):
+        """截图（screenshot）"""
+        screenshot_path = f'screenshots/step_{step_data["step_number"]}.png'
+        self.current_page.screenshot(path=screenshot_path)
+        step_result['screenshot'] = screenshot_path
+        step_result['success'] = True
+
+    def _playwright_assert(self, step_data, step_result, start_time):
+        """断言（assert）"""
+        element = step_data['element']
+        element_name = element.get('name', '未知元素')
+        selector = element['selector']
+
+        # 解析断言值中的变量
+        resolved_assert_value = resolve_slot(step_data, 'assert_value')
+        if resolved_assert_value != step_data['assert_value']:
+            print(f"  ✓ 断言变量解析: {step_data['assert_value']} -> {resolved_assert_value}")
+
+        # 执行断言
+        if step_data['assert_type'] == 'textContains':
+            text = self.current_page.text_content(selector, timeout=step_data['wait_time'])
+            if resolved_assert_value in text:
+                step_result['success'] = True
+            else:
+                # 格式化为详细的错误信息，与playwright_engine.py保持一致
+                log = f"✗ 断言失败: 文本不包含 '{resolved_assert_value}'\n"
+                log += f"  - 实际文本: '{text}'"
+                step_result['error'] = log
+        elif step_data['assert_type'] == 'textEquals':
+            text = self.current_page.text_content(selector, timeout=step_data['wait_time'])
+            if text == resolved_assert_value:
+                step_result['success'] = True
+            else:
+                # 格式化为详细的错误信息
+                log = f"✗ 断言失败: 文本不等于 '{resolved_assert_value}'\n"
+                log += f"  - 期望: '{resolved_assert_value}'\n"
+                log += f"  - 实际: '{text}'"
+                step_result['error'] = log
+        elif step_data['assert_type'] == 'isVisible':
+            is_visible = self.current_page.is_visible(selector)
+            step_result['success'] = is_visible
+            if not is_visible:
+                step_result['error'] = f"✗ 断言失败: 元素 '{element_name}' 不可见"
+        elif step_data['assert_type'] == 'exists':
+            count = self.current_page.locator(selector).count()
+            step_result['success'] = count > 0
+            if count == 0:
+                step_result['error'] = f"✗ 断言失败: 元素 '{element_name}' 不存在"
+
+    def _playwright_wait(self, step_data, step_result, start_time):
+        """固定等待（wait）"""
+        self.current_page.wait_for_timeout(step_data['wait_time'])
+        step_result['success'] = True
+
+    def _playwright_switch_tab(self, step_data, step_result, start_time):
+        """切换标签页（switchTab）"""
+        # 切换标签页 - 同步版本
+        import time as sync_time
+
+        # 获取超时时间
+        # 强制使用至少5秒的超时时间，确保有足够时间等待新标签页打开
+        user_wait = step_data.get('wait_time', 0) or 0
+        if user_wait > 0:
+            timeout = max(user_wait / 1000, 5.0)
+        else:
+            timeout = 5.0
+
+        print(f"🔄 开始执行切换标签页 (超时: {timeout}s)...")
+        start_wait = sync_time.time()
+        current_page = self.current_page
+        target_index = -1
+
+        # 轮询等待新标签页
+        # 轮询等待新标签页
+        while True:
+            pages = self.current_page.context.pages
+            target_index = -1  # 默认切换到最新标签页
+            should_switch = False
+
+            # 调试日志：打印当前页面状态
+            print(f"  [Debug] 当前页面列表 (数量: {len(pages)}):")
+            for idx, p in enumerate(pages):
+                is_current = " (Current)" if p == current_page else ""
+                try:
+                    print(f"    {idx}: {p.url} - {p.title()}{is_current}")
+                except Exception as e:
+                    print(f"    {idx}: [Error getting info] {str(e)}")
+
+            if step_data['input_value'] and str(step_data['input_value']).isdigit():
+                # 指定索引的情况
+                idx = int(step_data['input_value'])
+                if 0 <= idx < len(pages):
+                    target_index = idx
+                    should_switch = True
+            else:
+                # 自动模式：寻找一个不是当前页面的新页面
+                # 优先找列表末尾的（通常是新的）
+                candidates = [p for p in pages if p != current_page]
+                if candidates:
+                    should_switch = True
+                elif len(pages) > 1:
+                    # 如果有多个页面但都是 current_page (理论上不可能)，或者 current_page 不在 pages 里
+                    # 只要页面数量增加，就应该切换
+                    should_switch = True
+
+            if should_switch:
+                break
+
+            if sync_time.time() - start_wait > timeout:
+                # 超时了
+                break
+
+            # 关键修改：使用 wait_for_timeout 代替 time.sleep
+            # time.sleep 会阻塞线程，导致 Playwright 无法接收新页面事件
+            self.current_page.wait_for_timeout(500)
+
+        # 获取目标页面
+        pages = self.current_page.context.pages
+        if target_index == -1:
+            # 自动模式
+            candidates = [p for p in pages if p != current_page]
+            if candidates:
+                # 切换到最新的一个非当前页面
+                target_page = candidates[-1]
+                final_target_index = pages.index(target_page)
+            else:
+                # 如果没有找到新页面
+                if len(pages) > 1:
+                    # 备选：如果有多个页面，切换到最后一个
+                    target_page = pages[-1]
+                    final_target_index = len(pages) - 1
                 else:
-                    skipped += 1
+                    raise Exception(
+                        f"切换标签页失败: 在 {timeout} 秒内未检测到新标签页打开 (当前页面数: {len(pages)})")
+        else:
+            target_page = pages[target_index]
+            final_target_index = target_index
 
-            except Exception as e:
-                print(f"✗ 用例执行出现异常: {str(e)}")
-                # 记录异常
-                self.results.append({
-                    'test_case_id': case_data['id'],
-                    'test_case_name': case_data['name'],
-                    'status': 'failed',
-                    'steps': [],
-                    'error': f"用例执行异常: {str(e)}",
-                    'start_time': datetime.now().isoformat(),
-                    'end_time': datetime.now().isoformat(),
-                    'screenshots': []
-                })
-                failed += 1
+        # 将目标页面设为当前活动页面
+        target_page.bring_to_front()
 
-                # 更新执行记录
-                case_execution = case_executions[case_data['id']]
-                case_execution.status = 'failed'
-                case_execution.finished_at = timezone.now()
-                case_execution.execution_time = (case_execution.finished_at - case_execution.started_at).total_seconds()
-                case_execution.error_message = f"用例执行异常: {str(e)}"
-                case_execution.save()
+        # 等待页面稳定
+        # 新标签页可能需要时间加载和渲染
+        try:
+            # 等待网络空闲状态（页面加载完成）
+            target_page.wait_for_load_state('networkidle', timeout=10000)  # 增加到10秒
+            print(f"  - 页面加载状态: networkidle")
+        except Exception as e:
+            # 如果networkidle超时，至少等待domcontentloaded
+            try:
+                target_page.wait_for_load_state('domcontentloaded', timeout=5000)  # 增加到5秒
+                print(f"  - 页面加载状态: domcontentloaded")
+            except Exception as e2:
+                print(f"  - 页面加载状态: 超时，继续执行 ({str(e2)[:50]})")
+
+        # 等待页面渲染稳定
+        SmartWait.for_playwright(target_page).settle()
+
+        # 验证页面确实已切换
+        print(f"  - 当前活动页面URL: {target_page.url}")
+        print(f"  - 页面是否可见: {target_page.is_visible('body') if target_page else 'Unknown'}")
+
+        # 关键修复：直接更新实例变量！
+        self.current_page = target_page
+        step_result['switched_page'] = target_page
+        step_result['success'] = True
+
+        print(f"✓ 切换标签页成功")
+        print(f"  - 目标索引: {final_target_index}")
+        print(f"  - 页面标题: {self.current_page.title()}")
+        print(f"  - self.current_page已更新为新页面")
+
+    # 操作类型 → Playwright 步骤处理方法
+    PLAYWRIGHT_ACTIONS = {
+        'click': _playwright_click,
+        'fill': _playwright_fill,
+        'getText': _playwright_get_text,
+        'waitFor': _playwright_wait_for,
+        'hover': _playwright_hover,
+        'scroll': _playwright_scroll,
+        'screenshot': _playwright_screenshot,
+        'assert': _playwright_assert,
+        'wait': _playwright_wait,
+        'switchTab': _playwright_switch_tab,
+    }
 
-            finally:
-                # Safari：每个用例执行完都关闭浏览器
-                if not use_browser_reuse and driver:
+    def run_with_selenium(self):
+        """使用 Selenium 执行测试"""
+        start_time = time.time()
+
+        test_cases_data = self.prepare_test_cases_data()
+        case_executions = self.create_case_executions(test_cases_data)
+
+        # 优化：每个工作线程使用自己的浏览器实例并在线程内复用，避免频繁启动/关闭
+        # 注意：Safari 不支持浏览器复用（会话管理问题），需要每个用例独立启动；
+        # safaridriver 同一时间只允许一个会话，因此 Safari 始终串行执行
+        use_browser_reuse = self.browser != 'safari'
+        concurrency = self.get_concurrency(len(test_cases_data)) if use_browser_reuse else 1
+        print(f"准备执行 {len(test_cases_data)} 个测试用例，并发数: {concurrency}")
+        if not use_browser_reuse:
+            print(f"ℹ️  Safari 浏览器将为每个用例独立启动（Safari 不支持浏览器复用）\n")
+
+        def worker(case_queue, results):
+            driver = None
+            launch_error = None
+            used_cases = 0
+            try:
+                while True:
                     try:
-                        driver.quit()
-                        print(f"✓ Safari 浏览器已关闭\n")
-                    except Exception as e:
-                        print(f"✗ 关闭 Safari 浏览器时出错: {str(e)}\n")
-                    driver = None
+                        index, case_data = case_queue.get_nowait()
+                    except queue.Empty:
+                        return
+                    print(f"\n{'=' * 60}")
+                    print(f"正在执行第 {index + 1}/{len(test_cases_data)} 个用例: {case_data['name']}")
+                    print(f"{'=' * 60}")
+
+                    case_execution = case_executions[case_data['id']]
+                    self.start_case_execution(case_execution)
+
+                    # 复用浏览器时启动失败不再重试，该线程后续用例直接标记为失败
+                    if driver is None and not (use_browser_reuse and launch_error):
+                        try:
+                            driver = self.create_selenium_driver()
+                            used_cases = 0
+                            print(f"✓ 浏览器已启动")
+                        except Exception as e:
+                            print(f"✗ 浏览器启动失败: {str(e)}")
+                            launch_error = str(e)
+
+                    if driver is None:
+                        case_result = self.failed_case_result(case_data, f"浏览器启动失败: {launch_error}")
+                    else:
+                        try:
+                            case_result = self._run_case_with_driver(driver, case_data, used_cases > 0)
+                            print(f"✓ 用例执行完成，状态: {case_result['status']}")
+                        except Exception as e:
+                            print(f"✗ 用例执行出现异常: {str(e)}")
+                            case_result = self.failed_case_result(case_data, f"用例执行异常: {str(e)}")
+                        used_cases += 1
+
+                    results[index] = case_result
+                    self.finish_case_execution(case_execution, case_result)
 
-        # 所有用例执行完毕后，关闭浏览器（仅对复用浏览器的情况）
-        if use_browser_reuse and driver:
+                    # Safari：每个用例执行完都关闭浏览器
+                    if not use_browser_reuse and driver:
+                        self._quit_driver(driver)
+                        driver = None
+            finally:
+                # 所有用例执行完毕后，关闭浏览器
+                if driver:
+                    self._quit_driver(driver)
+
+        self.run_case_workers(test_cases_data, worker, concurrency, start_time)
+
+    @staticmethod
+    def _quit_driver(driver):
+        try:
+            driver.quit()
+            print(f"✓ 浏览器已关闭")
+        except Exception as e:
+            print(f"✗ 关闭浏览器时出错: {str(e)}")
+
+    def _run_case_with_driver(self, driver, case_data, clean_state):
+        """使用指定的 WebDriver 执行单个用例
+
+        Args:
+            clean_state: 浏览器已执行过其他用例，执行前需要清理 Cookie 和本地存储
+        """
+        # 在每个用例开始前清理浏览器状态（浏览器刚启动时无需清理）
+        if clean_state:
             try:
-                print(f"\n{'=' * 60}")
-                print(f"正在关闭浏览器...")
-                driver.quit()
-                print(f"✓ 浏览器已关闭")
-                print(f"{'=' * 60}\n")
-            except Exception as e:
-                print(f"✗ 关闭浏览器时出错: {str(e)}")
+                print(f"🧹 清理浏览器状态...")
+                # 清除所有 Cookie
+                driver.delete_all_cookies()
+                # 清除 localStorage 和 sessionStorage
+                driver.execute_script("window.localStorage.clear();")
+                driver.execute_script("window.sessionStorage.clear();")
+                print(f"✓ 浏览器状态已清理")
+            except Exception as clean_error:
+                print(f"⚠️  清理浏览器状态失败: {str(clean_error)}，继续执行...")
+
+        # 导航到项目基础URL
+        if self.test_suite.project.base_url:
+            try:
+                print(f"正在导航到: {self.test_suite.project.base_url}")
 
-        # 注意：每个用例的执行记录已在执行过程中实时更新，不需要在这里统一更新
+                # 检测是否在Linux服务器环境
+                import platform
+                is_linux = platform.system() == 'Linux'
 
-        duration = time.time() - start_time
-        status = 'SUCCESS' if failed == 0 else 'FAILED'
-        self.update_execution_result(status, passed, failed, skipped, duration)
+                # 导航到URL
+                driver.get(self.test_suite.project.base_url)
+                ElementCache.for_driver(driver).invalidate()
+
+                # 等待页面基本加载完成
+                # 在服务器环境（特别是无头模式）需要更长的等待时间
+                try:
+                    WebDriverWait(driver, 15 if is_linux else 10).until(
+                        lambda d: d.execute_script("return document.readyState") == "complete"
+                    )
+                except:
+                    pass  # 即使超时也继续执行
+
+                # 等待动态内容渲染完成（Vue/React等SPA应用）
+                waited = SmartWait.for_selenium(driver).settle()
+
+                print(
+                    f"✓ 成功导航到: {self.test_suite.project.base_url} (已等待页面稳定 {waited:.0f}ms)")
+            except Exception as e:
+                print(f"✗ 导航失败: {str(e)}")
+                # 导航失败，记录错误并继续下一个用例
+                return self.failed_case_result(case_data, f"导航到基础URL失败: {str(e)}")
+
+        # 执行测试用例
+        return self.execute_test_case_selenium_no_db(driver, case_data)
 
     def create_selenium_driver(self):
         """创建 Selenium WebDriver"""
@@ -1738,19 +1490,23 @@ class TestExecutor:
         }
 
         try:
+            element_cache = ElementCache.for_driver(driver)
+            steps = case_data['steps']
+
             # 遍历预先准备好的步骤数据
-            for step_data in case_data['steps']:
+            for index, step_data in enumerate(steps):
+                # 后续步骤的定位器，在定位当前元素时一并批量解析
+                element_cache.plan([step['element']['locator'] for step in steps[index + 1:] if step.get('element')])
                 step_result = self.execute_step_selenium(driver, step_data)
                 result['steps'].append(step_result)
 
                 # 步骤执行完后添加短暂延迟，确保页面状态稳定
                 # 特别是点击操作后，可能触发动画、下拉框展开等
                 if step_result['success'] and step_data['action_type'] in ['click', 'fill', 'hover']:
-                    # 点击操作后等待更长时间（下拉框展开动画）
-                    if step_data['action_type'] == 'click':
-                        time.sleep(0.8)  # 等待800ms，确保下拉框完全展开
-                    else:
-                        time.sleep(0.3)  # 其他操作等待300ms
+                    waiter = SmartWait.for_selenium(driver)
+                    waiter.settle()
+                    # 页面发生跳转或 DOM 变化时丢弃缓存的元素句柄
+                    element_cache.sync(waiter.dom_key)
 
                 # 如果步骤失败,捕获失败截图
                 if not step_result['success']:
@@ -1760,11 +1516,9 @@ class TestExecutor:
 
                     # 捕获失败截图
                     try:
-                        import base64
                         screenshot_bytes = driver.get_screenshot_as_png()
-                        screenshot_base64 = base64.b64encode(screenshot_bytes).decode()
                         result['screenshots'].append({
-                            'url': f'data:image/png;base64,{screenshot_base64}',
+                            **save_screenshot(screenshot_bytes),
                             'description': f'步骤 {step_data["step_number"]} 失败截图: {step_data.get("description", "")}',
                             'step_number': step_data['step_number'],
                             'timestamp': datetime.now().isoformat()
@@ -1780,11 +1534,9 @@ class TestExecutor:
 
             # 捕获异常截图
             try:
-                import base64
                 screenshot_bytes = driver.get_screenshot_as_png()
-                screenshot_base64 = base64.b64encode(screenshot_bytes).decode()
                 result['screenshots'].append({
-                    'url': f'data:image/png;base64,{screenshot_base64}',
+                    **save_screenshot(screenshot_bytes),
                     'description': f'异常截图: {str(e)}',
                     'step_number': None,
                     'timestamp': datetime.now().isoformat()
@@ -1860,7 +1612,6 @@ class TestExecutor:
             driver: Selenium WebDriver对象
             step_data: 预先准备的步骤数据字典
         """
-        from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
         start_time = time.time()
 
         step_result = {
@@ -1872,369 +1623,12 @@ class TestExecutor:
         }
 
         try:
-            if step_data['element']:
-                element = step_data['element']
-                locator_value = element['locator_value']
-                locator_strategy = element['locator_strategy'].lower()
-                element_name = element.get('name', '未知元素')
-
-                # 根据定位策略获取元素
-                wait = WebDriverWait(driver, step_data['wait_time'] / 1000)
-
-                # 自动修正定位策略：如果值以 // 开头，强制使用 XPath
-                if locator_value.startswith('//') or locator_value.startswith('xpath='):
-                    locator_strategy = 'xpath'
-                    if locator_value.startswith('xpath='):
-                        locator_value = locator_value[6:]
-
-                # 根据定位策略构造 Playwright 选择器
-                if locator_strategy in ['css', 'css selector']:
-                    by = By.CSS_SELECTOR
-                elif locator_strategy == 'xpath':
-                    by = By.XPATH
-                elif locator_strategy == 'id':
-                    by = By.ID
-                elif locator_strategy == 'name':
-                    by = By.NAME
-                elif locator_strategy in ['class', 'class name']:
-                    by = By.CLASS_NAME
-                elif locator_strategy in ['tag', 'tag name']:
-                    by = By.TAG_NAME
-                elif locator_strategy == 'link text':
-                    by = By.LINK_TEXT
-                elif locator_strategy == 'partial link text':
-                    by = By.PARTIAL_LINK_TEXT
-                else:
-                    by = By.CSS_SELECTOR
-
-                # 定义重试次数（用于所有操作类型）
-                max_retries = 3
-
-                # 根据操作类型选择合适的等待条件
-                if step_data['action_type'] == 'click':
-                    # 检测是否是原生HTML select的option元素（优先检测）
-                    is_native_select_option = (
-                            (
-                                        'option[' in locator_value or ' > option' in locator_value or '//option' in locator_value) or
-                            ('select' in locator_value.lower() and 'option' in locator_value.lower())
-                    )
-
-                    # 对于原生HTML select的option，使用Selenium的select类
-                    if is_native_select_option:
-                        from selenium.webdriver.support.ui import Select
-                        print(f"[Selenium-调试] 检测到原生HTML select元素，使用Select类...")
-
-                        # 提取option的value值
-                        import re
-                        option_value_match = re.search(r'option\[value=["\']([^"\']+)["\']\]', locator_value)
-                        option_value_xpath_match = re.search(r'option\[@value=["\']([^"\']+)["\']\]', locator_value)
-
-                        option_value = None
-                        if option_value_match:
-                            option_value = option_value_match.group(1)
-                        elif option_value_xpath_match:
-                            option_value = option_value_xpath_match.group(1)
-                        else:
-                            option_value = '1'  # 默认值
-
-                        # 构造select元素的定位器（去掉option部分）
-                        select_locator_value = re.sub(r'\s*>\s*option\[.*?\]', '', locator_value)
-                        select_locator_value = re.sub(r'\s+option\[.*?\]', '', select_locator_value)
-                        select_locator_value = re.sub(r'//option\[.*?\]', '', select_locator_value)
-
-                        print(f"[Selenium-调试] Select定位器: {select_locator_value}, Option值: {option_value}")
-
-                        try:
-                            # 查找select元素
-                            select_element = wait.until(EC.presence_of_element_located((by, select_locator_value)))
-
-                            # 使用Select类选择选项
-                            select_obj = Select(select_element)
-                            select_obj.select_by_value(option_value)
-
-                            step_result['success'] = True
-                            print(f"✓ 选择下拉框选项成功 (Select.select_by_value)")
-                            # 成功处理select，跳过后续逻辑
-                            native_select_handled = True
-                        except Exception as e:
-                            print(f"✗ Select类失败: {e}")
-                            # 如果失败，继续尝试普通点击
-                            native_select_handled = False
-                    else:
-                        native_select_handled = False
-
-                    # 只有当原生select处理失败或不是原生select时，才继续后续逻辑
-                    if not native_select_handled:
-                        # 点击操作：等待元素可点击（解决 stale element 问题）
-                        # 通过定位器特征自动识别下拉框选项
-                        is_dropdown_option = (
-                                'dropdown' in locator_value.lower() or
-                                'el-select' in locator_value.lower() or
-                                'role="option"' in element_name.lower() or
-                                '下拉' in element_name or
-                                '选项' in element_name or
-                                'el-select-dropdown__item' in locator_value.lower() or
-                                ('//li' in locator_value and 'span=' in locator_value)  # XPath 下拉框模式
-                        )
-
-                        if is_dropdown_option:
-                            # 下拉框选项：特殊处理，遍历所有匹配元素找到可见的那个
-                            print(f"  检测到下拉框选项（定位器匹配），尝试查找可见元素...")
-
-                            # 自定义等待逻辑：轮询查找可见元素
-                            end_time = time.time() + (step_data['wait_time'] / 1000)
-                            found_visible = False
-
-                            while time.time() < end_time:
-                                try:
-                                    # 查找所有匹配元素
-                                    elements = driver.find_elements(by, locator_value)
-                                    for el in elements:
-                                        if el.is_displayed():
-                                            element_obj = el
-                                            found_visible = True
-                                            print(f"  ✓ 找到可见的下拉框选项")
-                                            break
-
-                                    if found_visible:
-                                        break
-
-                                    time.sleep(0.5)
-                                except:
-                                    time.sleep(0.5)
-
-                            if not found_visible:
-                                # 如果没找到可见元素，回退到默认行为（可能会抛出超时）
-                                print(f"  ⚠️ 未找到可见的下拉框选项，尝试默认等待...")
-                                element_obj = wait.until(EC.visibility_of_element_located((by, locator_value)))
-                        else:
-                            element_obj = wait.until(EC.element_to_be_clickable((by, locator_value)))
-                    else:
-                        # 其他操作：等待元素出现
-                        element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-
-                    # click操作的实际执行逻辑（使用 stale element 重试机制）
-                    for attempt in range(max_retries):
-                        try:
-                            # 每次重试都重新查找元素（解决stale element问题）
-                            if attempt > 0:
-                                print(f"⚠️  重新查找元素（Stale Element 重试）... (尝试 {attempt + 1}/{max_retries})")
-                                # 增加等待时间，让页面 DOM 稳定（对于 Vue/React 应用很重要）
-                                wait_time = 1.0 if attempt == 1 else 1.5  # 第一次重试等1秒，第二次重试等1.5秒
-                                print(f"等待 {wait_time}秒 让页面稳定...")
-                                time.sleep(wait_time)
-                                # 重新定位元素
-                                if is_dropdown_option:
-                                    element_obj = wait.until(EC.visibility_of_element_located((by, locator_value)))
-                                else:
-                                    element_obj = wait.until(EC.element_to_be_clickable((by, locator_value)))
-                                # 等待元素状态稳定
-                                time.sleep(0.3)
-                                print(f"✓ 元素重新定位成功")
-
-                            # 对于下拉框选项，先滚动到可视区域
-                            if 'dropdown' in locator_value.lower() or 'el-select' in locator_value.lower() or '下拉' in element_name or '选项' in element_name:
-                                try:
-                                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});",
-                                                          element_obj)
-                                    time.sleep(0.3)  # 等待滚动完成
-                                except:
-                                    pass
-
-                            # 如果是 el-select 容器，尝试点击内部的可点击区域
-                            if 'el-select' in locator_value.lower() and 'ancestor::' in locator_value.lower():
-                                # 这是点击 el-select 容器，需要找到真正的触发器
-                                try:
-                                    # 尝试找到并点击内部的 input 或 wrapper
-                                    clickable = element_obj.find_element(By.CSS_SELECTOR, '.el-select__wrapper, input')
-                                    clickable.click()
-                                except:
-                                    # 如果找不到，直接点击容器
-                                    element_obj.click()
-                            else:
-                                element_obj.click()
-
-                            step_result['success'] = True
-                            break
-                        except StaleElementReferenceException:
-                            if attempt < max_retries - 1:
-                                print(f"⚠️  元素过期，正在重试... ({attempt + 1}/{max_retries})")
-                                # 继续下一次循环，会重新查找元素
-                                continue
-                            else:
-                                raise
-                        except Exception as click_error:
-                            # 如果是下拉框选项且点击失败，尝试使用 JavaScript 点击
-                            if attempt < max_retries - 1 and (
-                                    'not visible' in str(click_error).lower() or 'not interactable' in str(
-                                    click_error).lower()):
-                                print(f"⚠️  元素不可交互，尝试使用 JavaScript 点击... ({attempt + 1}/{max_retries})")
-                                try:
-                                    driver.execute_script("arguments[0].click();", element_obj)
-                                    step_result['success'] = True
-                                    break
-                                except:
-                                    if attempt < max_retries - 1:
-                                        time.sleep(0.5)
-                                        # 重新定位
-                                        if 'dropdown' in locator_value.lower() or 'el-select' in locator_value.lower():
-                                            element_obj = wait.until(
-                                                EC.visibility_of_element_located((by, locator_value)))
-                                        else:
-                                            element_obj = wait.until(EC.element_to_be_clickable((by, locator_value)))
-                                    else:
-                                        raise
-                            else:
-                                raise
-
-                elif step_data['action_type'] == 'fill':
-                    # 先定位元素
-                    element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                    
-                    # 解析输入值中的变量表达式
-                    resolved_value = resolve_variables(step_data['input_value'])
-
-                    for attempt in range(max_retries):
-                        try:
-                            element_obj.clear()
-                            element_obj.send_keys(resolved_value)
-                            step_result['success'] = True
-
-                            # 记录解析后的值（用于调试）
-                            if resolved_value != step_data['input_value']:
-                                step_result['resolved_value'] = resolved_value
-                                print(f"  ✓ 变量解析: {step_data['input_value']} -> {resolved_value}")
-
-                            break
-                        except StaleElementReferenceException:
-                            if attempt < max_retries - 1:
-                                print(f"⚠️  元素过期（Stale Element），正在重试... (尝试 {attempt + 2}/{max_retries})")
-                                # 增加等待时间，让页面 DOM 稳定
-                                wait_time = 1.0 if attempt == 0 else 1.5
-                                print(f"等待 {wait_time}秒 让页面稳定...")
-                                time.sleep(wait_time)
-                                element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                                time.sleep(0.3)  # 确保元素状态稳定
-                                print(f"✓ 元素重新定位成功")
-                            else:
-                                raise
-
-                elif step_data['action_type'] == 'getText':
-                    # 先定位元素
-                    element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                    
-                    for attempt in range(max_retries):
-                        try:
-                            text = element_obj.text
-                            step_result['result'] = text
-                            step_result['success'] = True
-                            break
-                        except StaleElementReferenceException:
-                            if attempt < max_retries - 1:
-                                print(f"⚠️  元素过期（Stale Element），正在重试... (尝试 {attempt + 2}/{max_retries})")
-                                # 增加等待时间，让页面 DOM 稳定
-                                wait_time = 1.0 if attempt == 0 else 1.5
-                                print(f"等待 {wait_time}秒 让页面稳定...")
-                                time.sleep(wait_time)
-                                element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                                time.sleep(0.3)  # 确保元素状态稳定
-                                print(f"✓ 元素重新定位成功")
-                            else:
-                                raise
-
-                elif step_data['action_type'] == 'hover':
-                    # 先定位元素
-                    element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                    
-                    from selenium.webdriver.common.action_chains import ActionChains
-                    for attempt in range(max_retries):
-                        try:
-                            ActionChains(driver).move_to_element(element_obj).perform()
-                            step_result['success'] = True
-                            break
-                        except StaleElementReferenceException:
-                            if attempt < max_retries - 1:
-                                print(f"⚠️  元素过期（Stale Element），正在重试... (尝试 {attempt + 2}/{max_retries})")
-                                # 增加等待时间，让页面 DOM 稳定
-                                wait_time = 1.0 if attempt == 0 else 1.5
-                                print(f"等待 {wait_time}秒 让页面稳定...")
-                                time.sleep(wait_time)
-                                element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                                time.sleep(0.3)  # 确保元素状态稳定
-                                print(f"✓ 元素重新定位成功")
-                            else:
-                                raise
-
-                elif step_data['action_type'] == 'screenshot':
-                    screenshot_path = f'screenshots/step_{step_data["step_number"]}.png'
-                    driver.save_screenshot(screenshot_path)
-                    step_result['screenshot'] = screenshot_path
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'assert':
-                    # 先定位元素
-                    element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                    
-                    # 解析断言值中的变量
-                    resolved_assert_value = resolve_variables(step_data['assert_value'])
-                    if resolved_assert_value != step_data['assert_value']:
-                        print(f"  ✓ 断言变量解析: {step_data['assert_value']} -> {resolved_assert_value}")
-
-                    if step_data['assert_type'] == 'textContains':
-                        text = element_obj.text
-                        if resolved_assert_value in text:
-                            step_result['success'] = True
-                        else:
-                            # 格式化为详细的错误信息，与selenium_engine.py保持一致
-                            log = f"✗ 断言失败: 文本不包含 '{resolved_assert_value}'\n"
-                            log += f"  - 实际文本: '{text}'"
-                            step_result['error'] = log
-                    elif step_data['assert_type'] == 'textEquals':
-                        text = element_obj.text
-                        if text == resolved_assert_value:
-                            step_result['success'] = True
-                        else:
-                            # 格式化为详细的错误信息
-                            log = f"✗ 断言失败: 文本不等于 '{resolved_assert_value}'\n"
-                            log += f"  - 期望: '{resolved_assert_value}'\n"
-                            log += f"  - 实际: '{text}'"
-                            step_result['error'] = log
-                    elif step_data['assert_type'] == 'isVisible':
-                        is_visible = element_obj.is_displayed()
-                        step_result['success'] = is_visible
-                        if not is_visible:
-                            step_result['error'] = f"✗ 断言失败: 元素 '{element_name}' 不可见"
-                    elif step_data['assert_type'] == 'exists':
-                        # 元素已经找到，说明存在
-                        step_result['success'] = True
-
-            else:
-                if step_data['action_type'] == 'wait':
-                    time.sleep(step_data['wait_time'] / 1000)
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'switchTab':
-                    # Selenium 切换标签页逻辑
-                    try:
-                        # 获取当前所有窗口句柄
-                        handles = driver.window_handles
-
-                        # 简单的策略：切换到最后一个窗口（通常是新打开的）
-                        # 如果指定了索引，则切换到指定索引
-                        target_index = -1
-                        if step_data.get('input_value') and str(step_data['input_value']).isdigit():
-                            target_index = int(step_data['input_value'])
-
-                        if target_index >= 0 and target_index < len(handles):
-                            driver.switch_to.window(handles[target_index])
-                        else:
-                            driver.switch_to.window(handles[-1])
-
-                        step_result['success'] = True
-                        print(f"✓ Selenium 切换标签页成功 (Handle Count: {len(handles)})")
-                    except Exception as e:
-                        step_result['error'] = f"切换标签页失败: {str(e)}"
-                        step_result['success'] = False
+            action_type = step_data['action_type']
+            # 没有关联元素的步骤只执行等待、切换标签页
+            if step_data['element'] or action_type in PAGE_ACTIONS:
+                handler = self.SELENIUM_ACTIONS.get(action_type)
+                if handler is not None:
+                    handler(self, driver, step_data, step_result, start_time)
 
         except TimeoutException as e:
             # 格式化为详细的错误信息，与selenium_engine.py保持一致
@@ -2292,12 +1686,12 @@ class TestExecutor:
                     if tb_str:
                         # 提取等待条件信息（从堆栈中）
                         wait_condition = "未知条件"
-                        if 'EC.visibility_of_element_located' in tb_str:
-                            wait_condition = "等待元素可见 (visibility_of_element_located)"
-                        elif 'EC.element_to_be_clickable' in tb_str:
-                            wait_condition = "等待元素可点击 (element_to_be_clickable)"
-                        elif 'EC.presence_of_element_located' in tb_str:
-                            wait_condition = "等待元素存在 (presence_of_element_located)"
+                        if "'visible')" in tb_str:
+                            wait_condition = "等待元素可见 (visible)"
+                        elif "'clickable')" in tb_str:
+                            wait_condition = "等待元素可点击 (clickable)"
+                        elif 'element_cache.' in tb_str:
+                            wait_condition = "等待元素存在 (present)"
 
                         error_parts.append(f"\n等待条件: {wait_condition}")
                         error_parts.append(f"\n调用堆栈:\n{tb_str}")
@@ -2422,3 +1816,349 @@ class TestExecutor:
             print(f"   错误信息: {error_msg[:500]}")  # 限制长度避免刷屏
 
         return step_result
+
+    def _selenium_click(self, driver, step_data, step_result, start_time):
+        """点击元素（click）"""
+        element = step_data['element']
+        element_name = element.get('name', '未知元素')
+        timeout = step_data['wait_time'] / 1000
+        element_cache = ElementCache.for_driver(driver)
+        waiter = SmartWait.for_selenium(driver)
+        by, locator_value = element['locator']
+        max_retries = 3
+
+        # 检测是否是原生HTML select的option元素（优先检测）
+        is_native_select_option = (
+                (
+                            'option[' in locator_value or ' > option' in locator_value or '//option' in locator_value) or
+                ('select' in locator_value.lower() and 'option' in locator_value.lower())
+        )
+
+        # 对于原生HTML select的option，使用Selenium的select类
+        if is_native_select_option:
+            from selenium.webdriver.support.ui import Select
+            print(f"[Selenium-调试] 检测到原生HTML select元素，使用Select类...")
+
+            # 提取option的value值
+            import re
+            option_value_match = re.search(r'option\[value=["\']([^"\']+)["\']\]', locator_value)
+            option_value_xpath_match = re.search(r'option\[@value=["\']([^"\']+)["\']\]', locator_value)
+
+            option_value = None
+            if option_value_match:
+                option_value = option_value_match.group(1)
+            elif option_value_xpath_match:
+                option_value = option_value_xpath_match.group(1)
+            else:
+                option_value = '1'  # 默认值
+
+            # 构造select元素的定位器（去掉option部分）
+            select_locator_value = re.sub(r'\s*>\s*option\[.*?\]', '', locator_value)
+            select_locator_value = re.sub(r'\s+option\[.*?\]', '', select_locator_value)
+            select_locator_value = re.sub(r'//option\[.*?\]', '', select_locator_value)
+
+            print(f"[Selenium-调试] Select定位器: {select_locator_value}, Option值: {option_value}")
+
+            try:
+                # 查找select元素
+                select_element = element_cache.find(by, select_locator_value, timeout)
+
+                # 使用Select类选择选项
+                select_obj = Select(select_element)
+                select_obj.select_by_value(option_value)
+
+                step_result['success'] = True
+                print(f"✓ 选择下拉框选项成功 (Select.select_by_value)")
+                # 成功处理select，跳过后续逻辑
+                native_select_handled = True
+            except Exception as e:
+                print(f"✗ Select类失败: {e}")
+                # 如果失败，继续尝试普通点击
+                native_select_handled = False
+        else:
+            native_select_handled = False
+
+        # 只有当原生select处理失败或不是原生select时，才继续后续逻辑
+        if not native_select_handled:
+            # 点击操作：等待元素可点击（解决 stale element 问题）
+            # 通过定位器特征自动识别下拉框选项
+            is_dropdown_option = (
+                    'dropdown' in locator_value.lower() or
+                    'el-select' in locator_value.lower() or
+                    'role="option"' in element_name.lower() or
+                    '下拉' in element_name or
+                    '选项' in element_name or
+                    'el-select-dropdown__item' in locator_value.lower() or
+                    ('//li' in locator_value and 'span=' in locator_value)  # XPath 下拉框模式
+            )
+
+            if is_dropdown_option:
+                # 下拉框选项：特殊处理，取所有匹配元素中可见的那个
+                print(f"  检测到下拉框选项（定位器匹配），尝试查找可见元素...")
+                element_obj = element_cache.find(by, locator_value, timeout, 'visible')
+                print(f"  ✓ 找到可见的下拉框选项")
+            else:
+                element_obj = element_cache.find(by, locator_value, timeout, 'clickable')
+        else:
+            # 其他操作：等待元素出现
+            element_obj = element_cache.find(by, locator_value, timeout)
+
+        # click操作的实际执行逻辑（使用 stale element 重试机制）
+        for attempt in range(max_retries):
+            try:
+                # 每次重试都重新查找元素（解决stale element问题）
+                if attempt > 0:
+                    print(f"⚠️  重新查找元素（Stale Element 重试）... (尝试 {attempt + 1}/{max_retries})")
+                    # 等待页面 DOM 稳定（对于 Vue/React 应用很重要）
+                    waiter.settle(network=False)
+                    # 重新定位元素
+                    if is_dropdown_option:
+                        element_obj = element_cache.refresh(by, locator_value, timeout, 'visible')
+                    else:
+                        element_obj = element_cache.refresh(by, locator_value, timeout, 'clickable')
+                    # 等待元素状态稳定
+                    waiter.wait_for_element_stable(element_obj)
+                    print(f"✓ 元素重新定位成功")
+
+                # 对于下拉框选项，先滚动到可视区域
+                if 'dropdown' in locator_value.lower() or 'el-select' in locator_value.lower() or '下拉' in element_name or '选项' in element_name:
+                    try:
+                        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});",
+                                              element_obj)
+                        waiter.wait_for_element_stable(element_obj)  # 等待滚动完成
+                    except:
+                        pass
+
+                # 如果是 el-select 容器，尝试点击内部的可点击区域
+                if 'el-select' in locator_value.lower() and 'ancestor::' in locator_value.lower():
+                    # 这是点击 el-select 容器，需要找到真正的触发器
+                    try:
+                        # 尝试找到并点击内部的 input 或 wrapper
+                        clickable = element_obj.find_element(By.CSS_SELECTOR, '.el-select__wrapper, input')
+                        clickable.click()
+                    except:
+                        # 如果找不到，直接点击容器
+                        element_obj.click()
+                else:
+                    element_obj.click()
+
+                step_result['success'] = True
+                break
+            except StaleElementReferenceException:
+                if attempt < max_retries - 1:
+                    print(f"⚠️  元素过期，正在重试... ({attempt + 1}/{max_retries})")
+                    # 继续下一次循环，会重新查找元素
+                    continue
+                else:
+                    raise
+            except Exception as click_error:
+                # 如果是下拉框选项且点击失败，尝试使用 JavaScript 点击
+                if attempt < max_retries - 1 and (
+                        'not visible' in str(click_error).lower() or 'not interactable' in str(
+                        click_error).lower()):
+                    print(f"⚠️  元素不可交互，尝试使用 JavaScript 点击... ({attempt + 1}/{max_retries})")
+                    try:
+                        driver.execute_script("arguments[0].click();", element_obj)
+                        step_result['success'] = True
+                        break
+                    except:
+                        if attempt < max_retries - 1:
+                            waiter.settle(network=False)
+                            # 重新定位
+                            if 'dropdown' in locator_value.lower() or 'el-select' in locator_value.lower():
+                                element_obj = element_cache.refresh(by, locator_value, timeout, 'visible')
+                            else:
+                                element_obj = element_cache.refresh(by, locator_value, timeout, 'clickable')
+                        else:
+                            raise
+                else:
+                    raise
+
+    def _selenium_fill(self, driver, step_data, step_result, start_time):
+        """输入文本（fill）"""
+        element = step_data['element']
+        timeout = step_data['wait_time'] / 1000
+        element_cache = ElementCache.for_driver(driver)
+        waiter = SmartWait.for_selenium(driver)
+        by, locator_value = element['locator']
+        max_retries = 3
+
+        # 先定位元素
+        element_obj = element_cache.find(by, locator_value, timeout)
+
+        # 解析输入值中的变量表达式
+        resolved_value = resolve_slot(step_data, 'input_value')
+
+        for attempt in range(max_retries):
+            try:
+                element_obj.clear()
+                element_obj.send_keys(resolved_value)
+                step_result['success'] = True
+
+                # 记录解析后的值（用于调试）
+                if resolved_value != step_data['input_value']:
+                    step_result['resolved_value'] = resolved_value
+                    print(f"  ✓ 变量解析: {step_data['input_value']} -> {resolved_value}")
+
+                break
+            except StaleElementReferenceException:
+                if attempt < max_retries - 1:
+                    print(f"⚠️  元素过期（Stale Element），正在重试... (尝试 {attempt + 2}/{max_retries})")
+                    # 等待页面 DOM 稳定
+                    waiter.settle(network=False)
+                    element_obj = element_cache.refresh(by, locator_value, timeout)
+                    waiter.wait_for_element_stable(element_obj)  # 确保元素状态稳定
+                    print(f"✓ 元素重新定位成功")
+                else:
+                    raise
+
+    def _selenium_get_text(self, driver, step_data, step_result, start_time):
+        """获取元素文本（getText）"""
+        element = step_data['element']
+        timeout = step_data['wait_time'] / 1000
+        element_cache = ElementCache.for_driver(driver)
+        waiter = SmartWait.for_selenium(driver)
+        by, locator_value = element['locator']
+        max_retries = 3
+
+        # 先定位元素
+        element_obj = element_cache.find(by, locator_value, timeout)
+
+        for attempt in range(max_retries):
+            try:
+                text = element_obj.text
+                step_result['result'] = text
+                step_result['success'] = True
+                break
+            except StaleElementReferenceException:
+                if attempt < max_retries - 1:
+                    print(f"⚠️  元素过期（Stale Element），正在重试... (尝试 {attempt + 2}/{max_retries})")
+                    # 等待页面 DOM 稳定
+                    waiter.settle(network=False)
+                    element_obj = element_cache.refresh(by, locator_value, timeout)
+                    waiter.wait_for_element_stable(element_obj)  # 确保元素状态稳定
+                    print(f"✓ 元素重新定位成功")
+                else:
+                    raise
+
+    def _selenium_hover(self, driver, step_data, step_result, start_time):
+        """鼠标悬停（hover）"""
+        element = step_data['element']
+        timeout = step_data['wait_time'] / 1000
+        element_cache = ElementCache.for_driver(driver)
+        waiter = SmartWait.for_selenium(driver)
+        by, locator_value = element['locator']
+        max_retries = 3
+
+        # 先定位元素
+        element_obj = element_cache.find(by, locator_value, timeout)
+
+        from selenium.webdriver.common.action_chains import ActionChains
+        for attempt in range(max_retries):
+            try:
+                ActionChains(driver).move_to_element(element_obj).perform()
+                step_result['success'] = True
+                break
+            except StaleElementReferenceException:
+                if attempt < max_retries - 1:
+                    print(f"⚠️  元素过期（Stale Element），正在重试... (尝试 {attempt + 2}/{max_retries})")
+                    # 等待页面 DOM 稳定
+                    waiter.settle(network=False)
+                    element_obj = element_cache.refresh(by, locator_value, timeout)
+                    waiter.wait_for_element_stable(element_obj)  # 确保元素状态稳定
+                    print(f"✓ 元素重新定位成功")
+                else:
+                    raise
+
+    def _selenium_screenshot(self, driver, step_data, step_result, start_time):
+        """截图（screenshot）"""
+        screenshot_path = f'screenshots/step_{step_data["step_number"]}.png'
+        driver.save_screenshot(screenshot_path)
+        step_result['screenshot'] = screenshot_path
+        step_result['success'] = True
+
+    def _selenium_assert(self, driver, step_data, step_result, start_time):
+        """断言（assert）"""
+        element = step_data['element']
+        element_name = element.get('name', '未知元素')
+        timeout = step_data['wait_time'] / 1000
+        element_cache = ElementCache.for_driver(driver)
+        by, locator_value = element['locator']
+
+        # 先定位元素
+        element_obj = element_cache.find(by, locator_value, timeout)
+
+        # 解析断言值中的变量
+        resolved_assert_value = resolve_slot(step_data, 'assert_value')
+        if resolved_assert_value != step_data['assert_value']:
+            print(f"  ✓ 断言变量解析: {step_data['assert_value']} -> {resolved_assert_value}")
+
+        if step_data['assert_type'] == 'textContains':
+            text = element_obj.text
+            if resolved_assert_value in text:
+                step_result['success'] = True
+            else:
+                # 格式化为详细的错误信息，与selenium_engine.py保持一致
+                log = f"✗ 断言失败: 文本不包含 '{resolved_assert_value}'\n"
+                log += f"  - 实际文本: '{text}'"
+                step_result['error'] = log
+        elif step_data['assert_type'] == 'textEquals':
+            text = element_obj.text
+            if text == resolved_assert_value:
+                step_result['success'] = True
+            else:
+                # 格式化为详细的错误信息
+                log = f"✗ 断言失败: 文本不等于 '{resolved_assert_value}'\n"
+                log += f"  - 期望: '{resolved_assert_value}'\n"
+                log += f"  - 实际: '{text}'"
+                step_result['error'] = log
+        elif step_data['assert_type'] == 'isVisible':
+            is_visible = element_obj.is_displayed()
+            step_result['success'] = is_visible
+            if not is_visible:
+                step_result['error'] = f"✗ 断言失败: 元素 '{element_name}' 不可见"
+        elif step_data['assert_type'] == 'exists':
+            # 元素已经找到，说明存在
+            step_result['success'] = True
+
+    def _selenium_wait(self, driver, step_data, step_result, start_time):
+        """固定等待（wait）"""
+        time.sleep(step_data['wait_time'] / 1000)
+        step_result['success'] = True
+
+    def _selenium_switch_tab(self, driver, step_data, step_result, start_time):
+        """切换标签页（switchTab）"""
+        # Selenium 切换标签页逻辑
+        try:
+            # 获取当前所有窗口句柄
+            handles = driver.window_handles
+
+            # 简单的策略：切换到最后一个窗口（通常是新打开的）
+            # 如果指定了索引，则切换到指定索引
+            target_index = -1
+            if step_data.get('input_value') and str(step_data['input_value']).isdigit():
+                target_index = int(step_data['input_value'])
+
+            if target_index >= 0 and target_index < len(handles):
+                driver.switch_to.window(handles[target_index])
+            else:
+                driver.switch_to.window(handles[-1])
+            ElementCache.for_driver(driver).invalidate()
+
+            step_result['success'] = True
+            print(f"✓ Selenium 切换标签页成功 (Handle Count: {len(handles)})")
+        except Exception as e:
+            step_result['error'] = f"切换标签页失败: {str(e)}"
+            step_result['success'] = False
+
+    # 操作类型 → Selenium 步骤处理方法
+    SELENIUM_ACTIONS = {
+        'click': _selenium_click,
+        'fill': _selenium_fill,
+        'getText': _selenium_get_text,
+        'hover': _selenium_hover,
+        'screenshot': _selenium_screenshot,
+        'assert': _selenium_assert,
+        'wait': _selenium_wait,
+        'switchTab': _selenium_switch_tab,
+    }
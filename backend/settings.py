@@ -286,6 +286,101 @@ CELERY_BROKER_URL = config('REDIS_URL', default='redis://:1234@127.0.0.1:6379/0'
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://:1234@127.0.0.1:6379/0')
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 
+# API 测试 HTTP 客户端连接池配置
+API_HTTP_POOL_CONNECTIONS = config('API_HTTP_POOL_CONNECTIONS', default=10, cast=int)  # 每个会话缓存的主机连接池数
+API_HTTP_POOL_MAXSIZE = config('API_HTTP_POOL_MAXSIZE', default=20, cast=int)  # 单个主机最大保持连接数
+API_HTTP_POOL_MAX_HOSTS = config('API_HTTP_POOL_MAX_HOSTS', default=100, cast=int)  # 进程内最多缓存的会话数
+API_HTTP_KEEP_ALIVE = config('API_HTTP_KEEP_ALIVE', default=True, cast=bool)
+API_HTTP_MAX_RETRIES = config('API_HTTP_MAX_RETRIES', default=0, cast=int)
+API_HTTP_TIMEOUT = config('API_HTTP_TIMEOUT', default=30, cast=int)
+API_ASYNC_ENGINE_ENABLED = config('API_ASYNC_ENGINE_ENABLED', default=True, cast=bool)  # 接口批量执行使用 httpx 异步引擎，False 时逐个同步执行
+API_ASYNC_MAX_CONCURRENCY = config('API_ASYNC_MAX_CONCURRENCY', default=100, cast=int)  # 异步引擎最大在途请求数
+API_BATCH_MAX_REQUESTS = config('API_BATCH_MAX_REQUESTS', default=1000, cast=int)  # 接口批量执行单次最多发送的请求数（接口数 × 重复次数）
+API_HISTORY_BATCH_SIZE = config('API_HISTORY_BATCH_SIZE', default=50, cast=int)  # 套件执行时请求历史批量写入条数
+API_HISTORY_FLUSH_INTERVAL = config('API_HISTORY_FLUSH_INTERVAL', default=5, cast=int)  # 请求历史最长缓冲秒数
+API_TEMPLATE_CACHE_SIZE = config('API_TEMPLATE_CACHE_SIZE', default=500, cast=int)  # 编译后的请求模板缓存数量
+API_SCRIPT_CACHE_SIZE = config('API_SCRIPT_CACHE_SIZE', default=256, cast=int)  # 编译后的前置/后置 Python 脚本缓存数量
+API_JS_WORKER_POOL_SIZE = config('API_JS_WORKER_POOL_SIZE', default=2, cast=int)  # 常驻 Node.js 脚本进程数
+API_JS_WORKER_MAX_CALLS = config('API_JS_WORKER_MAX_CALLS', default=500, cast=int)  # 单个 Node.js 进程执行多少次后回收
+API_JS_WORKER_MAX_RSS_MB = config('API_JS_WORKER_MAX_RSS_MB', default=256, cast=int)  # Node.js 进程内存超过该值后回收
+API_SIGNATURE_KEY_CACHE_SIZE = config('API_SIGNATURE_KEY_CACHE_SIZE', default=64, cast=int)  # 解析后的签名/加密密钥对象缓存数量
+
+# API 测试定时任务执行 worker 配置
+API_EXECUTION_BACKEND = config('API_EXECUTION_BACKEND', default='celery')  # celery：投递到 API 执行 worker；thread：在当前进程后台线程中执行
+API_SUITE_QUEUE = config('API_SUITE_QUEUE', default='api_suite')  # 测试套件定时任务队列
+API_REQUEST_QUEUE = config('API_REQUEST_QUEUE', default='api_request')  # 单个请求定时任务队列
+API_PROJECT_MAX_CONCURRENCY = config('API_PROJECT_MAX_CONCURRENCY', default=4, cast=int)  # 每个项目同时执行的定时任务上限（跨 worker），0 表示不限制
+API_TASK_RETRY_DELAY = config('API_TASK_RETRY_DELAY', default=10, cast=int)  # 项目并发已满时任务重新入队的延迟（秒）
+API_TASK_RUN_TIMEOUT = config('API_TASK_RUN_TIMEOUT', default=3600, cast=int)  # 运行超过该时间的执行日志不再计入项目并发（秒）
+
+# UI 自动化 Playwright 浏览器池配置
+UI_BROWSER_POOL_SIZE = config('UI_BROWSER_POOL_SIZE', default=2, cast=int)  # 常驻浏览器工作线程数
+UI_BROWSER_MAX_CONTEXTS = config('UI_BROWSER_MAX_CONTEXTS', default=50, cast=int)  # 单个浏览器创建多少个上下文后重启
+UI_BROWSER_IDLE_TIMEOUT = config('UI_BROWSER_IDLE_TIMEOUT', default=300, cast=int)  # 浏览器空闲多少秒后关闭
+UI_SUITE_CONCURRENCY = config('UI_SUITE_CONCURRENCY', default=1, cast=int)  # UI 套件用例并发执行的工作线程数
+UI_SCREENSHOT_FORMAT = config('UI_SCREENSHOT_FORMAT', default='png')  # 截图保存格式：png / webp / jpeg
+UI_SCREENSHOT_QUALITY = config('UI_SCREENSHOT_QUALITY', default=80, cast=int)  # webp / jpeg 压缩质量
+UI_SCREENSHOT_THUMBNAIL_WIDTH = config('UI_SCREENSHOT_THUMBNAIL_WIDTH', default=320, cast=int)  # 截图缩略图宽度，0 表示不生成
+
+# UI 自动化智能等待配置（毫秒）
+UI_WAIT_DOM_QUIET_MS = config('UI_WAIT_DOM_QUIET_MS', default=150, cast=int)  # DOM 连续无变化多久视为稳定
+UI_WAIT_DOM_TIMEOUT_MS = config('UI_WAIT_DOM_TIMEOUT_MS', default=2000, cast=int)  # 等待 DOM 稳定的超时
+UI_WAIT_NETWORK_TAIL_MS = config('UI_WAIT_NETWORK_TAIL_MS', default=200, cast=int)  # 请求全部结束后再等待的空闲时间
+UI_WAIT_NETWORK_TIMEOUT_MS = config('UI_WAIT_NETWORK_TIMEOUT_MS', default=5000, cast=int)  # 等待 fetch/XHR 结束的超时
+UI_WAIT_ANIMATION_TIMEOUT_MS = config('UI_WAIT_ANIMATION_TIMEOUT_MS', default=1000, cast=int)  # 等待动画结束的超时
+UI_WAIT_STABLE_TIMEOUT_MS = config('UI_WAIT_STABLE_TIMEOUT_MS', default=1000, cast=int)  # 等待元素位置稳定的超时
+
+# UI 自动化执行 worker 配置
+UI_EXECUTION_BACKEND = config('UI_EXECUTION_BACKEND', default='celery')  # celery：投递到 UI 执行 worker；thread：在 Web 进程后台线程中执行
+UI_CELERY_QUEUE_PREFIX = config('UI_CELERY_QUEUE_PREFIX', default='ui_')  # 队列名前缀，按浏览器类型划分队列，如 ui_chrome
+UI_WORKER_HOST_CONCURRENCY = config('UI_WORKER_HOST_CONCURRENCY', default=2, cast=int)  # 每台主机同时执行的 UI 任务上限（跨 worker 进程），0 表示不限制
+UI_WORKER_SLOT_DIR = config('UI_WORKER_SLOT_DIR', default='')  # 执行槽位锁文件目录，默认系统临时目录
+UI_WORKER_SLOT_RETRY_DELAY = config('UI_WORKER_SLOT_RETRY_DELAY', default=10, cast=int)  # 槽位占满时任务重新入队的延迟（秒）
+UI_CASE_RUN_TIMEOUT = config('UI_CASE_RUN_TIMEOUT', default=600, cast=int)  # 单用例执行接口等待 worker 结果的超时（秒）
+UI_EXECUTION_HEARTBEAT_INTERVAL = config('UI_EXECUTION_HEARTBEAT_INTERVAL', default=30, cast=int)  # 执行记录心跳间隔（秒）
+UI_EXECUTION_HEARTBEAT_TIMEOUT = config('UI_EXECUTION_HEARTBEAT_TIMEOUT', default=180, cast=int)  # 超过该时间无心跳的运行中记录视为中止（秒）
+UI_EXECUTION_QUEUE_TIMEOUT = config('UI_EXECUTION_QUEUE_TIMEOUT', default=3600, cast=int)  # 投递后超过该时间仍未开始执行的记录视为任务丢失（秒）
+UI_EXECUTION_RECOVERY_INTERVAL = config('UI_EXECUTION_RECOVERY_INTERVAL', default=60, cast=int)  # 回收心跳超时记录的周期（秒）
+
+CELERY_BEAT_SCHEDULE = {
+    'recover-stale-ui-executions': {
+        'task': 'apps.ui_automation.tasks.recover_stale_ui_executions',
+        'schedule': UI_EXECUTION_RECOVERY_INTERVAL,
+    },
+}
+
+# 定时任务调度器配置（run_all_scheduled_tasks）
+SCHEDULER_LEASE_TIMEOUT = config('SCHEDULER_LEASE_TIMEOUT', default=7200, cast=int)  # 执行租约有效期（秒），执行进程异常退出后租约过期即可再次触发
+SCHEDULER_QUEUE_RETRY_INTERVAL = config('SCHEDULER_QUEUE_RETRY_INTERVAL', default=15, cast=int)  # 排队策略的任务等待上一次执行结束时的重试间隔（秒）
+
+# UI 自动化 Selenium 元素定位缓存配置
+UI_SELENIUM_PREFETCH_STEPS = config('UI_SELENIUM_PREFETCH_STEPS', default=5, cast=int)  # 批量解析后续步骤定位器的数量
+
+# APP 自动化图片匹配配置
+APP_FRAME_REUSE_WINDOW = config('APP_FRAME_REUSE_WINDOW', default=0.5, cast=float)  # 连续图片匹配/OCR 复用同一帧截图的时间窗口（秒），0 表示不复用
+
+# APP 自动化 OCR 模型配置
+APP_OCR_WARMUP_LANGUAGES = config('APP_OCR_WARMUP_LANGUAGES', default='')  # pytest 执行进程启动时预加载的语言集合，集合间用 ; 分隔，如 en;ch_sim,en
+APP_OCR_READER_IDLE_TIMEOUT = config('APP_OCR_READER_IDLE_TIMEOUT', default=600, cast=int)  # OCR reader 空闲多少秒后回收，0 表示不回收
+APP_OCR_READER_SWEEP_INTERVAL = config('APP_OCR_READER_SWEEP_INTERVAL', default=60, cast=int)  # 后台检查 OCR reader 空闲超时的间隔（秒）
+APP_OCR_READER_MAX_MEMORY_MB = config('APP_OCR_READER_MAX_MEMORY_MB', default=0, cast=int)  # 已加载 OCR 模型的内存上限（MB），超过时回收最久未用的 reader，0 表示不限制
+
+# APP 自动化常驻 pytest 执行进程配置
+APP_PYTEST_WORKER_ENABLED = config('APP_PYTEST_WORKER_ENABLED', default=True, cast=bool)  # 每台设备复用一个常驻 pytest 进程执行用例，False 时每个用例单独启动 pytest
+APP_PYTEST_WORKER_MAX_JOBS = config('APP_PYTEST_WORKER_MAX_JOBS', default=200, cast=int)  # 常驻进程执行多少个用例后重新启动，0 表示不限制
+APP_PYTEST_WORKER_IDLE_TIMEOUT = config('APP_PYTEST_WORKER_IDLE_TIMEOUT', default=900, cast=int)  # 常驻进程空闲多少秒后退出，0 表示不退出
+
+# APP 自动化套件多设备分片执行配置
+APP_SUITE_MAX_SHARDS = config('APP_SUITE_MAX_SHARDS', default=0, cast=int)  # 一次套件执行最多使用的设备数，0 表示使用设备池中全部可用设备
+APP_SUITE_SHARD_HEARTBEAT_INTERVAL = config('APP_SUITE_SHARD_HEARTBEAT_INTERVAL', default=30, cast=int)  # 分片执行心跳间隔（秒）
+APP_SUITE_SHARD_HEARTBEAT_TIMEOUT = config('APP_SUITE_SHARD_HEARTBEAT_TIMEOUT', default=180, cast=int)  # 超过该时间无心跳的分片执行视为中止（秒）
+APP_SUITE_SHARD_RECOVERY_INTERVAL = config('APP_SUITE_SHARD_RECOVERY_INTERVAL', default=60, cast=int)  # 回收心跳超时分片执行的周期（秒）
+
+CELERY_BEAT_SCHEDULE['recover-stale-suite-shards'] = {
+    'task': 'apps.app_automation.tasks.recover_stale_suite_shards',
+    'schedule': APP_SUITE_SHARD_RECOVERY_INTERVAL,
+}
+
 # Channels Configuration
 CHANNEL_LAYERS = {
     'default': {